@@ -1,5 +1,6 @@
 import logging
 import time
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
 logger = logging.getLogger(__name__)
@@ -34,3 +35,64 @@ class RequestLoggingMiddleware(MiddlewareMixin):
                 )
         
         return response
+
+
+class CompresionRespuestaMiddleware(MiddlewareMixin):
+    """
+    Compresión de respuestas negociada por Accept-Encoding (zstd, br o gzip
+    según disponibilidad y preferencia del cliente).
+    
+    Técnicas implementadas:
+    - Solo tipos de texto (JSON, NDJSON, CSV, text/*) y cuerpos de al menos
+      COMPRESION_RESPUESTAS['UMBRAL_BYTES']
+    - Respuestas en streaming comprimidas al vuelo con un único compresor
+      (texto completo de documentos, exportaciones): memoria constante
+    - No toca respuestas ya codificadas (la exportación con gzip propio),
+      parciales (206: los rangos se refieren a los bytes sin comprimir) ni
+      sin cuerpo
+    - ETag fuerte convertido en débil y Vary: Accept-Encoding para caches
+    """
+    
+    def process_response(self, request, response):
+        from Document_Processing.Services import compresion
+        
+        if (
+            response.has_header('Content-Encoding')
+            or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+            or not compresion.es_comprimible(response.get('Content-Type'))
+        ):
+            return response
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        umbral = compresion.configuracion()['UMBRAL_BYTES']
+        if response.streaming:
+            if response.has_header('Content-Length') and int(response['Content-Length']) < umbral:
+                return response
+        elif len(response.content) < umbral:
+            return response
+        
+        codificacion = compresion.negociar(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if codificacion is None:
+            return response
+        
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compresion.comprimir_bloques_async(
+                    response.streaming_content, codificacion
+                )
+            else:
+                response.streaming_content = compresion.comprimir_bloques(response.streaming_content, codificacion)
+            del response['Content-Length']
+        else:
+            comprimido = compresion.comprimir(response.content, codificacion)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+        
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificacion
+        return response
@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Antes de los middlewares que leen o modifican el cuerpo de la respuesta
+    'Backend.middleware.CompresionRespuestaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -155,12 +157,16 @@ CORS_ALLOWED_HEADERS = [
     'x-requested-with',
 ]
 
+# Validadores del GET condicional legibles desde el frontend
+CORS_EXPOSE_HEADERS = ['etag', 'last-modified']
+
 # REST framework settings
 REST_FRAMEWORK = {
+    # JSON con orjson (ver Document_Processing/renderers.py); la API navegable
+    # solo en desarrollo
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  
-    ],
+        'Document_Processing.renderers.RenderizadorJSONRapido',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     
     'DEFAULT_FILTER_BACKENDS': [
       'django_filters.rest_framework.DjangoFilterBackend',
@@ -215,6 +221,50 @@ SIMPLE_JWT = {
 POPPLER_PATH = r'C:\Users\Administrador\AppData\Local\Microsoft\WinGet\Packages\oschwartz10612.Poppler_Microsoft.Winget.Source_8wekyb3d8bbwe\poppler-24.08.0\Library\bin'
 TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# Almacén de contenido direccionado por hash (PDFs originales y textos extraídos)
+ALMACEN_BLOBS = {
+    'DIRECTORIO': BASE_DIR / 'blobs',
+}
+
+# Compresión de respuestas (Backend.middleware.CompresionRespuestaMiddleware);
+# zstd y br se ofrecen si están instalados zstandard y brotli
+COMPRESION_RESPUESTAS = {
+    'UMBRAL_BYTES': 1024,
+    'NIVEL_GZIP': 1,
+    'NIVEL_BROTLI': 4,
+    'NIVEL_ZSTD': 3,
+}
+
+# Vistas asíncronas bajo ASGI (Services.concurrencia): extracciones de PDF
+# simultáneas y búsquedas simultáneas por event loop
+CONCURRENCIA_ASINCRONA = {
+    'MAX_EXTRACCIONES': 2,
+    'MAX_BUSQUEDAS': 2,
+}
+
+# Purga de documentos eliminados lógicamente (comando purgar_eliminados)
+PURGA_ELIMINADOS = {
+    'RETENCION_DIAS': 30,
+    'TAMAÑO_LOTE': 200,
+    'PAUSA_SEGUNDOS': 0.1,
+}
+
+# Cachés: 'busqueda' guarda resultados de DocumentoBusquedaView.
+# LocMemCache es un LRU en memoria por proceso; para compartirla entre
+# procesos usar FileBasedCache ('LOCATION': BASE_DIR / 'cache_busqueda') o
+# DatabaseCache ('LOCATION': 'cache_busqueda', requiere createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'busqueda': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'busqueda-documentos',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
 # Límites para archivos grandes (sincronizado con frontend)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.utils import timezone
+from . import sugerencias, versiones
+from .indice_busqueda import TAMAÑO_LOTE_TERMINOS, tokenizar
+from .mapas_bits import MapaBits
+
+# Mapas de documentos por usuario en memoria por proceso (LRU)
+MAX_MAPAS_USUARIO = 256
+
+# Margen hacia atrás al pedir cambios (ver Services.sugerencias)
+MARGEN_CAMBIOS = timedelta(seconds=60)
+
+# Antigüedad máxima antes de reconstruir los mapas completos
+MAX_ANTIGUEDAD_SEGUNDOS = 15 * 60
+
+# Documentos modificados a partir de los cuales conviene reconstruir
+MAX_CAMBIOS_INCREMENTALES = 5000
+
+# Términos del vocabulario a los que puede expandirse un prefijo o fragmento
+MAX_TERMINOS_EXPANSION = 200
+
+# Por encima de estos candidatos la búsqueda por texto en SQL es igual de barata
+MAX_CANDIDATOS = 5000
+
+TAMAÑO_LOTE = 2000
+
+_bloqueo = threading.Lock()
+_estado = None
+
+
+class MapasAlcance:
+    """
+    Mapas de bits de los documentos visibles en cada ámbito de búsqueda.
+
+    - activos: documentos no eliminados (ámbito global)
+    - sin_indice: activos que todavía no pasaron por el índice invertido
+      (se buscan siempre por texto)
+    - usuarios: todos los documentos de cada usuario, cargados a demanda;
+      el ámbito personal es usuario ∩ activos
+    """
+
+    def __init__(self, version):
+        from ..models import DocumentoProcesado
+
+        self.revisado = timezone.now()
+        self.construido = time.monotonic()
+        self.version = version
+        self.usuarios = OrderedDict()
+
+        activos, sin_indice = [], []
+        filas = DocumentoProcesado.objects.activos().order_by().values_list('id', 'norma_terminos')
+        for documento_id, norma in filas.iterator(chunk_size=TAMAÑO_LOTE):
+            activos.append(documento_id)
+            if norma is None:
+                sin_indice.append(documento_id)
+        self.activos = MapaBits(activos)
+        self.sin_indice = MapaBits(sin_indice)
+
+    def usuario(self, usuario_id):
+        from ..models import DocumentoProcesado
+
+        mapa = self.usuarios.get(usuario_id)
+        if mapa is None:
+            mapa = MapaBits(
+                DocumentoProcesado.objects.filter(usuario_id=usuario_id).values_list('id', flat=True).iterator(
+                    chunk_size=TAMAÑO_LOTE
+                )
+            )
+            self.usuarios[usuario_id] = mapa
+        self.usuarios.move_to_end(usuario_id)
+        while len(self.usuarios) > MAX_MAPAS_USUARIO:
+            self.usuarios.popitem(last=False)
+        return mapa
+
+    def refrescar(self):
+        """
+        Aplica los documentos creados, eliminados o restaurados desde el
+        último refresco (índice por fecha de cambio). Devuelve False si hay
+        demasiados cambios y conviene reconstruir.
+        """
+        from ..models import DocumentoProcesado
+
+        ahora = timezone.now()
+        cambios = list(
+            DocumentoProcesado.objects.filter(
+                actualizado_en__gte=self.revisado - MARGEN_CAMBIOS
+            ).order_by().values_list('id', 'usuario_id', 'eliminado', 'norma_terminos')[:MAX_CAMBIOS_INCREMENTALES + 1]
+        )
+        if len(cambios) > MAX_CAMBIOS_INCREMENTALES:
+            return False
+
+        for documento_id, usuario_id, eliminado, norma in cambios:
+            if eliminado:
+                self.activos.descartar(documento_id)
+                self.sin_indice.descartar(documento_id)
+            else:
+                self.activos.agregar(documento_id)
+                if norma is None:
+                    self.sin_indice.agregar(documento_id)
+                else:
+                    self.sin_indice.descartar(documento_id)
+            for propietario, mapa in self.usuarios.items():
+                # Un id solo pertenece a un usuario (descarta restos de ids reutilizados)
+                if propietario == usuario_id:
+                    mapa.agregar(documento_id)
+                else:
+                    mapa.descartar(documento_id)
+        self.revisado = ahora
+        return True
+
+    def alcance(self, usuario_id=None):
+        if usuario_id is None:
+            return self.activos
+        return self.usuario(usuario_id) & self.activos
+
+
+def _mapas():
+    """
+    Mapas vigentes del proceso. Se construyen la primera vez y luego solo
+    se refrescan cuando cambia la versión global de la colección
+    (VersionColeccion, compartida por todos los procesos): alta,
+    eliminación lógica, restauración o purga de documentos.
+    Debe llamarse con _bloqueo tomado.
+    """
+    global _estado
+
+    version = versiones.version()
+    if _estado is None or time.monotonic() - _estado.construido > MAX_ANTIGUEDAD_SEGUNDOS:
+        _estado = MapasAlcance(version)
+    elif _estado.version != version:
+        if not _estado.refrescar():
+            _estado = MapasAlcance(version)
+        _estado.version = version
+    return _estado
+
+
+def descartar_mapas():
+    """Descarta los mapas en memoria del proceso."""
+    global _estado
+
+    with _bloqueo:
+        _estado = None
+
+
+def terminos_candidatos(consulta, usuario_id=None):
+    """
+    Términos del índice cuyos documentos contienen a todos los que
+    coinciden con la consulta por subcadena, o None si el índice no
+    permite acotarlos.
+
+    Con varios términos, los intermedios deben aparecer completos y el
+    último como prefijo (el primero puede empezar a mitad de palabra);
+    con uno solo, basta con que aparezca dentro de algún término del
+    vocabulario. Se elige la opción de menor frecuencia de documento.
+    """
+    terminos = [termino for termino, _, _ in tokenizar(consulta or '')]
+    if not terminos:
+        return None
+
+    vocabulario = sugerencias.diccionario(usuario_id)
+    if len(terminos) == 1:
+        opciones = [vocabulario.que_contienen(terminos[0], MAX_TERMINOS_EXPANSION)]
+    else:
+        opciones = [[(termino, vocabulario.frecuencia(termino))] for termino in terminos[1:-1]]
+        opciones.append(vocabulario.con_prefijo(terminos[-1], MAX_TERMINOS_EXPANSION))
+    opciones = [opcion for opcion in opciones if opcion is not None]
+    if not opciones:
+        return None
+
+    mejor = min(opciones, key=lambda opcion: sum(documentos for _, documentos in opcion))
+    if sum(documentos for _, documentos in mejor) > MAX_CANDIDATOS:
+        return None
+    return [termino for termino, documentos in mejor if documentos > 0]
+
+
+def _postings(terminos, usuario_id):
+    from ..models import TerminoIndexado
+
+    documentos = []
+    for i in range(0, len(terminos), TAMAÑO_LOTE_TERMINOS):
+        postings = TerminoIndexado.objects.filter(termino__in=terminos[i:i + TAMAÑO_LOTE_TERMINOS])
+        if usuario_id is not None:
+            postings = postings.filter(documento__usuario_id=usuario_id)
+        documentos.extend(postings.order_by().values_list('documento_id', flat=True))
+    return MapaBits(documentos)
+
+
+def coincidencias(consulta, usuario_id=None):
+    """
+    Ids de los documentos del ámbito que pueden contener la consulta.
+
+    Técnicas implementadas:
+    - Conjunto de candidatos desde el índice invertido (postings de los
+      términos más selectivos de la consulta), como mapa de bits
+    - Intersección en memoria con el mapa del ámbito: activos para la
+      búsqueda global, usuario ∩ activos para la personal; ambas comparten
+      el mismo camino
+    - Los activos sin indexar se agregan siempre como candidatos
+
+    La coincidencia exacta por subcadena se sigue verificando en SQL, pero
+    solo sobre estos ids.
+
+    Returns:
+        Lista ordenada de ids, o None si el índice no acota la búsqueda
+        (consulta sin términos o demasiado común) y hay que filtrar por
+        usuario y estado en SQL
+    """
+    terminos = terminos_candidatos(consulta, usuario_id)
+    if terminos is None:
+        return None
+    candidatos = _postings(terminos, usuario_id)
+
+    with _bloqueo:
+        mapas = _mapas()
+        alcance = mapas.alcance(usuario_id)
+        resultado = (candidatos | mapas.sin_indice) & alcance
+    if len(resultado) > MAX_CANDIDATOS:
+        return None
+    return list(resultado)
@@ -0,0 +1,262 @@
+import hashlib
+import mmap
+import os
+import secrets
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+
+TAMAÑO_BLOQUE = 64 * 1024
+LONGITUD_HUELLA = 64  # SHA-256 en hexadecimal
+
+# Blobs de texto comprimidos: cabecera, longitud del texto en bytes UTF-8
+# (8 bytes) y el valor de fields.comprimir. 0x89 no puede iniciar un texto
+# UTF-8, así que no se confunde con los blobs de texto plano anteriores.
+CABECERA_TEXTO = b'\x89TXT'
+INICIO_TEXTO = len(CABECERA_TEXTO) + 8
+
+
+def _directorio_por_defecto():
+    return Path(settings.BASE_DIR) / 'blobs'
+
+
+class AlmacenBlobs:
+    """
+    Almacén de contenido direccionado por hash en disco.
+
+    Técnicas implementadas:
+    - Deduplicación: el nombre de cada blob es el SHA-256 de su contenido
+    - Rutas particionadas (ab/cd/abcd...) para no concentrar miles de
+      archivos en un mismo directorio
+    - Escritura atómica: archivo temporal en el mismo sistema de archivos,
+      fsync y os.replace. Un blob existente se reescribe igual (mismo
+      contenido): así una recolección que lo haya apartado no deja al
+      documento nuevo sin blob, y su mtime refleja el último uso
+    - Lectura con mmap: el sistema operativo pagina el archivo bajo demanda
+      y los rangos se sirven sin copiar el blob completo a memoria
+    - Textos comprimidos con el codec de TextoComprimidoField (guardar_texto);
+      su huella es la del texto sin comprimir, de modo que filter(campo=texto)
+      sigue comparando por huella, y los rangos se sirven descomprimiendo
+      en streaming. Los PDFs se guardan tal cual (ya vienen comprimidos)
+
+    Solo la copia canónica de texto_extraido vive aquí comprimida: la
+    columna texto_normalizado, el texto por página y las posiciones del
+    índice siguen sin comprimir en la base de datos, porque las búsquedas
+    y el recorte de fragmentos los leen con SQL.
+    """
+
+    def __init__(self, directorio=None):
+        self.directorio = Path(directorio or _directorio_por_defecto())
+
+    def ruta(self, huella):
+        """Ruta particionada del blob con la huella indicada."""
+        if len(huella) != LONGITUD_HUELLA:
+            raise ValueError(f"Huella de blob inválida: {huella!r}")
+        return self.directorio / huella[:2] / huella[2:4] / huella
+
+    def existe(self, huella):
+        return self.ruta(huella).exists()
+
+    def tamaño(self, huella):
+        return self.ruta(huella).stat().st_size
+
+    def guardar(self, datos):
+        """
+        Guarda un contenido en memoria (bytes o str en UTF-8).
+
+        Returns:
+            Huella SHA-256 del contenido
+        """
+        if isinstance(datos, str):
+            datos = datos.encode('utf-8')
+        return self.guardar_bloques([datos])
+
+    def guardar_archivo(self, ruta_origen):
+        """Guarda el contenido de un archivo leyéndolo por bloques."""
+        with open(ruta_origen, 'rb') as origen:
+            return self.guardar_bloques(iter(lambda: origen.read(TAMAÑO_BLOQUE), b''))
+
+    def guardar_bloques(self, bloques):
+        """
+        Guarda un contenido entregado por bloques, calculando el hash mientras
+        se escribe a un temporal que luego reemplaza al blob.
+        """
+        return self._escribir(bloques)
+
+    def guardar_texto(self, texto):
+        """
+        Guarda un texto comprimido bajo la huella del texto sin comprimir.
+
+        Returns:
+            Huella SHA-256 del texto en UTF-8
+        """
+        from ..fields import comprimir
+
+        datos = texto.encode('utf-8')
+        huella = hashlib.sha256(datos).hexdigest()
+        cabecera = CABECERA_TEXTO + len(datos).to_bytes(8, 'big')
+        return self._escribir([cabecera, comprimir(texto)], huella)
+
+    def asegurar_texto(self, texto, huella):
+        """
+        Vuelve a escribir el texto si su blob ya no está. Se llama después
+        del commit que lo referencia: una recolección que comprobó las
+        referencias antes de ese commit pudo apartarlo.
+        """
+        if not self.existe(huella):
+            self.guardar_texto(texto)
+
+    def _escribir(self, bloques, huella=None):
+        """
+        Escritura atómica: temporal en el mismo sistema de archivos, fsync y
+        os.replace. Sin huella, se usa el SHA-256 de lo escrito.
+        """
+        temporales = self.directorio / 'tmp'
+        temporales.mkdir(parents=True, exist_ok=True)
+        sha256 = hashlib.sha256()
+
+        descriptor, ruta_temporal = tempfile.mkstemp(dir=temporales)
+        try:
+            with os.fdopen(descriptor, 'wb') as temporal:
+                for bloque in bloques:
+                    if huella is None:
+                        sha256.update(bloque)
+                    temporal.write(bloque)
+                temporal.flush()
+                os.fsync(temporal.fileno())
+
+            huella = huella or sha256.hexdigest()
+            destino = self.ruta(huella)
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(ruta_temporal, destino)
+            return huella
+        except BaseException:
+            if os.path.exists(ruta_temporal):
+                os.unlink(ruta_temporal)
+            raise
+
+    @contextmanager
+    def abrir(self, huella):
+        """
+        Mapea el blob en memoria de solo lectura.
+
+        Uso:
+            with almacen.abrir(huella) as datos:
+                datos[inicio:fin]
+        """
+        with open(self.ruta(huella), 'rb') as archivo:
+            if os.fstat(archivo.fileno()).st_size == 0:
+                # mmap no admite archivos vacíos
+                yield b''
+                return
+            with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+                yield datos
+
+    def leer(self, huella):
+        with self.abrir(huella) as datos:
+            return bytes(datos)
+
+    def texto_comprimido(self, huella):
+        """Si el blob es un texto guardado con guardar_texto."""
+        with open(self.ruta(huella), 'rb') as archivo:
+            return archivo.read(len(CABECERA_TEXTO)) == CABECERA_TEXTO
+
+    def leer_texto(self, huella):
+        from ..fields import descomprimir
+
+        with self.abrir(huella) as datos:
+            if datos[:len(CABECERA_TEXTO)] == CABECERA_TEXTO:
+                return descomprimir(datos[INICIO_TEXTO:])
+            return bytes(datos).decode('utf-8')
+
+    def tamaño_texto(self, huella):
+        """Tamaño en bytes UTF-8 del texto, sin descomprimirlo."""
+        with open(self.ruta(huella), 'rb') as archivo:
+            cabecera = archivo.read(INICIO_TEXTO)
+        if cabecera[:len(CABECERA_TEXTO)] == CABECERA_TEXTO:
+            return int.from_bytes(cabecera[len(CABECERA_TEXTO):], 'big')
+        return self.tamaño(huella)
+
+    def leer_bloques(self, huella, inicio=0, fin=None, tamaño_bloque=TAMAÑO_BLOQUE):
+        """
+        Genera el contenido del blob (o del rango [inicio, fin) en bytes)
+        en bloques, para respuestas en streaming.
+        """
+        with self.abrir(huella) as datos:
+            fin = len(datos) if fin is None else min(fin, len(datos))
+            for posicion in range(inicio, fin, tamaño_bloque):
+                yield datos[posicion:min(posicion + tamaño_bloque, fin)]
+
+    def leer_bloques_texto(self, huella, inicio=0, fin=None, tamaño_bloque=TAMAÑO_BLOQUE):
+        """
+        Como leer_bloques, pero con el rango [inicio, fin) en bytes del texto
+        sin comprimir. Los blobs comprimidos se descomprimen en streaming
+        (descartando lo anterior a inicio y deteniéndose en fin); los de
+        texto plano se leen directamente del mmap.
+        """
+        from ..fields import descomprimir_bloques
+
+        with self.abrir(huella) as datos:
+            if datos[:len(CABECERA_TEXTO)] != CABECERA_TEXTO:
+                fin = len(datos) if fin is None else min(fin, len(datos))
+                for posicion in range(inicio, fin, tamaño_bloque):
+                    yield datos[posicion:min(posicion + tamaño_bloque, fin)]
+                return
+
+            posicion = 0
+            for bloque in descomprimir_bloques(datos, desplazamiento=INICIO_TEXTO, tamaño_bloque=tamaño_bloque):
+                siguiente = posicion + len(bloque)
+                if siguiente > inicio:
+                    parte = bloque[max(inicio - posicion, 0):None if fin is None else fin - posicion]
+                    if parte:
+                        yield parte
+                posicion = siguiente
+                if fin is not None and posicion >= fin:
+                    break
+
+    def eliminar(self, huella):
+        """Elimina el blob si existe."""
+        try:
+            os.unlink(self.ruta(huella))
+        except FileNotFoundError:
+            pass
+
+    def eliminar_sin_uso(self, huella, en_uso):
+        """
+        Elimina el blob salvo que se vuelva a referenciar durante la
+        recolección.
+
+        El blob se aparta primero (os.replace a tmp/) y recién entonces se
+        consulta en_uso(): si un documento que lo referencia se confirmó
+        antes, se restaura; si se confirma después, ya no encuentra el blob
+        y lo reescribe (asegurar_texto, o la escritura que siempre reemplaza).
+
+        Returns:
+            True si el blob se eliminó
+        """
+        temporales = self.directorio / 'tmp'
+        temporales.mkdir(parents=True, exist_ok=True)
+        apartado = temporales / f'{huella}.{secrets.token_hex(4)}'
+        try:
+            os.replace(self.ruta(huella), apartado)
+        except FileNotFoundError:
+            return False
+        if en_uso():
+            # Mismo contenido: da igual si un escritor ya lo había repuesto
+            os.replace(apartado, self.ruta(huella))
+            return False
+        os.unlink(apartado)
+        return True
+
+    def huellas(self):
+        """Recorre las huellas de todos los blobs guardados."""
+        for ruta in self.directorio.glob('??/??/*'):
+            if len(ruta.name) == LONGITUD_HUELLA:
+                yield ruta.name
+
+
+def almacen_blobs():
+    """Almacén configurado en settings.ALMACEN_BLOBS['DIRECTORIO']."""
+    configuracion = getattr(settings, 'ALMACEN_BLOBS', {})
+    return AlmacenBlobs(configuracion.get('DIRECTORIO'))
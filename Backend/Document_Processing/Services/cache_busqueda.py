@@ -0,0 +1,136 @@
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from .normalizacion import normalizar_texto
+
+# Alias de settings.CACHES; si no está configurado se usa 'default'
+ALIAS_CACHE = 'busqueda'
+
+PREFIJO = 'busqueda'
+CLAVE_ACIERTOS = f'{PREFIJO}:metricas:aciertos'
+CLAVE_FALLOS = f'{PREFIJO}:metricas:fallos'
+
+# Parámetros que no cambian el resultado de la búsqueda
+PARAMETROS_IGNORADOS = {'q', 'global'}
+
+
+def cache():
+    alias = ALIAS_CACHE if ALIAS_CACHE in settings.CACHES else 'default'
+    return caches[alias]
+
+
+def _incrementar(clave):
+    """
+    Incrementa un contador de generación sin tiempo de expiración.
+
+    Si el contador no existe (o el backend lo descartó) se reinicia con
+    un valor basado en el reloj: así una generación perdida nunca vuelve
+    a un número ya usado y las entradas viejas no reaparecen.
+    """
+    almacen = cache()
+    try:
+        return almacen.incr(clave)
+    except ValueError:
+        valor = time.time_ns()
+        almacen.set(clave, valor, timeout=None)
+        return valor
+
+
+def _contar(clave):
+    """Incrementa un contador de métricas (compartido entre procesos si el backend lo es)."""
+    almacen = cache()
+    try:
+        almacen.incr(clave)
+    except ValueError:
+        if not almacen.add(clave, 1, timeout=None):
+            almacen.incr(clave)
+
+
+def _clave_generacion(ambito):
+    return f'{PREFIJO}:generacion:{ambito}'
+
+
+def ambito_busqueda(usuario_id=None):
+    """Ámbito de una búsqueda: 'global' o el del usuario."""
+    return 'global' if usuario_id is None else f'usuario:{usuario_id}'
+
+
+def generacion(ambito):
+    """Generación vigente de un ámbito."""
+    almacen = cache()
+    clave = _clave_generacion(ambito)
+    valor = almacen.get(clave)
+    if valor is None:
+        valor = time.time_ns()
+        if not almacen.add(clave, valor, timeout=None):
+            valor = almacen.get(clave, valor)
+    return valor
+
+
+def invalidar(usuario_ids):
+    """
+    Invalida las búsquedas afectadas por cambios en documentos de los
+    usuarios indicados: incrementa su generación y la global.
+
+    Técnica: invalidación por generaciones; las entradas viejas no se
+    borran, simplemente dejan de ser alcanzables y el backend las descarta
+    por LRU o expiración.
+    """
+    for usuario_id in set(usuario_ids):
+        _incrementar(_clave_generacion(ambito_busqueda(usuario_id)))
+    _incrementar(_clave_generacion(ambito_busqueda()))
+
+
+def clave_resultado(termino, ambito, version, parametros):
+    """
+    Clave de un resultado: consulta normalizada, ámbito con su versión y
+    su generación, y los parámetros de paginación/orden (página, tamaño,
+    cursor, etc.).
+
+    La versión (VersionColeccion, Services.versiones) es la que usa el
+    ETag: se renueva en la transacción de cada cambio y es la misma en
+    todos los procesos, así que un cambio hecho en otro proceso también
+    deja la entrada anterior inalcanzable aunque la caché sea local. La
+    generación permite además descartar las entradas con invalidar().
+
+    Ambas se leen antes de ejecutar la búsqueda: si un documento cambia
+    mientras tanto, el resultado queda guardado bajo la versión anterior
+    y ya no se sirve.
+    """
+    otros = sorted(
+        (nombre, parametros.getlist(nombre))
+        for nombre in parametros
+        if nombre not in PARAMETROS_IGNORADOS
+    )
+    firma = json.dumps(
+        [normalizar_texto(termino), ambito, str(version), generacion(ambito), otros],
+        ensure_ascii=False
+    )
+    return f'{PREFIJO}:resultado:' + hashlib.sha256(firma.encode('utf-8')).hexdigest()
+
+
+def obtener(clave):
+    """Resultado guardado o None; registra el acierto o el fallo."""
+    datos = cache().get(clave)
+    _contar(CLAVE_ACIERTOS if datos is not None else CLAVE_FALLOS)
+    return datos
+
+
+def guardar(clave, datos):
+    cache().set(clave, datos)
+
+
+def metricas():
+    """Aciertos, fallos y ratio de aciertos de la caché de búsquedas."""
+    almacen = cache()
+    aciertos = almacen.get(CLAVE_ACIERTOS) or 0
+    fallos = almacen.get(CLAVE_FALLOS) or 0
+    consultas = aciertos + fallos
+    return {
+        'backend': f'{type(almacen).__module__}.{type(almacen).__name__}',
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'ratio_aciertos': round(aciertos / consultas, 4) if consultas else None,
+    }
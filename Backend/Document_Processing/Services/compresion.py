@@ -0,0 +1,146 @@
+import zlib
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional: sin ella no se ofrece br
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: sin ella no se ofrece zstd
+    zstandard = None
+
+CONFIGURACION_POR_DEFECTO = {
+    # Cuerpos más chicos no se comprimen: el ahorro no compensa la CPU ni
+    # la cabecera del formato
+    'UMBRAL_BYTES': 1024,
+    # Nivel 1: en textos de 200 KB a 2 MB comprime ~2.7x a ~60 MB/s; el
+    # nivel 6 gana un 25% de relación con 8 veces más CPU
+    # (Tests/benchmark_compresion_respuestas.py)
+    'NIVEL_GZIP': 1,
+    'NIVEL_BROTLI': 4,
+    'NIVEL_ZSTD': 3,
+}
+
+# Tipos de contenido que vale la pena comprimir (texto)
+TIPOS_COMPRIMIBLES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/xml',
+    'application/javascript',
+)
+
+
+def configuracion():
+    """Configuración efectiva (settings.COMPRESION_RESPUESTAS sobre los valores por defecto)."""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'COMPRESION_RESPUESTAS', {})}
+
+
+def disponibles():
+    """Codificaciones soportadas, en orden de preferencia del servidor."""
+    codificaciones = []
+    if zstandard is not None:
+        codificaciones.append('zstd')
+    if brotli is not None:
+        codificaciones.append('br')
+    codificaciones.append('gzip')
+    return codificaciones
+
+
+def calidades(accept_encoding):
+    """Calidad (q) de cada codificación de la cabecera Accept-Encoding."""
+    resultado = {}
+    for opcion in (accept_encoding or '').split(','):
+        nombre, _, parametros = opcion.strip().partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        resultado[nombre] = calidad
+    return resultado
+
+
+def negociar(accept_encoding, opciones=None):
+    """
+    Codificación a usar según Accept-Encoding: la de mayor q entre las
+    disponibles y, a igual q, la preferida por el servidor. '*' cubre las
+    que el cliente no nombra. None si ninguna es aceptable.
+    """
+    aceptadas = calidades(accept_encoding)
+    comodin = aceptadas.get('*', 0.0)
+    mejor, mejor_calidad = None, 0.0
+    for codificacion in opciones or disponibles():
+        calidad = aceptadas.get(codificacion, comodin)
+        if calidad > mejor_calidad:
+            mejor, mejor_calidad = codificacion, calidad
+    return mejor
+
+
+def es_comprimible(content_type):
+    tipo = (content_type or '').split(';')[0].strip().lower()
+    return tipo.startswith(TIPOS_COMPRIMIBLES)
+
+
+class _Compresor:
+    """Interfaz común compress()/flush() para los tres formatos."""
+
+    def __init__(self, codificacion, config):
+        self.codificacion = codificacion
+        if codificacion == 'zstd':
+            self._objeto = zstandard.ZstdCompressor(level=config['NIVEL_ZSTD']).compressobj()
+        elif codificacion == 'br':
+            self._objeto = brotli.Compressor(quality=config['NIVEL_BROTLI'])
+        else:
+            self._objeto = zlib.compressobj(config['NIVEL_GZIP'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, datos):
+        if self.codificacion == 'br':
+            return self._objeto.process(datos)
+        return self._objeto.compress(datos)
+
+    def flush(self):
+        if self.codificacion == 'br':
+            return self._objeto.finish()
+        return self._objeto.flush()
+
+
+def compresor(codificacion):
+    """Compresor incremental para la codificación negociada."""
+    return _Compresor(codificacion, configuracion())
+
+
+def comprimir(datos, codificacion):
+    """Comprime un cuerpo completo."""
+    objeto = compresor(codificacion)
+    return objeto.compress(datos) + objeto.flush()
+
+
+def comprimir_bloques(bloques, codificacion):
+    """
+    Comprime al vuelo un contenido entregado por bloques con un único
+    compresor: la salida completa nunca se arma en memoria.
+    """
+    objeto = compresor(codificacion)
+    for bloque in bloques:
+        comprimido = objeto.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield objeto.flush()
+
+
+async def comprimir_bloques_async(bloques, codificacion):
+    """Versión para contenido asíncrono (StreamingHttpResponse bajo ASGI)."""
+    objeto = compresor(codificacion)
+    async for bloque in bloques:
+        comprimido = objeto.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield objeto.flush()
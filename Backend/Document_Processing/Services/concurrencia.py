@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .pdf_extractor import PDFExtractor
+
+CONFIGURACION_POR_DEFECTO = {
+    # Extracciones de PDF simultáneas (hilos del ejecutor); las demás
+    # subidas esperan turno sin ocupar ningún hilo
+    'MAX_EXTRACCIONES': 2,
+    # Búsquedas simultáneas por event loop; las demás esperan sin ocupar
+    # ningún hilo
+    'MAX_BUSQUEDAS': 2,
+}
+
+_ejecutor = None
+_candado_ejecutor = threading.Lock()
+_semaforos_busqueda = weakref.WeakKeyDictionary()
+
+
+def configuracion():
+    """Configuración efectiva (settings.CONCURRENCIA_ASINCRONA sobre los valores por defecto)."""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'CONCURRENCIA_ASINCRONA', {})}
+
+
+def ejecutor_extraccion():
+    """ThreadPoolExecutor compartido del proceso, creado en el primer uso."""
+    global _ejecutor
+    with _candado_ejecutor:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=configuracion()['MAX_EXTRACCIONES'],
+                thread_name_prefix='extraccion-pdf'
+            )
+        return _ejecutor
+
+
+async def extraer(ruta):
+    """
+    Extrae el texto de un PDF en el ejecutor acotado sin bloquear el event loop.
+
+    Técnicas implementadas:
+    - Como máximo MAX_EXTRACCIONES extracciones a la vez; el resto queda en
+      la cola del ejecutor
+    - Cancelación: si la tarea que espera se cancela (el cliente se
+      desconectó), una extracción aún en cola no llega a correr y una en
+      curso se interrumpe en la siguiente página (ExtraccionCancelada)
+    """
+    cancelada = threading.Event()
+    loop = asyncio.get_running_loop()
+    futuro = loop.run_in_executor(ejecutor_extraccion(), PDFExtractor().extract_text, ruta, cancelada.is_set)
+    try:
+        return await futuro
+    except asyncio.CancelledError:
+        cancelada.set()
+        raise
+
+
+def limite_busquedas():
+    """
+    Semáforo de búsquedas del event loop en curso (asyncio.Semaphore no se
+    puede compartir entre loops).
+    """
+    loop = asyncio.get_running_loop()
+    semaforo = _semaforos_busqueda.get(loop)
+    if semaforo is None:
+        semaforo = _semaforos_busqueda[loop] = asyncio.Semaphore(configuracion()['MAX_BUSQUEDAS'])
+    return semaforo
@@ -0,0 +1,137 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+CERO = Decimal('0.000')
+
+
+def _vacio_metodo():
+    return {'documentos': 0, 'tamaño_bytes': 0, 'suma_tiempo_procesamiento': CERO, 'documentos_con_tiempo': 0}
+
+
+def _vacio_dia():
+    return {'documentos': 0, 'tamaño_bytes': 0}
+
+
+def deltas_documentos(documentos):
+    """
+    Deltas de estadísticas de documentos ya cargados en memoria.
+
+    Returns:
+        (por_metodo, por_dia): {(usuario_id, metodo): valores} y
+        {(usuario_id, dia): valores}
+    """
+    por_metodo = defaultdict(_vacio_metodo)
+    por_dia = defaultdict(_vacio_dia)
+    for documento in documentos:
+        valores = por_metodo[(documento.usuario_id, documento.metodo_extraccion)]
+        valores['documentos'] += 1
+        valores['tamaño_bytes'] += documento.tamaño_bytes
+        if documento.tiempo_procesamiento is not None:
+            valores['suma_tiempo_procesamiento'] += Decimal(str(documento.tiempo_procesamiento))
+            valores['documentos_con_tiempo'] += 1
+
+        dia = por_dia[(documento.usuario_id, timezone.localdate(documento.fecha_procesamiento))]
+        dia['documentos'] += 1
+        dia['tamaño_bytes'] += documento.tamaño_bytes
+    return dict(por_metodo), dict(por_dia)
+
+
+def deltas_queryset(queryset):
+    """
+    Deltas de estadísticas de un queryset, agregados en la base de datos
+    (dos GROUP BY, sin cargar documentos).
+    """
+    queryset = queryset.order_by()
+    por_metodo = {
+        (fila['usuario_id'], fila['metodo_extraccion']): {
+            'documentos': fila['documentos'],
+            'tamaño_bytes': fila['tamaño_bytes'] or 0,
+            'suma_tiempo_procesamiento': fila['suma_tiempo_procesamiento'] or CERO,
+            'documentos_con_tiempo': fila['documentos_con_tiempo'],
+        }
+        for fila in queryset.values('usuario_id', 'metodo_extraccion').annotate(
+            documentos=Count('id'),
+            tamaño_bytes=Sum('tamaño_bytes'),
+            suma_tiempo_procesamiento=Sum('tiempo_procesamiento'),
+            documentos_con_tiempo=Count('tiempo_procesamiento'),
+        )
+    }
+    por_dia = {
+        (fila['usuario_id'], fila['dia']): {
+            'documentos': fila['documentos'],
+            'tamaño_bytes': fila['tamaño_bytes'] or 0,
+        }
+        for fila in queryset.annotate(dia=TruncDate('fecha_procesamiento')).values('usuario_id', 'dia').annotate(
+            documentos=Count('id'),
+            tamaño_bytes=Sum('tamaño_bytes'),
+        )
+    }
+    return por_metodo, por_dia
+
+
+def _sumar(modelo, filtro, valores, signo):
+    """
+    Suma (o resta) valores a la fila indicada con UPDATE ... SET x = x + d;
+    si la fila no existe la crea. Ante una creación concurrente se reintenta
+    el UPDATE.
+    """
+    cambios = {campo: F(campo) + signo * valor for campo, valor in valores.items()}
+    if modelo.objects.filter(**filtro).update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**filtro, **{campo: signo * valor for campo, valor in valores.items()})
+    except IntegrityError:
+        modelo.objects.filter(**filtro).update(**cambios)
+
+
+def aplicar(deltas, signo=1):
+    """
+    Aplica deltas (de deltas_documentos o deltas_queryset) a las tablas de
+    estadísticas: signo=1 al crear o restaurar, -1 al eliminar.
+    Debe llamarse dentro de la misma transacción que el cambio de datos.
+    """
+    from ..models import EstadisticaDiaria, EstadisticaUsuario
+
+    por_metodo, por_dia = deltas
+    for (usuario_id, metodo), valores in por_metodo.items():
+        _sumar(EstadisticaUsuario, {'usuario_id': usuario_id, 'metodo_extraccion': metodo}, valores, signo)
+    for (usuario_id, dia), valores in por_dia.items():
+        _sumar(EstadisticaDiaria, {'usuario_id': usuario_id, 'dia': dia}, valores, signo)
+
+
+def resumen_usuario(usuario, dias_recientes=7):
+    """
+    Estadísticas de un usuario leídas de las tablas de resumen.
+
+    Técnica: lectura acotada (una fila por método y una por día reciente),
+    independiente de la cantidad de documentos del usuario.
+    """
+    from ..models import EstadisticaDiaria, EstadisticaUsuario
+
+    filas = list(EstadisticaUsuario.objects.filter(usuario=usuario).order_by('metodo_extraccion'))
+    documentos_con_tiempo = sum(fila.documentos_con_tiempo for fila in filas)
+    suma_tiempo = sum((fila.suma_tiempo_procesamiento for fila in filas), CERO)
+
+    desde = timezone.localdate() - timedelta(days=dias_recientes - 1)
+    recientes = EstadisticaDiaria.objects.filter(usuario=usuario, dia__gte=desde).aggregate(
+        total=Sum('documentos')
+    )['total']
+
+    return {
+        'total_documentos': sum(fila.documentos for fila in filas),
+        'total_tamaño_bytes': sum(fila.tamaño_bytes for fila in filas),
+        'tiempo_promedio_procesamiento': (
+            float(suma_tiempo / documentos_con_tiempo) if documentos_con_tiempo else 0
+        ),
+        'distribucion_por_metodo': [
+            {'metodo_extraccion': fila.metodo_extraccion, 'cantidad': fila.documentos}
+            for fila in filas if fila.documentos
+        ],
+        'documentos_recientes': recientes or 0,
+    }
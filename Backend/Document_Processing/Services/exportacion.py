@@ -0,0 +1,151 @@
+import csv
+import json
+import zlib
+from . import compresion
+from .almacen_blobs import almacen_blobs
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin ella las líneas NDJSON se codifican con json
+    orjson = None
+
+# Filas leídas de la base de datos por lote (QuerySet.iterator)
+TAMAÑO_LOTE = 2000
+
+# Bytes acumulados antes de entregar un bloque a la respuesta
+TAMAÑO_BLOQUE = 64 * 1024
+
+NIVEL_GZIP = 6
+
+FORMATOS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+CAMPOS = (
+    'id', 'nombre_archivo', 'tamaño_bytes', 'metodo_extraccion', 'tiempo_procesamiento',
+    'fecha_procesamiento', 'resumen_texto'
+)
+
+
+class FormatoInvalido(ValueError):
+    """Se pidió un formato de exportación no soportado (HTTP 400)."""
+
+
+def parsear_formato(valor):
+    """
+    Formato pedido en el parámetro 'formato' (por defecto NDJSON).
+
+    Raises:
+        FormatoInvalido: si no está en FORMATOS
+    """
+    formato = (valor or 'ndjson').strip().lower()
+    if formato not in FORMATOS:
+        raise FormatoInvalido(
+            f"Formato no soportado: {formato}. Disponibles: {', '.join(FORMATOS)}"
+        )
+    return formato
+
+
+def acepta_gzip(accept_encoding):
+    """True si la cabecera Accept-Encoding admite gzip (q > 0)."""
+    return compresion.negociar(accept_encoding, ['gzip']) == 'gzip'
+
+
+def campos_exportacion(incluir_texto=False):
+    return CAMPOS + (('texto_extraido',) if incluir_texto else ())
+
+
+def filas(queryset, incluir_texto=False):
+    """
+    Filas de exportación leídas en streaming: values() por lotes con
+    iterator(), sin instancias del modelo ni caché del QuerySet. Con
+    incluir_texto, el texto de cada documento se lee del almacén de blobs
+    al llegar a su fila (solo un texto en memoria a la vez).
+    """
+    from ..serializers import formateador_fechas
+
+    fecha = formateador_fechas()
+    almacen = almacen_blobs() if incluir_texto else None
+    for fila in queryset.values(*campos_exportacion(incluir_texto)).iterator(chunk_size=TAMAÑO_LOTE):
+        fila['fecha_procesamiento'] = fecha(fila['fecha_procesamiento'])
+        if fila['tiempo_procesamiento'] is not None:
+            fila['tiempo_procesamiento'] = str(fila['tiempo_procesamiento'])
+        if almacen is not None:
+            fila['texto_extraido'] = almacen.leer_texto(fila['texto_extraido'])
+        yield fila
+
+
+def _agrupar(partes):
+    """Junta partes pequeñas en bloques de al menos TAMAÑO_BLOQUE bytes."""
+    pendientes, tamaño = [], 0
+    for parte in partes:
+        pendientes.append(parte)
+        tamaño += len(parte)
+        if tamaño >= TAMAÑO_BLOQUE:
+            yield b''.join(pendientes)
+            pendientes, tamaño = [], 0
+    if pendientes:
+        yield b''.join(pendientes)
+
+
+def _linea_json(fila):
+    if orjson is not None:
+        return orjson.dumps(fila, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(fila, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: writerow() devuelve la línea escrita."""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_ndjson(filas):
+    """Un objeto JSON por línea."""
+    return _agrupar(_linea_json(fila) for fila in filas)
+
+
+def generar_csv(filas, campos):
+    """CSV con encabezado; los textos con saltos de línea van entre comillas."""
+    escritor = csv.writer(_Eco())
+
+    def lineas():
+        yield escritor.writerow(campos).encode('utf-8')
+        for fila in filas:
+            yield escritor.writerow([fila[campo] for campo in campos]).encode('utf-8')
+
+    return _agrupar(lineas())
+
+
+def comprimir_gzip(bloques, nivel=NIVEL_GZIP):
+    """
+    Comprime los bloques al vuelo en formato gzip con un único compresor:
+    la salida completa nunca se arma en memoria.
+    """
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def exportar(queryset, formato, incluir_texto=False, gzip=False):
+    """
+    Bloques de bytes de la exportación de un queryset de documentos.
+
+    Técnicas implementadas:
+    - Lectura por lotes con QuerySet.iterator(chunk_size=TAMAÑO_LOTE)
+    - Codificación fila a fila (orjson para NDJSON, csv.writer para CSV)
+      y entrega en bloques de TAMAÑO_BLOQUE bytes
+    - Compresión gzip opcional en streaming
+    - Memoria constante: ni las filas ni la salida se acumulan
+    """
+    datos = filas(queryset, incluir_texto)
+    if formato == 'csv':
+        bloques = generar_csv(datos, campos_exportacion(incluir_texto))
+    else:
+        bloques = generar_ndjson(datos)
+    return comprimir_gzip(bloques) if gzip else bloques
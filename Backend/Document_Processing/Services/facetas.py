@@ -0,0 +1,105 @@
+from collections import Counter
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+# Rangos de tamaño: (clave, etiqueta, límite superior exclusivo en bytes)
+RANGOS_TAMAÑO = [
+    ('menos_100kb', 'Menos de 100 KB', 100 * 1024),
+    ('100kb_1mb', '100 KB - 1 MB', 1024 * 1024),
+    ('1mb_10mb', '1 MB - 10 MB', 10 * 1024 * 1024),
+    ('mas_10mb', 'Más de 10 MB', None),
+]
+
+# Propietarios informados en la faceta 'usuario' (los de más documentos)
+MAX_VALORES_USUARIO = 20
+
+FACETAS = ('metodo_extraccion', 'mes', 'usuario', 'tamaño')
+
+
+class FacetaInvalida(ValueError):
+    """Se pidió una faceta no soportada (HTTP 400)."""
+
+
+def parsear_facetas(valor):
+    """
+    Facetas pedidas en el parámetro 'facets' (separadas por comas).
+
+    Raises:
+        FacetaInvalida: si alguna no está en FACETAS
+    """
+    pedidas = list(dict.fromkeys(nombre.strip() for nombre in (valor or '').split(',') if nombre.strip()))
+    invalidas = [nombre for nombre in pedidas if nombre not in FACETAS]
+    if invalidas:
+        raise FacetaInvalida(
+            f"Facetas no soportadas: {', '.join(invalidas)}. Disponibles: {', '.join(FACETAS)}"
+        )
+    return pedidas
+
+
+def rango_tamaño(tamaño_bytes):
+    for clave, _, limite in RANGOS_TAMAÑO:
+        if limite is None or tamaño_bytes < limite:
+            return clave
+
+
+def calcular_facetas(queryset, facetas):
+    """
+    Conteos por faceta de todos los documentos que coinciden con la búsqueda.
+
+    Técnicas implementadas:
+    - Una sola consulta sobre el conjunto de coincidencias: solo se leen
+      las columnas de las facetas pedidas (sin texto)
+    - Un único recorrido en streaming acumulando todos los conteos, en
+      lugar de una búsqueda de texto por faceta
+
+    Returns:
+        dict {faceta: [{'valor', 'etiqueta', 'cantidad'}, ...]}
+    """
+    if not facetas:
+        return {}
+
+    columnas = {
+        'metodo_extraccion': 'metodo_extraccion',
+        'mes': 'fecha_procesamiento',
+        'usuario': 'usuario_id',
+        'tamaño': 'tamaño_bytes',
+    }
+    campos = [columnas[faceta] for faceta in facetas]
+    conteos = {faceta: Counter() for faceta in facetas}
+
+    filas = queryset.order_by().values_list(*campos)
+    for fila in filas.iterator(chunk_size=2000):
+        for faceta, valor in zip(facetas, fila):
+            if faceta == 'mes':
+                valor = timezone.localtime(valor).strftime('%Y-%m')
+            elif faceta == 'tamaño':
+                valor = rango_tamaño(valor)
+            conteos[faceta][valor] += 1
+
+    resultado = {}
+    if 'metodo_extraccion' in conteos:
+        from ..models import METODOS_EXTRACCION
+        etiquetas = dict(METODOS_EXTRACCION)
+        resultado['metodo_extraccion'] = [
+            {'valor': valor, 'etiqueta': etiquetas.get(valor, valor), 'cantidad': cantidad}
+            for valor, cantidad in conteos['metodo_extraccion'].most_common()
+        ]
+    if 'mes' in conteos:
+        resultado['mes'] = [
+            {'valor': valor, 'etiqueta': valor, 'cantidad': cantidad}
+            for valor, cantidad in sorted(conteos['mes'].items(), reverse=True)
+        ]
+    if 'usuario' in conteos:
+        principales = conteos['usuario'].most_common(MAX_VALORES_USUARIO)
+        nombres = dict(User.objects.filter(id__in=[valor for valor, _ in principales]).values_list('id', 'username'))
+        resultado['usuario'] = [
+            {'valor': valor, 'etiqueta': nombres.get(valor, ''), 'cantidad': cantidad}
+            for valor, cantidad in principales
+        ]
+    if 'tamaño' in conteos:
+        resultado['tamaño'] = [
+            {'valor': clave, 'etiqueta': etiqueta, 'cantidad': conteos['tamaño'][clave]}
+            for clave, etiqueta, _ in RANGOS_TAMAÑO
+            if conteos['tamaño'][clave]
+        ]
+    return resultado
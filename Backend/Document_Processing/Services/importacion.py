@@ -0,0 +1,190 @@
+import json
+import time
+from django.db import transaction
+from rest_framework import serializers
+from . import cache_busqueda, estadisticas, versiones
+from .indice_busqueda import (
+    SEPARADOR_PAGINA, construir_postings, frecuencias_terminos, norma_terminos, sumar_documentos_nuevos
+)
+from .similitud import calcular_firma, cubetas
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin ella las líneas se decodifican con json
+    orjson = None
+
+# Filas validadas por inserción masiva (una transacción por lote)
+TAMAÑO_LOTE = 500
+
+# Filas inválidas detalladas en el resumen (el total se cuenta igual)
+MAX_ERRORES_INFORMADOS = 100
+
+# Filas por sentencia en los bulk_create del lote
+TAMAÑO_LOTE_INSERCION = 1000
+
+
+def _decodificar(linea):
+    if orjson is not None:
+        return orjson.loads(linea)
+    return json.loads(linea)
+
+
+def _paginas(documento, fila):
+    """
+    Páginas del documento: textos (importación NDJSON) o dicts con los
+    datos de extracción de cada página (ingesta de PDFs); si la fila no
+    las trae, se derivan del texto completo con el separador de página.
+    """
+    from ..models import PaginaDocumento
+
+    paginas = []
+    for numero, pagina in enumerate(fila.get('paginas') or documento.texto_extraido.split(SEPARADOR_PAGINA), start=1):
+        if isinstance(pagina, str):
+            pagina = {'texto': pagina}
+        paginas.append(PaginaDocumento(
+            documento=documento,
+            numero=pagina.get('numero', numero),
+            texto=pagina['texto'],
+            metodo_extraccion=pagina.get('metodo_extraccion') or documento.metodo_extraccion,
+            confianza=pagina.get('confianza'),
+            tiempo_procesamiento=pagina.get('tiempo_procesamiento')
+        ))
+    return paginas
+
+
+@transaction.atomic
+def insertar_lote(filas, usuario_id):
+    """
+    Inserta un lote de filas ya validadas como documentos del usuario.
+    Además de los campos de FilaImportacionSerializer, una fila puede traer
+    huella_pdf (PDF original ya guardado en el almacén de blobs).
+
+    Técnicas implementadas:
+    - bulk_create de documentos, páginas, postings, firmas y cubetas LSH:
+      un puñado de sentencias por lote en lugar de varias por documento
+    - Páginas, índice invertido, norma de términos y firma calculados en
+      memoria antes de insertar: el documento entra ya indexado, sin
+      UPDATE posterior
+    - Frecuencias de documento sumadas por grupos de términos del lote
+    - Estadísticas y versión de la colección actualizadas una vez por lote,
+      en la misma transacción; caché de búsquedas invalidada al confirmar
+
+    Returns:
+        Lista de DocumentoProcesado creados
+    """
+    from ..models import CubetaSimilitud, DocumentoProcesado, FirmaDocumento, PaginaDocumento, TerminoIndexado
+
+    documentos, paginas, postings, firmas, claves, terminos = [], [], [], [], [], []
+    for fila in filas:
+        documento = DocumentoProcesado(
+            usuario_id=usuario_id,
+            nombre_archivo=fila['nombre_archivo'],
+            tamaño_bytes=fila['tamaño_bytes'],
+            texto_extraido=fila['texto_extraido'],
+            metodo_extraccion=fila['metodo_extraccion'],
+            tiempo_procesamiento=fila.get('tiempo_procesamiento'),
+            huella_pdf=fila.get('huella_pdf', '')
+        )
+        if fila.get('fecha_procesamiento') is not None:
+            documento.fecha_procesamiento = fila['fecha_procesamiento']
+        documento.actualizar_campos_derivados()
+        documentos.append(documento)
+
+        paginas_documento = _paginas(documento, fila)
+        paginas.extend(paginas_documento)
+
+        postings_documento = construir_postings(documento, paginas_documento)
+        postings.extend(postings_documento)
+        frecuencias = frecuencias_terminos(postings_documento)
+        terminos.append(frecuencias.keys())
+        documento.norma_terminos = norma_terminos(frecuencias.values())
+
+        firma = calcular_firma(documento.texto_extraido)
+        if firma is not None:
+            firmas.append(FirmaDocumento(documento=documento, firma=firma))
+            claves.extend(
+                CubetaSimilitud(documento=documento, usuario_id=usuario_id, cubeta=clave)
+                for clave in cubetas(firma)
+            )
+
+    # Las filas relacionadas toman el id de su documento al insertarse
+    DocumentoProcesado.objects.bulk_create(documentos, batch_size=TAMAÑO_LOTE_INSERCION)
+    PaginaDocumento.objects.bulk_create(paginas, batch_size=TAMAÑO_LOTE_INSERCION)
+    TerminoIndexado.objects.bulk_create(postings, batch_size=TAMAÑO_LOTE_INSERCION)
+    FirmaDocumento.objects.bulk_create(firmas, batch_size=TAMAÑO_LOTE_INSERCION)
+    CubetaSimilitud.objects.bulk_create(claves, batch_size=TAMAÑO_LOTE_INSERCION)
+
+    sumar_documentos_nuevos(usuario_id, terminos)
+    estadisticas.aplicar(estadisticas.deltas_documentos(documentos), 1)
+    versiones.renovar([usuario_id])
+    transaction.on_commit(lambda: cache_busqueda.invalidar([usuario_id]))
+    return documentos
+
+
+def importar(lineas, usuario_id, tamaño_lote=TAMAÑO_LOTE, progreso=None):
+    """
+    Importa documentos con texto ya extraído desde líneas NDJSON (el
+    formato de la exportación).
+
+    Características:
+    - Lectura y validación en streaming: solo un lote de filas en memoria
+    - Cada lote se inserta en su propia transacción con insertar_lote
+    - Las filas inválidas (JSON mal formado o campos inválidos) se omiten
+      y se informan con su número de línea; no detienen la importación
+    - Las líneas vacías se ignoran
+
+    Args:
+        lineas: iterable de líneas (bytes o str)
+        tamaño_lote: filas por inserción masiva
+        progreso: función opcional llamada tras cada lote con (importados, segundos)
+
+    Returns:
+        Dict con importados, errores, detalle_errores (los primeros
+        MAX_ERRORES_INFORMADOS), segundos y filas_por_segundo
+    """
+    from ..serializers import FilaImportacionSerializer
+
+    validador = FilaImportacionSerializer()
+    inicio = time.perf_counter()
+    importados, errores, detalle = 0, 0, []
+    lote = []
+
+    def insertar():
+        nonlocal importados
+        insertar_lote(lote, usuario_id)
+        importados += len(lote)
+        lote.clear()
+        if progreso:
+            progreso(importados, time.perf_counter() - inicio)
+
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            datos = _decodificar(linea)
+            if not isinstance(datos, dict):
+                raise ValueError('Cada línea debe ser un objeto JSON')
+            lote.append(validador.run_validation(datos))
+        except serializers.ValidationError as error:
+            errores += 1
+            if len(detalle) < MAX_ERRORES_INFORMADOS:
+                detalle.append({'linea': numero, 'errores': error.detail})
+            continue
+        except ValueError as error:
+            errores += 1
+            if len(detalle) < MAX_ERRORES_INFORMADOS:
+                detalle.append({'linea': numero, 'errores': str(error)})
+            continue
+        if len(lote) >= tamaño_lote:
+            insertar()
+    if lote:
+        insertar()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'importados': importados,
+        'errores': errores,
+        'detalle_errores': detalle,
+        'segundos': round(segundos, 3),
+        'filas_por_segundo': round(importados / segundos, 1) if segundos > 0 else None,
+    }
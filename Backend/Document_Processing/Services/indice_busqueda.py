@@ -0,0 +1,445 @@
+import math
+import re
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Case, Count, F, When, Value, TextField, Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+from django.utils.html import escape
+from .normalizacion import PATRON_GUION_FIN_LINEA, normalizar_termino, normalizar_texto, plegar
+
+# Separador de páginas en el texto extraído (convención de pdftotext)
+SEPARADOR_PAGINA = "\f"
+
+# Palabras, incluyendo las partidas por guion al final de línea
+PATRON_TOKEN = re.compile(r'\w+(?:-[ \t]*\r?\n\s*\w+)*')
+
+MAX_LONGITUD_TERMINO = 100
+MAX_POSICIONES_POR_TERMINO = 64
+TAMAÑO_LOTE = 1000
+# Términos por sentencia al actualizar frecuencias (límite de parámetros de SQLite)
+TAMAÑO_LOTE_TERMINOS = 500
+
+
+def tokenizar(texto):
+    """
+    Divide el texto en términos normalizados (sin acentos ni mayúsculas)
+    con su posición en el texto original.
+
+    Returns:
+        Generador de tuplas (termino, inicio, fin)
+    """
+    for coincidencia in PATRON_TOKEN.finditer(texto):
+        termino = normalizar_termino(coincidencia.group())
+        if len(termino) > MAX_LONGITUD_TERMINO:
+            continue
+        yield termino, coincidencia.start(), coincidencia.end()
+
+
+def terminos_consulta(consulta):
+    """Términos únicos de una consulta, en el orden en que aparecen."""
+    return list(dict.fromkeys(termino for termino, _, _ in tokenizar(consulta or '')))
+
+
+def _textos_paginas(documento, paginas=None):
+    """
+    Pares (numero, texto) de las páginas del documento: las recibidas, las
+    guardadas en PaginaDocumento o, en su defecto, el texto completo
+    dividido por el separador de página.
+    """
+    if paginas is None:
+        paginas = list(documento.paginas.only('numero', 'texto'))
+    if paginas:
+        return [(pagina.numero, pagina.texto) for pagina in paginas]
+
+    texto = documento.texto_extraido or ''
+    return list(enumerate(texto.split(SEPARADOR_PAGINA), start=1))
+
+
+def construir_postings(documento, paginas=None):
+    """
+    Construye las entradas del índice invertido de un documento.
+
+    Técnica: Un único recorrido del texto de cada página agrupando
+    ocurrencias por término. Solo se guardan las primeras posiciones
+    (relativas a la página); la frecuencia conserva el total.
+    """
+    from ..models import TerminoIndexado
+
+    postings = []
+    for numero, texto in _textos_paginas(documento, paginas):
+        acumulado = defaultdict(lambda: [0, []])
+        for termino, inicio, fin in tokenizar(texto or ''):
+            entrada = acumulado[termino]
+            entrada[0] += 1
+            if len(entrada[1]) < MAX_POSICIONES_POR_TERMINO:
+                entrada[1].append([inicio, fin])
+
+        postings.extend(
+            TerminoIndexado(
+                documento=documento,
+                termino=termino,
+                pagina=numero,
+                frecuencia=frecuencia,
+                posiciones=posiciones
+            )
+            for termino, (frecuencia, posiciones) in acumulado.items()
+        )
+    return postings
+
+
+def peso_tf(frecuencia):
+    """Peso sublineal de la frecuencia de un término en un documento (1 + ln tf)."""
+    return 1 + math.log(frecuencia)
+
+
+def norma_terminos(frecuencias):
+    """Norma euclídea del vector de pesos tf de un documento."""
+    return math.sqrt(sum(peso_tf(frecuencia) ** 2 for frecuencia in frecuencias))
+
+
+def ajustar_frecuencias(usuario_id, terminos, delta):
+    """
+    Suma `delta` a la cantidad de documentos del usuario que contienen cada
+    término (FrecuenciaTermino).
+
+    Técnica: inserción de las filas faltantes con ignore_conflicts seguida
+    de UPDATE ... SET documentos = documentos + delta por lotes; no hay
+    lectura previa, por lo que dos ingestas concurrentes no pierden cuentas.
+    Las filas que llegan a cero se conservan con su fecha de cambio (ver
+    Services.sugerencias).
+    """
+    from ..models import FrecuenciaTermino
+
+    terminos = list(terminos)
+    ahora = timezone.now()
+    for i in range(0, len(terminos), TAMAÑO_LOTE_TERMINOS):
+        lote = terminos[i:i + TAMAÑO_LOTE_TERMINOS]
+        if delta > 0:
+            FrecuenciaTermino.objects.bulk_create(
+                [FrecuenciaTermino(usuario_id=usuario_id, termino=termino, documentos=0) for termino in lote],
+                ignore_conflicts=True
+            )
+        FrecuenciaTermino.objects.filter(usuario_id=usuario_id, termino__in=lote).update(
+            documentos=F('documentos') + delta, actualizado_en=ahora
+        )
+
+
+def frecuencias_terminos(postings):
+    """Frecuencia total de cada término de un documento (suma de sus páginas)."""
+    frecuencias = defaultdict(int)
+    for posting in postings:
+        frecuencias[posting.termino] += posting.frecuencia
+    return frecuencias
+
+
+def sumar_documentos_nuevos(usuario_id, terminos_por_documento):
+    """
+    Suma a FrecuenciaTermino un lote de documentos nuevos del usuario.
+
+    Técnica: los términos se agrupan por la cantidad de documentos del lote
+    que los contienen y se hace un ajuste por grupo, en lugar de uno por
+    documento.
+    """
+    conteo = Counter()
+    for terminos in terminos_por_documento:
+        conteo.update(terminos)
+    grupos = defaultdict(list)
+    for termino, documentos in conteo.items():
+        grupos[documentos].append(termino)
+    for documentos, terminos in grupos.items():
+        ajustar_frecuencias(usuario_id, terminos, documentos)
+
+
+def _ajustar_frecuencias_documentos(postings, signo):
+    """Suma (signo=1) o resta (signo=-1) a FrecuenciaTermino los términos de unos postings."""
+    grupos = defaultdict(list)
+    filas = postings.order_by().values('documento__usuario_id', 'termino').annotate(
+        documentos=Count('documento_id', distinct=True)
+    )
+    for fila in filas:
+        grupos[(fila['documento__usuario_id'], fila['documentos'])].append(fila['termino'])
+    for (usuario_id, documentos), terminos in grupos.items():
+        ajustar_frecuencias(usuario_id, terminos, signo * documentos)
+
+
+def descontar_frecuencias(documento_ids):
+    """
+    Descuenta de FrecuenciaTermino los términos de documentos activos que
+    se van a eliminar (lógica o físicamente). Los ya eliminados lógicamente
+    se descontaron al eliminarlos y no se vuelven a descontar. Debe
+    llamarse antes del UPDATE o DELETE, en la misma transacción.
+    """
+    from ..models import TerminoIndexado
+
+    _ajustar_frecuencias_documentos(
+        TerminoIndexado.objects.filter(documento_id__in=documento_ids, documento__eliminado=False), -1
+    )
+
+
+def sumar_frecuencias(documento_ids):
+    """
+    Vuelve a sumar a FrecuenciaTermino los términos de documentos
+    eliminados lógicamente que se van a restaurar. Debe llamarse antes del
+    UPDATE, en la misma transacción.
+    """
+    from ..models import TerminoIndexado
+
+    _ajustar_frecuencias_documentos(
+        TerminoIndexado.objects.filter(documento_id__in=documento_ids, documento__eliminado=True), 1
+    )
+
+
+@transaction.atomic
+def indexar_documento(documento, paginas=None, nuevo=False):
+    """
+    (Re)construye el índice invertido de un documento.
+
+    También mantiene, de forma incremental, las frecuencias de documento
+    por término del usuario (solo cambian los términos que aparecen o
+    desaparecen, y nada si el documento está eliminado) y la norma del vector de términos del documento, usadas
+    por la búsqueda de documentos similares.
+
+    Args:
+        documento: DocumentoProcesado ya guardado
+        paginas: PaginaDocumento recién creadas (evita volver a leerlas)
+        nuevo: documento recién creado, sin entradas anteriores que leer ni borrar
+    """
+    from ..models import DocumentoProcesado, TerminoIndexado
+
+    anteriores = set()
+    if not nuevo:
+        anteriores = set(
+            TerminoIndexado.objects.filter(documento=documento).values_list('termino', flat=True).distinct()
+        )
+        TerminoIndexado.objects.filter(documento=documento).delete()
+    postings = TerminoIndexado.objects.bulk_create(
+        construir_postings(documento, paginas),
+        batch_size=TAMAÑO_LOTE
+    )
+
+    frecuencias = frecuencias_terminos(postings)
+    # Los documentos eliminados lógicamente no cuentan en las frecuencias
+    if not documento.eliminado:
+        ajustar_frecuencias(documento.usuario_id, set(frecuencias) - anteriores, 1)
+        ajustar_frecuencias(documento.usuario_id, anteriores - set(frecuencias), -1)
+
+    documento.norma_terminos = norma_terminos(frecuencias.values())
+    DocumentoProcesado.objects.filter(pk=documento.pk).update(norma_terminos=documento.norma_terminos)
+
+
+def _filtro_prefijo(termino):
+    """
+    Filtro por prefijo expresado como rango para aprovechar el índice B-tree
+    (LIKE 'x%' no usa índices en SQLite).
+    """
+    return Q(termino__gte=termino, termino__lt=termino + '\U0010ffff')
+
+
+def _plegar_con_posiciones(texto):
+    """
+    Pliega el texto igual que normalizar_texto (guiones de fin de línea,
+    acentos, mayúsculas y espacios) conservando, para cada carácter
+    plegado, su posición en el texto original.
+
+    Returns:
+        Tupla (texto_plegado, posiciones)
+    """
+    omitidos = set()
+    for union in PATRON_GUION_FIN_LINEA.finditer(texto):
+        omitidos.update(range(union.end(1), union.start(2)))
+
+    plegado = []
+    posiciones = []
+    for i, caracter in enumerate(texto):
+        if i in omitidos:
+            continue
+        if caracter.isspace():
+            if plegado and plegado[-1] != ' ':
+                plegado.append(' ')
+                posiciones.append(i)
+            continue
+        for parte in plegar(caracter):
+            plegado.append(parte)
+            posiciones.append(i)
+    return ''.join(plegado), posiciones
+
+
+def _localizar_subcadena(texto, buscado, limite=MAX_POSICIONES_POR_TERMINO):
+    """
+    Posiciones (inicio, fin) en el texto original de las apariciones de
+    `buscado` (ya normalizado) dentro de una palabra o entre varias.
+    """
+    plegado, posiciones = _plegar_con_posiciones(texto)
+    encontrados = []
+    inicio = plegado.find(buscado)
+    while inicio != -1 and len(encontrados) < limite:
+        fin = inicio + len(buscado)
+        encontrados.append((posiciones[inicio], posiciones[fin - 1] + 1))
+        inicio = plegado.find(buscado, fin)
+    return encontrados
+
+
+def _agrupar_ventanas(hits, contexto, max_fragmentos):
+    """
+    Agrupa ocurrencias cercanas de una misma página en ventanas de texto.
+
+    Técnica: Barrido lineal sobre ocurrencias ordenadas por (página,
+    posición); las ventanas con más términos distintos se priorizan y
+    luego se ordenan por posición en el documento.
+    """
+    ventanas = []
+    actual = None
+    for pagina, inicio, fin, termino in sorted(hits):
+        if actual and pagina == actual['pagina'] and fin <= actual['fin']:
+            actual['hits'].append((inicio, fin, termino))
+            continue
+
+        inicio_ventana = max(0, inicio - contexto)
+        actual = {
+            'inicio': inicio_ventana,
+            'fin': max(inicio_ventana + 2 * contexto, fin),
+            'pagina': pagina,
+            'hits': [(inicio, fin, termino)]
+        }
+        ventanas.append(actual)
+
+    ventanas.sort(
+        key=lambda v: (len({t for _, _, t in v['hits']}), len(v['hits'])),
+        reverse=True
+    )
+    return sorted(ventanas[:max_fragmentos], key=lambda v: (v['pagina'], v['inicio']))
+
+
+def _resaltar(texto, resaltados):
+    """Escapa el fragmento y marca las ocurrencias con <mark>."""
+    partes = []
+    cursor = 0
+    for inicio, fin in resaltados:
+        partes.append(escape(texto[cursor:inicio]))
+        partes.append(f"<mark>{escape(texto[inicio:fin])}</mark>")
+        cursor = fin
+    partes.append(escape(texto[cursor:]))
+    return ''.join(partes)
+
+
+def obtener_fragmentos(documento_ids, consulta, max_fragmentos=3, contexto=100):
+    """
+    Genera fragmentos resaltados para un conjunto de documentos.
+
+    Técnicas implementadas:
+    - Posiciones de las coincidencias tomadas del índice invertido
+    - Recorte de los fragmentos en la base de datos (SUBSTR sobre el texto
+      de cada página) con una sola consulta para toda la página de resultados
+    - Nunca se carga el texto completo en el proceso web, salvo las páginas
+      de los documentos sin postings que coincidan: la búsqueda compara
+      subcadenas (p. ej. 'ntrat' en 'contrato'), así que para ellos la
+      coincidencia se ubica en el texto de cada página
+
+    Returns:
+        dict {documento_id: {'fragmentos': [...], 'paginas': [...]}}
+    """
+    from ..models import PaginaDocumento, TerminoIndexado
+
+    documento_ids = list(documento_ids)
+    resultado = {
+        doc_id: {'fragmentos': [], 'paginas': []}
+        for doc_id in documento_ids
+    }
+    if not documento_ids:
+        return resultado
+
+    # 1. Posiciones de los términos de la consulta (coincidencia por prefijo)
+    terminos = terminos_consulta(consulta)
+    hits = defaultdict(list)
+    coincidencias_por_pagina = defaultdict(lambda: defaultdict(int))
+    if terminos:
+        filtro = Q()
+        for termino in terminos:
+            filtro |= _filtro_prefijo(termino)
+
+        postings = TerminoIndexado.objects.filter(
+            filtro, documento_id__in=documento_ids
+        ).values_list('documento_id', 'termino', 'pagina', 'frecuencia', 'posiciones')
+
+        for doc_id, termino, pagina, frecuencia, posiciones in postings:
+            coincidencias_por_pagina[doc_id][pagina] += frecuencia
+            for inicio, fin in posiciones:
+                hits[doc_id].append((pagina, inicio, fin, termino))
+
+    # Coincidencias dentro de una palabra o entre palabras: el índice no
+    # las tiene, se ubican en el texto de las páginas
+    buscado = normalizar_texto(consulta)
+    sin_hits = [doc_id for doc_id in documento_ids if doc_id not in hits]
+    if buscado and sin_hits:
+        paginas = PaginaDocumento.objects.filter(documento_id__in=sin_hits).order_by(
+            'documento_id', 'numero'
+        ).values_list('documento_id', 'numero', 'texto')
+        for doc_id, pagina, texto in paginas.iterator():
+            for inicio, fin in _localizar_subcadena(texto, buscado):
+                coincidencias_por_pagina[doc_id][pagina] += 1
+                hits[doc_id].append((pagina, inicio, fin, buscado))
+
+    ventanas = {
+        doc_id: _agrupar_ventanas(hits_doc, contexto, max_fragmentos)
+        for doc_id, hits_doc in hits.items()
+    }
+
+    for doc_id, paginas in coincidencias_por_pagina.items():
+        resultado[doc_id]['paginas'] = [
+            {'pagina': pagina, 'coincidencias': cantidad}
+            for pagina, cantidad in sorted(paginas.items())
+        ]
+
+    # 2. Recorte de fragmentos en la base de datos: una columna por posición
+    # de fragmento, con un CASE por (documento, página). Se pide un carácter
+    # extra para saber si el texto continúa después de la ventana.
+    anotaciones = {}
+    for slot in range(max_fragmentos):
+        casos = [
+            When(
+                documento_id=doc_id,
+                numero=v[slot]['pagina'],
+                then=Substr('texto', v[slot]['inicio'] + 1, v[slot]['fin'] - v[slot]['inicio'] + 1)
+            )
+            for doc_id, v in ventanas.items()
+            if len(v) > slot
+        ]
+        if casos:
+            anotaciones[f'fragmento_{slot}'] = Case(*casos, default=Value(''), output_field=TextField())
+
+    if anotaciones:
+        paginas_con_hits = Q()
+        for doc_id, v in ventanas.items():
+            paginas_con_hits |= Q(documento_id=doc_id, numero__in={ventana['pagina'] for ventana in v})
+
+        filas = PaginaDocumento.objects.filter(paginas_con_hits).order_by().annotate(
+            **anotaciones
+        ).values('documento_id', 'numero', *anotaciones.keys())
+
+        recortes = {(fila['documento_id'], fila['numero']): fila for fila in filas}
+
+        for doc_id, ventanas_doc in ventanas.items():
+            for slot, ventana in enumerate(ventanas_doc):
+                fila = recortes.get((doc_id, ventana['pagina']))
+                if fila is None:
+                    continue
+                crudo = fila[f'fragmento_{slot}']
+                longitud = ventana['fin'] - ventana['inicio']
+                texto = crudo[:longitud]
+                resaltados = [
+                    [inicio - ventana['inicio'], fin - ventana['inicio']]
+                    for inicio, fin, _ in ventana['hits']
+                ]
+                resultado[doc_id]['fragmentos'].append({
+                    'texto': texto,
+                    'texto_resaltado': _resaltar(texto, resaltados),
+                    'inicio': ventana['inicio'],
+                    'fin': ventana['inicio'] + len(texto),
+                    'pagina': ventana['pagina'],
+                    'resaltados': resaltados,
+                    'truncado_inicio': ventana['inicio'] > 0,
+                    'truncado_fin': len(crudo) > longitud
+                })
+
+    return resultado
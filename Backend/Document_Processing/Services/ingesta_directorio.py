@@ -0,0 +1,257 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from django.utils import timezone
+from . import importacion
+from .almacen_blobs import almacen_blobs
+from .pdf_extractor import PDFExtractor, datos_extraccion
+
+# Archivos enviados al pool por cada proceso (limita lo pendiente en memoria)
+PENDIENTES_POR_PROCESO = 4
+
+# Mínimo de caracteres extraídos para guardar un documento (como la subida)
+MIN_CARACTERES = 10
+
+# Tamaño máximo de PDF aceptado (como la subida)
+MAX_TAMAÑO_BYTES = 50 * 1024 * 1024
+
+ESTADO_OK = 'ok'
+ESTADO_ERROR = 'error'
+ESTADO_PENDIENTE = 'pendiente'
+
+
+def archivos_pdf(directorio):
+    """Rutas relativas de los PDF del directorio (recursivo), en orden estable."""
+    raiz = Path(directorio)
+    return sorted(
+        ruta.relative_to(raiz).as_posix()
+        for ruta in raiz.rglob('*')
+        if ruta.is_file() and ruta.suffix.lower() == '.pdf'
+    )
+
+
+def extraer_archivo(directorio, relativa):
+    """
+    Extrae el texto de un PDF en un proceso del pool.
+
+    No toca la base de datos: devuelve la fila lista para insertar_lote,
+    con el PDF original ya guardado en el almacén de blobs (deduplicado por
+    SHA-256), o un dict con 'error'. Los errores se devuelven como texto
+    porque no todas las excepciones del extractor se pueden serializar
+    entre procesos.
+    """
+    ruta = os.path.join(directorio, relativa)
+    inicio = time.time()
+    try:
+        tamaño = os.path.getsize(ruta)
+        if tamaño > MAX_TAMAÑO_BYTES:
+            return {'ruta': relativa, 'error': f'Archivo demasiado grande ({tamaño} bytes)'}
+
+        resultado = PDFExtractor().extract_text(ruta)
+        texto = resultado["text"]
+        if not texto or len(texto.strip()) < MIN_CARACTERES:
+            return {'ruta': relativa, 'error': 'Texto extraído insuficiente'}
+
+        metodo, paginas = datos_extraccion(resultado)
+        return {
+            'ruta': relativa,
+            'nombre_archivo': os.path.basename(relativa)[:255],
+            'tamaño_bytes': tamaño,
+            'texto_extraido': texto,
+            'metodo_extraccion': metodo,
+            'paginas': paginas,
+            'huella_pdf': almacen_blobs().guardar_archivo(ruta),
+            'tiempo_procesamiento': round(time.time() - inicio, 3),
+        }
+    except Exception as error:
+        return {'ruta': relativa, 'error': f'{type(error).__name__}: {error}'}
+
+
+class PuntoControl:
+    """
+    Archivo de punto de control de una ingesta: una línea
+    "estado<TAB>ruta relativa" por archivo ya resuelto (guardado o con
+    error).
+
+    Se agrega al archivo recién después de confirmar cada lote y con fsync,
+    de modo que tras una caída solo se reprocesa el lote en curso. Las
+    rutas con error tampoco se reintentan (quedan listadas en el archivo).
+
+    Antes de insertar un lote se anuncian sus archivos con líneas
+    "pendiente<TAB>marca<TAB>huella del PDF<TAB>ruta". Si la caída ocurre
+    entre el commit y la línea "ok", al reanudar (recuperar) se buscan en
+    la base de datos los documentos del usuario con esa huella creados
+    desde la marca: los que existen se dan por guardados y no se duplican.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.resueltos = set()
+        # ruta relativa -> (marca, huella del PDF) de los lotes anunciados
+        self.pendientes = {}
+        if ruta and os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    estado, _, relativa = linea.rstrip('\n').partition('\t')
+                    if estado == ESTADO_PENDIENTE:
+                        marca, huella, relativa = relativa.split('\t', 2)
+                        self.pendientes[relativa] = (datetime.fromisoformat(marca), huella)
+                    elif relativa:
+                        self.resueltos.add(relativa)
+        for relativa in self.resueltos:
+            self.pendientes.pop(relativa, None)
+
+    def _agregar(self, lineas):
+        with open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.writelines(lineas)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+    def anunciar(self, filas):
+        """Registra los archivos de un lote antes de insertarlo."""
+        if not self.ruta or not filas:
+            return
+        marca = timezone.now().isoformat()
+        self._agregar(
+            f'{ESTADO_PENDIENTE}\t{marca}\t{fila["huella_pdf"]}\t{fila["ruta"]}\n' for fila in filas
+        )
+
+    def registrar(self, entradas):
+        """Agrega pares (estado, ruta relativa) y los fuerza a disco."""
+        if not entradas:
+            return
+        self.resueltos.update(relativa for _, relativa in entradas)
+        if not self.ruta:
+            return
+        self._agregar(f'{estado}\t{relativa}\n' for estado, relativa in entradas)
+
+    def recuperar(self, usuario_id):
+        """
+        Resuelve los archivos anunciados sin línea final: se marcan "ok" los
+        que ya tienen documento (su lote se confirmó) y los demás se dejan
+        para reprocesar.
+
+        Returns:
+            Cantidad de archivos recuperados
+        """
+        from ..models import DocumentoProcesado
+
+        if not self.pendientes:
+            return 0
+        guardados = DocumentoProcesado.objects.filter(
+            usuario_id=usuario_id,
+            huella_pdf__in={huella for _, huella in self.pendientes.values()},
+            fecha_procesamiento__gte=min(marca for marca, _ in self.pendientes.values())
+        ).values_list('huella_pdf', 'fecha_procesamiento')
+        fechas = {}
+        for huella, fecha in guardados:
+            fechas[huella] = max(fecha, fechas.get(huella, fecha))
+        recuperados = [
+            (ESTADO_OK, relativa) for relativa, (marca, huella) in self.pendientes.items()
+            if huella in fechas and fechas[huella] >= marca
+        ]
+        self.registrar(recuperados)
+        self.pendientes.clear()
+        return len(recuperados)
+
+
+def ingerir(directorio, usuario_id, procesos=None, tamaño_lote=importacion.TAMAÑO_LOTE,
+            punto_control=None, progreso=None):
+    """
+    Ingesta de todos los PDF de un directorio para un usuario.
+
+    Técnicas implementadas:
+    - Extracción en paralelo con un ProcessPoolExecutor (PDFExtractor es
+      CPU intensivo, sobre todo con OCR); el proceso principal solo escribe
+    - Cantidad acotada de archivos en vuelo (PENDIENTES_POR_PROCESO por
+      proceso): memoria constante para cualquier cantidad de archivos
+    - Escritura por lotes con importacion.insertar_lote (bulk_create de
+      documentos, páginas, índice y firmas; estadísticas una vez por lote)
+    - Punto de control opcional para reanudar una ingesta interrumpida; el
+      lote que se confirmó sin llegar a registrarse no se vuelve a insertar
+
+    Args:
+        procesos: procesos del pool (por defecto, uno por CPU)
+        punto_control: PuntoControl con los archivos ya resueltos
+        progreso: función opcional llamada cada vez que terminan archivos,
+            con el avance: archivos extraídos, total a procesar, importados
+            (confirmados), paginas extraídas, errores y segundos
+
+    Returns:
+        Dict con archivos, omitidos, importados, errores, detalle_errores,
+        paginas, segundos y paginas_por_segundo
+    """
+    punto_control = punto_control or PuntoControl(None)
+    punto_control.recuperar(usuario_id)
+    archivos = archivos_pdf(directorio)
+    pendientes_archivos = [relativa for relativa in archivos if relativa not in punto_control.resueltos]
+    avance = {
+        'archivos': 0, 'total': len(pendientes_archivos), 'importados': 0,
+        'paginas': 0, 'errores': 0, 'segundos': 0.0,
+    }
+    detalle_errores = []
+    lote, resueltos = [], []
+    inicio = time.perf_counter()
+
+    def confirmar():
+        if lote:
+            punto_control.anunciar(lote)
+            importacion.insertar_lote(lote, usuario_id)
+            avance['importados'] += len(lote)
+        punto_control.registrar(resueltos)
+        lote.clear()
+        resueltos.clear()
+
+    restantes = iter(pendientes_archivos)
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        en_vuelo = set()
+        try:
+            while True:
+                while len(en_vuelo) < procesos * PENDIENTES_POR_PROCESO:
+                    relativa = next(restantes, None)
+                    if relativa is None:
+                        break
+                    en_vuelo.add(pool.submit(extraer_archivo, directorio, relativa))
+                if not en_vuelo:
+                    break
+
+                terminados, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    fila = futuro.result()
+                    avance['archivos'] += 1
+                    if 'error' in fila:
+                        avance['errores'] += 1
+                        if len(detalle_errores) < importacion.MAX_ERRORES_INFORMADOS:
+                            detalle_errores.append({'ruta': fila['ruta'], 'error': fila['error']})
+                        resueltos.append((ESTADO_ERROR, fila['ruta']))
+                    else:
+                        lote.append(fila)
+                        resueltos.append((ESTADO_OK, fila['ruta']))
+                        avance['paginas'] += len(fila['paginas'] or ())
+                if len(lote) >= tamaño_lote:
+                    confirmar()
+                if progreso:
+                    avance['segundos'] = time.perf_counter() - inicio
+                    progreso(dict(avance))
+            confirmar()
+        except BaseException:
+            # Interrupción o error al escribir: se descarta lo no confirmado
+            # (queda fuera del punto de control y se reprocesa al reanudar)
+            for futuro in en_vuelo:
+                futuro.cancel()
+            raise
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'archivos': len(archivos),
+        'omitidos': len(archivos) - len(pendientes_archivos),
+        'importados': avance['importados'],
+        'errores': avance['errores'],
+        'detalle_errores': detalle_errores,
+        'paginas': avance['paginas'],
+        'segundos': round(segundos, 3),
+        'paginas_por_segundo': round(avance['paginas'] / segundos, 1) if segundos > 0 else None,
+    }
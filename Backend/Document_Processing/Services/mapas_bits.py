@@ -0,0 +1,175 @@
+from array import array
+from bisect import bisect_left
+
+# Valores a partir de los cuales un contenedor pasa de arreglo ordenado a mapa de bits
+UMBRAL_ARREGLO = 4096
+
+# Bytes de un contenedor de mapa de bits (2^16 bits)
+BYTES_MAPA = 1 << 13
+
+
+def _a_mapa(bajos):
+    bits = bytearray(BYTES_MAPA)
+    for bajo in bajos:
+        bits[bajo >> 3] |= 1 << (bajo & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _bits(mapa):
+    """Posiciones de los bits encendidos de un contenedor, en orden."""
+    for indice, byte in enumerate(mapa.to_bytes(BYTES_MAPA, 'little')):
+        if byte:
+            base = indice << 3
+            for desplazamiento in range(8):
+                if byte >> desplazamiento & 1:
+                    yield base + desplazamiento
+
+
+def _longitud(contenedor):
+    if isinstance(contenedor, int):
+        return contenedor.bit_count()
+    return len(contenedor)
+
+
+def _contenedor(bajos):
+    """Contenedor compacto para valores bajos ordenados y sin repetir."""
+    if len(bajos) > UMBRAL_ARREGLO:
+        return _a_mapa(bajos)
+    return array('H', bajos)
+
+
+def _interseccion(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        comun = a & b
+        if comun.bit_count() > UMBRAL_ARREGLO:
+            return comun
+        return array('H', _bits(comun))
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        bits = b.to_bytes(BYTES_MAPA, 'little')
+        return array('H', (bajo for bajo in a if bits[bajo >> 3] >> (bajo & 7) & 1))
+    if len(a) > len(b):
+        a, b = b, a
+    return array('H', sorted(set(a).intersection(b)))
+
+
+def _union(a, b):
+    if isinstance(a, int) or isinstance(b, int):
+        mapa_a = a if isinstance(a, int) else _a_mapa(a)
+        mapa_b = b if isinstance(b, int) else _a_mapa(b)
+        return mapa_a | mapa_b
+    return _contenedor(sorted(set(a).union(b)))
+
+
+class MapaBits:
+    """
+    Conjunto comprimido de enteros no negativos (ids de documentos) al
+    estilo roaring.
+
+    Técnicas implementadas:
+    - Los 16 bits altos eligen un contenedor; los 16 bajos se guardan en él
+    - Contenedores dispersos como arreglos ordenados de 2 bytes por valor y
+      densos (más de 4096 valores) como mapas de bits de 8 KB sobre un int
+    - Intersección y unión contenedor a contenedor: AND/OR de enteros entre
+      mapas, filtrado por bits entre arreglo y mapa, y de conjuntos entre
+      arreglos
+    """
+
+    __slots__ = ('_contenedores',)
+
+    def __init__(self, valores=()):
+        agrupados = {}
+        for valor in valores:
+            agrupados.setdefault(valor >> 16, set()).add(valor & 0xFFFF)
+        self._contenedores = {
+            alto: _contenedor(sorted(bajos)) for alto, bajos in agrupados.items()
+        }
+
+    @classmethod
+    def _desde_contenedores(cls, contenedores):
+        mapa = cls()
+        mapa._contenedores = {
+            alto: contenedor for alto, contenedor in contenedores.items() if _longitud(contenedor)
+        }
+        return mapa
+
+    def agregar(self, valor):
+        alto, bajo = valor >> 16, valor & 0xFFFF
+        contenedor = self._contenedores.get(alto)
+        if contenedor is None:
+            self._contenedores[alto] = array('H', [bajo])
+        elif isinstance(contenedor, int):
+            self._contenedores[alto] = contenedor | (1 << bajo)
+        else:
+            posicion = bisect_left(contenedor, bajo)
+            if posicion == len(contenedor) or contenedor[posicion] != bajo:
+                contenedor.insert(posicion, bajo)
+                if len(contenedor) > UMBRAL_ARREGLO:
+                    self._contenedores[alto] = _a_mapa(contenedor)
+
+    def descartar(self, valor):
+        alto, bajo = valor >> 16, valor & 0xFFFF
+        contenedor = self._contenedores.get(alto)
+        if contenedor is None:
+            return
+        if isinstance(contenedor, int):
+            contenedor &= ~(1 << bajo)
+            if contenedor.bit_count() <= UMBRAL_ARREGLO:
+                contenedor = array('H', _bits(contenedor))
+            self._contenedores[alto] = contenedor
+        else:
+            posicion = bisect_left(contenedor, bajo)
+            if posicion < len(contenedor) and contenedor[posicion] == bajo:
+                del contenedor[posicion]
+        if not _longitud(self._contenedores[alto]):
+            del self._contenedores[alto]
+
+    def __contains__(self, valor):
+        contenedor = self._contenedores.get(valor >> 16)
+        if contenedor is None:
+            return False
+        bajo = valor & 0xFFFF
+        if isinstance(contenedor, int):
+            return bool(contenedor >> bajo & 1)
+        posicion = bisect_left(contenedor, bajo)
+        return posicion < len(contenedor) and contenedor[posicion] == bajo
+
+    def __len__(self):
+        return sum(_longitud(contenedor) for contenedor in self._contenedores.values())
+
+    def __bool__(self):
+        return bool(self._contenedores)
+
+    def __iter__(self):
+        for alto in sorted(self._contenedores):
+            contenedor = self._contenedores[alto]
+            base = alto << 16
+            bajos = _bits(contenedor) if isinstance(contenedor, int) else contenedor
+            for bajo in bajos:
+                yield base | bajo
+
+    def __and__(self, otro):
+        comunes = self._contenedores.keys() & otro._contenedores.keys()
+        return MapaBits._desde_contenedores({
+            alto: _interseccion(self._contenedores[alto], otro._contenedores[alto]) for alto in comunes
+        })
+
+    def __or__(self, otro):
+        contenedores = {
+            alto: contenedor if isinstance(contenedor, int) else array('H', contenedor)
+            for alto, contenedor in self._contenedores.items()
+        }
+        for alto, contenedor in otro._contenedores.items():
+            if alto in contenedores:
+                contenedores[alto] = _union(contenedores[alto], contenedor)
+            else:
+                contenedores[alto] = contenedor if isinstance(contenedor, int) else array('H', contenedor)
+        return MapaBits._desde_contenedores(contenedores)
+
+    def tamaño_bytes(self):
+        """Memoria aproximada de los contenedores."""
+        return sum(
+            BYTES_MAPA if isinstance(contenedor, int) else contenedor.itemsize * len(contenedor)
+            for contenedor in self._contenedores.values()
+        )
@@ -0,0 +1,37 @@
+import re
+import unicodedata
+
+# Palabra partida por guion al final de línea: "búsque-\nda"
+PATRON_GUION_FIN_LINEA = re.compile(r'(\w)-[ \t]*\r?\n\s*(\w)')
+PATRON_ESPACIOS = re.compile(r'\s+')
+
+
+def plegar(texto):
+    """
+    Pliega acentos y mayúsculas: NFKD, eliminación de marcas
+    diacríticas y casefold ("Búsqueda" -> "busqueda").
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_acentos.casefold()
+
+
+def normalizar_texto(texto):
+    """
+    Forma normalizada de un texto para búsquedas.
+
+    Técnicas aplicadas (en orden):
+    1. Reunión de palabras separadas por guion al final de línea
+    2. Plegado de acentos y mayúsculas
+    3. Colapso de espacios en blanco
+    """
+    if not texto:
+        return ''
+    texto = PATRON_GUION_FIN_LINEA.sub(r'\1\2', texto)
+    texto = plegar(texto)
+    return PATRON_ESPACIOS.sub(' ', texto).strip()
+
+
+def normalizar_termino(termino):
+    """Normaliza un término aislado (token del índice o de la consulta)."""
+    return plegar(PATRON_ESPACIOS.sub('', termino.replace('-', '')))
@@ -0,0 +1,122 @@
+from django.db import transaction
+from django.utils import timezone
+from . import cache_busqueda, estadisticas, versiones
+from .indice_busqueda import descontar_frecuencias, sumar_frecuencias
+
+
+def _bloquear(queryset):
+    """
+    Bloquea las filas afectadas hasta el final de la transacción
+    (SELECT ... FOR UPDATE; en SQLite la transacción ya serializa escrituras).
+    """
+    return list(queryset.select_for_update().values_list('id', flat=True))
+
+
+def _usuarios(deltas):
+    return {usuario_id for usuario_id, _ in deltas[0]}
+
+
+def _registrar_cambios(usuarios):
+    """
+    Renueva las versiones de las colecciones de los usuarios afectados en
+    la transacción e invalida la caché de búsquedas (y con ella los
+    diccionarios de sugerencias) al confirmarla.
+    """
+    usuarios = set(usuarios)
+    if usuarios:
+        versiones.renovar(usuarios)
+        transaction.on_commit(lambda: cache_busqueda.invalidar(usuarios))
+
+
+def eliminar_documentos(queryset, fecha=None):
+    """
+    Eliminación lógica de un conjunto de documentos con un único UPDATE.
+
+    Técnicas implementadas:
+    - UPDATE ... SET eliminado = TRUE sobre el conjunto (sin save() por fila)
+    - Estadísticas descontadas con deltas agregados en la base de datos,
+      en la misma transacción
+    - Versión de las colecciones renovada en la transacción y caché de
+      búsquedas invalidada al confirmarla
+    - El índice invertido no cambia (las búsquedas ya excluyen eliminados);
+      los términos se descuentan de las frecuencias de documento que usan
+      las sugerencias y la búsqueda de similares
+
+    Args:
+        fecha: fecha de eliminación a registrar (por defecto, ahora)
+
+    Returns:
+        Cantidad de documentos eliminados
+    """
+    with transaction.atomic():
+        objetivo = queryset.filter(eliminado=False)
+        ids = _bloquear(objetivo)
+        deltas = estadisticas.deltas_queryset(objetivo)
+        descontar_frecuencias(ids)
+        ahora = timezone.now()
+        cantidad = objetivo.update(eliminado=True, fecha_eliminacion=fecha or ahora, actualizado_en=ahora)
+        estadisticas.aplicar(deltas, -1)
+        _registrar_cambios(_usuarios(deltas))
+    return cantidad
+
+
+def restaurar_documentos(queryset):
+    """
+    Restauración de documentos eliminados lógicamente con un único UPDATE,
+    sumando de nuevo sus estadísticas y las frecuencias de sus términos en
+    la misma transacción.
+
+    Returns:
+        Cantidad de documentos restaurados
+    """
+    with transaction.atomic():
+        objetivo = queryset.filter(eliminado=True)
+        ids = _bloquear(objetivo)
+        deltas = estadisticas.deltas_queryset(objetivo)
+        sumar_frecuencias(ids)
+        cantidad = objetivo.update(eliminado=False, fecha_eliminacion=None, actualizado_en=timezone.now())
+        estadisticas.aplicar(deltas, 1)
+        _registrar_cambios(_usuarios(deltas))
+    return cantidad
+
+
+def purgar_documentos(queryset):
+    """
+    Eliminación física de un conjunto de documentos.
+
+    Páginas e índice invertido se borran en cascada con DELETE por
+    conjunto (de los documentos solo se leen las claves: memoria acotada
+    al tamaño del lote) y los términos de los documentos que seguían
+    activos se descuentan de las frecuencias de documento;
+    los documentos que seguían activos se descuentan de las estadísticas y
+    los blobs sin otras referencias se liberan al confirmar.
+
+    Returns:
+        Cantidad de documentos eliminados físicamente
+    """
+    from ..models import DocumentoProcesado
+
+    with transaction.atomic():
+        ids = _bloquear(queryset)
+        objetivo = DocumentoProcesado.objects.filter(id__in=queryset.values('id'))
+        huellas = set()
+        # Todos los usuarios afectados, también los que solo tenían
+        # documentos ya eliminados lógicamente
+        usuarios = set()
+        hay_activos = False
+        filas = objetivo.values_list('texto_extraido', 'huella_pdf', 'usuario_id', 'eliminado')
+        for huella_texto, huella_pdf, usuario_id, eliminado in filas:
+            huellas.update((huella_texto, huella_pdf))
+            usuarios.add(usuario_id)
+            hay_activos = hay_activos or not eliminado
+        # Solo los documentos activos siguen contando en las estadísticas
+        deltas = estadisticas.deltas_queryset(objetivo.filter(eliminado=False)) if hay_activos else ({}, {})
+
+        descontar_frecuencias(ids)
+        # El borrado en cascada solo necesita las claves: sin only() el
+        # collector cargaría cada fila completa (texto normalizado incluido)
+        objetivo.only('id').delete()
+        estadisticas.aplicar(deltas, -1)
+        _registrar_cambios(usuarios)
+        transaction.on_commit(lambda: DocumentoProcesado.liberar_blobs(huellas))
+    return len(ids)
@@ -1,9 +1,48 @@
 import os
+import time
 import fitz  # PyMuPDF
 import pytesseract
 from pdf2image import convert_from_path
 from django.conf import settings
 
+# Métodos del extractor -> valores de DocumentoProcesado.metodo_extraccion
+METODOS_MODELO = {
+    "PyMuPDF": "pypdf",
+    "Tesseract OCR": "ocr"
+}
+
+
+class ExtraccionCancelada(Exception):
+    """La extracción se interrumpió porque ya nadie espera su resultado."""
+
+
+def _verificar(cancelled):
+    if cancelled is not None and cancelled():
+        raise ExtraccionCancelada()
+
+
+def datos_extraccion(resultado):
+    """
+    Adapta el resultado de PDFExtractor.extract_text a los campos del modelo.
+    
+    Returns:
+        (metodo_extraccion, paginas): el método mapeado (pypdf por defecto) y
+        las páginas como dicts de PaginaDocumento, o None si no hay páginas
+    """
+    metodo = METODOS_MODELO.get(resultado["method"], "pypdf")
+    paginas = [
+        {
+            'numero': pagina["number"],
+            'texto': pagina["text"],
+            'metodo_extraccion': METODOS_MODELO.get(pagina["method"], metodo),
+            'confianza': pagina["confidence"],
+            'tiempo_procesamiento': round(pagina["time"], 3)
+        }
+        for pagina in resultado.get("pages", [])
+    ] or None
+    return metodo, paginas
+
+
 class PDFExtractor:
     """
     Servicio para extraer texto de PDFs con estrategia híbrida:
@@ -19,49 +58,123 @@ class PDFExtractor:
         if self.tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
             
-    def extract_text(self, pdf_path):
+    def extract_text(self, pdf_path, cancelled=None):
         """
-        Extrae texto de un PDF utilizando estrategia híbrida
+        Extrae texto de un PDF utilizando estrategia híbrida.
+        
+        Args:
+            cancelled: función opcional sin argumentos; si devuelve True la
+                extracción se interrumpe entre páginas con ExtraccionCancelada
+        
+        Returns:
+            dict con el texto completo (páginas separadas por \\f), el método
+            usado y la lista de páginas con su texto, confianza y tiempo
         """
         # Primer intento con PyMuPDF
-        text = self.extract_with_pymupdf(pdf_path)
+        pages = self.extract_pages_with_pymupdf(pdf_path, cancelled)
+        text = self.join_pages(pages)
         method = "PyMuPDF"
         
         # Verificar si se extrajo un texto significativo
         if not text or len(text.strip()) < 100:
             print("Texto insuficiente con PyMuPDF, intentando OCR...")
-            text = self.extract_with_ocr(pdf_path)
+            _verificar(cancelled)  # la conversión a imágenes no se interrumpe
+            pages = self.extract_pages_with_ocr(pdf_path, cancelled)
+            text = self.join_pages(pages)
             method = "Tesseract OCR"
             
         return {
             "text": text,
-            "method": method
+            "method": method,
+            "pages": pages
         }
-            
+    
+    @staticmethod
+    def join_pages(pages):
+        """Une el texto de las páginas con el separador de página (\\f)"""
+        return "\f".join(page["text"] for page in pages)
+    
     def extract_with_pymupdf(self, pdf_path):
         """Extrae texto usando PyMuPDF (método rápido para PDFs nativos)"""
+        return self.join_pages(self.extract_pages_with_pymupdf(pdf_path))
+    
+    def extract_with_ocr(self, pdf_path):
+        """Extrae texto usando OCR (para PDFs escaneados)"""
+        return self.join_pages(self.extract_pages_with_ocr(pdf_path))
+            
+    def extract_pages_with_pymupdf(self, pdf_path, cancelled=None):
+        """Extrae el texto de cada página con PyMuPDF"""
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
+            pages = []
+            # El documento se cierra también si se cancela o falla una página
+            with fitz.open(pdf_path) as doc:
+                for number, page in enumerate(doc, start=1):
+                    _verificar(cancelled)
+                    start = time.time()
+                    pages.append({
+                        "number": number,
+                        "text": page.get_text(),
+                        "method": "PyMuPDF",
+                        "confidence": None,
+                        "time": time.time() - start
+                    })
+            return pages
+        except ExtraccionCancelada:
+            raise
         except Exception as e:
             print(f'Error extrayendo texto: {e}')
-            return ""
+            return []
         
-    def extract_with_ocr(self, pdf_path):
-        """Extrae texto usando OCR (para PDFs escaneados)"""
+    def extract_pages_with_ocr(self, pdf_path, cancelled=None):
+        """
+        Extrae el texto de cada página usando OCR.
+        
+        Una sola pasada de Tesseract por página (image_to_data) entrega
+        tanto las palabras como su confianza.
+        """
         try:
             # Convertir PDF a imágenes
-            pages = convert_from_path(pdf_path, dpi=500, poppler_path=self.poppler_path)
+            images = convert_from_path(pdf_path, dpi=500, poppler_path=self.poppler_path)
             
-            text = ""
-            for page in pages:
-                page_text = pytesseract.image_to_string(page, lang='spa')
-                text = page_text + "\n\n"
-            return text
+            pages = []
+            for number, image in enumerate(images, start=1):
+                _verificar(cancelled)
+                start = time.time()
+                data = pytesseract.image_to_data(
+                    image, lang='spa', output_type=pytesseract.Output.DICT
+                )
+                text, confidence = self._text_from_ocr_data(data)
+                pages.append({
+                    "number": number,
+                    "text": text,
+                    "method": "Tesseract OCR",
+                    "confidence": confidence,
+                    "time": time.time() - start
+                })
+            return pages
+        except ExtraccionCancelada:
+            raise
         except Exception as e:
             print(f'Error extrayendo texto con OCR: {e}')
-            return ""
\ No newline at end of file
+            return []
+    
+    @staticmethod
+    def _text_from_ocr_data(data):
+        """
+        Reconstruye las líneas de texto a partir de la salida de image_to_data
+        y calcula la confianza media de las palabras reconocidas.
+        """
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            conf = float(data["conf"][i])
+            if conf >= 0:
+                confidences.append(conf)
+        
+        text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+        confidence = round(sum(confidences) / len(confidences), 2) if confidences else None
+        return text + "\n", confidence
@@ -0,0 +1,129 @@
+import math
+from collections import defaultdict
+from django.db.models import Sum
+from .indice_busqueda import TAMAÑO_LOTE_TERMINOS, peso_tf
+
+# Términos más representativos del documento usados como consulta
+MAX_TERMINOS_CONSULTA = 25
+
+# Términos presentes en más de esta fracción del corpus no discriminan
+MAX_PROPORCION_DOCUMENTOS = 0.5
+
+MIN_LONGITUD_TERMINO = 3
+
+
+def idf(documentos, total_documentos):
+    """IDF suavizado: ln((1 + N) / (1 + df)) + 1."""
+    return math.log((1 + total_documentos) / (1 + documentos)) + 1
+
+
+def _en_lotes(valores, tamaño=TAMAÑO_LOTE_TERMINOS):
+    valores = list(valores)
+    for i in range(0, len(valores), tamaño):
+        yield valores[i:i + tamaño]
+
+
+def vector_consulta(documento, usuario_id=None, max_terminos=MAX_TERMINOS_CONSULTA):
+    """
+    Términos más representativos del documento con su peso TF-IDF.
+
+    Las frecuencias de documento se leen de FrecuenciaTermino (del usuario
+    o sumadas entre usuarios para el corpus global); se descartan los
+    términos que solo aparecen en este documento y los demasiado comunes.
+
+    Returns:
+        dict {termino: peso}
+    """
+    from ..models import DocumentoProcesado, FrecuenciaTermino, TerminoIndexado
+
+    frecuencias = dict(
+        TerminoIndexado.objects.filter(documento=documento).order_by().values('termino').annotate(
+            total=Sum('frecuencia')
+        ).values_list('termino', 'total')
+    )
+    frecuencias = {
+        termino: total for termino, total in frecuencias.items()
+        if len(termino) >= MIN_LONGITUD_TERMINO and not termino.isdigit()
+    }
+    if not frecuencias:
+        return {}
+
+    # N y df cuentan los mismos documentos: solo los activos
+    documentos = DocumentoProcesado.objects.activos()
+    df = FrecuenciaTermino.objects.all()
+    if usuario_id is not None:
+        documentos = documentos.filter(usuario_id=usuario_id)
+        df = df.filter(usuario_id=usuario_id)
+    total_documentos = documentos.count()
+
+    frecuencias_documento = {}
+    for lote in _en_lotes(frecuencias):
+        frecuencias_documento.update(
+            df.filter(termino__in=lote).order_by().values('termino').annotate(
+                total=Sum('documentos')
+            ).values_list('termino', 'total')
+        )
+
+    maximo = max(1, MAX_PROPORCION_DOCUMENTOS * total_documentos)
+    pesos = {
+        termino: peso_tf(total) * idf(frecuencias_documento[termino], total_documentos)
+        for termino, total in frecuencias.items()
+        if 1 < frecuencias_documento.get(termino, 0) <= maximo
+    }
+    mejores = sorted(pesos, key=lambda termino: (-pesos[termino], termino))[:max_terminos]
+    return {termino: pesos[termino] for termino in mejores}
+
+
+def documentos_similares(documento, usuario_id=None, limite=10, max_terminos=MAX_TERMINOS_CONSULTA):
+    """
+    Documentos activos más parecidos a `documento` ("más como este").
+
+    Técnicas implementadas:
+    - Vector de consulta TF-IDF con los términos más representativos del
+      documento (frecuencias de documento mantenidas en la ingesta)
+    - Puntaje acumulado recorriendo en el índice invertido solo los
+      postings de esos términos: el costo depende de sus listas de
+      postings, no del tamaño del corpus
+    - Puntaje: consulta TF-IDF · vector tf del candidato / (norma de la
+      consulta · norma tf del candidato). No es un coseno TF-IDF: el
+      candidato no se pondera con idf, porque su norma se guarda al
+      indexarlo y el idf cambia con el corpus. Queda acotado a (0, 1]
+      (Cauchy-Schwarz) y penaliza por igual a los documentos largos
+    - Top-k en memoria sobre los candidatos
+
+    Args:
+        usuario_id: acotar a los documentos de un usuario (None: corpus global)
+
+    Returns:
+        Lista de tuplas (documento_id, puntaje) de mayor a menor
+    """
+    from ..models import DocumentoProcesado, TerminoIndexado
+
+    consulta = vector_consulta(documento, usuario_id, max_terminos)
+    if not consulta:
+        return []
+    norma_consulta = math.sqrt(sum(peso ** 2 for peso in consulta.values()))
+
+    postings = TerminoIndexado.objects.filter(
+        termino__in=list(consulta), documento__eliminado=False
+    ).exclude(documento_id=documento.pk)
+    if usuario_id is not None:
+        postings = postings.filter(documento__usuario_id=usuario_id)
+
+    puntajes = defaultdict(float)
+    filas = postings.order_by().values('documento_id', 'termino').annotate(
+        total=Sum('frecuencia')
+    ).values_list('documento_id', 'termino', 'total')
+    for documento_id, termino, total in filas:
+        puntajes[documento_id] += consulta[termino] * peso_tf(total)
+
+    resultados = []
+    for lote in _en_lotes(puntajes):
+        normas = DocumentoProcesado.objects.filter(id__in=lote).values_list('id', 'norma_terminos')
+        resultados.extend(
+            (documento_id, puntajes[documento_id] / (norma_consulta * norma))
+            for documento_id, norma in normas
+            if norma
+        )
+    resultados.sort(key=lambda resultado: (-resultado[1], resultado[0]))
+    return resultados[:limite]
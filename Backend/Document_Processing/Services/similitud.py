@@ -0,0 +1,185 @@
+import hashlib
+import struct
+from .indice_busqueda import tokenizar
+
+# Firma MinHash: 128 valores de 32 bits (512 bytes por documento)
+NUM_VALORES = 128
+FORMATO_FIRMA = f'<{NUM_VALORES}I'
+
+# LSH: 16 bandas de 8 valores. Probabilidad de ser candidato con similitud s:
+# 1 - (1 - s^8)^16 -> ~0.98 con s=0.85, ~0.20 con s=0.6 (umbral efectivo ~0.7)
+BANDAS = 16
+FILAS_POR_BANDA = NUM_VALORES // BANDAS
+
+# Palabras por shingle
+LONGITUD_SHINGLE = 5
+
+# Similitud de Jaccard estimada a partir de la cual dos documentos son casi duplicados
+UMBRAL_CASI_DUPLICADO = 0.8
+
+# Desplazamiento para rellenar cubetas vacías (constante de Fibonacci de 32 bits)
+_DESPLAZAMIENTO = 0x9E3779B1
+_MASCARA_32 = 0xFFFFFFFF
+
+
+def _hash64(contenido):
+    return int.from_bytes(hashlib.blake2b(contenido, digest_size=8).digest(), 'little')
+
+
+def shingles(texto):
+    """
+    Conjunto de shingles del texto: secuencias de LONGITUD_SHINGLE términos
+    normalizados consecutivos. Al normalizar, diferencias de mayúsculas,
+    acentos, espacios o saltos de línea entre extracciones no cuentan.
+    """
+    terminos = [termino for termino, _, _ in tokenizar(texto or '')]
+    if len(terminos) < LONGITUD_SHINGLE:
+        return {' '.join(terminos)} if terminos else set()
+    return {
+        ' '.join(terminos[i:i + LONGITUD_SHINGLE])
+        for i in range(len(terminos) - LONGITUD_SHINGLE + 1)
+    }
+
+
+def calcular_firma(texto):
+    """
+    Firma MinHash del texto, o None si no tiene términos.
+
+    Técnica: one permutation hashing con densificación por rotación.
+    Cada shingle se hashea una única vez (64 bits): los bits bajos eligen
+    una de las NUM_VALORES cubetas y los altos son el valor, del que se
+    conserva el mínimo por cubeta. Las cubetas vacías (documentos cortos)
+    copian la siguiente cubeta ocupada con un desplazamiento por distancia,
+    de modo que documentos iguales producen firmas iguales. El costo es
+    O(shingles) en lugar de O(shingles x permutaciones).
+
+    Returns:
+        bytes de longitud 4 * NUM_VALORES
+    """
+    minimos = [None] * NUM_VALORES
+    for shingle in shingles(texto):
+        valor = _hash64(shingle.encode('utf-8'))
+        cubeta = valor % NUM_VALORES
+        valor >>= 32
+        if minimos[cubeta] is None or valor < minimos[cubeta]:
+            minimos[cubeta] = valor
+
+    if all(minimo is None for minimo in minimos):
+        return None
+
+    firma = list(minimos)
+    for cubeta in range(NUM_VALORES):
+        if firma[cubeta] is not None:
+            continue
+        distancia = 1
+        while minimos[(cubeta + distancia) % NUM_VALORES] is None:
+            distancia += 1
+        origen = minimos[(cubeta + distancia) % NUM_VALORES]
+        firma[cubeta] = (origen + distancia * _DESPLAZAMIENTO) & _MASCARA_32
+    return struct.pack(FORMATO_FIRMA, *firma)
+
+
+def similitud(firma_a, firma_b):
+    """Similitud de Jaccard estimada: fracción de valores coincidentes."""
+    valores_a = struct.unpack(FORMATO_FIRMA, bytes(firma_a))
+    valores_b = struct.unpack(FORMATO_FIRMA, bytes(firma_b))
+    return sum(a == b for a, b in zip(valores_a, valores_b)) / NUM_VALORES
+
+
+def cubetas(firma):
+    """
+    Claves LSH de la firma: un hash de 63 bits (con signo, para BigIntegerField)
+    por banda, que incluye el número de banda.
+    """
+    firma = bytes(firma)
+    tamaño_banda = FILAS_POR_BANDA * 4
+    claves = []
+    for banda in range(BANDAS):
+        segmento = firma[banda * tamaño_banda:(banda + 1) * tamaño_banda]
+        clave = _hash64(bytes([banda]) + segmento)
+        claves.append(clave - (1 << 64) if clave >= (1 << 63) else clave)
+    return claves
+
+
+def registrar_firma(documento, firma=None, nuevo=False):
+    """
+    Guarda la firma del documento y sus claves LSH (reemplazando las
+    anteriores). La firma se calcula del texto si no se recibe.
+    Debe llamarse dentro de la transacción que crea el documento; con
+    nuevo=True (documento recién creado) no se buscan firmas anteriores.
+    """
+    from ..models import CubetaSimilitud, FirmaDocumento
+
+    if firma is None:
+        firma = calcular_firma(documento.texto_extraido)
+    if not nuevo:
+        CubetaSimilitud.objects.filter(documento=documento).delete()
+    if firma is None:
+        if not nuevo:
+            FirmaDocumento.objects.filter(documento=documento).delete()
+        return None
+
+    if nuevo:
+        FirmaDocumento.objects.create(documento=documento, firma=firma)
+    else:
+        FirmaDocumento.objects.update_or_create(documento=documento, defaults={'firma': firma})
+    CubetaSimilitud.objects.bulk_create([
+        CubetaSimilitud(documento=documento, usuario_id=documento.usuario_id, cubeta=clave)
+        for clave in cubetas(firma)
+    ])
+    return firma
+
+
+def buscar_casi_duplicados(firma, usuario_id, umbral=UMBRAL_CASI_DUPLICADO, excluir_id=None, limite=20):
+    """
+    Documentos activos del usuario cuya similitud estimada con la firma es
+    al menos `umbral`, de mayor a menor similitud.
+
+    Técnicas implementadas:
+    - Candidatos por igualdad de claves LSH sobre el índice
+      (usuario, cubeta): costo proporcional a los candidatos, no al total
+      de documentos
+    - Verificación de los candidatos comparando las firmas completas
+
+    Returns:
+        Lista de tuplas (documento_id, similitud)
+    """
+    from ..models import CubetaSimilitud, FirmaDocumento
+
+    if firma is None:
+        return []
+    candidatos = CubetaSimilitud.objects.filter(usuario_id=usuario_id, cubeta__in=cubetas(firma))
+    if excluir_id is not None:
+        candidatos = candidatos.exclude(documento_id=excluir_id)
+
+    firmas = FirmaDocumento.objects.filter(
+        documento_id__in=candidatos.values('documento_id'),
+        documento__eliminado=False
+    ).values_list('documento_id', 'firma')
+
+    resultados = []
+    for documento_id, firma_candidato in firmas:
+        valor = similitud(firma, firma_candidato)
+        if valor >= umbral:
+            resultados.append((documento_id, valor))
+    resultados.sort(key=lambda resultado: (-resultado[1], resultado[0]))
+    return resultados[:limite]
+
+
+def describir_casi_duplicados(resultados):
+    """Datos básicos de los documentos de buscar_casi_duplicados (una consulta)."""
+    from ..models import DocumentoProcesado
+
+    documentos = DocumentoProcesado.objects.filter(
+        id__in=[documento_id for documento_id, _ in resultados]
+    ).only('id', 'nombre_archivo', 'fecha_procesamiento').in_bulk(field_name='id')
+    return [
+        {
+            'id': documento_id,
+            'nombre_archivo': documentos[documento_id].nombre_archivo,
+            'fecha_procesamiento': documentos[documento_id].fecha_procesamiento,
+            'similitud': round(valor, 3),
+        }
+        for documento_id, valor in resultados
+        if documento_id in documentos
+    ]
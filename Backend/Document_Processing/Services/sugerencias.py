@@ -0,0 +1,222 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import timedelta
+from django.db.models import Sum
+from django.utils import timezone
+from . import cache_busqueda, versiones
+from .indice_busqueda import TAMAÑO_LOTE_TERMINOS, tokenizar
+
+# Diccionarios en memoria por proceso (LRU por ámbito)
+MAX_DICCIONARIOS = 64
+
+# Margen hacia atrás al pedir cambios: cubre transacciones que confirmaron
+# después del último refresco con una fecha de cambio anterior
+MARGEN_CAMBIOS = timedelta(seconds=60)
+
+# Antigüedad máxima antes de reconstruir el diccionario completo
+MAX_ANTIGUEDAD_SEGUNDOS = 15 * 60
+
+# Cambios a partir de los cuales conviene reconstruir en lugar de insertar
+MAX_CAMBIOS_INCREMENTALES = 2000
+
+_diccionarios = OrderedDict()
+_bloqueo = threading.Lock()
+
+
+class DiccionarioTerminos:
+    """
+    Vocabulario indexado de un ámbito ordenado alfabéticamente, con la
+    frecuencia de documento de cada término.
+
+    Técnicas implementadas:
+    - Listas paralelas ordenadas: un prefijo es un rango contiguo que se
+      ubica con dos búsquedas binarias (bisect)
+    - Top-k por frecuencia dentro del rango con heapq.nlargest
+    - Cambios incrementales con inserción ordenada sobre una copia que se
+      publica de una vez, sin bloquear las lecturas
+    """
+
+    def __init__(self, filas, version, revisado):
+        filas = sorted(filas)
+        # Una sola tupla: las lecturas concurrentes ven siempre listas consistentes
+        self._datos = ([termino for termino, _ in filas], [documentos for _, documentos in filas])
+        self.version = version
+        self.construido = time.monotonic()
+        self.revisado = revisado
+
+    def __len__(self):
+        return len(self._datos[0])
+
+    def aplicar(self, cambios):
+        """
+        Aplica frecuencias absolutas {termino: documentos} sobre una copia
+        de las listas y la publica de una vez (copia en escritura).
+        """
+        terminos, frecuencias = (list(lista) for lista in self._datos)
+        for termino, documentos in cambios.items():
+            posicion = bisect_left(terminos, termino)
+            if posicion < len(terminos) and terminos[posicion] == termino:
+                frecuencias[posicion] = documentos
+            elif documentos > 0:
+                terminos.insert(posicion, termino)
+                frecuencias.insert(posicion, documentos)
+        self._datos = (terminos, frecuencias)
+
+    def frecuencia(self, termino):
+        """Frecuencia de documento de un término (0 si no está)."""
+        terminos, frecuencias = self._datos
+        posicion = bisect_left(terminos, termino)
+        if posicion < len(terminos) and terminos[posicion] == termino:
+            return frecuencias[posicion]
+        return 0
+
+    def con_prefijo(self, prefijo, maximo=None):
+        """
+        Pares (termino, frecuencia) que empiezan con `prefijo`, o None si
+        son más de `maximo`.
+        """
+        terminos, frecuencias = self._datos
+        inicio = bisect_left(terminos, prefijo)
+        fin = bisect_left(terminos, prefijo + '\U0010ffff', inicio)
+        if maximo is not None and fin - inicio > maximo:
+            return None
+        return [(terminos[i], frecuencias[i]) for i in range(inicio, fin) if frecuencias[i] > 0]
+
+    def que_contienen(self, fragmento, maximo=None):
+        """
+        Pares (termino, frecuencia) que contienen `fragmento` en cualquier
+        posición (recorrido lineal del vocabulario, no de los textos), o
+        None si son más de `maximo`.
+        """
+        terminos, frecuencias = self._datos
+        encontrados = []
+        for termino, documentos in zip(terminos, frecuencias):
+            if documentos > 0 and fragmento in termino:
+                encontrados.append((termino, documentos))
+                if maximo is not None and len(encontrados) > maximo:
+                    return None
+        return encontrados
+
+    def buscar(self, prefijo, limite=10):
+        """Términos que empiezan con `prefijo`, de mayor a menor frecuencia."""
+        terminos, frecuencias = self._datos
+        inicio = bisect_left(terminos, prefijo)
+        fin = bisect_left(terminos, prefijo + '\U0010ffff', inicio)
+        mejores = heapq.nlargest(
+            limite,
+            (posicion for posicion in range(inicio, fin) if frecuencias[posicion] > 0),
+            key=lambda posicion: (frecuencias[posicion], -posicion)
+        )
+        return [(terminos[posicion], frecuencias[posicion]) for posicion in mejores]
+
+
+def _frecuencias(usuario_id):
+    from ..models import FrecuenciaTermino
+
+    if usuario_id is not None:
+        return FrecuenciaTermino.objects.filter(usuario_id=usuario_id)
+    return FrecuenciaTermino.objects.all()
+
+
+def _leer(usuario_id, terminos=None):
+    """Pares (termino, documentos) del ámbito; el global suma entre usuarios."""
+    filas = _frecuencias(usuario_id)
+    if terminos is not None:
+        filas = filas.filter(termino__in=terminos)
+    if usuario_id is not None:
+        return filas.values_list('termino', 'documentos')
+    return filas.order_by().values('termino').annotate(total=Sum('documentos')).values_list('termino', 'total')
+
+
+def _construir(usuario_id, version):
+    revisado = timezone.now()
+    return DiccionarioTerminos(
+        [(termino, documentos) for termino, documentos in _leer(usuario_id) if documentos > 0],
+        version,
+        revisado
+    )
+
+
+def _refrescar(diccionario, usuario_id):
+    """
+    Lee solo los términos cuya frecuencia cambió desde el último refresco
+    (índice por fecha de cambio) y los aplica al diccionario. Devuelve
+    False si hay demasiados cambios y conviene reconstruir.
+    """
+    ahora = timezone.now()
+    cambiados = list(
+        _frecuencias(usuario_id).filter(
+            actualizado_en__gte=diccionario.revisado - MARGEN_CAMBIOS
+        ).values_list('termino', flat=True).distinct()[:MAX_CAMBIOS_INCREMENTALES + 1]
+    )
+    if len(cambiados) > MAX_CAMBIOS_INCREMENTALES:
+        return False
+
+    cambios = {}
+    for i in range(0, len(cambiados), TAMAÑO_LOTE_TERMINOS):
+        cambios.update(_leer(usuario_id, cambiados[i:i + TAMAÑO_LOTE_TERMINOS]))
+    diccionario.aplicar(cambios)
+    diccionario.revisado = ahora
+    return True
+
+
+def diccionario(usuario_id=None):
+    """
+    Diccionario de términos del usuario (o global si usuario_id es None).
+
+    Se construye la primera vez desde FrecuenciaTermino (mantenida en cada
+    ingesta, eliminación, restauración y purga). Luego solo se refresca
+    cuando cambia la versión de la colección (VersionColeccion, compartida
+    por todos los procesos), leyendo únicamente los términos modificados.
+    """
+    ambito = cache_busqueda.ambito_busqueda(usuario_id)
+    version = versiones.version(usuario_id)
+
+    with _bloqueo:
+        actual = _diccionarios.get(ambito)
+        if actual is not None:
+            _diccionarios.move_to_end(ambito)
+
+    if actual is None or time.monotonic() - actual.construido > MAX_ANTIGUEDAD_SEGUNDOS:
+        actual = _construir(usuario_id, version)
+    elif actual.version != version:
+        with _bloqueo:
+            if not _refrescar(actual, usuario_id):
+                actual = _construir(usuario_id, version)
+            actual.version = version
+
+    with _bloqueo:
+        _diccionarios[ambito] = actual
+        _diccionarios.move_to_end(ambito)
+        while len(_diccionarios) > MAX_DICCIONARIOS:
+            _diccionarios.popitem(last=False)
+    return actual
+
+
+def descartar_diccionarios():
+    """Vacía los diccionarios en memoria del proceso."""
+    with _bloqueo:
+        _diccionarios.clear()
+
+
+def sugerir(consulta, usuario_id=None, limite=10):
+    """
+    Completa el último término de la consulta con los términos indexados
+    más frecuentes que empiezan igual.
+
+    Returns:
+        (prefijo normalizado, lista de dicts con termino, documentos y la
+        consulta completada)
+    """
+    terminos = list(tokenizar(consulta or ''))
+    if not terminos:
+        return '', []
+    prefijo, inicio, _ = terminos[-1]
+    base = consulta[:inicio]
+    return prefijo, [
+        {'termino': termino, 'documentos': documentos, 'consulta': base + termino}
+        for termino, documentos in diccionario(usuario_id).buscar(prefijo, limite)
+    ]
@@ -0,0 +1,124 @@
+import re
+from django.db.models import Func, IntegerField
+from django.db.models.functions import Length
+from .indice_busqueda import SEPARADOR_PAGINA
+
+PATRON_RANGO = re.compile(r'^\s*(bytes|chars)\s*=\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+class RangoNoSatisfacible(Exception):
+    """El rango solicitado queda fuera del texto (HTTP 416)."""
+
+    def __init__(self, total):
+        super().__init__(f"Rango fuera del texto (total {total})")
+        self.total = total
+
+
+class LongitudBytes(Func):
+    """Longitud en bytes (UTF-8) de una columna de texto, calculada en la base de datos."""
+    function = 'OCTET_LENGTH'
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='LENGTH(CAST(%(expressions)s AS BLOB))', **extra_context)
+
+
+def parsear_rango(cabecera):
+    """
+    Interpreta una cabecera Range de un solo rango.
+
+    Soporta 'bytes=a-b', 'bytes=a-', 'bytes=-n' y la misma sintaxis con la
+    unidad 'chars' (posiciones de caracteres).
+
+    Returns:
+        (unidad, inicio, fin) con fin inclusivo o None si falta; para
+        rangos de sufijo inicio es None y fin es la cantidad solicitada.
+        None si la cabecera no es válida (se ignora, como indica RFC 9110).
+    """
+    coincidencia = PATRON_RANGO.match(cabecera or '')
+    if not coincidencia:
+        return None
+    unidad, inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        return unidad, None, int(fin)
+    inicio = int(inicio)
+    fin = int(fin) if fin else None
+    if fin is not None and fin < inicio:
+        return None
+    return unidad, inicio, fin
+
+
+def tamaños_paginas(paginas, unidad):
+    """
+    Tamaño de cada página en la unidad pedida, calculado en la base de datos.
+    El separador de página cuenta como un carácter/byte al final de cada
+    página salvo la última.
+
+    Returns:
+        Lista de tuplas (numero, tamaño)
+    """
+    medida = LongitudBytes('texto') if unidad == 'bytes' else Length('texto')
+    tamaños = list(paginas.order_by('numero').annotate(tamaño=medida).values_list('numero', 'tamaño'))
+    return [
+        (numero, tamaño + (1 if i < len(tamaños) - 1 else 0))
+        for i, (numero, tamaño) in enumerate(tamaños)
+    ]
+
+
+def resolver_rango(tamaños, inicio, fin):
+    """
+    Traduce un rango (fin inclusivo, inicio None para sufijos) a posiciones
+    absolutas y a los cortes necesarios en cada página.
+
+    Returns:
+        (inicio, fin, total, cortes) donde cortes es {numero: (desde, hasta)}
+        relativo a cada página
+    """
+    total = sum(tamaño for _, tamaño in tamaños)
+    if inicio is None:
+        inicio, fin = max(0, total - fin), total - 1
+    elif fin is None or fin >= total:
+        fin = total - 1
+    if inicio >= total:
+        raise RangoNoSatisfacible(total)
+
+    cortes = {}
+    desplazamiento = 0
+    for numero, tamaño in tamaños:
+        pagina_inicio, pagina_fin = desplazamiento, desplazamiento + tamaño
+        if pagina_fin > inicio and pagina_inicio <= fin:
+            cortes[numero] = (
+                max(inicio, pagina_inicio) - pagina_inicio,
+                min(fin + 1, pagina_fin) - pagina_inicio
+            )
+        desplazamiento = pagina_fin
+    return inicio, fin, total, cortes
+
+
+def generar_texto(paginas, unidad='chars', cortes=None, ultima_pagina=None, lote=20):
+    """
+    Genera el texto de las páginas en streaming, una página a la vez.
+
+    Args:
+        paginas: queryset de PaginaDocumento ya filtrado
+        unidad: 'bytes' o 'chars' (unidad en que se expresan los cortes)
+        cortes: {numero: (desde, hasta)} opcional para recortar páginas
+        ultima_pagina: número de la última página del documento; el separador
+            se emite después de toda página que no sea la última
+    """
+    for pagina in paginas.order_by('numero').only('numero', 'texto').iterator(chunk_size=lote):
+        texto = pagina.texto
+        if pagina.numero != ultima_pagina:
+            texto += SEPARADOR_PAGINA
+
+        if unidad == 'bytes':
+            segmento = texto.encode('utf-8')
+            if cortes:
+                segmento = segmento[slice(*cortes[pagina.numero])]
+            yield segmento
+        else:
+            if cortes:
+                texto = texto[slice(*cortes[pagina.numero])]
+            yield texto.encode('utf-8')
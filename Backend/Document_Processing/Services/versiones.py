@@ -0,0 +1,38 @@
+import uuid
+from . import cache_busqueda
+
+
+def renovar(usuario_ids):
+    """
+    Renueva la versión de las colecciones de los usuarios indicados y la
+    global con un único upsert (INSERT ... ON CONFLICT DO UPDATE).
+
+    Debe llamarse dentro de la transacción del cambio: la versión nueva se
+    confirma junto con los datos y es la misma para todos los procesos (a
+    diferencia de las generaciones de la caché, que pueden ser locales).
+    """
+    from ..models import VersionColeccion
+
+    ambitos = [cache_busqueda.ambito_busqueda(usuario_id) for usuario_id in sorted(set(usuario_ids))]
+    if not ambitos:
+        return
+    ambitos.append(cache_busqueda.ambito_busqueda())
+    VersionColeccion.objects.bulk_create(
+        [VersionColeccion(ambito=ambito, version=uuid.uuid4()) for ambito in ambitos],
+        update_conflicts=True,
+        unique_fields=['ambito'],
+        update_fields=['version']
+    )
+
+
+def version(usuario_id=None):
+    """
+    Versión vigente de la colección del usuario (o global si usuario_id es
+    None). None si todavía no tuvo cambios: la primera modificación crea
+    la fila, así que el valor cambia igual.
+    """
+    from ..models import VersionColeccion
+
+    return VersionColeccion.objects.filter(
+        ambito=cache_busqueda.ambito_busqueda(usuario_id)
+    ).values_list('version', flat=True).first()
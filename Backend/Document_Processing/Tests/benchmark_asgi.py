@@ -0,0 +1,247 @@
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+import asyncio
+from unittest import mock
+import fitz
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from Document_Processing.Services import concurrencia
+from Document_Processing.Services.pdf_extractor import ExtraccionCancelada, PDFExtractor
+
+"""
+Prueba de carga de las vistas asíncronas bajo ASGI.
+
+Llama a la aplicación ASGI directamente (sin servidor ni red) sobre una
+base SQLite de prueba en un archivo temporal (bajo ASGI cada petición usa
+su propia conexión): N subidas simultáneas de PDFs escaneados mientras un
+cliente consulta perfil/ y estadisticas/ en bucle, e informa la latencia
+de esas consultas (mediana, p95 y máxima) en tres escenarios:
+
+- sin carga
+- subidas con la vista asíncrona (extracción en el ejecutor acotado)
+- subidas con la extracción en el hilo de cada petición, como la vista
+  síncrona anterior bajo ASGI: todas las extracciones a la vez
+
+El OCR se simula para no depender de tesseract: por cada página, un
+proceso hijo consume SEGUNDOS_OCR_PAGINA de CPU, como tesseract. Con la
+extracción sin límite todas las subidas compiten por la CPU con las
+consultas; con el ejecutor acotado solo MAX_EXTRACCIONES.
+
+Al final mide una subida cuyo cliente se desconecta a un tercio de la
+extracción: cuánto tarda el hilo del ejecutor en liberarse.
+
+Uso:
+    python benchmark_asgi.py [subidas=12] [paginas=5]
+"""
+
+SEGUNDOS_OCR_PAGINA = 0.15
+
+LIMITE = 'limite-benchmark-asgi'
+LINEA = 'Contrato de servicios entre las partes con condiciones de pago y plazos de entrega.'
+
+
+def generar_pdf(paginas):
+    pdf = fitz.open()
+    for numero in range(paginas):
+        pdf.new_page().insert_text((72, 72), f'{LINEA} Página {numero}.\n' * 50, fontsize=7)
+    return pdf.tobytes()
+
+
+def ocr_simulado(segundos):
+    """Trabajo de CPU en un proceso hijo (como tesseract para una página)."""
+    subprocess.run([
+        sys.executable, '-S', '-c',
+        f'import time\nfin = time.process_time() + {segundos}\nwhile time.process_time() < fin: pass'
+    ], check=True)
+
+
+class ExtractorOCRSimulado(PDFExtractor):
+    """PyMuPDF real seguido del OCR simulado de cada página (PDF escaneado)."""
+
+    def extract_text(self, pdf_path, cancelled=None):
+        resultado = super().extract_text(pdf_path, cancelled)
+        for _ in resultado['pages']:
+            if cancelled is not None and cancelled():
+                raise ExtraccionCancelada()
+            ocr_simulado(SEGUNDOS_OCR_PAGINA)
+        return resultado
+
+
+def multipart(nombre, contenido):
+    return (
+        f'--{LIMITE}\r\nContent-Disposition: form-data; name="archivo"; filename="{nombre}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'
+    ).encode() + contenido + f'\r\n--{LIMITE}--\r\n'.encode()
+
+
+async def peticion(aplicacion, metodo, ruta, token, cuerpo=b'', content_type=None, desconectar=None):
+    """
+    Una petición HTTP por la interfaz ASGI. Con desconectar (asyncio.Event),
+    el cliente envía http.disconnect en cuanto se activa. Devuelve (status, segundos).
+    """
+    cabeceras = [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())]
+    if cuerpo:
+        cabeceras += [(b'content-type', content_type.encode()), (b'content-length', str(len(cuerpo)).encode())]
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': metodo, 'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(),
+        'query_string': b'', 'root_path': '', 'headers': cabeceras,
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    enviado = False
+    respuesta = {'status': None}
+
+    async def receive():
+        nonlocal enviado
+        if not enviado:
+            enviado = True
+            return {'type': 'http.request', 'body': cuerpo, 'more_body': False}
+        await (desconectar or asyncio.Event()).wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            respuesta['status'] = mensaje['status']
+
+    inicio = time.perf_counter()
+    await aplicacion(scope, receive, send)
+    return respuesta['status'], time.perf_counter() - inicio
+
+
+async def sondear(aplicacion, token, hasta):
+    """Consulta perfil/ y estadisticas/ alternadamente hasta que termine la carga."""
+    latencias = []
+    rutas = ['/api/v1/perfil/', '/api/v1/documentos/estadisticas/']
+    while not hasta.done():
+        estado, segundos = await peticion(aplicacion, 'GET', rutas[len(latencias) % 2], token)
+        assert estado == 200, estado
+        latencias.append(segundos)
+        await asyncio.sleep(0.02)
+    return latencias
+
+
+async def escenario(aplicacion, token, subidas, pdf):
+    cuerpo = multipart('carga.pdf', pdf)
+    tipo = f'multipart/form-data; boundary={LIMITE}'
+    inicio = time.perf_counter()
+    if subidas:
+        carga = asyncio.gather(*(
+            peticion(aplicacion, 'POST', '/api/v1/documentos/extraer-texto/', token, cuerpo, tipo)
+            for _ in range(subidas)
+        ))
+    else:
+        carga = asyncio.ensure_future(asyncio.sleep(3))
+    latencias = await sondear(aplicacion, token, carga)
+    resultados = await carga
+    duracion = time.perf_counter() - inicio
+    if subidas:
+        assert all(estado == 201 for estado, _ in resultados), resultados
+    return latencias, duracion
+
+
+async def extraer_sin_limite(ruta):
+    """La extracción como en la vista síncrona: en el hilo de la petición, sin límite."""
+    return await sync_to_async(concurrencia.PDFExtractor().extract_text)(ruta)
+
+
+async def desconexion(aplicacion, token, pdf):
+    inicios, fines = [], []
+
+    class ExtractorMedido(ExtractorOCRSimulado):
+        def extract_text(self, *args, **kwargs):
+            inicios.append(time.perf_counter())
+            try:
+                return super().extract_text(*args, **kwargs)
+            finally:
+                fines.append(time.perf_counter())
+
+    async def esperar(lista, cantidad):
+        while len(lista) < cantidad:
+            await asyncio.sleep(0.005)
+
+    desconectar = asyncio.Event()
+    tipo = f'multipart/form-data; boundary={LIMITE}'
+    with mock.patch.object(concurrencia, 'PDFExtractor', ExtractorMedido):
+        await peticion(aplicacion, 'POST', '/api/v1/documentos/extraer-texto/', token,
+                       multipart('completa.pdf', pdf), tipo)
+        completa = fines[0] - inicios[0]
+
+        tarea = asyncio.ensure_future(peticion(
+            aplicacion, 'POST', '/api/v1/documentos/extraer-texto/', token,
+            multipart('cancelada.pdf', pdf), tipo, desconectar
+        ))
+        await esperar(inicios, 2)
+        await asyncio.sleep(completa / 3)
+        desconectado = time.perf_counter()
+        desconectar.set()
+        await tarea
+        await esperar(fines, 2)
+    return completa, fines[1] - desconectado
+
+
+def resumen(etiqueta, latencias, duracion):
+    ordenadas = sorted(latencias)
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    print(f'  {etiqueta:<36} {len(latencias):>6} {statistics.median(latencias) * 1000:>10.1f} '
+          f'{p95 * 1000:>10.1f} {ordenadas[-1] * 1000:>10.1f} {duracion:>8.1f}s')
+
+
+def main():
+    subidas = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    paginas = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    directorio = tempfile.mkdtemp()
+    nombre_original = connection.settings_dict['NAME']
+    connection.settings_dict['TEST']['NAME'] = os.path.join(directorio, 'benchmark_asgi.sqlite3')
+    # Las escrituras simultáneas esperan el bloqueo de SQLite en lugar de fallar
+    connection.settings_dict['OPTIONS']['timeout'] = 60
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(ALMACEN_BLOBS={'DIRECTORIO': os.path.join(directorio, 'blobs')}):
+            usuario = User.objects.create_user(username='carga', password='x')
+            token = str(RefreshToken.for_user(usuario).access_token)
+            aplicacion = get_asgi_application()
+            pdf = generar_pdf(paginas)
+
+            print(f'{subidas} subidas simultáneas de {paginas} páginas, '
+                  f'{concurrencia.configuracion()["MAX_EXTRACCIONES"]} extracciones a la vez, '
+                  f'{os.cpu_count()} CPUs')
+            print(f'  {"perfil/ y estadisticas/ durante":<36} {"n":>6} {"mediana ms":>10} '
+                  f'{"p95 ms":>10} {"máx ms":>10} {"carga":>9}')
+            resumen('sin carga', *asyncio.run(escenario(aplicacion, token, 0, pdf)))
+            with mock.patch.object(concurrencia, 'PDFExtractor', ExtractorOCRSimulado):
+                resumen('subidas asíncronas', *asyncio.run(escenario(aplicacion, token, subidas, pdf)))
+                with mock.patch.object(concurrencia, 'extraer', extraer_sin_limite):
+                    resumen('subidas con extracción sin límite',
+                            *asyncio.run(escenario(aplicacion, token, subidas, pdf)))
+
+            completa, liberado = asyncio.run(desconexion(aplicacion, token, pdf))
+            print(f'\nDesconexión a 1/3 de una subida de {completa:.2f}s: '
+                  f'hilo del ejecutor libre {liberado * 1000:.0f} ms después')
+            print(f'Documentos guardados: {usuario.documentos_procesados.count()} '
+                  f'de {2 * subidas + 2} subidas (la cancelada no se guarda)')
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from Document_Processing.Services.similitud import (
+    NUM_VALORES,
+    UMBRAL_CASI_DUPLICADO,
+    calcular_firma,
+    cubetas,
+    similitud,
+)
+
+"""
+Benchmark de búsqueda de casi duplicados (MinHash + LSH).
+
+Carga N firmas de un mismo usuario (peor caso: la búsqueda se acota por
+usuario) en una base SQLite temporal con el mismo esquema e índice que
+FirmaDocumento y CubetaSimilitud, y compara:
+
+- Búsqueda LSH: igualdad de claves sobre el índice (usuario, cubeta) y
+  verificación de los candidatos con la firma completa (misma consulta
+  que Services.similitud.buscar_casi_duplicados)
+- Recorrido lineal: comparar la firma contra todas las demás
+
+Las firmas de relleno son aleatorias; se agregan grupos de textos casi
+duplicados (palabras cambiadas o una "página" reemplazada) para medir la
+exhaustividad.
+
+Uso:
+    python benchmark_casi_duplicados.py [documentos=1000000] [consultas=200]
+"""
+
+USUARIO_ID = 1
+PALABRAS_POR_TEXTO = 3000
+GRUPOS_CASI_DUPLICADOS = 50
+LOTE = 10000
+
+CONSULTA_LSH = f"""
+    SELECT f.documento_id, f.firma
+    FROM firma f
+    WHERE f.documento_id IN (
+        SELECT c.documento_id FROM cubeta c
+        WHERE c.usuario_id = ? AND c.cubeta IN ({', '.join('?' * 16)}) AND c.documento_id != ?
+    )
+"""
+
+
+def crear_esquema(conexion):
+    conexion.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE firma (documento_id INTEGER PRIMARY KEY, firma BLOB NOT NULL);
+        CREATE TABLE cubeta (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            documento_id INTEGER NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            cubeta BIGINT NOT NULL
+        );
+    """)
+
+
+def insertar(conexion, documentos):
+    conexion.executemany('INSERT INTO firma VALUES (?, ?)', documentos)
+    conexion.executemany(
+        'INSERT INTO cubeta (documento_id, usuario_id, cubeta) VALUES (?, ?, ?)',
+        [(documento_id, USUARIO_ID, clave) for documento_id, firma in documentos for clave in cubetas(firma)]
+    )
+
+
+def textos_casi_duplicados(generador, vocabulario):
+    """Un texto base y tres variantes: 2% de palabras cambiadas, una página nueva y reordenado de páginas."""
+    palabras = [generador.choice(vocabulario) for _ in range(PALABRAS_POR_TEXTO)]
+    cambiadas = [generador.choice(vocabulario) if generador.random() < 0.02 else p for p in palabras]
+    pagina_nueva = palabras[:-300] + [generador.choice(vocabulario) for _ in range(300)]
+    paginas = [palabras[i:i + 500] for i in range(0, PALABRAS_POR_TEXTO, 500)]
+    paginas[0], paginas[1] = paginas[1], paginas[0]
+    reordenado = [p for pagina in paginas for p in pagina]
+    return [' '.join(variante) for variante in (palabras, cambiadas, pagina_nueva, reordenado)]
+
+
+def buscar_lsh(conexion, documento_id, firma, umbral):
+    parametros = [USUARIO_ID, *cubetas(firma), documento_id]
+    return [
+        candidato for candidato, firma_candidato in conexion.execute(CONSULTA_LSH, parametros)
+        if similitud(firma, firma_candidato) >= umbral
+    ]
+
+
+def buscar_lineal(conexion, documento_id, firma, umbral):
+    return [
+        candidato for candidato, firma_candidato in conexion.execute('SELECT documento_id, firma FROM firma')
+        if candidato != documento_id and similitud(firma, firma_candidato) >= umbral
+    ]
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    generador = random.Random(42)
+    vocabulario = [f'palabra{i}' for i in range(20000)]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        conexion = sqlite3.connect(os.path.join(directorio, 'benchmark.sqlite3'))
+        crear_esquema(conexion)
+
+        # Grupos de casi duplicados al comienzo; el resto, firmas aleatorias
+        inicio = time.perf_counter()
+        grupos = []
+        siguiente_id = 1
+        for _ in range(GRUPOS_CASI_DUPLICADOS):
+            ids = []
+            documentos = []
+            for texto in textos_casi_duplicados(generador, vocabulario):
+                documentos.append((siguiente_id, calcular_firma(texto)))
+                ids.append(siguiente_id)
+                siguiente_id += 1
+            insertar(conexion, documentos)
+            grupos.append(ids)
+        while siguiente_id <= total:
+            cantidad = min(LOTE, total - siguiente_id + 1)
+            insertar(conexion, [
+                (siguiente_id + i, generador.randbytes(4 * NUM_VALORES)) for i in range(cantidad)
+            ])
+            siguiente_id += cantidad
+        conexion.execute('CREATE INDEX cubeta_usuario_idx ON cubeta (usuario_id, cubeta)')
+        conexion.commit()
+        carga = time.perf_counter() - inicio
+        print(f'{total} firmas cargadas en {carga:.1f}s '
+              f'({os.path.getsize(os.path.join(directorio, "benchmark.sqlite3")) / 2 ** 20:.0f} MB)')
+
+        firmas = dict(conexion.execute(
+            'SELECT documento_id, firma FROM firma WHERE documento_id <= ?', (GRUPOS_CASI_DUPLICADOS * 4,)
+        ))
+
+        # Exhaustividad: cada variante debe encontrar a las demás de su grupo
+        esperados = encontrados = 0
+        for ids in grupos:
+            for documento_id in ids:
+                resultado = set(buscar_lsh(conexion, documento_id, firmas[documento_id], UMBRAL_CASI_DUPLICADO))
+                reales = {
+                    otro for otro in ids
+                    if otro != documento_id and similitud(firmas[documento_id], firmas[otro]) >= UMBRAL_CASI_DUPLICADO
+                }
+                esperados += len(reales)
+                encontrados += len(reales & resultado)
+        print(f'Exhaustividad LSH (umbral {UMBRAL_CASI_DUPLICADO}): {encontrados}/{esperados}')
+
+        # Latencia LSH: consultas sobre documentos con y sin casi duplicados
+        muestra = [generador.randint(1, total) for _ in range(consultas)]
+        firmas_muestra = dict(conexion.execute(
+            f'SELECT documento_id, firma FROM firma WHERE documento_id IN ({", ".join("?" * len(muestra))})', muestra
+        ))
+        tiempos = []
+        for documento_id in muestra:
+            inicio = time.perf_counter()
+            buscar_lsh(conexion, documento_id, firmas_muestra[documento_id], UMBRAL_CASI_DUPLICADO)
+            tiempos.append(time.perf_counter() - inicio)
+        print(f'LSH     {consultas} consultas: p50 {percentil(tiempos, 0.5) * 1000:.2f} ms, '
+              f'p95 {percentil(tiempos, 0.95) * 1000:.2f} ms')
+
+        inicio = time.perf_counter()
+        buscar_lineal(conexion, muestra[0], firmas_muestra[muestra[0]], UMBRAL_CASI_DUPLICADO)
+        print(f'Lineal  1 consulta: {(time.perf_counter() - inicio) * 1000:.0f} ms')
+        conexion.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from collections import Counter
+from Document_Processing.fields import comprimir, descomprimir, identificador_diccionario, zstandard
+from Document_Processing.Services.indice_busqueda import PATRON_TOKEN
+from Document_Processing.Services.normalizacion import normalizar_texto
+from Document_Processing.Services.pdf_extractor import PDFExtractor
+
+"""
+Benchmark de almacenamiento comprimido de texto_extraido.
+
+Mide, para cada configuración de compresión (settings.TEXTO_COMPRIMIDO),
+la relación de tamaño y la latencia de escritura (compresión) y lectura
+(descompresión) sobre el texto de los PDFs de ejemplo del repositorio.
+Es el codec con que el almacén de blobs guarda los textos (guardar_texto).
+
+Solo cubre la copia canónica del texto: texto_normalizado, el texto por
+página (PaginaDocumento) y las posiciones del índice se guardan sin
+comprimir en la base de datos. Al final se informa su tamaño para no
+leer la relación como la del almacenamiento total del documento.
+
+Uso:
+    python benchmark_compresion.py [carpeta_con_pdfs] [repeticiones]
+"""
+
+REPETICIONES = 5
+
+
+def cargar_textos(carpeta):
+    extractor = PDFExtractor()
+    textos = {}
+    for nombre in sorted(os.listdir(carpeta)):
+        if nombre.lower().endswith('.pdf'):
+            texto = extractor.extract_with_pymupdf(os.path.join(carpeta, nombre))
+            if texto.strip():
+                textos[nombre] = texto
+    return textos
+
+
+def diccionario_zlib(textos, tamaño=32 * 1024):
+    """Diccionario de palabras frecuentes (mismo criterio que entrenar_diccionario)."""
+    frecuencias = Counter()
+    for texto in textos:
+        frecuencias.update(PATRON_TOKEN.findall(texto))
+    palabras, total = [], 0
+    for palabra, _ in frecuencias.most_common():
+        codificada = (palabra + ' ').encode('utf-8')
+        if total + len(codificada) > tamaño:
+            break
+        palabras.append(codificada)
+        total += len(codificada)
+    contenido = b''.join(reversed(palabras))
+    return identificador_diccionario(contenido), contenido
+
+
+def medir(texto, repeticiones, **opciones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        comprimido = comprimir(texto, **opciones)
+    escritura = (time.perf_counter() - inicio) / repeticiones
+
+    diccionarios = dict([opciones['diccionario']]) if opciones.get('diccionario') else None
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        descomprimir(comprimido, diccionarios)
+    lectura = (time.perf_counter() - inicio) / repeticiones
+    return len(comprimido), escritura, lectura
+
+
+def main():
+    carpeta = os.path.join(os.path.dirname(__file__), '..', 'Utils', 'PDFs', 'Text')
+    if len(sys.argv) > 1:
+        carpeta = sys.argv[1]
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else REPETICIONES
+
+    textos = cargar_textos(carpeta)
+    if not textos:
+        print(f'No se encontraron PDFs con texto en: {carpeta}')
+        sys.exit(1)
+
+    configuraciones = [
+        ('zlib-1', {'algoritmo': 'zlib', 'nivel': 1, 'diccionario': False}),
+        ('zlib-6', {'algoritmo': 'zlib', 'nivel': 6, 'diccionario': False}),
+        ('zlib-9', {'algoritmo': 'zlib', 'nivel': 9, 'diccionario': False}),
+    ]
+    if zstandard:
+        configuraciones += [
+            ('zstd-3', {'algoritmo': 'zstd', 'nivel': 3, 'diccionario': False}),
+            ('zstd-19', {'algoritmo': 'zstd', 'nivel': 19, 'diccionario': False}),
+        ]
+
+    print(f'{"documento":<45} {"config":<12} {"original":>10} {"comprimido":>11} '
+          f'{"ratio":>7} {"escritura ms":>13} {"lectura ms":>11}')
+
+    totales = Counter()
+    for nombre, texto in textos.items():
+        original = len(texto.encode('utf-8'))
+        # Diccionario entrenado con los demás documentos (sin fuga de datos)
+        otros = [t for n, t in textos.items() if n != nombre] or [texto]
+        filas = configuraciones + [
+            ('zlib-6+dict', {'algoritmo': 'zlib', 'nivel': 6, 'diccionario': diccionario_zlib(otros)})
+        ]
+        for etiqueta, opciones in filas:
+            tamaño, escritura, lectura = medir(texto, repeticiones, **opciones)
+            totales[(etiqueta, 'original')] += original
+            totales[(etiqueta, 'comprimido')] += tamaño
+            print(f'{nombre[:44]:<45} {etiqueta:<12} {original:>10} {tamaño:>11} '
+                  f'{original / tamaño:>7.2f} {escritura * 1000:>13.2f} {lectura * 1000:>11.2f}')
+
+    print('\n--- Relación total por configuración ---')
+    for etiqueta in dict.fromkeys(etiqueta for etiqueta, _ in totales):
+        original = totales[(etiqueta, 'original')]
+        comprimido = totales[(etiqueta, 'comprimido')]
+        print(f'{etiqueta:<12} {original:>10} -> {comprimido:>10} bytes  ({original / comprimido:.2f}x)')
+
+    # Copias que no pasan por el codec (el índice invertido no se incluye)
+    normalizado = sum(len(normalizar_texto(texto).encode('utf-8')) for texto in textos.values())
+    paginas = sum(len(texto.encode('utf-8')) for texto in textos.values())
+    print('\n--- Copias sin comprimir en la base de datos ---')
+    print(f'{"normalizado":<12} {normalizado:>10} bytes')
+    print(f'{"páginas":<12} {paginas:>10} bytes')
+
+
+if __name__ == '__main__':
+    main()
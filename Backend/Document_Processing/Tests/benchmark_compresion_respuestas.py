@@ -0,0 +1,102 @@
+import json
+import os
+import random
+import sys
+import time
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from Document_Processing.Services import compresion
+
+"""
+Benchmark de la compresión de respuestas: costo de CPU contra bytes
+ahorrados.
+
+Arma respuestas JSON del detalle de documento (con texto_extraido) de
+varios tamaños típicos, con texto pseudoaleatorio a partir de un
+vocabulario de 3.000 palabras (menos repetitivo que un texto real, así
+que las relaciones de compresión son conservadoras). Para cada
+codificación disponible (gzip siempre; br y zstd si están instalados
+brotli y zstandard) y varios niveles mide:
+
+- Relación de compresión y bytes ahorrados
+- Milisegundos de CPU por respuesta y MB/s
+- KB ahorrados por ms de CPU: con un enlace de B MB/s, comprimir conviene
+  mientras este valor supere B (el ahorro de transferencia es mayor que el
+  tiempo de CPU agregado)
+
+Uso:
+    python benchmark_compresion_respuestas.py [repeticiones=20]
+"""
+
+TAMAÑOS = [('2 KB', 2 * 1024), ('20 KB', 20 * 1024), ('200 KB', 200 * 1024), ('2 MB', 2 * 1024 * 1024)]
+
+NIVELES = {
+    'gzip': ('NIVEL_GZIP', [1, 6, 9]),
+    'br': ('NIVEL_BROTLI', [1, 4, 9]),
+    'zstd': ('NIVEL_ZSTD', [1, 3, 9]),
+}
+
+
+def vocabulario(generador, cantidad=3000):
+    silabas = ['ca', 'de', 'ti', 'lo', 'ra', 'men', 'con', 'tra', 'pa', 'go', 'ción', 'es', 'nu', 'so', 'li', 'ta']
+    return [''.join(generador.choice(silabas) for _ in range(generador.randint(1, 4))) for _ in range(cantidad)]
+
+
+def cuerpo(generador, palabras, tamaño):
+    texto = []
+    largo = 0
+    while largo < tamaño:
+        linea = ' '.join(generador.choice(palabras) for _ in range(12)) + '.\n'
+        texto.append(linea)
+        largo += len(linea)
+    return json.dumps({
+        'id': 1,
+        'nombre_archivo': 'contrato.pdf',
+        'metodo_extraccion': 'pypdf',
+        'texto_extraido': ''.join(texto)[:tamaño],
+    }, ensure_ascii=False).encode('utf-8')
+
+
+def medir(datos, codificacion, config, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.process_time()
+        objeto = compresion._Compresor(codificacion, config)
+        comprimido = objeto.compress(datos) + objeto.flush()
+        tiempos.append(time.process_time() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2], len(comprimido)
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    generador = random.Random(42)
+    palabras = vocabulario(generador)
+    base = compresion.configuracion()
+
+    print(f'Codificaciones disponibles: {", ".join(compresion.disponibles())}')
+    print(f'Umbral configurado: {base["UMBRAL_BYTES"]} bytes\n')
+    for nombre, tamaño in TAMAÑOS:
+        datos = cuerpo(generador, palabras, tamaño)
+        print(f'{nombre} ({len(datos):,} bytes)')
+        for codificacion in compresion.disponibles():
+            clave, niveles = NIVELES[codificacion]
+            for nivel in niveles:
+                segundos, comprimido = medir(datos, codificacion, {**base, clave: nivel}, repeticiones)
+                ahorro = len(datos) - comprimido
+                ms = max(segundos * 1000, 1e-3)
+                print(
+                    f'  {codificacion:4} nivel {nivel}: relación {len(datos) / comprimido:5.2f}x  '
+                    f'{ms:8.2f} ms  {len(datos) / 1024 / 1024 / max(segundos, 1e-9):7.1f} MB/s  '
+                    f'{ahorro / 1024 / ms:8.1f} KB ahorrados/ms'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import tracemalloc
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from Document_Processing.models import DocumentoProcesado
+from Document_Processing.renderers import RenderizadorJSONRapido
+from Document_Processing.serializers import DocumentoListaSerializer
+from Document_Processing.Services import exportacion
+
+"""
+Benchmark de la exportación en streaming.
+
+Crea una base de prueba temporal (como el runner de tests) y, para dos
+tamaños de colección, mide filas por segundo y pico de memoria
+(tracemalloc) de:
+
+- Paginado: recorrer el listado de a 50 documentos, con COUNT(*) en cada
+  página (lo que hacía un cliente para exportar)
+- Exportación NDJSON, CSV y NDJSON con gzip (Services.exportacion)
+
+La memoria de la exportación no debe crecer con la cantidad de filas.
+
+Uso:
+    python benchmark_exportacion.py [filas=20000]
+"""
+
+TAMAÑO_PAGINA = 50
+TAMAÑO_INSERCION = 2000
+
+
+def cargar(usuario, total):
+    texto = 'Contrato de servicios entre las partes con condiciones de pago. ' * 20
+    for inicio in range(0, total, TAMAÑO_INSERCION):
+        DocumentoProcesado.objects.bulk_create([
+            DocumentoProcesado(
+                usuario=usuario,
+                nombre_archivo=f'documento_{i}.pdf',
+                tamaño_bytes=1000 + i,
+                texto_extraido=texto,
+                resumen_texto=texto[:200],
+                metodo_extraccion='pypdf',
+                tiempo_procesamiento='1.250'
+            )
+            for i in range(inicio, min(inicio + TAMAÑO_INSERCION, total))
+        ])
+
+
+def paginado(queryset):
+    filas = queryset.values(*DocumentoListaSerializer.CAMPOS_VALORES)
+    total = filas.count()
+    for desplazamiento in range(0, total, TAMAÑO_PAGINA):
+        filas.count()
+        pagina = filas[desplazamiento:desplazamiento + TAMAÑO_PAGINA]
+        yield RenderizadorJSONRapido().render(DocumentoListaSerializer.serializar_valores(pagina))
+
+
+def medir(bloques):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    tamaño = sum(len(bloque) for bloque in bloques)
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracion, pico, tamaño
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        usuario = User.objects.create_user(username='exportador', password='x')
+        cargados = 0
+        for filas in (total // 4, total):
+            cargar(usuario, filas - cargados)
+            cargados = filas
+            queryset = DocumentoProcesado.objects.por_usuario(usuario)
+            print(f'\n{filas} documentos')
+
+            casos = [
+                ('Paginado (50 + COUNT)', lambda: paginado(queryset)),
+                ('NDJSON', lambda: exportacion.exportar(queryset, 'ndjson')),
+                ('CSV', lambda: exportacion.exportar(queryset, 'csv')),
+                ('NDJSON gzip', lambda: exportacion.exportar(queryset, 'ndjson', gzip=True)),
+                ('NDJSON con texto', lambda: exportacion.exportar(queryset, 'ndjson', incluir_texto=True)),
+            ]
+            for nombre, generar in casos:
+                duracion, pico, tamaño = medir(generar())
+                print(f'  {nombre:22} {filas / duracion:10,.0f} filas/s  '
+                      f'pico {pico / 1024:8,.0f} KB  salida {tamaño / 1024 / 1024:7.1f} MB')
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import time
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from Document_Processing.models import DocumentoProcesado
+from Document_Processing.Services import importacion
+
+"""
+Benchmark de la importación masiva NDJSON.
+
+Crea una base de prueba temporal (como el runner de tests) y mide filas
+por segundo de:
+
+- Antes: un DocumentoProcesado.objects.create() por fila (lo que hace la
+  subida de PDFs: páginas, índice, firma y estadísticas por documento)
+- Después: Services.importacion.importar con distintos tamaños de lote
+
+Las filas tienen dos páginas de texto de unas 150 palabras distintas por
+documento, como un archivo legado típico.
+
+Uso:
+    python benchmark_importacion.py [filas=2000]
+"""
+
+PALABRAS = [
+    'contrato', 'factura', 'informe', 'anual', 'servicio', 'cliente', 'pago', 'entrega', 'plazo', 'firma',
+    'acta', 'anexo', 'cláusula', 'proveedor', 'importe', 'vencimiento', 'garantía', 'obra', 'licitación', 'recibo'
+]
+
+
+def lineas(total, prefijo):
+    for i in range(total):
+        pagina = ' '.join(f'{PALABRAS[(i * 7 + j) % len(PALABRAS)]}{j % 13}' for j in range(150))
+        yield json.dumps({
+            'nombre_archivo': f'{prefijo}_{i}.pdf',
+            'tamaño_bytes': 1000 + i,
+            'texto_extraido': f'{pagina}\f{pagina}',
+            'metodo_extraccion': 'pypdf',
+            'tiempo_procesamiento': '1.250'
+        }).encode('utf-8')
+
+
+def una_por_una(usuario, total):
+    for linea in lineas(total, 'individual'):
+        fila = json.loads(linea)
+        DocumentoProcesado.objects.create(usuario=usuario, **fila)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        usuario = User.objects.create_user(username='importador', password='x')
+
+        inicio = time.perf_counter()
+        una_por_una(usuario, total)
+        duracion = time.perf_counter() - inicio
+        print(f'{"create() por fila":22} {total / duracion:10,.0f} filas/s')
+
+        for lote in (100, 500, 2000):
+            resumen = importacion.importar(lineas(total, f'lote{lote}'), usuario.id, tamaño_lote=lote)
+            print(f'{f"importar (lote {lote})":22} {resumen["filas_por_segundo"]:10,.0f} filas/s')
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+import fitz
+from django.contrib.auth.models import User
+from django.db import connection
+from Document_Processing.Services.ingesta_directorio import ingerir
+
+"""
+Benchmark de la ingesta de un directorio de PDFs (ingerir_pdfs).
+
+Crea una base de prueba temporal (como el runner de tests) y un directorio
+con N PDFs nativos de varias páginas, y mide páginas por segundo de la
+ingesta con distintas cantidades de procesos. Cada corrida usa un usuario
+nuevo y sin punto de control.
+
+La extracción escala con los procesos hasta la cantidad de CPUs; la
+escritura por lotes corre siempre en el proceso principal.
+
+Uso:
+    python benchmark_ingesta.py [archivos=200] [paginas=5]
+"""
+
+LINEA = 'Contrato de servicios entre las partes con condiciones de pago y plazos de entrega.'
+
+
+def generar(directorio, archivos, paginas):
+    for i in range(archivos):
+        pdf = fitz.open()
+        for numero in range(paginas):
+            pdf.new_page().insert_text((72, 72), f'{LINEA} Documento {i}, página {numero}.\n' * 40, fontsize=8)
+        pdf.save(os.path.join(directorio, f'documento_{i:05}.pdf'))
+
+
+def main():
+    archivos = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paginas = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    directorio = tempfile.mkdtemp()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        generar(directorio, archivos, paginas)
+        print(f'{archivos} PDFs de {paginas} páginas, {os.cpu_count()} CPUs')
+        for procesos in sorted({1, 2, os.cpu_count() or 1}):
+            usuario = User.objects.create_user(username=f'ingesta{procesos}', password='x')
+            inicio = time.perf_counter()
+            resumen = ingerir(directorio, usuario.id, procesos=procesos, tamaño_lote=100)
+            duracion = time.perf_counter() - inicio
+            print(f'  {procesos:2} procesos: {resumen["paginas"] / duracion:8,.1f} páginas/s '
+                  f'({resumen["importados"]} documentos en {duracion:.1f}s)')
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    main()
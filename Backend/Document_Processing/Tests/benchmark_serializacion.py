@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import random
+import django
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+from Document_Processing.models import DocumentoProcesado
+from Document_Processing.renderers import RenderizadorJSONRapido
+from Document_Processing.Services.indice_busqueda import obtener_fragmentos
+from Document_Processing.serializers import DocumentoBusquedaSerializer, DocumentoListaSerializer
+
+"""
+Benchmark de serialización de listados y búsquedas.
+
+Crea una base de prueba temporal (como el runner de tests) con N
+documentos y mide, por cada 1.000 filas, la lectura + serialización +
+render JSON de:
+
+- Antes: instancias del modelo con ModelSerializer (SerializerMethodField
+  por fila) y JSONRenderer de DRF
+- Después: filas values() con serializar_valores y RenderizadorJSONRapido
+
+Ambos caminos leen las mismas filas. Los fragmentos de búsqueda (mismas
+consultas al índice en los dos caminos, por páginas de 50 resultados como
+la vista) se calculan una vez aparte y se miden por separado, de modo que
+la comparación es solo de lectura, serialización y render.
+
+Uso:
+    python benchmark_serializacion.py [filas=1000] [repeticiones=20]
+"""
+
+PALABRAS = ['contrato', 'factura', 'informe', 'anual', 'servicio', 'cliente', 'pago', 'entrega', 'plazo', 'firma']
+TERMINO = 'contrato'
+TAMAÑO_PAGINA = 50
+
+
+def cargar(total, generador):
+    usuarios = [
+        User.objects.create_user(username=f'usuario{i}', password='x', first_name='Nombre', last_name=f'Apellido {i}')
+        for i in range(5)
+    ]
+    for i in range(total):
+        texto = ' '.join(generador.choice(PALABRAS) for _ in range(200))
+        DocumentoProcesado.objects.create(
+            usuario=usuarios[i % len(usuarios)],
+            nombre_archivo=f'documento_{i}.pdf',
+            tamaño_bytes=generador.randint(1000, 5_000_000),
+            texto_extraido=f'{TERMINO} {texto}',
+            metodo_extraccion='pypdf'
+        )
+
+
+def paginas(filas):
+    return [filas[i:i + TAMAÑO_PAGINA] for i in range(0, len(filas), TAMAÑO_PAGINA)]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    generador = random.Random(42)
+
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        inicio = time.perf_counter()
+        cargar(total, generador)
+        print(f'{total} documentos cargados en {time.perf_counter() - inicio:.1f}s')
+
+        listado = DocumentoProcesado.objects.activos().defer(*DocumentoProcesado.CAMPOS_TEXTO)
+        busqueda = DocumentoProcesado.objects.busqueda_global(TERMINO).defer(*DocumentoProcesado.CAMPOS_TEXTO)
+
+        inicio = time.perf_counter()
+        fragmentos = {}
+        for pagina in paginas(list(busqueda.values_list('id', flat=True))):
+            fragmentos.update(obtener_fragmentos(pagina, TERMINO))
+        t_fragmentos = time.perf_counter() - inicio
+        contexto = {'termino_busqueda': TERMINO, 'fragmentos': fragmentos}
+
+        def busqueda_antes():
+            # Lo que hace el ListSerializer con los fragmentos ya calculados
+            serializer = DocumentoBusquedaSerializer(context=contexto)
+            return JSONRenderer().render([
+                serializer.to_representation(documento) for documento in busqueda.select_related('usuario')
+            ])
+
+        def busqueda_despues():
+            return RenderizadorJSONRapido().render(DocumentoBusquedaSerializer.serializar_valores(
+                busqueda.values(*DocumentoBusquedaSerializer.CAMPOS_VALORES), contexto
+            ))
+
+        casos = [
+            (
+                'Listado',
+                lambda: JSONRenderer().render(DocumentoListaSerializer(listado, many=True).data),
+                lambda: RenderizadorJSONRapido().render(DocumentoListaSerializer.serializar_valores(
+                    listado.values(*DocumentoListaSerializer.CAMPOS_VALORES)
+                )),
+            ),
+            ('Búsqueda', busqueda_antes, busqueda_despues),
+        ]
+        escala = 1000 / total
+        for nombre, antes, despues in casos:
+            t_antes = medir(antes, repeticiones) * escala
+            t_despues = medir(despues, repeticiones) * escala
+            print(f'{nombre:9} por 1.000 filas: antes {t_antes * 1000:7.1f} ms, '
+                  f'después {t_despues * 1000:7.1f} ms ({t_antes / t_despues:.1f}x)')
+
+        filas = DocumentoBusquedaSerializer.serializar_valores(
+            busqueda.values(*DocumentoBusquedaSerializer.CAMPOS_VALORES), contexto
+        )
+        t_json = medir(lambda: JSONRenderer().render(filas), repeticiones) * escala
+        t_orjson = medir(lambda: RenderizadorJSONRapido().render(filas), repeticiones) * escala
+        print(f'Solo render de la búsqueda por 1.000 filas: JSONRenderer {t_json * 1000:.1f} ms, '
+              f'orjson {t_orjson * 1000:.1f} ms')
+        print(f'Fragmentos (común a ambos caminos) por 1.000 filas: {t_fragmentos * escala * 1000:.0f} ms')
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
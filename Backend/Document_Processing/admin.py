@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import DocumentoProcesado
+from .Services import operaciones_masivas
 
 @admin.register(DocumentoProcesado)
 class DocumentoProcesadoAdmin(admin.ModelAdmin):
@@ -36,15 +37,19 @@ class DocumentoProcesadoAdmin(admin.ModelAdmin):
         'nombre_archivo',
         'usuario__username',
         'usuario__email',
-        'texto_extraido'
+        'texto_normalizado'  # El texto original se almacena comprimido
     ]
     
-    # Campos de solo lectura
+    # Campos de solo lectura; la eliminación y la restauración pasan por
+    # las acciones (operaciones_masivas), que mantienen estadísticas,
+    # frecuencias de términos, versiones y caché
     readonly_fields = [
         'fecha_procesamiento',
         'actualizado_en',
+        'eliminado',
         'fecha_eliminacion',
-        'tamaño_legible'
+        'tamaño_legible',
+        'huella_pdf'
     ]
     
     # Organización en fieldsets
@@ -53,7 +58,7 @@ class DocumentoProcesadoAdmin(admin.ModelAdmin):
             'fields': ('nombre_archivo', 'usuario', 'tamaño_bytes', 'tamaño_legible')
         }),
         ('Contenido', {
-            'fields': ('texto_extraido',),
+            'fields': ('texto_extraido', 'huella_pdf'),
             'classes': ('collapse',)  # Colapsado por defecto
         }),
         ('Procesamiento', {
@@ -68,16 +73,55 @@ class DocumentoProcesadoAdmin(admin.ModelAdmin):
     # Paginación
     list_per_page = 25
     
+    # Propietario en la misma consulta del listado (columna 'usuario')
+    list_select_related = ['usuario']
+    
+    # Sin el segundo COUNT(*) sobre toda la tabla al filtrar
+    show_full_result_count = False
+    
+    # Propietario por id en el formulario, sin cargar todos los usuarios en un select
+    raw_id_fields = ['usuario']
+    
+    def get_queryset(self, request):
+        """
+        En el listado no se leen las columnas de texto completo; el
+        formulario de edición sí las necesita.
+        """
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.defer(*DocumentoProcesado.CAMPOS_TEXTO)
+        return queryset
+    
+    def get_readonly_fields(self, request, obj=None):
+        """
+        El propietario se elige al crear y luego no se edita: las
+        estadísticas, las frecuencias de términos y las cubetas de
+        similitud lo copian.
+        """
+        campos = super().get_readonly_fields(request, obj)
+        if obj is not None:
+            campos = [*campos, 'usuario']
+        return campos
+    
+    def save_model(self, request, obj, form, change):
+        """
+        Si se editó el texto, reemplazar_texto regenera las páginas, el
+        índice y la firma junto con el guardado.
+        """
+        if change and 'texto_extraido' in form.changed_data:
+            obj.reemplazar_texto(obj.texto_extraido)
+        else:
+            super().save_model(request, obj, form, change)
+    
     # Acciones personalizadas
-    actions = ['marcar_como_eliminado', 'restaurar_documentos']
+    actions = ['marcar_como_eliminado', 'restaurar_documentos', 'purgar_documentos']
     
     def marcar_como_eliminado(self, request, queryset):
-        """Acción para eliminar lógicamente documentos seleccionados."""
-        count = 0
-        for documento in queryset:
-            if not documento.eliminado:
-                documento.delete()  # Usa nuestro método de soft delete
-                count += 1
+        """
+        Acción para eliminar lógicamente documentos seleccionados.
+        Un único UPDATE para todo el conjunto (sin save() por documento).
+        """
+        count = operaciones_masivas.eliminar_documentos(queryset)
         
         self.message_user(
             request,
@@ -87,13 +131,24 @@ class DocumentoProcesadoAdmin(admin.ModelAdmin):
     
     def restaurar_documentos(self, request, queryset):
         """Acción para restaurar documentos eliminados lógicamente."""
-        count = queryset.filter(eliminado=True).update(
-            eliminado=False,
-            fecha_eliminacion=None
-        )
+        count = operaciones_masivas.restaurar_documentos(queryset)
         
         self.message_user(
             request,
             f'{count} documento(s) restaurado(s).'
         )
     restaurar_documentos.short_description = "Restaurar documentos"
+    
+    def purgar_documentos(self, request, queryset):
+        """Acción para eliminar físicamente los documentos ya eliminados lógicamente."""
+        count = operaciones_masivas.purgar_documentos(queryset.filter(eliminado=True))
+        
+        self.message_user(
+            request,
+            f'{count} documento(s) purgado(s) definitivamente.'
+        )
+    purgar_documentos.short_description = "Purgar documentos eliminados"
+    
+    def delete_queryset(self, request, queryset):
+        """La acción estándar de borrado mantiene estadísticas, caché y blobs."""
+        operaciones_masivas.purgar_documentos(queryset)
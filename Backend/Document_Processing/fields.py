@@ -0,0 +1,380 @@
+import hashlib
+import zlib
+from functools import lru_cache
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.query_utils import DeferredAttribute
+from .Services.almacen_blobs import LONGITUD_HUELLA, almacen_blobs
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: sin ella se usa zlib
+    zstandard = None
+
+# Primer byte de cada valor almacenado: identifica el algoritmo y si se
+# usó un diccionario (en ese caso siguen 4 bytes con su identificador)
+CODEC_ZLIB = b'z'
+CODEC_ZLIB_DICCIONARIO = b'Z'
+CODEC_ZSTD = b's'
+CODEC_ZSTD_DICCIONARIO = b'S'
+
+CONFIGURACION_POR_DEFECTO = {
+    'ALGORITMO': 'zstd' if zstandard else 'zlib',
+    'NIVEL': 6,
+    # Rutas de diccionarios entrenados; el primero se usa para comprimir y
+    # todos quedan disponibles para descomprimir valores antiguos
+    'DICCIONARIOS': [],
+}
+
+
+def configuracion():
+    """Configuración efectiva (settings.TEXTO_COMPRIMIDO sobre los valores por defecto)."""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'TEXTO_COMPRIMIDO', {})}
+
+
+def identificador_diccionario(diccionario):
+    """Identificador de 4 bytes de un diccionario (CRC32)."""
+    return zlib.crc32(diccionario).to_bytes(4, 'big')
+
+
+@lru_cache(maxsize=None)
+def _cargar_diccionarios(rutas):
+    diccionarios = {}
+    for ruta in rutas:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        diccionarios[identificador_diccionario(contenido)] = contenido
+    return diccionarios
+
+
+def diccionarios_disponibles():
+    """Diccionarios configurados indexados por identificador."""
+    return _cargar_diccionarios(tuple(str(ruta) for ruta in configuracion()['DICCIONARIOS']))
+
+
+def diccionario_activo():
+    """(identificador, contenido) del diccionario usado para comprimir, o None."""
+    rutas = configuracion()['DICCIONARIOS']
+    if not rutas:
+        return None
+    diccionarios = diccionarios_disponibles()
+    return next(iter(diccionarios.items()))
+
+
+def comprimir(texto, algoritmo=None, nivel=None, diccionario=None):
+    """
+    Comprime un texto y antepone la cabecera del codec.
+
+    Args:
+        algoritmo, nivel: por defecto los de settings.TEXTO_COMPRIMIDO
+        diccionario: (identificador, contenido); por defecto el activo
+    """
+    config = configuracion()
+    algoritmo = algoritmo or config['ALGORITMO']
+    nivel = nivel or config['NIVEL']
+    diccionario = diccionario if diccionario is not None else diccionario_activo()
+    datos = texto.encode('utf-8')
+
+    if algoritmo == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("El algoritmo 'zstd' requiere el paquete zstandard")
+        if diccionario:
+            identificador, contenido = diccionario
+            compresor = zstandard.ZstdCompressor(
+                level=nivel, dict_data=zstandard.ZstdCompressionDict(contenido)
+            )
+            return CODEC_ZSTD_DICCIONARIO + identificador + compresor.compress(datos)
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=nivel).compress(datos)
+
+    if diccionario:
+        identificador, contenido = diccionario
+        compresor = zlib.compressobj(nivel, zdict=contenido)
+        return CODEC_ZLIB_DICCIONARIO + identificador + compresor.compress(datos) + compresor.flush()
+    return CODEC_ZLIB + zlib.compress(datos, nivel)
+
+
+def descomprimir(valor, diccionarios=None):
+    """
+    Descomprime un valor almacenado según su cabecera.
+
+    Args:
+        diccionarios: {identificador: contenido}; por defecto los configurados
+    """
+    valor = bytes(valor)
+    codec, cuerpo = valor[:1], valor[1:]
+
+    if codec in (CODEC_ZLIB_DICCIONARIO, CODEC_ZSTD_DICCIONARIO):
+        identificador, cuerpo = cuerpo[:4], cuerpo[4:]
+        contenido = (diccionarios or diccionarios_disponibles()).get(identificador)
+        if contenido is None:
+            raise ValueError(f"Diccionario de compresión {identificador.hex()} no configurado")
+
+    if codec == CODEC_ZLIB:
+        datos = zlib.decompress(cuerpo)
+    elif codec == CODEC_ZLIB_DICCIONARIO:
+        descompresor = zlib.decompressobj(zdict=contenido)
+        datos = descompresor.decompress(cuerpo) + descompresor.flush()
+    elif codec in (CODEC_ZSTD, CODEC_ZSTD_DICCIONARIO):
+        if zstandard is None:
+            raise RuntimeError("El valor está comprimido con zstd y zstandard no está instalado")
+        diccionario = zstandard.ZstdCompressionDict(contenido) if codec == CODEC_ZSTD_DICCIONARIO else None
+        datos = zstandard.ZstdDecompressor(dict_data=diccionario).decompress(cuerpo)
+    else:
+        raise ValueError(f"Codec de compresión desconocido: {codec!r}")
+
+    return datos.decode('utf-8')
+
+
+def descomprimir_bloques(valor, diccionarios=None, desplazamiento=0, tamaño_bloque=64 * 1024):
+    """
+    Descomprime por bloques un valor con cabecera de codec (el resultado de
+    comprimir), sin armar el texto completo en memoria.
+
+    Args:
+        valor: bytes o mmap; el valor comienza en desplazamiento
+        diccionarios: {identificador: contenido}; por defecto los configurados
+
+    Yields:
+        Bytes UTF-8 de hasta tamaño_bloque (con zlib); un bloque puede
+        cortar un carácter multibyte
+    """
+    codec = bytes(valor[desplazamiento:desplazamiento + 1])
+    posicion = desplazamiento + 1
+    contenido = None
+    if codec in (CODEC_ZLIB_DICCIONARIO, CODEC_ZSTD_DICCIONARIO):
+        identificador = bytes(valor[posicion:posicion + 4])
+        posicion += 4
+        contenido = (diccionarios or diccionarios_disponibles()).get(identificador)
+        if contenido is None:
+            raise ValueError(f"Diccionario de compresión {identificador.hex()} no configurado")
+
+    es_zlib = codec in (CODEC_ZLIB, CODEC_ZLIB_DICCIONARIO)
+    if es_zlib:
+        descompresor = zlib.decompressobj(zdict=contenido) if contenido else zlib.decompressobj()
+    elif codec in (CODEC_ZSTD, CODEC_ZSTD_DICCIONARIO):
+        if zstandard is None:
+            raise RuntimeError("El valor está comprimido con zstd y zstandard no está instalado")
+        diccionario = zstandard.ZstdCompressionDict(contenido) if contenido else None
+        descompresor = zstandard.ZstdDecompressor(dict_data=diccionario).decompressobj()
+    else:
+        raise ValueError(f"Codec de compresión desconocido: {codec!r}")
+
+    for inicio in range(posicion, len(valor), tamaño_bloque):
+        pendiente = valor[inicio:inicio + tamaño_bloque]
+        if not es_zlib:
+            datos = descompresor.decompress(pendiente)
+            if datos:
+                yield datos
+            continue
+        # zlib acota la salida de cada llamada a tamaño_bloque
+        while pendiente:
+            datos = descompresor.decompress(pendiente, tamaño_bloque)
+            pendiente = descompresor.unconsumed_tail
+            if datos:
+                yield datos
+    if es_zlib:
+        resto = descompresor.flush()
+        if resto:
+            yield resto
+
+
+class TextoComprimido(bytes):
+    """
+    Valor comprimido tal como llega de la base de datos.
+
+    Se descomprime recién cuando se accede al atributo del modelo; en
+    consultas values() se obtiene el texto con str(valor).
+    """
+
+    def __str__(self):
+        return descomprimir(self)
+
+
+class DescriptorTextoComprimido(DeferredAttribute):
+    """
+    Descriptor que descomprime el valor en el primer acceso y lo cachea en
+    la instancia. Conserva los bytes originales para no recomprimir al
+    guardar si el texto no cambió.
+
+    Define __set__ para ser un descriptor de datos: así tiene prioridad
+    sobre el __dict__ de la instancia y cada acceso pasa por __get__.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        valor = super().__get__(instance, cls)
+        if isinstance(valor, TextoComprimido):
+            texto = str(valor)
+            instance.__dict__[self.field.attname] = texto
+            instance.__dict__.setdefault('_textos_comprimidos', {})[self.field.attname] = (texto, valor)
+            return texto
+        return valor
+
+
+class TextoComprimidoField(models.TextField):
+    """
+    Campo de texto almacenado comprimido (zstd o zlib, con diccionario
+    entrenado opcional) en una columna binaria.
+
+    Características técnicas:
+    - Se comporta como un TextField en formularios, serializers y validaciones
+    - Descompresión perezosa al acceder al atributo
+    - Sin recompresión al guardar instancias cuyo texto no cambió
+    - Las búsquedas por contenido deben hacerse sobre otras columnas
+      (texto_normalizado o el índice), no sobre los bytes comprimidos
+
+    texto_extraido usó este campo hasta que se movió al almacén de blobs
+    (que guarda los textos con el mismo codec); se conserva porque lo
+    referencian las migraciones 0006 y 0007. El codec solo se aplica a
+    esa copia: texto_normalizado y PaginaDocumento.texto son TextField
+    sin comprimir.
+    """
+    descriptor_class = DescriptorTextoComprimido
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            # Valores de texto plano anteriores a la compresión
+            return value
+        return TextoComprimido(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return str(value)
+
+    def pre_save(self, model_instance, add):
+        if self.attname not in model_instance.__dict__:
+            return getattr(model_instance, self.attname)
+        valor = model_instance.__dict__[self.attname]
+        if isinstance(valor, TextoComprimido):
+            # Nunca se accedió al texto: se guardan los mismos bytes
+            return valor
+        cache = model_instance.__dict__.get('_textos_comprimidos', {}).get(self.attname)
+        if cache and cache[0] is valor:
+            return cache[1]
+        return valor
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, TextoComprimido):
+            value = comprimir(str(value))
+        return connection.Database.Binary(bytes(value))
+
+
+class ReferenciaBlob(str):
+    """
+    Huella SHA-256 tal como llega de la base de datos: el texto todavía no
+    se leyó del almacén de blobs.
+    """
+
+
+def referencia_blob(instancia, attname):
+    """
+    Huella del blob de un TextoEnAlmacenField sin leer su contenido.
+    None si el texto se modificó y todavía no se guardó.
+    """
+    valor = instancia.__dict__.get(attname)
+    if isinstance(valor, ReferenciaBlob):
+        return valor
+    cache = instancia.__dict__.get('_referencias_blob', {}).get(attname)
+    if cache and cache[0] is valor:
+        return cache[1]
+    return None
+
+
+class DescriptorTextoEnAlmacen(DeferredAttribute):
+    """
+    Descriptor que lee el texto del almacén de blobs en el primer acceso y
+    lo cachea en la instancia junto con su huella, para no reescribir el
+    blob al guardar si el texto no cambió.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        valor = super().__get__(instance, cls)
+        if isinstance(valor, ReferenciaBlob):
+            texto = almacen_blobs().leer_texto(valor)
+            instance.__dict__[self.field.attname] = texto
+            instance.__dict__.setdefault('_referencias_blob', {})[self.field.attname] = (texto, valor)
+            return texto
+        return valor
+
+
+class TextoEnAlmacenField(models.TextField):
+    """
+    Campo de texto cuyo contenido vive en el almacén de blobs, comprimido
+    con el codec de TextoComprimidoField; la columna solo guarda la huella
+    SHA-256 del texto sin comprimir (64 caracteres).
+
+    Características técnicas:
+    - Se comporta como un TextField en formularios, serializers y validaciones
+    - Lectura perezosa del blob al acceder al atributo
+    - Textos idénticos comparten un único blob (deduplicación)
+    - El blob se escribe en pre_save (save/bulk_create) y, para update(),
+      en get_db_prep_save; bulk_update() envuelve los valores en
+      expresiones (Case/When), que pasan sin cambios y cuyos Value llegan
+      después a get_db_prep_save uno por uno
+    - filter(campo=texto) compara por huella sin escribir nada
+    - Tras el commit se verifica que el blob siga en el almacén, por si una
+      recolección concurrente lo apartó antes de ver la nueva referencia
+    """
+    descriptor_class = DescriptorTextoEnAlmacen
+
+    def db_type(self, connection):
+        return models.CharField(max_length=LONGITUD_HUELLA).db_type(connection)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return ReferenciaBlob(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, ReferenciaBlob):
+            return value
+        return str(value)
+
+    def pre_save(self, model_instance, add):
+        if self.attname not in model_instance.__dict__:
+            return getattr(model_instance, self.attname)
+        valor = model_instance.__dict__[self.attname]
+        # Si el texto no se leyó o no cambió se conserva la misma referencia
+        referencia = referencia_blob(model_instance, self.attname)
+        if referencia or valor is None:
+            return referencia or valor
+        referencia = ReferenciaBlob(self._guardar(str(valor)))
+        model_instance.__dict__.setdefault('_referencias_blob', {})[self.attname] = (valor, referencia)
+        return referencia
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None or isinstance(value, ReferenciaBlob) or hasattr(value, 'as_sql'):
+            return value
+        return hashlib.sha256(str(value).encode('utf-8')).hexdigest()
+
+    def get_db_prep_save(self, value, connection):
+        # Las expresiones (Case/When de bulk_update, F()) se compilan aparte
+        if value is None or isinstance(value, ReferenciaBlob) or hasattr(value, 'as_sql'):
+            return value
+        return self._guardar(str(value))
+
+    @staticmethod
+    def _guardar(texto):
+        """
+        Escribe el blob y, al confirmarse la transacción, verifica que siga
+        en el almacén (una recolección concurrente pudo apartarlo).
+        """
+        almacen = almacen_blobs()
+        huella = almacen.guardar_texto(texto)
+        transaction.on_commit(lambda: almacen.asegurar_texto(texto, huella))
+        return huella
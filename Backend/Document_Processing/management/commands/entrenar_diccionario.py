@@ -0,0 +1,74 @@
+from collections import Counter
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from Document_Processing.fields import identificador_diccionario, zstandard
+from Document_Processing.models import PaginaDocumento
+from Document_Processing.Services.indice_busqueda import PATRON_TOKEN
+
+# Tamaño máximo de ventana (y de diccionario útil) en zlib
+MAX_DICCIONARIO_ZLIB = 32 * 1024
+
+
+class Command(BaseCommand):
+    """
+    Entrena un diccionario de compresión a partir de páginas existentes.
+
+    Con zstandard instalado usa zstd.train_dictionary; en caso contrario
+    construye un diccionario zlib (zdict) con las palabras más frecuentes,
+    ubicando las más comunes al final (donde zlib las referencia con
+    distancias más cortas).
+
+    Uso:
+        python manage.py entrenar_diccionario salida.dict [--muestras 2000] [--tamaño 65536]
+
+    Después se añade la ruta a settings.TEXTO_COMPRIMIDO['DICCIONARIOS'].
+    """
+    help = "Entrena un diccionario para la compresión de texto_extraido"
+
+    def add_arguments(self, parser):
+        parser.add_argument('salida', help="Ruta del archivo de diccionario a generar")
+        parser.add_argument('--muestras', type=int, default=2000, help="Páginas a muestrear")
+        parser.add_argument('--tamaño', type=int, default=64 * 1024, help="Tamaño del diccionario en bytes")
+        parser.add_argument(
+            '--algoritmo', choices=['zstd', 'zlib'],
+            default='zstd' if zstandard else 'zlib'
+        )
+
+    def handle(self, *args, **options):
+        muestras = [
+            texto.encode('utf-8')
+            for texto in PaginaDocumento.objects.order_by('?').values_list(
+                'texto', flat=True
+            )[:options['muestras']].iterator()
+            if texto
+        ]
+        if not muestras:
+            raise CommandError("No hay páginas para entrenar el diccionario")
+
+        if options['algoritmo'] == 'zstd':
+            if zstandard is None:
+                raise CommandError("El algoritmo 'zstd' requiere el paquete zstandard")
+            diccionario = zstandard.train_dictionary(options['tamaño'], muestras).as_bytes()
+        else:
+            diccionario = self._diccionario_zlib(muestras, min(options['tamaño'], MAX_DICCIONARIO_ZLIB))
+
+        Path(options['salida']).write_bytes(diccionario)
+        self.stdout.write(self.style.SUCCESS(
+            f"Diccionario {identificador_diccionario(diccionario).hex()} "
+            f"({len(diccionario)} bytes, {len(muestras)} muestras) guardado en {options['salida']}"
+        ))
+
+    def _diccionario_zlib(self, muestras, tamaño):
+        frecuencias = Counter()
+        for muestra in muestras:
+            frecuencias.update(PATRON_TOKEN.findall(muestra.decode('utf-8')))
+
+        palabras = []
+        total = 0
+        for palabra, _ in frecuencias.most_common():
+            codificada = (palabra + ' ').encode('utf-8')
+            if total + len(codificada) > tamaño:
+                break
+            palabras.append(codificada)
+            total += len(codificada)
+        return b''.join(reversed(palabras))
@@ -0,0 +1,61 @@
+import gzip
+import sys
+from contextlib import nullcontext
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from Document_Processing.Services import importacion
+
+
+class Command(BaseCommand):
+    """
+    Importa documentos con texto ya extraído desde un archivo NDJSON (el
+    formato de la exportación), sin volver a procesar los PDF.
+
+    Los archivos .gz se descomprimen al vuelo; con '-' se lee la entrada
+    estándar. Cada lote se confirma por separado: si la importación se
+    interrumpe, los lotes anteriores quedan guardados.
+
+    Uso:
+        python manage.py importar_documentos archivo.ndjson[.gz] --usuario USUARIO [--lote 500]
+    """
+    help = "Importa documentos con texto ya extraído desde NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Archivo NDJSON (.ndjson o .ndjson.gz), o '-' para stdin")
+        parser.add_argument('--usuario', required=True, help="Usuario propietario de los documentos")
+        parser.add_argument(
+            '--lote', type=int, default=importacion.TAMAÑO_LOTE,
+            help="Filas por inserción masiva (una transacción por lote)"
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero")
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        def progreso(importados, segundos):
+            self.stdout.write(f"{importados} documentos importados ({importados / segundos:,.0f} filas/s)...")
+
+        try:
+            with self._abrir(options['archivo']) as lineas:
+                resumen = importacion.importar(lineas, usuario.id, tamaño_lote=options['lote'], progreso=progreso)
+        except OSError as error:
+            raise CommandError(f"No se pudo leer {options['archivo']}: {error}")
+
+        for error in resumen['detalle_errores']:
+            self.stderr.write(f"Línea {error['linea']}: {error['errores']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {resumen['importados']} documentos en {resumen['segundos']:.1f}s "
+            f"({resumen['filas_por_segundo'] or 0:,.0f} filas/s); {resumen['errores']} líneas con errores"
+        ))
+
+    @staticmethod
+    def _abrir(archivo):
+        if archivo == '-':
+            return nullcontext(sys.stdin.buffer)
+        if archivo.endswith('.gz'):
+            return gzip.open(archivo, 'rb')
+        return open(archivo, 'rb')
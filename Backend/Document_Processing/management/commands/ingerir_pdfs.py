@@ -0,0 +1,105 @@
+import os
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from Document_Processing.Services.ingesta_directorio import PuntoControl, ingerir
+
+# Segundos mínimos entre dos líneas de progreso
+INTERVALO_PROGRESO = 5
+
+NOMBRE_PUNTO_CONTROL = '.ingerir_pdfs.checkpoint'
+
+
+class Command(BaseCommand):
+    """
+    Procesa todos los PDF de un directorio local (recursivo) sin pasar por
+    la API: la extracción corre en un pool de procesos y los documentos se
+    guardan por lotes.
+
+    El punto de control (por defecto <directorio>/.ingerir_pdfs.checkpoint)
+    registra cada archivo resuelto al confirmar su lote; si la ejecución se
+    interrumpe, volver a lanzar el mismo comando continúa desde allí. Con
+    --sin-punto-control se procesan todos los archivos.
+
+    Uso:
+        python manage.py ingerir_pdfs DIRECTORIO --usuario USUARIO [--procesos 4] [--lote 100]
+    """
+    help = "Procesa los PDF de un directorio en paralelo, con punto de control"
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio', help="Directorio con los PDF (se recorre recursivamente)")
+        parser.add_argument('--usuario', required=True, help="Usuario propietario de los documentos")
+        parser.add_argument(
+            '--procesos', type=int, default=os.cpu_count() or 1,
+            help="Procesos de extracción en paralelo (por defecto, uno por CPU)"
+        )
+        parser.add_argument('--lote', type=int, default=100, help="Documentos guardados por lote")
+        parser.add_argument('--punto-control', help="Ruta del archivo de punto de control")
+        parser.add_argument(
+            '--sin-punto-control', action='store_true',
+            help="No leer ni escribir el punto de control"
+        )
+
+    def handle(self, *args, **options):
+        directorio = options['directorio']
+        if not os.path.isdir(directorio):
+            raise CommandError(f"No existe el directorio {directorio}")
+        if options['procesos'] < 1 or options['lote'] < 1:
+            raise CommandError("--procesos y --lote deben ser mayores que cero")
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        ruta_control = None
+        if not options['sin_punto_control']:
+            ruta_control = options['punto_control'] or os.path.join(directorio, NOMBRE_PUNTO_CONTROL)
+        punto_control = PuntoControl(ruta_control)
+        if punto_control.resueltos:
+            self.stdout.write(f"Reanudando: {len(punto_control.resueltos)} archivos ya resueltos en {ruta_control}")
+
+        ultimo = 0.0
+
+        def progreso(avance):
+            nonlocal ultimo
+            if time.monotonic() - ultimo < INTERVALO_PROGRESO and avance['archivos'] < avance['total']:
+                return
+            ultimo = time.monotonic()
+            self.stdout.write(self._linea_progreso(avance))
+
+        try:
+            resumen = ingerir(
+                directorio, usuario.id, procesos=options['procesos'], tamaño_lote=options['lote'],
+                punto_control=punto_control, progreso=progreso
+            )
+        except KeyboardInterrupt:
+            raise CommandError("Ingesta interrumpida: vuelva a ejecutar el comando para continuar")
+
+        for error in resumen['detalle_errores']:
+            self.stderr.write(f"{error['ruta']}: {error['error']}")
+        if resumen['errores'] > len(resumen['detalle_errores']):
+            self.stderr.write(
+                f"... y {resumen['errores'] - len(resumen['detalle_errores'])} errores más"
+                + (f" (ver {ruta_control})" if ruta_control else "")
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {resumen['importados']} documentos ({resumen['paginas']} páginas) en "
+            f"{resumen['segundos']:.1f}s ({resumen['paginas_por_segundo'] or 0:,.1f} páginas/s); "
+            f"{resumen['errores']} con errores, {resumen['omitidos']} omitidos por el punto de control"
+        ))
+
+    @staticmethod
+    def _linea_progreso(avance):
+        segundos = avance['segundos']
+        paginas_por_segundo = avance['paginas'] / segundos if segundos else 0
+        restantes = avance['total'] - avance['archivos']
+        if avance['archivos'] and segundos:
+            eta = str(timedelta(seconds=round(restantes * segundos / avance['archivos'])))
+        else:
+            eta = '?'
+        return (
+            f"{avance['archivos']}/{avance['total']} archivos, {avance['paginas']} páginas "
+            f"({paginas_por_segundo:,.1f} páginas/s), {avance['importados']} guardados, "
+            f"{avance['errores']} errores, ETA {eta}"
+        )
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from Document_Processing.models import DocumentoProcesado
+from Document_Processing.Services.indice_busqueda import indexar_documento
+
+
+class Command(BaseCommand):
+    """
+    Rellena la columna texto_normalizado de los documentos existentes.
+
+    Técnicas implementadas:
+    - Lectura en streaming con iterator() (memoria constante)
+    - Solo se cargan las columnas necesarias
+    - Escritura por lotes con bulk_update
+
+    Uso:
+        python manage.py normalizar_textos [--lote 200] [--todos] [--reindexar]
+    """
+    help = "Calcula texto_normalizado para documentos existentes (backfill por lotes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=200,
+            help="Tamaño de lote para lectura y escritura"
+        )
+        parser.add_argument(
+            '--todos', action='store_true',
+            help="Recalcular también los documentos que ya tienen texto normalizado"
+        )
+        parser.add_argument(
+            '--reindexar', action='store_true',
+            help="Reconstruir además el índice invertido con términos normalizados"
+        )
+
+    def handle(self, *args, **options):
+        tamaño_lote = options['lote']
+
+        queryset = DocumentoProcesado.objects.order_by('id').only('id', 'texto_extraido')
+        if not options['todos']:
+            queryset = queryset.filter(texto_normalizado='')
+
+        lote = []
+        total = 0
+        for documento in queryset.iterator(chunk_size=tamaño_lote):
+            documento.actualizar_texto_normalizado()
+            lote.append(documento)
+
+            if options['reindexar']:
+                indexar_documento(documento)
+
+            if len(lote) >= tamaño_lote:
+                total += self._guardar(lote)
+                lote = []
+
+        if lote:
+            total += self._guardar(lote)
+
+        self.stdout.write(self.style.SUCCESS(f"Texto normalizado para {total} documentos"))
+
+    def _guardar(self, lote):
+        DocumentoProcesado.objects.bulk_update(lote, ['texto_normalizado'])
+        self.stdout.write(f"  lote de {len(lote)} documentos guardado")
+        return len(lote)
@@ -0,0 +1,164 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from Document_Processing.models import DocumentoProcesado, FrecuenciaTermino, PaginaDocumento, TerminoIndexado
+from Document_Processing.Services.operaciones_masivas import purgar_documentos
+
+# Páginas de la base liberadas por cada PRAGMA incremental_vacuum
+PAGINAS_POR_PASO_VACUUM = 1000
+
+
+def _configuracion():
+    return {
+        'RETENCION_DIAS': 30,
+        'TAMAÑO_LOTE': 200,
+        'PAUSA_SEGUNDOS': 0.1,
+        **getattr(settings, 'PURGA_ELIMINADOS', {}),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Elimina físicamente los documentos eliminados lógicamente hace más de
+    la retención configurada (settings.PURGA_ELIMINADOS['RETENCION_DIAS']).
+
+    Técnicas implementadas:
+    - Lotes pequeños por clave primaria, cada uno en su propia transacción,
+      con una pausa entre lotes para no retener el bloqueo de escritura
+    - Selección por índice parcial (solo filas eliminadas, por fecha)
+    - Páginas e índice invertido borrados en cascada; blobs sin otras
+      referencias liberados al confirmar cada lote
+    - Términos del diccionario que quedaron sin documentos antes de la
+      retención eliminados con un único DELETE
+    - Compactación opcional: ANALYZE de las tablas afectadas y, en SQLite,
+      PRAGMA incremental_vacuum por pasos (o VACUUM completo si la base no
+      usa auto_vacuum incremental)
+
+    Uso:
+        python manage.py purgar_eliminados [--dias 30] [--lote 200] [--pausa 0.1]
+                                           [--max-lotes N] [--simular] [--analyze] [--vacuum]
+    """
+    help = "Purga documentos eliminados lógicamente tras el periodo de retención"
+
+    def add_arguments(self, parser):
+        configuracion = _configuracion()
+        parser.add_argument(
+            '--dias', type=int, default=configuracion['RETENCION_DIAS'],
+            help="Días de retención desde la eliminación lógica"
+        )
+        parser.add_argument(
+            '--lote', type=int, default=configuracion['TAMAÑO_LOTE'],
+            help="Documentos purgados por transacción"
+        )
+        parser.add_argument(
+            '--pausa', type=float, default=configuracion['PAUSA_SEGUNDOS'],
+            help="Segundos de espera entre lotes"
+        )
+        parser.add_argument(
+            '--max-lotes', type=int, default=None,
+            help="Detenerse tras esta cantidad de lotes (para ventanas de mantenimiento)"
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help="Solo informar cuántos documentos se purgarían"
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help="Actualizar estadísticas del planificador al terminar"
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help="Devolver al sistema el espacio liberado al terminar"
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0 or options['lote'] < 1 or options['pausa'] < 0:
+            raise CommandError("--dias y --pausa no pueden ser negativos y --lote debe ser mayor que cero")
+
+        limite = timezone.now() - timedelta(days=options['dias'])
+        vencidos = DocumentoProcesado.objects.vencidos(limite).order_by('id')
+
+        if options['simular']:
+            self.stdout.write(f"Se purgarían {vencidos.count()} documentos eliminados antes de {limite:%Y-%m-%d %H:%M}")
+            return
+
+        purgados = 0
+        lotes = 0
+        ultimo_id = 0
+        inicio = time.monotonic()
+        while options['max_lotes'] is None or lotes < options['max_lotes']:
+            # Recorrido por clave primaria: cada lote parte donde terminó el anterior
+            ids = list(vencidos.filter(id__gt=ultimo_id).values_list('id', flat=True)[:options['lote']])
+            if not ids:
+                break
+            ultimo_id = ids[-1]
+            # Se vuelve a aplicar el filtro: un documento restaurado entre lotes no se purga
+            purgados += purgar_documentos(DocumentoProcesado.objects.vencidos(limite).filter(id__in=ids))
+            lotes += 1
+            self.stdout.write(f"  Lote {lotes}: {purgados} documentos purgados")
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        # Frecuencias en cero conservadas para el refresco de sugerencias
+        terminos, _ = FrecuenciaTermino.objects.filter(documentos__lte=0, actualizado_en__lt=limite).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Purgados {purgados} documentos en {lotes} lotes ({time.monotonic() - inicio:.1f}s); "
+            f"{terminos} términos sin documentos eliminados del diccionario"
+        ))
+
+        if options['analyze']:
+            self._analizar()
+        if options['vacuum']:
+            self._compactar(options['pausa'])
+
+    def _analizar(self):
+        tablas = [modelo._meta.db_table for modelo in (DocumentoProcesado, PaginaDocumento, TerminoIndexado)]
+        with connection.cursor() as cursor:
+            for tabla in tablas:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(tabla)}')
+        self.stdout.write(f"ANALYZE ejecutado sobre {', '.join(tablas)}")
+
+    def _compactar(self, pausa):
+        if connection.vendor == 'postgresql':
+            tablas = [modelo._meta.db_table for modelo in (DocumentoProcesado, PaginaDocumento, TerminoIndexado)]
+            with connection.cursor() as cursor:
+                for tabla in tablas:
+                    cursor.execute(f'VACUUM {connection.ops.quote_name(tabla)}')
+            self.stdout.write(f"VACUUM ejecutado sobre {', '.join(tablas)}")
+            return
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING(f"Compactación no soportada para {connection.vendor}"))
+            return
+        if connection.in_atomic_block:
+            raise CommandError("VACUUM no puede ejecutarse dentro de una transacción")
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA auto_vacuum')
+            modo = cursor.fetchone()[0]
+            if modo != 2:
+                # Sin auto_vacuum incremental solo existe el VACUUM completo
+                # (reescribe la base; para habilitar el modo incremental:
+                # PRAGMA auto_vacuum = INCREMENTAL seguido de un VACUUM)
+                cursor.execute('VACUUM')
+                self.stdout.write("VACUUM completo ejecutado")
+                return
+
+            cursor.execute('PRAGMA freelist_count')
+            libres = cursor.fetchone()[0]
+            liberadas = 0
+            while libres:
+                cursor.execute(f'PRAGMA incremental_vacuum({PAGINAS_POR_PASO_VACUUM})')
+                cursor.fetchall()
+                cursor.execute('PRAGMA freelist_count')
+                restantes = cursor.fetchone()[0]
+                if restantes >= libres:
+                    break
+                liberadas += libres - restantes
+                libres = restantes
+                if pausa:
+                    time.sleep(pausa)
+        self.stdout.write(f"incremental_vacuum: {liberadas} páginas devueltas al sistema")
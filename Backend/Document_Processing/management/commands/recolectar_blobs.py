@@ -0,0 +1,69 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from Document_Processing.fields import ReferenciaBlob
+from Document_Processing.models import DocumentoProcesado
+from Document_Processing.Services.almacen_blobs import almacen_blobs
+
+
+class Command(BaseCommand):
+    """
+    Elimina del almacén los blobs que ningún documento referencia.
+
+    Quedan blobs huérfanos cuando una transacción de ingesta se revierte
+    después de escribir el blob o cuando se borran documentos en bloque
+    (queryset.delete()). Los blobs recientes se conservan para no competir
+    con ingestas en curso.
+
+    Técnicas implementadas:
+    - Las huellas referenciadas se leen con values_list en streaming
+    - Recorrido del almacén sin cargar contenidos
+    - Cada huérfano se aparta y se vuelve a comprobar antes de borrarlo
+      (AlmacenBlobs.eliminar_sin_uso): una ingesta posterior a la lectura
+      de referencias no pierde su blob
+
+    Uso:
+        python manage.py recolectar_blobs [--antiguedad 60] [--simular]
+    """
+    help = "Elimina blobs huérfanos (texto o PDF sin documento que los referencie)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--antiguedad', type=int, default=60,
+            help="Minutos mínimos de antigüedad de un blob para poder eliminarlo"
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help="Solo informar los blobs que se eliminarían"
+        )
+
+    def handle(self, *args, **options):
+        almacen = almacen_blobs()
+        limite = time.time() - options['antiguedad'] * 60
+
+        referenciadas = set()
+        filas = DocumentoProcesado.objects.values_list('texto_extraido', 'huella_pdf')
+        for huella_texto, huella_pdf in filas.iterator(chunk_size=2000):
+            referenciadas.update((huella_texto, huella_pdf))
+
+        def en_uso(huella):
+            return DocumentoProcesado.objects.filter(
+                Q(texto_extraido=ReferenciaBlob(huella)) | Q(huella_pdf=huella)
+            ).exists()
+
+        eliminados = 0
+        liberados = 0
+        for huella in almacen.huellas():
+            if huella in referenciadas:
+                continue
+            estado = almacen.ruta(huella).stat()
+            if estado.st_mtime > limite:
+                continue
+            if options['simular'] or almacen.eliminar_sin_uso(huella, lambda: en_uso(huella)):
+                eliminados += 1
+                liberados += estado.st_size
+
+        accion = "Se eliminarían" if options['simular'] else "Eliminados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {eliminados} blobs huérfanos ({liberados / (1024 * 1024):.1f} MB)"
+        ))
@@ -0,0 +1,131 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from Document_Processing.models import DocumentoProcesado, EstadisticaDiaria, EstadisticaUsuario
+from Document_Processing.Services import versiones
+from Document_Processing.Services.estadisticas import deltas_queryset
+
+
+def _tabla(modelo, claves, campos, usuario_ids):
+    filas = modelo.objects.all()
+    if usuario_ids:
+        filas = filas.filter(usuario_id__in=usuario_ids)
+    return {
+        tuple(fila[clave] for clave in claves): {campo: fila[campo] for campo in campos}
+        for fila in filas.values(*claves, *campos)
+    }
+
+
+def _diferencias(guardado, calculado):
+    """Filas cuyo valor guardado difiere del recalculado (las vacías equivalen a cero)."""
+    diferencias = []
+    for clave in sorted(set(guardado) | set(calculado), key=str):
+        actual = guardado.get(clave, {})
+        esperado = calculado.get(clave, {})
+        campos = set(actual) | set(esperado)
+        if any((actual.get(campo) or 0) != (esperado.get(campo) or 0) for campo in campos):
+            diferencias.append((clave, actual, esperado))
+    return diferencias
+
+
+def _bloquear_estadisticas():
+    """
+    Serializa las escrituras de estadísticas hasta el final de la transacción:
+    los documentos creados o eliminados mientras se recalcula esperan en
+    estadisticas.aplicar y suman su delta sobre las filas reconstruidas.
+    """
+    tablas = [EstadisticaUsuario._meta.db_table, EstadisticaDiaria._meta.db_table]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"LOCK TABLE {', '.join(map(connection.ops.quote_name, tablas))} IN SHARE ROW EXCLUSIVE MODE"
+            )
+        else:
+            # SQLite: la primera escritura toma el bloqueo de escritura de la
+            # base hasta el commit (una transacción diferida solo lee)
+            cursor.execute(f"UPDATE {connection.ops.quote_name(tablas[0])} SET id = id WHERE 0 = 1")
+
+
+class Command(BaseCommand):
+    """
+    Recalcula desde cero las tablas de estadísticas (EstadisticaUsuario y
+    EstadisticaDiaria) e informa las diferencias con lo guardado.
+
+    Técnicas implementadas:
+    - Dos agregaciones GROUP BY en la base de datos (sin cargar documentos)
+    - Recálculo y reemplazo de las filas dentro de una misma transacción,
+      con las escrituras de estadísticas bloqueadas mientras tanto
+
+    Uso:
+        python manage.py reconciliar_estadisticas [--usuario ID ...] [--solo-reportar]
+    """
+    help = "Reconstruye las estadísticas por usuario e informa la deriva encontrada"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario', type=int, action='append', dest='usuarios',
+            help="Limitar a estos usuarios (se puede repetir)"
+        )
+        parser.add_argument(
+            '--solo-reportar', action='store_true',
+            help="Informar la deriva sin modificar las tablas"
+        )
+
+    def handle(self, *args, **options):
+        usuario_ids = options['usuarios']
+
+        with transaction.atomic():
+            if not options['solo_reportar']:
+                _bloquear_estadisticas()
+            self._reconciliar(usuario_ids, options['solo_reportar'])
+
+    def _reconciliar(self, usuario_ids, solo_reportar):
+        documentos = DocumentoProcesado.objects.activos()
+        if usuario_ids:
+            documentos = documentos.filter(usuario_id__in=usuario_ids)
+        por_metodo, por_dia = deltas_queryset(documentos)
+
+        campos_metodo = ['documentos', 'tamaño_bytes', 'suma_tiempo_procesamiento', 'documentos_con_tiempo']
+        campos_dia = ['documentos', 'tamaño_bytes']
+        diferencias_metodo = _diferencias(
+            _tabla(EstadisticaUsuario, ['usuario_id', 'metodo_extraccion'], campos_metodo, usuario_ids),
+            por_metodo
+        )
+        diferencias_dia = _diferencias(
+            _tabla(EstadisticaDiaria, ['usuario_id', 'dia'], campos_dia, usuario_ids),
+            por_dia
+        )
+
+        for titulo, diferencias in (('usuario/método', diferencias_metodo), ('usuario/día', diferencias_dia)):
+            for clave, actual, esperado in diferencias:
+                self.stdout.write(self.style.WARNING(
+                    f"  Deriva {titulo} {clave}: guardado={actual or '-'} recalculado={esperado or '-'}"
+                ))
+
+        total = len(diferencias_metodo) + len(diferencias_dia)
+        if solo_reportar:
+            self.stdout.write(f"Filas con deriva: {total} (sin cambios)")
+            return
+
+        estadisticas_usuario = EstadisticaUsuario.objects.all()
+        estadisticas_diarias = EstadisticaDiaria.objects.all()
+        if usuario_ids:
+            estadisticas_usuario = estadisticas_usuario.filter(usuario_id__in=usuario_ids)
+            estadisticas_diarias = estadisticas_diarias.filter(usuario_id__in=usuario_ids)
+        estadisticas_usuario.delete()
+        estadisticas_diarias.delete()
+
+        EstadisticaUsuario.objects.bulk_create([
+            EstadisticaUsuario(usuario_id=usuario_id, metodo_extraccion=metodo, **valores)
+            for (usuario_id, metodo), valores in por_metodo.items()
+        ], batch_size=500)
+        EstadisticaDiaria.objects.bulk_create([
+            EstadisticaDiaria(usuario_id=usuario_id, dia=dia, **valores)
+            for (usuario_id, dia), valores in por_dia.items()
+        ], batch_size=500)
+        # Las estadísticas corregidas invalidan las copias de los clientes (ETag)
+        versiones.renovar({clave[0] for clave, _, _ in diferencias_metodo + diferencias_dia})
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas reconstruidas: {len(por_metodo)} filas usuario/método, "
+            f"{len(por_dia)} filas usuario/día; filas con deriva corregidas: {total}"
+        ))
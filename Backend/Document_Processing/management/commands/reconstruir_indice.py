@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from Document_Processing.models import DocumentoProcesado
+from Document_Processing.Services.indice_busqueda import indexar_documento
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye el índice invertido de búsqueda de los documentos existentes.
+
+    Uso:
+        python manage.py reconstruir_indice [--lote 100] [--solo-faltantes]
+    """
+    help = "Reconstruye el índice invertido de búsqueda (TerminoIndexado)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=100,
+            help="Documentos leídos por lote (chunk_size del iterator)"
+        )
+        parser.add_argument(
+            '--solo-faltantes', action='store_true',
+            help="Indexar únicamente documentos sin entradas en el índice"
+        )
+
+    def handle(self, *args, **options):
+        queryset = DocumentoProcesado.objects.order_by('id')
+        if options['solo_faltantes']:
+            queryset = queryset.filter(terminos_indexados__isnull=True).distinct()
+
+        total = 0
+        for documento in queryset.iterator(chunk_size=options['lote']):
+            indexar_documento(documento)
+            total += 1
+            if total % options['lote'] == 0:
+                self.stdout.write(f"{total} documentos indexados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruido: {total} documentos"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoIndexado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(help_text='Término normalizado (minúsculas)', max_length=100)),
+                ('pagina', models.PositiveIntegerField(default=1, help_text='Número de página donde aparece el término')),
+                ('frecuencia', models.PositiveIntegerField(default=0, help_text='Número total de ocurrencias del término en la página')),
+                ('posiciones', models.JSONField(default=list, help_text='Pares [inicio, fin] de las primeras ocurrencias en el texto')),
+                ('documento', models.ForeignKey(help_text='Documento al que pertenece el término', on_delete=django.db.models.deletion.CASCADE, related_name='terminos_indexados', to='Document_Processing.documentoprocesado')),
+            ],
+            options={
+                'verbose_name': 'Término Indexado',
+                'verbose_name_plural': 'Términos Indexados',
+                'indexes': [models.Index(fields=['termino', 'documento'], name='indice_termino_doc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('documento', 'termino', 'pagina'), name='indice_doc_termino_pagina_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0002_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoprocesado',
+            name='texto_normalizado',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Texto sin acentos, en minúsculas y con espacios colapsados (para búsquedas)'),
+        ),
+    ]
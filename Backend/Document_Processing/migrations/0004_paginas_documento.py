@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def crear_paginas(apps, schema_editor):
+    """
+    Crea las páginas de los documentos existentes dividiendo el texto por el
+    separador de página (\\f). Los documentos antiguos quedan con una página.
+    """
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    PaginaDocumento = apps.get_model('Document_Processing', 'PaginaDocumento')
+
+    lote = []
+    documentos = DocumentoProcesado.objects.order_by('id').only(
+        'id', 'texto_extraido', 'metodo_extraccion'
+    )
+    for documento in documentos.iterator(chunk_size=100):
+        for numero, texto in enumerate(documento.texto_extraido.split('\f'), start=1):
+            lote.append(PaginaDocumento(
+                documento_id=documento.id,
+                numero=numero,
+                texto=texto,
+                metodo_extraccion=documento.metodo_extraccion
+            ))
+        if len(lote) >= 500:
+            PaginaDocumento.objects.bulk_create(lote)
+            lote = []
+    PaginaDocumento.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0003_texto_normalizado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='terminoindexado',
+            name='posiciones',
+            field=models.JSONField(default=list, help_text='Pares [inicio, fin] de las primeras ocurrencias en el texto de la página'),
+        ),
+        migrations.CreateModel(
+            name='PaginaDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField(help_text='Número de página (desde 1)')),
+                ('texto', models.TextField(blank=True, help_text='Texto extraído de la página')),
+                ('metodo_extraccion', models.CharField(choices=[('pypdf', 'PyPDF2 - Texto directo'), ('ocr', 'OCR - Reconocimiento óptico')], help_text='Método utilizado para extraer el texto de la página', max_length=50)),
+                ('confianza', models.DecimalField(blank=True, decimal_places=2, help_text='Confianza media del OCR (0-100); vacío para texto nativo', max_digits=5, null=True)),
+                ('tiempo_procesamiento', models.DecimalField(blank=True, decimal_places=3, help_text='Tiempo de extracción de la página en segundos', max_digits=8, null=True)),
+                ('documento', models.ForeignKey(help_text='Documento al que pertenece la página', on_delete=django.db.models.deletion.CASCADE, related_name='paginas', to='Document_Processing.documentoprocesado')),
+            ],
+            options={
+                'verbose_name': 'Página de Documento',
+                'verbose_name_plural': 'Páginas de Documentos',
+                'ordering': ['numero'],
+                'constraints': [models.UniqueConstraint(fields=('documento', 'numero'), name='pagina_documento_numero_uniq')],
+            },
+        ),
+        migrations.RunPython(crear_paginas, migrations.RunPython.noop),
+    ]
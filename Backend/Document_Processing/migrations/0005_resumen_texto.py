@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:45
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
+
+
+def calcular_resumenes(apps, schema_editor):
+    """
+    Rellena el resumen de los documentos existentes con un único UPDATE
+    calculado en la base de datos (sin cargar el texto en Python).
+    """
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    DocumentoProcesado.objects.update(
+        resumen_texto=Case(
+            When(
+                GreaterThan(Length('texto_extraido'), 200),
+                then=Concat(Substr('texto_extraido', 1, 197), Value('...'))
+            ),
+            default=Substr('texto_extraido', 1, 200)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0004_paginas_documento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoprocesado',
+            name='resumen_texto',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Primeros caracteres del texto extraído, calculados en la ingesta', max_length=200),
+        ),
+        migrations.RunPython(calcular_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+import Document_Processing.fields
+import django.core.validators
+from django.db import migrations, models
+
+TAMAÑO_LOTE = 200
+
+
+def comprimir_textos(apps, schema_editor):
+    """
+    Copia texto_extraido a la columna comprimida por lotes.
+
+    Técnica: iterator() para leer en streaming y bulk_update por lote,
+    de modo que la memoria no depende del tamaño de la tabla.
+    """
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+
+    lote = []
+    documentos = DocumentoProcesado.objects.order_by('id').only('id', 'texto_extraido')
+    for documento in documentos.iterator(chunk_size=TAMAÑO_LOTE):
+        documento.texto_comprimido = documento.texto_extraido
+        lote.append(documento)
+        if len(lote) >= TAMAÑO_LOTE:
+            DocumentoProcesado.objects.bulk_update(lote, ['texto_comprimido'])
+            lote = []
+    if lote:
+        DocumentoProcesado.objects.bulk_update(lote, ['texto_comprimido'])
+
+
+def descomprimir_textos(apps, schema_editor):
+    """Operación inversa: vuelve a copiar el texto plano."""
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+
+    lote = []
+    documentos = DocumentoProcesado.objects.order_by('id').only('id', 'texto_comprimido')
+    for documento in documentos.iterator(chunk_size=TAMAÑO_LOTE):
+        documento.texto_extraido = documento.texto_comprimido
+        lote.append(documento)
+        if len(lote) >= TAMAÑO_LOTE:
+            DocumentoProcesado.objects.bulk_update(lote, ['texto_extraido'])
+            lote = []
+    if lote:
+        DocumentoProcesado.objects.bulk_update(lote, ['texto_extraido'])
+
+
+class Migration(migrations.Migration):
+    """
+    Convierte texto_extraido en una columna comprimida.
+
+    Se crea una columna nueva, se copian los datos por lotes y se reemplaza
+    la original (que además tenía un índice B-tree inútil para búsquedas
+    por contenido). Funciona igual en SQLite y en PostgreSQL.
+    """
+
+    dependencies = [
+        ('Document_Processing', '0005_resumen_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoprocesado',
+            name='texto_comprimido',
+            field=Document_Processing.fields.TextoComprimidoField(null=True),
+        ),
+        migrations.RunPython(comprimir_textos, migrations.RunPython.noop),
+        # Columna original anulable para que la reversión pueda recrearla
+        # antes de copiar de vuelta los datos
+        migrations.AlterField(
+            model_name='documentoprocesado',
+            name='texto_extraido',
+            field=models.TextField(null=True, help_text='Texto completo extraído del PDF'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, descomprimir_textos),
+        migrations.RemoveField(
+            model_name='documentoprocesado',
+            name='texto_extraido',
+        ),
+        migrations.RenameField(
+            model_name='documentoprocesado',
+            old_name='texto_comprimido',
+            new_name='texto_extraido',
+        ),
+        migrations.AlterField(
+            model_name='documentoprocesado',
+            name='texto_extraido',
+            field=Document_Processing.fields.TextoComprimidoField(help_text='Texto completo extraído del PDF', validators=[django.core.validators.MinLengthValidator(1)]),
+        ),
+    ]
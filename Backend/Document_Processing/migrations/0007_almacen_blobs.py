@@ -0,0 +1,95 @@
+import Document_Processing.fields
+import django.core.validators
+from django.db import migrations, models
+
+TAMAÑO_LOTE = 200
+
+
+def mover_textos_a_blobs(apps, schema_editor):
+    """
+    Escribe el texto de cada documento en el almacén de blobs y guarda su
+    huella en la columna nueva, por lotes (iterator + bulk_update).
+    """
+    from Document_Processing.fields import ReferenciaBlob
+    from Document_Processing.Services.almacen_blobs import almacen_blobs
+
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    almacen = almacen_blobs()
+
+    lote = []
+    documentos = DocumentoProcesado.objects.order_by('id').only('id', 'texto_extraido')
+    for documento in documentos.iterator(chunk_size=TAMAÑO_LOTE):
+        documento.texto_referencia = ReferenciaBlob(almacen.guardar_texto(documento.texto_extraido))
+        lote.append(documento)
+        if len(lote) >= TAMAÑO_LOTE:
+            DocumentoProcesado.objects.bulk_update(lote, ['texto_referencia'])
+            lote = []
+    if lote:
+        DocumentoProcesado.objects.bulk_update(lote, ['texto_referencia'])
+
+
+def recuperar_textos_de_blobs(apps, schema_editor):
+    """Operación inversa: vuelve a guardar el texto (comprimido) en la fila."""
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+
+    lote = []
+    documentos = DocumentoProcesado.objects.order_by('id').only('id', 'texto_referencia')
+    for documento in documentos.iterator(chunk_size=TAMAÑO_LOTE):
+        documento.texto_extraido = documento.texto_referencia
+        lote.append(documento)
+        if len(lote) >= TAMAÑO_LOTE:
+            DocumentoProcesado.objects.bulk_update(lote, ['texto_extraido'])
+            lote = []
+    if lote:
+        DocumentoProcesado.objects.bulk_update(lote, ['texto_extraido'])
+
+
+class Migration(migrations.Migration):
+    """
+    Mueve texto_extraido al almacén de blobs; la fila conserva solo la
+    huella SHA-256. Agrega la referencia al PDF original.
+
+    Mismo esquema que 0006: columna nueva, copia por lotes y reemplazo de
+    la original, reversible en SQLite y PostgreSQL. Los blobs no se borran
+    al revertir (el almacén es de solo agregado).
+    """
+
+    dependencies = [
+        ('Document_Processing', '0006_texto_comprimido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoprocesado',
+            name='huella_pdf',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 del PDF original en el almacén de blobs', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='documentoprocesado',
+            name='texto_referencia',
+            field=Document_Processing.fields.TextoEnAlmacenField(db_column='texto_sha256', null=True),
+        ),
+        migrations.RunPython(mover_textos_a_blobs, migrations.RunPython.noop),
+        # Columna original anulable para que la reversión pueda recrearla
+        # antes de copiar de vuelta los datos
+        migrations.AlterField(
+            model_name='documentoprocesado',
+            name='texto_extraido',
+            field=Document_Processing.fields.TextoComprimidoField(null=True, help_text='Texto completo extraído del PDF'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, recuperar_textos_de_blobs),
+        migrations.RemoveField(
+            model_name='documentoprocesado',
+            name='texto_extraido',
+        ),
+        migrations.RenameField(
+            model_name='documentoprocesado',
+            old_name='texto_referencia',
+            new_name='texto_extraido',
+        ),
+        migrations.AlterField(
+            model_name='documentoprocesado',
+            name='texto_extraido',
+            field=Document_Processing.fields.TextoEnAlmacenField(db_column='texto_sha256', help_text='Texto completo extraído del PDF', validators=[django.core.validators.MinLengthValidator(1)]),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def calcular_estadisticas(apps, schema_editor):
+    """Rellena las tablas de estadísticas con los documentos activos existentes."""
+    from Document_Processing.Services.estadisticas import deltas_queryset
+
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    EstadisticaUsuario = apps.get_model('Document_Processing', 'EstadisticaUsuario')
+    EstadisticaDiaria = apps.get_model('Document_Processing', 'EstadisticaDiaria')
+
+    por_metodo, por_dia = deltas_queryset(DocumentoProcesado.objects.filter(eliminado=False))
+    EstadisticaUsuario.objects.bulk_create([
+        EstadisticaUsuario(usuario_id=usuario_id, metodo_extraccion=metodo, **valores)
+        for (usuario_id, metodo), valores in por_metodo.items()
+    ], batch_size=500)
+    EstadisticaDiaria.objects.bulk_create([
+        EstadisticaDiaria(usuario_id=usuario_id, dia=dia, **valores)
+        for (usuario_id, dia), valores in por_dia.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0007_almacen_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(help_text='Día de procesamiento de los documentos')),
+                ('documentos', models.IntegerField(default=0, help_text='Documentos activos procesados ese día')),
+                ('tamaño_bytes', models.BigIntegerField(default=0, help_text='Suma de tamaños de esos documentos')),
+                ('usuario', models.ForeignKey(help_text='Usuario al que pertenecen las estadísticas', on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Estadística Diaria',
+                'verbose_name_plural': 'Estadísticas Diarias',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'dia'), name='estadistica_usuario_dia_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo_extraccion', models.CharField(choices=[('pypdf', 'PyPDF2 - Texto directo'), ('ocr', 'OCR - Reconocimiento óptico')], help_text='Método de extracción', max_length=50)),
+                ('documentos', models.IntegerField(default=0, help_text='Documentos activos')),
+                ('tamaño_bytes', models.BigIntegerField(default=0, help_text='Suma de tamaños de los documentos activos')),
+                ('suma_tiempo_procesamiento', models.DecimalField(decimal_places=3, default=0, help_text='Suma de tiempos de procesamiento en segundos', max_digits=16)),
+                ('documentos_con_tiempo', models.IntegerField(default=0, help_text='Documentos activos con tiempo de procesamiento registrado')),
+                ('usuario', models.ForeignKey(help_text='Usuario al que pertenecen las estadísticas', on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_documentos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Estadística de Usuario',
+                'verbose_name_plural': 'Estadísticas de Usuarios',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'metodo_extraccion'), name='estadistica_usuario_metodo_uniq')],
+            },
+        ),
+        migrations.RunPython(calcular_estadisticas, migrations.RunPython.noop),
+    ]
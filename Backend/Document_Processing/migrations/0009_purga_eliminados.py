@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0008_estadisticas_usuario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentoprocesado',
+            index=models.Index(condition=models.Q(('eliminado', True)), fields=['fecha_eliminacion'], name='doc_eliminados_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+TAMAÑO_LOTE = 200
+
+
+def calcular_firmas(apps, schema_editor):
+    """Calcula la firma MinHash y las claves LSH de los documentos existentes."""
+    from Document_Processing.Services.similitud import calcular_firma, cubetas
+
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    FirmaDocumento = apps.get_model('Document_Processing', 'FirmaDocumento')
+    CubetaSimilitud = apps.get_model('Document_Processing', 'CubetaSimilitud')
+
+    firmas, claves = [], []
+    documentos = DocumentoProcesado.objects.order_by('id').only('id', 'usuario_id', 'texto_extraido')
+    for documento in documentos.iterator(chunk_size=TAMAÑO_LOTE):
+        firma = calcular_firma(documento.texto_extraido)
+        if firma is None:
+            continue
+        firmas.append(FirmaDocumento(documento_id=documento.id, firma=firma))
+        claves.extend(
+            CubetaSimilitud(documento_id=documento.id, usuario_id=documento.usuario_id, cubeta=clave)
+            for clave in cubetas(firma)
+        )
+        if len(firmas) >= TAMAÑO_LOTE:
+            FirmaDocumento.objects.bulk_create(firmas)
+            CubetaSimilitud.objects.bulk_create(claves, batch_size=1000)
+            firmas, claves = [], []
+    FirmaDocumento.objects.bulk_create(firmas)
+    CubetaSimilitud.objects.bulk_create(claves, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0009_purga_eliminados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FirmaDocumento',
+            fields=[
+                ('documento', models.OneToOneField(help_text='Documento al que pertenece la firma', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='firma', serialize=False, to='Document_Processing.documentoprocesado')),
+                ('firma', models.BinaryField(help_text='Valores MinHash empaquetados (uint32 little-endian)')),
+            ],
+            options={
+                'verbose_name': 'Firma de Documento',
+                'verbose_name_plural': 'Firmas de Documentos',
+            },
+        ),
+        migrations.CreateModel(
+            name='CubetaSimilitud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cubeta', models.BigIntegerField(help_text='Hash de la banda de la firma (incluye el número de banda)')),
+                ('documento', models.ForeignKey(help_text='Documento al que pertenece la clave', on_delete=django.db.models.deletion.CASCADE, related_name='cubetas_similitud', to='Document_Processing.documentoprocesado')),
+                ('usuario', models.ForeignKey(help_text='Propietario del documento', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cubeta de Similitud',
+                'verbose_name_plural': 'Cubetas de Similitud',
+                'indexes': [models.Index(fields=['usuario', 'cubeta'], name='similitud_usuario_cubeta_idx')],
+            },
+        ),
+        migrations.RunPython(calcular_firmas, migrations.RunPython.noop),
+    ]
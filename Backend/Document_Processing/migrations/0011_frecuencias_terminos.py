@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+TAMAÑO_LOTE = 1000
+
+
+def calcular_frecuencias(apps, schema_editor):
+    """
+    Rellena las frecuencias de documento por usuario y término y la norma
+    tf de cada documento a partir del índice invertido existente.
+    """
+    from Document_Processing.Services.indice_busqueda import norma_terminos
+
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    FrecuenciaTermino = apps.get_model('Document_Processing', 'FrecuenciaTermino')
+    TerminoIndexado = apps.get_model('Document_Processing', 'TerminoIndexado')
+
+    filas = TerminoIndexado.objects.order_by().values('documento__usuario_id', 'termino').annotate(
+        documentos=Count('documento_id', distinct=True)
+    )
+    FrecuenciaTermino.objects.bulk_create(
+        (
+            FrecuenciaTermino(usuario_id=fila['documento__usuario_id'], termino=fila['termino'], documentos=fila['documentos'])
+            for fila in filas.iterator(chunk_size=TAMAÑO_LOTE)
+        ),
+        batch_size=TAMAÑO_LOTE
+    )
+
+    def actualizar(documento_id, frecuencias):
+        DocumentoProcesado.objects.filter(pk=documento_id).update(norma_terminos=norma_terminos(frecuencias))
+
+    actual, frecuencias = None, []
+    totales = TerminoIndexado.objects.order_by('documento_id').values_list('documento_id', 'termino').annotate(
+        total=Sum('frecuencia')
+    )
+    for documento_id, _, total in totales.iterator(chunk_size=TAMAÑO_LOTE):
+        if documento_id != actual:
+            if actual is not None:
+                actualizar(actual, frecuencias)
+            actual, frecuencias = documento_id, []
+        frecuencias.append(total)
+    if actual is not None:
+        actualizar(actual, frecuencias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0010_firmas_similitud'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoprocesado',
+            name='norma_terminos',
+            field=models.FloatField(blank=True, editable=False, help_text='Norma del vector de pesos tf del documento (documentos similares)', null=True),
+        ),
+        migrations.CreateModel(
+            name='FrecuenciaTermino',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(help_text='Término normalizado', max_length=100)),
+                ('documentos', models.IntegerField(default=0, help_text='Documentos del usuario que contienen el término')),
+                ('usuario', models.ForeignKey(help_text='Usuario al que pertenecen los documentos', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Frecuencia de Término',
+                'verbose_name_plural': 'Frecuencias de Términos',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'termino'), name='frecuencia_usuario_termino_uniq')],
+            },
+        ),
+        migrations.RunPython(calcular_frecuencias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:24
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0011_frecuencias_terminos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='frecuenciatermino',
+            name='actualizado_en',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Último cambio de la frecuencia (refresco incremental de sugerencias)'),
+        ),
+        migrations.AddIndex(
+            model_name='frecuenciatermino',
+            index=models.Index(fields=['usuario', 'actualizado_en'], name='frecuencia_usuario_cambio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='frecuenciatermino',
+            index=models.Index(fields=['actualizado_en'], name='frecuencia_cambio_idx'),
+        ),
+    ]
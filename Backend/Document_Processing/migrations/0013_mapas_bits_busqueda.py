@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0012_sugerencias_terminos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentoprocesado',
+            index=models.Index(fields=['actualizado_en'], name='doc_actualizado_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:55
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Document_Processing', '0013_mapas_bits_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionColeccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ambito', models.CharField(help_text="Ámbito de la colección ('global' o 'usuario:<id>')", max_length=50, unique=True)),
+                ('version', models.UUIDField(default=uuid.uuid4, help_text='Token renovado en cada cambio de la colección')),
+            ],
+            options={
+                'verbose_name': 'Versión de Colección',
+                'verbose_name_plural': 'Versiones de Colecciones',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+TAMAÑO_LOTE = 2000
+
+
+def comprimir_blobs_texto(apps, schema_editor):
+    """
+    Reescribe comprimidos los blobs de texto guardados en texto plano por
+    versiones anteriores de 0007. La huella no cambia (es la del texto sin
+    comprimir) y cada blob se reemplaza de forma atómica.
+    """
+    from Document_Processing.Services.almacen_blobs import almacen_blobs
+
+    DocumentoProcesado = apps.get_model('Document_Processing', 'DocumentoProcesado')
+    almacen = almacen_blobs()
+
+    huellas = DocumentoProcesado.objects.order_by().values_list('texto_extraido', flat=True).distinct()
+    for huella in huellas.iterator(chunk_size=TAMAÑO_LOTE):
+        if huella and almacen.existe(huella) and not almacen.texto_comprimido(huella):
+            almacen.guardar_texto(almacen.leer_texto(huella))
+
+
+class Migration(migrations.Migration):
+    """
+    Comprime los blobs de texto existentes. Sin operación inversa: el
+    almacén lee tanto los blobs comprimidos como los de texto plano.
+    """
+
+    dependencies = [
+        ('Document_Processing', '0014_versiones_coleccion'),
+    ]
+
+    operations = [
+        migrations.RunPython(comprimir_blobs_texto, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from collections import defaultdict
+from django.db import migrations
+from django.db.models import Count, F
+from django.utils import timezone
+
+TAMAÑO_LOTE_TERMINOS = 500
+
+
+def _ajustar_eliminados(apps, signo):
+    """
+    Suma (signo=1) o resta (signo=-1) a FrecuenciaTermino los términos de
+    los documentos eliminados lógicamente, agrupando por (usuario,
+    cantidad de documentos) para actualizar los términos por lotes.
+    """
+    TerminoIndexado = apps.get_model('Document_Processing', 'TerminoIndexado')
+    FrecuenciaTermino = apps.get_model('Document_Processing', 'FrecuenciaTermino')
+
+    grupos = defaultdict(list)
+    filas = TerminoIndexado.objects.filter(documento__eliminado=True).order_by().values(
+        'documento__usuario_id', 'termino'
+    ).annotate(documentos=Count('documento_id', distinct=True))
+    for fila in filas.iterator():
+        grupos[(fila['documento__usuario_id'], fila['documentos'])].append(fila['termino'])
+
+    ahora = timezone.now()
+    for (usuario_id, documentos), terminos in grupos.items():
+        for i in range(0, len(terminos), TAMAÑO_LOTE_TERMINOS):
+            FrecuenciaTermino.objects.filter(
+                usuario_id=usuario_id, termino__in=terminos[i:i + TAMAÑO_LOTE_TERMINOS]
+            ).update(documentos=F('documentos') + signo * documentos, actualizado_en=ahora)
+
+
+def descontar_eliminados(apps, schema_editor):
+    _ajustar_eliminados(apps, -1)
+
+
+def sumar_eliminados(apps, schema_editor):
+    _ajustar_eliminados(apps, 1)
+
+
+class Migration(migrations.Migration):
+    """
+    FrecuenciaTermino pasa a contar solo documentos activos: descuenta los
+    términos de los documentos que ya estaban eliminados lógicamente.
+    """
+
+    dependencies = [
+        ('Document_Processing', '0015_comprimir_blobs_texto'),
+    ]
+
+    operations = [
+        migrations.RunPython(descontar_eliminados, sumar_eliminados),
+    ]
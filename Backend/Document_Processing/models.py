@@ -1,7 +1,44 @@
-from django.db import models
+import uuid
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
+from .fields import ReferenciaBlob, TextoEnAlmacenField, referencia_blob
+from .Services import cache_busqueda, estadisticas, versiones
+from .Services.alcance_busqueda import coincidencias
+from .Services.almacen_blobs import LONGITUD_HUELLA, almacen_blobs
+from .Services.operaciones_masivas import eliminar_documentos
+from .Services.normalizacion import normalizar_texto
+from .Services.indice_busqueda import SEPARADOR_PAGINA, descontar_frecuencias, indexar_documento, sumar_frecuencias
+from .Services.similitud import registrar_firma
+
+LONGITUD_RESUMEN = 200
+
+
+def resumir_texto(texto, longitud=LONGITUD_RESUMEN):
+    """
+    Devuelve un resumen del texto (primeros caracteres).
+    Útil para mostrar previsualizaciones en listados y búsquedas.
+    """
+    if len(texto) <= longitud:
+        return texto
+    return texto[:longitud - 3] + "..."
+
+
+def tamaño_legible(tamaño):
+    """Tamaño en bytes en formato legible ("1.5 MB")."""
+    for unidad in ['B', 'KB', 'MB', 'GB']:
+        if tamaño < 1024.0:
+            return f"{tamaño:.1f} {unidad}"
+        tamaño /= 1024.0
+    return f"{tamaño:.1f} TB"
+
+
+METODOS_EXTRACCION = [
+    ('pypdf', 'PyPDF2 - Texto directo'),
+    ('ocr', 'OCR - Reconocimiento óptico'),
+]
+
 
 class DocumentoManager(models.Manager):
     """
@@ -17,24 +54,44 @@ class DocumentoManager(models.Manager):
         """Documentos no eliminados."""
         return self.filter(eliminado=False)
     
+    def vencidos(self, limite):
+        """
+        Documentos eliminados lógicamente antes de `limite`; los eliminados
+        sin fecha registrada se evalúan por su última actualización.
+        """
+        return self.filter(eliminado=True).filter(
+            models.Q(fecha_eliminacion__lt=limite)
+            | models.Q(fecha_eliminacion__isnull=True, actualizado_en__lt=limite)
+        )
+    
     def por_usuario(self, usuario):
         """Documentos activos de un usuario específico."""
         return self.activos().filter(usuario=usuario)
     
+    def _busqueda(self, documentos, termino, usuario_id=None):
+        """
+        Filtra por texto los documentos del ámbito. Si el índice acota la
+        consulta, el ámbito ya se resolvió en memoria con mapas de bits:
+        se leen solo esos ids por clave primaria (sin el filtro por usuario,
+        que haría al planificador recorrer todos sus documentos) y la
+        comparación de texto se evalúa únicamente sobre ellos.
+        """
+        ids = coincidencias(termino, usuario_id)
+        if ids is not None:
+            documentos = self.filter(id__in=ids, eliminado=False)
+        return documentos.filter(texto_normalizado__contains=normalizar_texto(termino))
+    
     def busqueda_global(self, termino):
         """
         Búsqueda de texto en todos los documentos activos.
-        Utilizando icontains para búsqueda case-insensitive.
+        Compara contra la columna normalizada (sin acentos ni mayúsculas),
+        por lo que no se pliega el texto fila por fila en cada consulta.
         """
-        return self.activos().filter(
-            texto_extraido__icontains=termino
-        ).select_related('usuario')  # Optimización: evitar consultas adicionales
+        return self._busqueda(self.activos(), termino).select_related('usuario')  # Optimización: evitar consultas adicionales
     
     def busqueda_usuario(self, usuario, termino):
         """Búsqueda de texto en documentos de un usuario específico."""
-        return self.por_usuario(usuario).filter(
-            texto_extraido__icontains=termino
-        )
+        return self._busqueda(self.por_usuario(usuario), termino, usuario.id).select_related('usuario')
 
 class DocumentoProcesado(models.Model):
     """
@@ -65,20 +122,52 @@ class DocumentoProcesado(models.Model):
         help_text="Tamaño del archivo en bytes"
     )
     
-    # Contenido extraído - INDEXADO para búsquedas
-    texto_extraido = models.TextField(
+    # Referencia al PDF original en el almacén de blobs (permite reprocesar)
+    huella_pdf = models.CharField(
+        max_length=LONGITUD_HUELLA,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text="SHA-256 del PDF original en el almacén de blobs"
+    )
+    
+    # Contenido extraído - EN EL ALMACÉN DE BLOBS (la columna guarda su SHA-256;
+    # las búsquedas usan texto_normalizado y el índice)
+    texto_extraido = TextoEnAlmacenField(
+        db_column='texto_sha256',
         validators=[MinLengthValidator(1)],
-        help_text="Texto completo extraído del PDF",
-        db_index=True  # Índice para búsquedas rápidas
+        help_text="Texto completo extraído del PDF"
+    )
+    
+    # Sombra normalizada del texto, calculada una vez en la ingesta. Se guarda
+    # sin comprimir (LIKE la recorre en SQL), igual que PaginaDocumento.texto
+    texto_normalizado = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Texto sin acentos, en minúsculas y con espacios colapsados (para búsquedas)"
+    )
+    
+    # Resumen precalculado para listados (evita leer el texto completo)
+    resumen_texto = models.CharField(
+        max_length=LONGITUD_RESUMEN,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Primeros caracteres del texto extraído, calculados en la ingesta"
+    )
+    
+    norma_terminos = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Norma del vector de pesos tf del documento (documentos similares)"
     )
     
     # Metadatos del procesamiento
     metodo_extraccion = models.CharField(
         max_length=50,
-        choices=[
-            ('pypdf', 'PyPDF2 - Texto directo'),
-            ('ocr', 'OCR - Reconocimiento óptico'),
-        ],
+        choices=METODOS_EXTRACCION,
         help_text="Método utilizado para extraer el texto"
     )
     
@@ -118,6 +207,25 @@ class DocumentoProcesado(models.Model):
     # Manager personalizado
     objects = DocumentoManager()
     
+    # Columnas de texto completo; se difieren en listados y búsquedas
+    CAMPOS_TEXTO = ('texto_extraido', 'texto_normalizado')
+    
+    # Columnas de las que dependen las tablas de estadísticas y las
+    # frecuencias de términos (estas últimas solo de eliminado)
+    CAMPOS_RESUMEN = (
+        'usuario_id', 'metodo_extraccion', 'tamaño_bytes', 'tiempo_procesamiento',
+        'fecha_procesamiento', 'eliminado'
+    )
+    
+    # Páginas entregadas por el extractor (lista de dicts con numero, texto,
+    # metodo_extraccion, confianza y tiempo_procesamiento). Si se asignan antes
+    # de crear el documento se guardan tal cual; si no, se derivan del texto.
+    paginas_extraidas = None
+    
+    # Firma MinHash ya calculada (p. ej. al buscar casi duplicados antes de
+    # guardar); si no se asigna, se calcula del texto al crear el documento.
+    firma_similitud = None
+    
     class Meta:
         # Índices compuestos para optimización de consultas
         indexes = [
@@ -136,6 +244,18 @@ class DocumentoProcesado(models.Model):
                 fields=['eliminado', 'fecha_procesamiento'], 
                 name='doc_global_fecha_idx'
             ),
+            # Índice por fecha de cambio: refresco incremental de los mapas
+            # de bits de búsqueda (documentos creados, eliminados o restaurados)
+            models.Index(
+                fields=['actualizado_en'],
+                name='doc_actualizado_idx'
+            ),
+            # Índice parcial para la purga: solo contiene los eliminados
+            models.Index(
+                fields=['fecha_eliminacion'],
+                name='doc_eliminados_fecha_idx',
+                condition=models.Q(eliminado=True)
+            ),
         ]
         
         ordering = ['-fecha_procesamiento']  # Orden descendente por defecto
@@ -148,39 +268,570 @@ class DocumentoProcesado(models.Model):
     def delete(self, *args, **kwargs):
         """
         Override del método delete para implementar soft delete.
-        En lugar de eliminar físicamente, marca como eliminado.
+        En lugar de eliminar físicamente, marca como eliminado con un UPDATE
+        de solo esas columnas y descuenta el documento de las estadísticas
+        en la misma transacción.
         """
+        if self.eliminado:
+            return
+        fecha = timezone.now()
+        eliminar_documentos(DocumentoProcesado.objects.filter(pk=self.pk), fecha=fecha)
         self.eliminado = True
-        self.fecha_eliminacion = timezone.now()
-        self.save()
+        self.fecha_eliminacion = fecha
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda el documento e indexa su texto cuando se crea.
+        
+        Técnica: La normalización, el índice invertido y la firma de
+        similitud se calculan una sola vez en la ingesta para que las
+        búsquedas no reprocesen el texto.
+        Cualquier cambio (alta, eliminación lógica, edición) invalida las
+        búsquedas en caché del usuario y las globales.
+        
+        Al editar un documento existente (p. ej. desde el admin) se comparan
+        las columnas de CAMPOS_RESUMEN con las guardadas: si cambiaron, se
+        descuenta la versión anterior de las estadísticas y se suma la
+        nueva, y un cambio de eliminado descuenta o vuelve a sumar sus
+        términos, igual que eliminar_documentos y restaurar_documentos.
+        """
+        es_nuevo = self._state.adding
+        if es_nuevo:
+            self.actualizar_campos_derivados()
+        
+        with transaction.atomic():
+            anterior = None if es_nuevo else self._resumen_guardado(kwargs.get('update_fields'))
+            if anterior is not None and anterior.eliminado != self.eliminado:
+                # Antes del UPDATE: ambas funciones filtran por el estado guardado
+                (descontar_frecuencias if self.eliminado else sumar_frecuencias)([self.pk])
+            
+            super().save(*args, **kwargs)
+            
+            if es_nuevo:
+                paginas = self.registrar_paginas(self.paginas_extraidas)
+                indexar_documento(self, paginas, nuevo=True)
+                registrar_firma(self, self.firma_similitud, nuevo=True)
+                if not self.eliminado:
+                    estadisticas.aplicar(estadisticas.deltas_documentos([self]), 1)
+            elif anterior is not None:
+                if not anterior.eliminado:
+                    estadisticas.aplicar(estadisticas.deltas_documentos([anterior]), -1)
+                if not self.eliminado:
+                    estadisticas.aplicar(estadisticas.deltas_documentos([self]), 1)
+            usuarios = {self.usuario_id} | ({anterior.usuario_id} if anterior else set())
+            versiones.renovar(usuarios)
+        cache_busqueda.invalidar(usuarios)
+    
+    def _resumen_guardado(self, update_fields=None):
+        """
+        Columnas de CAMPOS_RESUMEN tal como están guardadas, bloqueando la
+        fila; None si no cambió ninguna (o update_fields no incluye ninguna).
+        """
+        campos = [campo.removesuffix('_id') for campo in self.CAMPOS_RESUMEN]
+        if update_fields is not None and not set(campos) & set(update_fields):
+            return None
+        anterior = DocumentoProcesado.objects.select_for_update().only(*campos).filter(pk=self.pk).first()
+        if anterior is None or all(
+            getattr(anterior, campo) == getattr(self, campo) for campo in self.CAMPOS_RESUMEN
+        ):
+            return None
+        return anterior
+    
+    def registrar_paginas(self, paginas=None):
+        """
+        Guarda las páginas del documento con una sola inserción masiva.
+        
+        Sin páginas del extractor, se derivan del texto completo usando el
+        separador de página.
+        """
+        if paginas is None:
+            paginas = [
+                {'numero': numero, 'texto': texto}
+                for numero, texto in enumerate(self.texto_extraido.split(SEPARADOR_PAGINA), start=1)
+            ]
+        
+        objetos = [
+            PaginaDocumento(
+                documento=self,
+                numero=pagina['numero'],
+                texto=pagina['texto'],
+                metodo_extraccion=pagina.get('metodo_extraccion') or self.metodo_extraccion,
+                confianza=pagina.get('confianza'),
+                tiempo_procesamiento=pagina.get('tiempo_procesamiento')
+            )
+            for pagina in paginas
+        ]
+        return PaginaDocumento.objects.bulk_create(objetos, batch_size=500)
+    
+    def reemplazar_texto(self, texto, paginas=None):
+        """
+        Reemplaza el texto de un documento existente y todo lo derivado de
+        él: normalizado, resumen, páginas, índice invertido (con sus
+        frecuencias) y firma de similitud. Todo camino que edite el texto
+        debe pasar por aquí.
+        
+        Args:
+            paginas: páginas del extractor; si no se reciben se derivan del
+                texto con el separador de página
+        """
+        self.texto_extraido = texto
+        self.actualizar_campos_derivados()
+        with transaction.atomic():
+            self.save()
+            self.paginas.all().delete()
+            indexar_documento(self, self.registrar_paginas(paginas))
+            registrar_firma(self)
+    
+    def actualizar_texto_normalizado(self):
+        """Recalcula la sombra normalizada a partir de texto_extraido."""
+        self.texto_normalizado = normalizar_texto(self.texto_extraido)
+    
+    def actualizar_campos_derivados(self):
+        """Recalcula los campos derivados del texto (normalizado y resumen)."""
+        self.actualizar_texto_normalizado()
+        self.resumen_texto = resumir_texto(self.texto_extraido)
     
     def hard_delete(self):
         """
         Método para eliminación física del registro.
         Usar solo cuando sea necesario limpiar completamente.
+        
+        Los blobs del texto y del PDF se eliminan si ningún otro documento
+        los referencia (pueden estar compartidos por la deduplicación).
         """
-        super().delete()
+        huellas = DocumentoProcesado.objects.filter(pk=self.pk).values_list(
+            'texto_extraido', 'huella_pdf'
+        ).first() or ()
+        with transaction.atomic():
+            descontar_frecuencias([self.pk])
+            super().delete()
+            if not self.eliminado:
+                estadisticas.aplicar(estadisticas.deltas_documentos([self]), -1)
+                versiones.renovar([self.usuario_id])
+        cache_busqueda.invalidar([self.usuario_id])
+        DocumentoProcesado.liberar_blobs(huellas)
     
-    @property
-    def tamaño_legible(self):
+    @staticmethod
+    def liberar_blobs(huellas):
         """
-        Convierte el tamaño en bytes a formato legible.
+        Elimina del almacén los blobs que ya no referencia ningún documento.
+        Las referencias se vuelven a comprobar con el blob apartado, por si
+        una ingesta concurrente lo reutilizó (ver AlmacenBlobs.eliminar_sin_uso).
         """
-        tamaño = self.tamaño_bytes
-        for unidad in ['B', 'KB', 'MB', 'GB']:
-            if tamaño < 1024.0:
-                return f"{tamaño:.1f} {unidad}"
-            tamaño /= 1024.0
-        return f"{tamaño:.1f} TB"
+        almacen = almacen_blobs()
+        for huella in {huella for huella in huellas if huella}:
+            def en_uso(huella=huella):
+                return DocumentoProcesado.objects.filter(
+                    models.Q(texto_extraido=ReferenciaBlob(huella)) | models.Q(huella_pdf=huella)
+                ).exists()
+            if not en_uso():
+                almacen.eliminar_sin_uso(huella, en_uso)
     
     @property
-    def resumen_texto(self):
+    def huella_texto(self):
+        """SHA-256 del texto en el almacén, sin leer el blob (None si se modificó)."""
+        return referencia_blob(self, 'texto_extraido')
+    
+    @property
+    def tamaño_legible(self):
         """
-        Devuelve un resumen del texto extraído (primeros 200 caracteres).
-        Útil para mostrar previsualizaciones en resultados de búsqueda.
+        Convierte el tamaño en bytes a formato legible.
         """
-        if len(self.texto_extraido) <= 200:
-            return self.texto_extraido
-        return self.texto_extraido[:197] + "..."
+        return tamaño_legible(self.tamaño_bytes)
+    
+
+
+class EstadisticaUsuario(models.Model):
+    """
+    Resumen de documentos activos de un usuario por método de extracción.
+    
+    Características técnicas:
+    - Se actualiza con UPDATE ... SET x = x + delta en la misma transacción
+      que el alta, la eliminación lógica o la restauración
+    - El endpoint de estadísticas lee una fila por método en lugar de
+      agregar todos los documentos del usuario
+    - Reconstruible con el comando reconciliar_estadisticas
+    """
+    
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='estadisticas_documentos',
+        help_text="Usuario al que pertenecen las estadísticas"
+    )
+    
+    metodo_extraccion = models.CharField(
+        max_length=50,
+        choices=METODOS_EXTRACCION,
+        help_text="Método de extracción"
+    )
+    
+    documentos = models.IntegerField(
+        default=0,
+        help_text="Documentos activos"
+    )
+    
+    tamaño_bytes = models.BigIntegerField(
+        default=0,
+        help_text="Suma de tamaños de los documentos activos"
+    )
+    
+    suma_tiempo_procesamiento = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=0,
+        help_text="Suma de tiempos de procesamiento en segundos"
+    )
+    
+    documentos_con_tiempo = models.IntegerField(
+        default=0,
+        help_text="Documentos activos con tiempo de procesamiento registrado"
+    )
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['usuario', 'metodo_extraccion'],
+                name='estadistica_usuario_metodo_uniq'
+            ),
+        ]
+        verbose_name = "Estadística de Usuario"
+        verbose_name_plural = "Estadísticas de Usuarios"
+    
+    def __str__(self):
+        return f"{self.usuario_id} - {self.metodo_extraccion}: {self.documentos}"
+
+
+class EstadisticaDiaria(models.Model):
+    """
+    Documentos activos de un usuario agrupados por día de procesamiento.
+    
+    Permite contar documentos recientes leyendo a lo sumo una fila por día.
+    """
+    
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='estadisticas_diarias',
+        help_text="Usuario al que pertenecen las estadísticas"
+    )
+    
+    dia = models.DateField(
+        help_text="Día de procesamiento de los documentos"
+    )
+    
+    documentos = models.IntegerField(
+        default=0,
+        help_text="Documentos activos procesados ese día"
+    )
+    
+    tamaño_bytes = models.BigIntegerField(
+        default=0,
+        help_text="Suma de tamaños de esos documentos"
+    )
+    
+    class Meta:
+        constraints = [
+            # También sirve de índice para filtrar por usuario y rango de días
+            models.UniqueConstraint(
+                fields=['usuario', 'dia'],
+                name='estadistica_usuario_dia_uniq'
+            ),
+        ]
+        verbose_name = "Estadística Diaria"
+        verbose_name_plural = "Estadísticas Diarias"
+    
+    def __str__(self):
+        return f"{self.usuario_id} - {self.dia}: {self.documentos}"
+
+
+class VersionColeccion(models.Model):
+    """
+    Versión de la colección de documentos de un ámbito ('global' o
+    'usuario:<id>', los mismos de la caché de búsquedas).
+    
+    Características técnicas:
+    - Se renueva con un único upsert en la misma transacción que el alta,
+      la edición, la eliminación lógica, la restauración o la purga
+    - Es el validador (ETag) de listados, búsquedas y estadísticas: leerla
+      es una consulta por clave única, sin recorrer los documentos
+    - Guarda un token aleatorio: solo importa que cambie, no su orden, así
+      que no depende del reloj de cada proceso
+    """
+    
+    ambito = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="Ámbito de la colección ('global' o 'usuario:<id>')"
+    )
+    
+    version = models.UUIDField(
+        default=uuid.uuid4,
+        help_text="Token renovado en cada cambio de la colección"
+    )
+    
+    class Meta:
+        verbose_name = "Versión de Colección"
+        verbose_name_plural = "Versiones de Colecciones"
+    
+    def __str__(self):
+        return f"{self.ambito}: {self.version}"
+
+
+class PaginaDocumento(models.Model):
+    """
+    Texto de una página individual de un documento procesado.
+    
+    Características técnicas:
+    - Permite mostrar o buscar una página sin cargar el documento completo
+    - Conserva el método, la confianza y el tiempo de extracción por página
+    - Se inserta en bloque (bulk_create) junto con el documento
+    """
+    
+    documento = models.ForeignKey(
+        DocumentoProcesado,
+        on_delete=models.CASCADE,
+        related_name='paginas',
+        help_text="Documento al que pertenece la página"
+    )
+    
+    numero = models.PositiveIntegerField(
+        help_text="Número de página (desde 1)"
+    )
+    
+    texto = models.TextField(
+        blank=True,
+        help_text="Texto extraído de la página"
+    )
+    
+    metodo_extraccion = models.CharField(
+        max_length=50,
+        choices=METODOS_EXTRACCION,
+        help_text="Método utilizado para extraer el texto de la página"
+    )
+    
+    confianza = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Confianza media del OCR (0-100); vacío para texto nativo"
+    )
+    
+    tiempo_procesamiento = models.DecimalField(
+        max_digits=8,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text="Tiempo de extracción de la página en segundos"
+    )
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['documento', 'numero'],
+                name='pagina_documento_numero_uniq'
+            ),
+        ]
+        ordering = ['numero']
+        verbose_name = "Página de Documento"
+        verbose_name_plural = "Páginas de Documentos"
+    
+    def __str__(self):
+        return f"{self.documento_id} - página {self.numero}"
+
+
+class TerminoIndexado(models.Model):
+    """
+    Entrada del índice invertido de búsqueda (posting).
+    
+    Características técnicas:
+    - Un registro por término, documento y página
+    - Posiciones de cada ocurrencia para generar fragmentos sin leer el texto
+    - Eliminación en cascada junto con el documento
+    """
+    
+    documento = models.ForeignKey(
+        DocumentoProcesado,
+        on_delete=models.CASCADE,
+        related_name='terminos_indexados',
+        help_text="Documento al que pertenece el término"
+    )
+    
+    termino = models.CharField(
+        max_length=100,
+        help_text="Término normalizado (minúsculas)"
+    )
+    
+    pagina = models.PositiveIntegerField(
+        default=1,
+        help_text="Número de página donde aparece el término"
+    )
+    
+    frecuencia = models.PositiveIntegerField(
+        default=0,
+        help_text="Número total de ocurrencias del término en la página"
+    )
+    
+    posiciones = models.JSONField(
+        default=list,
+        help_text="Pares [inicio, fin] de las primeras ocurrencias en el texto de la página"
+    )
+    
+    class Meta:
+        constraints = [
+            # Un posting por término y página; también indexa (documento, termino)
+            models.UniqueConstraint(
+                fields=['documento', 'termino', 'pagina'],
+                name='indice_doc_termino_pagina_uniq'
+            ),
+        ]
+        indexes = [
+            # Índice para localizar documentos a partir de un término
+            models.Index(
+                fields=['termino', 'documento'],
+                name='indice_termino_doc_idx'
+            ),
+        ]
+        verbose_name = "Término Indexado"
+        verbose_name_plural = "Términos Indexados"
+    
+    def __str__(self):
+        return f"{self.termino} ({self.documento_id}, p. {self.pagina})"
 
 
+class FrecuenciaTermino(models.Model):
+    """
+    Cantidad de documentos de un usuario que contienen cada término
+    (frecuencia de documento, df).
+    
+    Características técnicas:
+    - Mantenida de forma incremental al indexar, eliminar (lógica o
+      físicamente) y restaurar
+    - Da el IDF de los términos sin recorrer el índice invertido
+    - Cuenta solo los documentos activos: la eliminación lógica descuenta
+      sus términos y la restauración los vuelve a sumar
+    - Las filas que llegan a cero se conservan (con su fecha de cambio)
+      para que los diccionarios de sugerencias en memoria vean también las
+      bajas al refrescarse; purgar_eliminados las elimina tras la retención
+    """
+    
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Usuario al que pertenecen los documentos"
+    )
+    
+    termino = models.CharField(
+        max_length=100,
+        help_text="Término normalizado"
+    )
+    
+    documentos = models.IntegerField(
+        default=0,
+        help_text="Documentos del usuario que contienen el término"
+    )
+    
+    actualizado_en = models.DateTimeField(
+        default=timezone.now,
+        help_text="Último cambio de la frecuencia (refresco incremental de sugerencias)"
+    )
+    
+    class Meta:
+        constraints = [
+            # También sirve de índice para buscar términos de un usuario
+            models.UniqueConstraint(
+                fields=['usuario', 'termino'],
+                name='frecuencia_usuario_termino_uniq'
+            ),
+        ]
+        indexes = [
+            # Cambios recientes de un usuario y globales
+            models.Index(
+                fields=['usuario', 'actualizado_en'],
+                name='frecuencia_usuario_cambio_idx'
+            ),
+            models.Index(
+                fields=['actualizado_en'],
+                name='frecuencia_cambio_idx'
+            ),
+        ]
+        verbose_name = "Frecuencia de Término"
+        verbose_name_plural = "Frecuencias de Términos"
+    
+    def __str__(self):
+        return f"{self.termino} ({self.usuario_id}): {self.documentos}"
+
+
+class FirmaDocumento(models.Model):
+    """
+    Firma MinHash del texto de un documento para detectar casi duplicados
+    (el mismo documento reescaneado, guardado de nuevo o con una página
+    distinta).
+    
+    Características técnicas:
+    - Tamaño fijo (512 bytes) independiente del largo del texto
+    - Tabla aparte para no ensanchar las filas de DocumentoProcesado
+    """
+    
+    documento = models.OneToOneField(
+        DocumentoProcesado,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='firma',
+        help_text="Documento al que pertenece la firma"
+    )
+    
+    firma = models.BinaryField(
+        help_text="Valores MinHash empaquetados (uint32 little-endian)"
+    )
+    
+    class Meta:
+        verbose_name = "Firma de Documento"
+        verbose_name_plural = "Firmas de Documentos"
+    
+    def __str__(self):
+        return f"Firma {self.documento_id}"
+
+
+class CubetaSimilitud(models.Model):
+    """
+    Entrada del índice LSH: una clave por banda de la firma de un documento.
+    
+    Dos documentos son candidatos a casi duplicados si comparten alguna
+    clave; la búsqueda es una consulta por igualdad sobre el índice
+    (usuario, cubeta) en lugar de comparar contra todos los documentos.
+    """
+    
+    documento = models.ForeignKey(
+        DocumentoProcesado,
+        on_delete=models.CASCADE,
+        related_name='cubetas_similitud',
+        help_text="Documento al que pertenece la clave"
+    )
+    
+    # Desnormalizado para acotar la búsqueda a los documentos del usuario
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Propietario del documento"
+    )
+    
+    cubeta = models.BigIntegerField(
+        help_text="Hash de la banda de la firma (incluye el número de banda)"
+    )
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['usuario', 'cubeta'],
+                name='similitud_usuario_cubeta_idx'
+            ),
+        ]
+        verbose_name = "Cubeta de Similitud"
+        verbose_name_plural = "Cubetas de Similitud"
+    
+    def __str__(self):
+        return f"{self.cubeta} ({self.documento_id})"
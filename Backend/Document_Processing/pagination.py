@@ -0,0 +1,191 @@
+import base64
+import json
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Con total=aproximado se cuenta como mucho hasta este límite
+LIMITE_CONTEO_APROXIMADO = 1000
+
+MODOS_TOTAL = ('exacto', 'aproximado', 'omitir')
+
+
+def contar_aproximado(queryset, limite=None):
+    """
+    Cantidad aproximada de filas de un queryset.
+
+    Técnicas implementadas:
+    - PostgreSQL: estimación del planificador (EXPLAIN), sin recorrer filas
+    - Otros motores: conteo acotado (SELECT COUNT(*) FROM (... LIMIT n)),
+      que deja de leer al llegar al límite
+
+    Returns:
+        (total, es_aproximado)
+    """
+    limite = limite or LIMITE_CONTEO_APROXIMADO
+    queryset = queryset.order_by()
+    if connection.vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))
+        return plan[0]['Plan']['Plan Rows'], True
+
+    total = queryset[:limite + 1].count()
+    if total > limite:
+        return limite, True
+    return total, False
+
+
+class DocumentoCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (fecha_procesamiento, id).
+
+    Técnicas implementadas:
+    - Sin OFFSET: cada página continúa desde la última fila de la anterior
+      con WHERE fecha <= f AND (fecha < f OR id < i), que recorre el rango
+      de los índices compuestos (usuario, fecha) y (eliminado, fecha)
+    - Sin COUNT(*) por defecto; total exacto o aproximado a pedido
+      (?total=exacto|aproximado|omitir)
+    - Se lee una fila extra para saber si hay más páginas
+    - Mismo formato de respuesta (resultados/paginacion) que la paginación
+      por número de página
+
+    Uso:
+        ?paginacion=cursor[&page_size=20][&total=aproximado]
+        y luego los enlaces 'siguiente'/'anterior' de la respuesta
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    campo_orden = 'fecha_procesamiento'
+
+    @classmethod
+    def solicitada(cls, request):
+        """Indica si la request pide paginación por cursor."""
+        return (
+            request.query_params.get('paginacion') == 'cursor'
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.descendente = self._orden_descendente(request)
+        self.total, self.total_aproximado = self._contar(queryset, request)
+
+        posicion = self._decodificar_cursor(request)
+        hacia_atras = bool(posicion and posicion['anterior'])
+
+        # Hacia atrás se recorre en orden inverso y luego se invierte la página
+        descendente = self.descendente != hacia_atras
+        prefijo = '-' if descendente else ''
+        queryset = queryset.order_by(f'{prefijo}{self.campo_orden}', f'{prefijo}id')
+
+        if posicion:
+            queryset = queryset.filter(self._filtro_posicion(posicion, descendente))
+
+        filas = list(queryset[:self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        if hacia_atras:
+            filas.reverse()
+
+        self.pagina = filas
+        self.hay_siguiente = hay_mas if not hacia_atras else bool(filas)
+        self.hay_anterior = bool(posicion) and (hay_mas if hacia_atras else bool(filas))
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            'resultados': data,
+            'paginacion': {
+                'siguiente': self.get_next_link(),
+                'anterior': self.get_previous_link(),
+                'total_paginas': None,
+                'pagina_actual': None,
+                'total_documentos': self.total,
+                'total_aproximado': self.total_aproximado,
+                'documentos_por_pagina': self.page_size,
+                'modo': 'cursor'
+            }
+        })
+
+    def get_page_size(self, request):
+        try:
+            tamaño = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(tamaño, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.pagina:
+            return None
+        return self._enlace(self.pagina[-1], anterior=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior or not self.pagina:
+            return None
+        return self._enlace(self.pagina[0], anterior=True)
+
+    def _orden_descendente(self, request):
+        """
+        El orden solo puede ser por fecha (ascendente o descendente): es la
+        clave sobre la que se construye el cursor.
+        """
+        orden = request.query_params.get('ordering', f'-{self.campo_orden}')
+        if orden.lstrip('-') != self.campo_orden:
+            raise ValidationError({
+                'ordering': f"La paginación por cursor solo admite ordering={self.campo_orden} o -{self.campo_orden}"
+            })
+        return orden.startswith('-')
+
+    def _contar(self, queryset, request):
+        modo = request.query_params.get('total', 'omitir')
+        if modo not in MODOS_TOTAL:
+            raise ValidationError({'total': f"Valores posibles: {', '.join(MODOS_TOTAL)}"})
+        if modo == 'exacto':
+            return queryset.count(), False
+        if modo == 'aproximado':
+            return contar_aproximado(queryset)
+        return None, False
+
+    def _filtro_posicion(self, posicion, descendente):
+        fecha, id_ = posicion['fecha'], posicion['id']
+        if descendente:
+            return Q(**{f'{self.campo_orden}__lte': fecha}) & (
+                Q(**{f'{self.campo_orden}__lt': fecha}) | Q(id__lt=id_)
+            )
+        return Q(**{f'{self.campo_orden}__gte': fecha}) & (
+            Q(**{f'{self.campo_orden}__gt': fecha}) | Q(id__gt=id_)
+        )
+
+    def _enlace(self, documento, anterior):
+        # La página puede ser de instancias o de filas values()
+        if isinstance(documento, dict):
+            fecha, id_ = documento[self.campo_orden], documento['id']
+        else:
+            fecha, id_ = getattr(documento, self.campo_orden), documento.id
+        datos = {
+            'f': fecha.isoformat(),
+            'i': id_,
+            'a': anterior
+        }
+        cursor = base64.urlsafe_b64encode(json.dumps(datos).encode('utf-8')).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _decodificar_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            fecha = parse_datetime(datos['f'])
+            if fecha is None:
+                raise ValueError(datos['f'])
+            return {'fecha': fecha, 'id': int(datos['i']), 'anterior': bool(datos['a'])}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound("Cursor inválido")
@@ -0,0 +1,38 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin ella se usa el renderer JSON de DRF
+    orjson = None
+
+# Tipos que orjson no serializa de forma nativa (Decimal, textos diferidos,
+# QuerySet...) y las fechas (formato de DRF: 'Z' y milisegundos) se
+# convierten con el mismo encoder que usa DRF
+_convertir = JSONEncoder().default
+
+_OPCIONES = 0 if orjson is None else orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class RenderizadorJSONRapido(JSONRenderer):
+    """
+    Renderer JSON respaldado por orjson.
+    
+    Técnicas implementadas:
+    - Codificación en C directamente a bytes UTF-8, sin pasar por str
+    - UUID y subclases de str/dict/list (ErrorDetail, ReturnDict)
+      serializados de forma nativa; el resto con el encoder de DRF
+    - Misma salida compacta que JSONRenderer; si el cliente pide sangría
+      (Accept: application/json; indent=4) o no está orjson, se delega en él
+    """
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        contenido = orjson.dumps(data, default=_convertir, option=_OPCIONES)
+        # Como JSONRenderer: separadores de línea Unicode escapados (JSON válido como JavaScript)
+        if b'\xe2\x80\xa8' in contenido or b'\xe2\x80\xa9' in contenido:
+            contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return contenido
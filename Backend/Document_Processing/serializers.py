@@ -1,6 +1,64 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.db.models.functions import Length
+from django.utils import timezone
 from django.contrib.auth.models import User
-from .models import DocumentoProcesado
+from .models import METODOS_EXTRACCION, DocumentoProcesado, tamaño_legible
+from .Services.indice_busqueda import obtener_fragmentos
+
+# Fechas del camino rápido con el mismo formato que los serializers (DATETIME_FORMAT de DRF)
+_campo_fecha = serializers.DateTimeField()
+
+
+def formateador_fechas():
+    """
+    Función que formatea fechas igual que DateTimeField de DRF, con la zona
+    horaria y el formato resueltos una sola vez por página en lugar de por
+    fila (el formateo era el costo principal del camino rápido).
+    """
+    if not settings.USE_TZ or (api_settings.DATETIME_FORMAT or '').lower() != ISO_8601:
+        return _campo_fecha.to_representation
+    zona = timezone.get_current_timezone()
+    
+    def formatear(valor):
+        if not valor:
+            return None
+        texto = valor.astimezone(zona).isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    
+    return formatear
+
+
+def info_usuario(usuario_id, username, nombre, apellido, incluir_id=False):
+    """
+    Información básica del usuario sin exponer datos sensibles.
+    """
+    info = {'id': usuario_id} if incluir_id else {}
+    info['username'] = username
+    info['nombre_completo'] = f"{nombre} {apellido}".strip()
+    return info
+
+
+def fragmento_relevante(datos, resumen):
+    """
+    Primer fragmento que contiene el término de búsqueda, con puntos
+    suspensivos si está recortado; el resumen si no hay fragmentos.
+    """
+    if not datos['fragmentos']:
+        return resumen
+    
+    fragmento = datos['fragmentos'][0]
+    texto = fragmento['texto']
+    
+    # Agregar puntos suspensivos si es necesario
+    if fragmento['truncado_inicio']:
+        texto = "..." + texto
+    if fragmento['truncado_fin']:
+        texto = texto + "..."
+    
+    return texto
+
 
 class DocumentoProcesadoSerializer(serializers.ModelSerializer):
     """
@@ -19,6 +77,9 @@ class DocumentoProcesadoSerializer(serializers.ModelSerializer):
     # Información del usuario (solo lectura)
     usuario_info = serializers.SerializerMethodField()
     
+    # Resumen por página (sin el texto de cada página)
+    paginas = serializers.SerializerMethodField()
+    
     class Meta:
         model = DocumentoProcesado
         fields = [
@@ -32,6 +93,7 @@ class DocumentoProcesadoSerializer(serializers.ModelSerializer):
             'tiempo_procesamiento',
             'fecha_procesamiento',
             'usuario_info',
+            'paginas',
             'eliminado'
         ]
         read_only_fields = [
@@ -39,18 +101,36 @@ class DocumentoProcesadoSerializer(serializers.ModelSerializer):
             'fecha_procesamiento',
             'usuario_info',
             'tamaño_legible',
-            'resumen_texto'
+            'resumen_texto',
+            'paginas'
         ]
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # El texto completo solo se serializa si la vista lo solicita
+        if not self.context.get('incluir_texto', True):
+            self.fields.pop('texto_extraido')
+    
     def get_usuario_info(self, obj):
         """
         Devuelve información básica del usuario sin exponer datos sensibles.
         """
-        return {
-            'id': obj.usuario.id,
-            'username': obj.usuario.username,
-            'nombre_completo': f"{obj.usuario.first_name} {obj.usuario.last_name}".strip()
-        }
+        usuario = obj.usuario
+        return info_usuario(usuario.id, usuario.username, usuario.first_name, usuario.last_name, incluir_id=True)
+    
+    def get_paginas(self, obj):
+        """
+        Metadatos de cada página: método, confianza, tiempo y longitud.
+        
+        Técnica: values() con Length calculado en la base de datos, sin
+        transferir el texto de las páginas.
+        """
+        return list(
+            obj.paginas.annotate(caracteres=Length('texto')).values(
+                'numero', 'metodo_extraccion', 'confianza',
+                'tiempo_procesamiento', 'caracteres'
+            )
+        )
     
     def validate_texto_extraido(self, value):
         """
@@ -74,21 +154,40 @@ class DocumentoProcesadoSerializer(serializers.ModelSerializer):
         return value
 
 
+class DocumentoBusquedaListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer que precalcula los fragmentos de toda la página de
+    resultados con una sola consulta al índice y una al texto.
+    """
+    
+    def to_representation(self, data):
+        documentos = list(data.all() if hasattr(data, 'all') else data)
+        self.context['fragmentos'] = obtener_fragmentos(
+            [documento.id for documento in documentos],
+            self.context.get('termino_busqueda', '')
+        )
+        return super().to_representation(documentos)
+
+
 class DocumentoBusquedaSerializer(serializers.ModelSerializer):
     """
     Serializer optimizado para resultados de búsqueda.
     
     Características:
     - Campos mínimos para performance
-    - Fragmentos relevantes del texto
+    - Fragmentos resaltados a partir de las posiciones del índice
     - Información contextual del usuario
+    - Camino rápido sobre filas values() para la vista de búsqueda
     """
     
     usuario_info = serializers.SerializerMethodField()
     fragmento_relevante = serializers.SerializerMethodField()
+    fragmentos = serializers.SerializerMethodField()
+    paginas_coincidentes = serializers.SerializerMethodField()
     
     class Meta:
         model = DocumentoProcesado
+        list_serializer_class = DocumentoBusquedaListSerializer
         fields = [
             'id',
             'nombre_archivo',
@@ -96,47 +195,95 @@ class DocumentoBusquedaSerializer(serializers.ModelSerializer):
             'metodo_extraccion',
             'fecha_procesamiento',
             'usuario_info',
-            'fragmento_relevante'
+            'fragmento_relevante',
+            'fragmentos',
+            'paginas_coincidentes'
         ]
     
+    # Columnas del camino rápido (ver serializar_valores)
+    CAMPOS_VALORES = (
+        'id', 'nombre_archivo', 'tamaño_bytes', 'metodo_extraccion', 'fecha_procesamiento',
+        'resumen_texto', 'usuario_id', 'usuario__username', 'usuario__first_name', 'usuario__last_name'
+    )
+    
+    @classmethod
+    def serializar_valores(cls, filas, context):
+        """
+        Serializa una página de filas values() (CAMPOS_VALORES) con la misma
+        salida que el serializer.
+        
+        Técnicas implementadas:
+        - Sin instancias del modelo ni campos de DRF por fila: diccionarios
+          construidos directamente desde las columnas
+        - Fragmentos de toda la página con una consulta al índice y una al
+          texto, como el ListSerializer (o los ya calculados en el contexto)
+        - usuario_info armado una vez por usuario y compartido entre filas
+        """
+        filas = list(filas)
+        fragmentos = context.get('fragmentos')
+        if fragmentos is None:
+            fragmentos = obtener_fragmentos(
+                [fila['id'] for fila in filas],
+                context.get('termino_busqueda', '')
+            )
+        fecha = formateador_fechas()
+        usuarios = {}
+        resultados = []
+        for fila in filas:
+            usuario = usuarios.get(fila['usuario_id'])
+            if usuario is None:
+                usuario = usuarios[fila['usuario_id']] = info_usuario(
+                    fila['usuario_id'], fila['usuario__username'],
+                    fila['usuario__first_name'], fila['usuario__last_name']
+                )
+            datos = fragmentos[fila['id']]
+            resultados.append({
+                'id': fila['id'],
+                'nombre_archivo': fila['nombre_archivo'],
+                'tamaño_legible': tamaño_legible(fila['tamaño_bytes']),
+                'metodo_extraccion': fila['metodo_extraccion'],
+                'fecha_procesamiento': fecha(fila['fecha_procesamiento']),
+                'usuario_info': usuario,
+                'fragmento_relevante': fragmento_relevante(datos, fila['resumen_texto']),
+                'fragmentos': datos['fragmentos'],
+                'paginas_coincidentes': datos['paginas'],
+            })
+        return resultados
+    
     def get_usuario_info(self, obj):
         """Información básica del usuario."""
-        return {
-            'username': obj.usuario.username,
-            'nombre_completo': f"{obj.usuario.first_name} {obj.usuario.last_name}".strip()
-        }
+        usuario = obj.usuario
+        return info_usuario(usuario.id, usuario.username, usuario.first_name, usuario.last_name)
+    
+    def _datos_fragmentos(self, obj):
+        """
+        Fragmentos precalculados por el ListSerializer, o calculados
+        para este documento cuando se serializa de forma individual.
+        """
+        fragmentos = self.context.get('fragmentos')
+        if fragmentos is None or obj.id not in fragmentos:
+            fragmentos = obtener_fragmentos([obj.id], self.context.get('termino_busqueda', ''))
+        return fragmentos[obj.id]
+    
+    def get_fragmentos(self, obj):
+        """
+        Fragmentos resaltados con sus posiciones y número de página.
+        """
+        return self._datos_fragmentos(obj)['fragmentos']
+    
+    def get_paginas_coincidentes(self, obj):
+        """
+        Páginas con coincidencias y número de ocurrencias en cada una.
+        """
+        return self._datos_fragmentos(obj)['paginas']
     
     def get_fragmento_relevante(self, obj):
         """
-        Devuelve un fragmento del texto que contiene el término de búsqueda.
+        Devuelve el primer fragmento del texto que contiene el término de búsqueda.
         
-        Técnica: Extracción contextual de texto relevante
+        Técnica: Posiciones obtenidas del índice invertido, sin recorrer el texto
         """
-        termino = self.context.get('termino_busqueda', '')
-        if not termino:
-            return obj.resumen_texto
-        
-        texto = obj.texto_extraido.lower()
-        termino_lower = termino.lower()
-        
-        # Buscar la primera ocurrencia del término
-        posicion = texto.find(termino_lower)
-        if posicion == -1:
-            return obj.resumen_texto
-        
-        # Extraer contexto alrededor del término (200 caracteres)
-        inicio = max(0, posicion - 100)
-        fin = min(len(obj.texto_extraido), posicion + 100)
-        
-        fragmento = obj.texto_extraido[inicio:fin]
-        
-        # Agregar puntos suspensivos si es necesario
-        if inicio > 0:
-            fragmento = "..." + fragmento
-        if fin < len(obj.texto_extraido):
-            fragmento = fragmento + "..."
-        
-        return fragmento
+        return fragmento_relevante(self._datos_fragmentos(obj), obj.resumen_texto)
 
 
 class DocumentoListaSerializer(serializers.ModelSerializer):
@@ -147,6 +294,7 @@ class DocumentoListaSerializer(serializers.ModelSerializer):
     - Carga rápida de listas
     - Información esencial
     - Paginación eficiente
+    - Camino rápido sobre filas values() para las vistas de listado
     """
     
     tamaño_legible = serializers.ReadOnlyField()
@@ -161,6 +309,30 @@ class DocumentoListaSerializer(serializers.ModelSerializer):
             'fecha_procesamiento',
             'resumen_texto'
         ]
+    
+    # Columnas del camino rápido (ver serializar_valores)
+    CAMPOS_VALORES = (
+        'id', 'nombre_archivo', 'tamaño_bytes', 'metodo_extraccion', 'fecha_procesamiento', 'resumen_texto'
+    )
+    
+    @classmethod
+    def serializar_valores(cls, filas, context=None):
+        """
+        Serializa filas values() (CAMPOS_VALORES) con la misma salida que el
+        serializer, sin instancias del modelo ni campos de DRF por fila.
+        """
+        fecha = formateador_fechas()
+        return [
+            {
+                'id': fila['id'],
+                'nombre_archivo': fila['nombre_archivo'],
+                'tamaño_legible': tamaño_legible(fila['tamaño_bytes']),
+                'metodo_extraccion': fila['metodo_extraccion'],
+                'fecha_procesamiento': fecha(fila['fecha_procesamiento']),
+                'resumen_texto': fila['resumen_texto'],
+            }
+            for fila in filas
+        ]
 
 
 class DocumentoCreacionSerializer(serializers.ModelSerializer):
@@ -185,10 +357,93 @@ class DocumentoCreacionSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         """
-        Creación personalizada que asigna automáticamente el usuario actual.
+        Creación personalizada que asigna automáticamente el usuario actual
+        y guarda las páginas entregadas por el extractor.
         """
         # El usuario se obtiene del contexto de la request
         usuario = self.context['request'].user
         validated_data['usuario'] = usuario
         
-        return super().create(validated_data)
+        documento = DocumentoProcesado(**validated_data)
+        documento.paginas_extraidas = self.context.get('paginas')
+        documento.firma_similitud = self.context.get('firma')
+        documento.save()
+        return documento
+
+
+class OperacionMasivaSerializer(serializers.Serializer):
+    """
+    Selección de documentos para operaciones masivas (eliminar, restaurar,
+    purgar): una lista de ids o filtros sobre los documentos del usuario.
+    
+    Características:
+    - Se exige al menos un criterio (o 'todos': true explícito) para evitar
+      operar sobre todos los documentos por omisión
+    - Los filtros se traducen a un queryset; la operación es un único UPDATE
+    """
+    MAX_IDS = 10000
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=MAX_IDS
+    )
+    metodo_extraccion = serializers.ChoiceField(choices=METODOS_EXTRACCION, required=False)
+    fecha_desde = serializers.DateTimeField(required=False)
+    fecha_hasta = serializers.DateTimeField(required=False)
+    nombre_contiene = serializers.CharField(required=False, max_length=255)
+    todos = serializers.BooleanField(required=False, default=False)
+    
+    def validate(self, data):
+        criterios = set(data) - {'todos'}
+        if not criterios and not data['todos']:
+            raise serializers.ValidationError(
+                "Indique 'ids', algún filtro (metodo_extraccion, fecha_desde, "
+                "fecha_hasta, nombre_contiene) o 'todos': true"
+            )
+        return data
+    
+    def filtrar(self, queryset):
+        """Aplica la selección validada a un queryset de documentos."""
+        datos = self.validated_data
+        if 'ids' in datos:
+            queryset = queryset.filter(id__in=datos['ids'])
+        if 'metodo_extraccion' in datos:
+            queryset = queryset.filter(metodo_extraccion=datos['metodo_extraccion'])
+        if 'fecha_desde' in datos:
+            queryset = queryset.filter(fecha_procesamiento__gte=datos['fecha_desde'])
+        if 'fecha_hasta' in datos:
+            queryset = queryset.filter(fecha_procesamiento__lte=datos['fecha_hasta'])
+        if 'nombre_contiene' in datos:
+            queryset = queryset.filter(nombre_archivo__icontains=datos['nombre_contiene'])
+        return queryset
+
+
+class FilaImportacionSerializer(serializers.Serializer):
+    """
+    Validación de una fila de importación NDJSON.
+    
+    Características:
+    - Mismo formato que la exportación: 'id' y 'resumen_texto' se ignoran
+      (se asignan y recalculan al importar)
+    - fecha_procesamiento opcional: conserva la fecha del archivo de origen
+    - paginas opcional: textos por página; si falta, se deriva del texto
+      completo con el separador de página
+    - Una sola instancia valida todas las filas con run_validation(), sin
+      volver a construir los campos por fila
+    """
+    MAX_TAMAÑO_BYTES = 2 ** 31 - 1
+    
+    nombre_archivo = serializers.CharField(max_length=255)
+    tamaño_bytes = serializers.IntegerField(min_value=0, max_value=MAX_TAMAÑO_BYTES)
+    texto_extraido = serializers.CharField(trim_whitespace=False)
+    metodo_extraccion = serializers.ChoiceField(choices=METODOS_EXTRACCION)
+    tiempo_procesamiento = serializers.DecimalField(
+        max_digits=8, decimal_places=3, min_value=0, required=False, allow_null=True
+    )
+    fecha_procesamiento = serializers.DateTimeField(required=False)
+    paginas = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, trim_whitespace=False),
+        required=False,
+        allow_empty=False
+    )
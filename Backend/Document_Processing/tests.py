@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
@@ -7,6 +7,32 @@ from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import DocumentoProcesado
 import json
+import shutil
+import tempfile
+from django.test import override_settings
+
+# Los tests escriben los blobs en un directorio temporal, no en el almacén real
+_almacen_temporal = None
+
+
+def setUpModule():
+    global _almacen_temporal
+    directorio = tempfile.mkdtemp(prefix='blobs-test-')
+    # Sin caché de búsquedas entre tests (los ids se reutilizan tras cada rollback)
+    _almacen_temporal = override_settings(
+        ALMACEN_BLOBS={'DIRECTORIO': directorio},
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'busqueda': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }
+    )
+    _almacen_temporal.enable()
+
+
+def tearDownModule():
+    directorio = _almacen_temporal.options['ALMACEN_BLOBS']['DIRECTORIO']
+    _almacen_temporal.disable()
+    shutil.rmtree(directorio, ignore_errors=True)
 
 class DocumentoProcesadoModelTest(TestCase):
     """
@@ -278,6 +304,11 @@ class DocumentoAPIViewsTest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['nombre_archivo'], 'documento1.pdf')
+        self.assertNotIn('texto_extraido', response.data)
+        self.assertEqual(response.data['resumen_texto'], 'Este es el contenido del primer documento')
+        
+        # El texto completo solo se incluye si se solicita
+        response = self.client.get(url, {'incluir_texto': 'true'})
         self.assertEqual(response.data['texto_extraido'], 'Este es el contenido del primer documento')
     
     def test_detalle_documento_otro_usuario(self):
@@ -370,3 +401,2559 @@ class DocumentoAPIViewsTest(APITestCase):
         stats = response.data['estadisticas_generales']
         self.assertEqual(stats['total_documentos'], 2)
         self.assertEqual(stats['total_tamaño_bytes'], 3072)  # 1024 + 2048
+
+
+class IndiceBusquedaTest(APITestCase):
+    """
+    Tests del índice invertido y de los fragmentos de búsqueda
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        relleno = 'texto de relleno ' * 30
+        self.documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='contrato.pdf',
+            tamaño_bytes=1024,
+            texto_extraido=f'Primera cláusula del contrato. {relleno}\fSegunda página del contrato firmado.',
+            metodo_extraccion='pypdf'
+        )
+    
+    def test_indexado_al_crear(self):
+        """El documento se indexa al crearse, con página y posiciones"""
+        entradas = self.documento.terminos_indexados.filter(termino='contrato').order_by('pagina')
+        self.assertEqual([e.pagina for e in entradas], [1, 2])
+        
+        inicio, fin = entradas[0].posiciones[0]
+        self.assertEqual(self.documento.texto_extraido[inicio:fin], 'contrato')
+    
+    def test_edicion_de_texto_en_admin(self):
+        """Editar el texto en el admin regenera páginas, índice, firma y texto por páginas"""
+        from unittest import mock
+        from django.contrib.admin.sites import site
+        from Document_Processing.models import FirmaDocumento
+        
+        firma_anterior = FirmaDocumento.objects.get(documento=self.documento).firma
+        documento = DocumentoProcesado.objects.get(id=self.documento.id)
+        documento.texto_extraido = 'Acta de la asamblea anual\fResolución aprobada por mayoría de los socios'
+        site._registry[DocumentoProcesado].save_model(
+            mock.Mock(), documento, mock.Mock(changed_data=['texto_extraido']), True
+        )
+        
+        self.assertEqual(
+            list(documento.paginas.order_by('numero').values_list('texto', flat=True)),
+            ['Acta de la asamblea anual', 'Resolución aprobada por mayoría de los socios']
+        )
+        self.assertFalse(documento.terminos_indexados.filter(termino='contrato').exists())
+        self.assertEqual(documento.terminos_indexados.get(termino='resolucion').pagina, 2)
+        self.assertNotEqual(
+            FirmaDocumento.objects.filter(documento=documento).values_list('firma', flat=True).first(),
+            firma_anterior
+        )
+        
+        response = self.client.get(reverse('documentos_buscar'), {'q': 'asamblea'})
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 1)
+        self.assertIn('asamblea', response.data['resultados'][0]['fragmento_relevante'])
+        
+        response = self.client.get(reverse('documento_texto', kwargs={'id': documento.id}), {'pagina': 2})
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'), 'Resolución aprobada por mayoría de los socios')
+    
+    def test_busqueda_devuelve_fragmentos_resaltados(self):
+        """La búsqueda devuelve varios fragmentos con posiciones y páginas"""
+        response = self.client.get(reverse('documentos_buscar'), {'q': 'contrato'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultado = response.data['resultados'][0]
+        fragmentos = resultado['fragmentos']
+        
+        self.assertEqual([f['pagina'] for f in fragmentos], [1, 2])
+        for fragmento in fragmentos:
+            inicio, fin = fragmento['resaltados'][0]
+            self.assertEqual(fragmento['texto'][inicio:fin].lower(), 'contrato')
+            self.assertIn('<mark>contrato</mark>', fragmento['texto_resaltado'])
+        self.assertIn('contrato', resultado['fragmento_relevante'])
+    
+    def test_fragmentos_de_coincidencia_dentro_de_palabra(self):
+        """Una subcadena sin postings ('NTRAT', 'SQUEDA') se ubica en el texto de la página"""
+        response = self.client.get(reverse('documentos_buscar'), {'q': 'NTRAT'})
+        resultado = response.data['resultados'][0]
+        fragmentos = resultado['fragmentos']
+        
+        self.assertEqual([f['pagina'] for f in fragmentos], [1, 2])
+        for fragmento in fragmentos:
+            inicio, fin = fragmento['resaltados'][0]
+            self.assertEqual(fragmento['texto'][inicio:fin], 'ntrat')
+        self.assertIn('co<mark>ntrat</mark>o', fragmentos[0]['texto_resaltado'])
+        self.assertEqual([p['pagina'] for p in resultado['paginas_coincidentes']], [1, 2])
+        
+        documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='guia.pdf',
+            tamaño_bytes=1024,
+            texto_extraido='Guía de búsque-\nda   Rápida',
+            metodo_extraccion='pypdf'
+        )
+        from .Services.indice_busqueda import obtener_fragmentos
+        fragmento = obtener_fragmentos([documento.id], 'SQUEDA')[documento.id]['fragmentos'][0]
+        self.assertEqual(fragmento['texto_resaltado'], 'Guía de bú<mark>sque-\nda</mark>   Rápida')
+
+class NormalizacionTextoTest(TestCase):
+    """
+    Tests de la columna normalizada usada por las búsquedas
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+    
+    def test_normalizar_texto(self):
+        """Acentos, mayúsculas, guiones de fin de línea y espacios"""
+        from .Services.normalizacion import normalizar_texto
+        
+        self.assertEqual(
+            normalizar_texto('Motor de BÚSQUE-\nDA   rápida\n\tÑandú'),
+            'motor de busqueda rapida nandu'
+        )
+    
+    def test_busqueda_sin_acentos(self):
+        """'busqueda' encuentra 'Búsqueda' en ambos managers y en el índice"""
+        documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='doc.pdf',
+            tamaño_bytes=1024,
+            texto_extraido='Guía de Búsqueda avanzada.',
+            metodo_extraccion='pypdf'
+        )
+        
+        self.assertEqual(documento.texto_normalizado, 'guia de busqueda avanzada.')
+        self.assertEqual(DocumentoProcesado.objects.busqueda_global('busqueda').count(), 1)
+        self.assertEqual(DocumentoProcesado.objects.busqueda_usuario(self.usuario, 'GUIA').count(), 1)
+        self.assertTrue(documento.terminos_indexados.filter(termino='busqueda').exists())
+    
+    def test_comando_backfill(self):
+        """El comando rellena documentos sin texto normalizado"""
+        from django.core.management import call_command
+        from io import StringIO
+        
+        documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='doc.pdf',
+            tamaño_bytes=1024,
+            texto_extraido='Acción Pública',
+            metodo_extraccion='pypdf'
+        )
+        DocumentoProcesado.objects.filter(id=documento.id).update(texto_normalizado='')
+        
+        call_command('normalizar_textos', '--lote', '1', stdout=StringIO())
+        
+        documento.refresh_from_db()
+        self.assertEqual(documento.texto_normalizado, 'accion publica')
+
+
+class PaginasDocumentoTest(APITestCase):
+    """
+    Tests del almacenamiento de texto por página
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+    
+    def test_paginas_del_extractor(self):
+        """Las páginas del extractor se guardan con sus metadatos"""
+        documento = DocumentoProcesado(
+            usuario=self.usuario,
+            nombre_archivo='escaneado.pdf',
+            tamaño_bytes=1024,
+            texto_extraido='Acta inicial\fAnexo firmado',
+            metodo_extraccion='ocr'
+        )
+        documento.paginas_extraidas = [
+            {'numero': 1, 'texto': 'Acta inicial', 'metodo_extraccion': 'ocr',
+             'confianza': 91.5, 'tiempo_procesamiento': 0.8},
+            {'numero': 2, 'texto': 'Anexo firmado', 'metodo_extraccion': 'ocr',
+             'confianza': 87.25, 'tiempo_procesamiento': 0.7},
+        ]
+        documento.save()
+        
+        paginas = list(documento.paginas.all())
+        self.assertEqual([p.numero for p in paginas], [1, 2])
+        self.assertEqual(float(paginas[1].confianza), 87.25)
+        
+        entrada = documento.terminos_indexados.get(termino='anexo')
+        self.assertEqual(entrada.pagina, 2)
+        self.assertEqual(entrada.posiciones, [[0, 5]])
+    
+    def test_detalle_y_busqueda_por_pagina(self):
+        """El detalle lista las páginas y la búsqueda indica dónde coincide"""
+        documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='informe.pdf',
+            tamaño_bytes=1024,
+            texto_extraido='Introducción\fResultados del informe\fInforme final',
+            metodo_extraccion='pypdf'
+        )
+        
+        response = self.client.get(reverse('documento_detalle', kwargs={'id': documento.id}))
+        self.assertEqual([p['numero'] for p in response.data['paginas']], [1, 2, 3])
+        self.assertEqual(response.data['paginas'][0]['caracteres'], len('Introducción'))
+        
+        response = self.client.get(reverse('documentos_buscar'), {'q': 'informe'})
+        resultado = response.data['resultados'][0]
+        self.assertEqual(
+            resultado['paginas_coincidentes'],
+            [{'pagina': 2, 'coincidencias': 1}, {'pagina': 3, 'coincidencias': 1}]
+        )
+        self.assertEqual(resultado['fragmentos'][1]['texto'], 'Informe final')
+    
+    def test_texto_ocr_por_lineas(self):
+        """El texto OCR se reconstruye por líneas con su confianza media"""
+        from .Services.pdf_extractor import PDFExtractor
+        
+        datos = {
+            'text': ['Hola', 'mundo', '', 'adiós'],
+            'block_num': [1, 1, 1, 1],
+            'par_num': [1, 1, 1, 1],
+            'line_num': [1, 1, 1, 2],
+            'conf': [90, 80, -1, 70],
+        }
+        texto, confianza = PDFExtractor._text_from_ocr_data(datos)
+        
+        self.assertEqual(texto, 'Hola mundo\nadiós\n')
+        self.assertEqual(confianza, 80.0)
+
+
+class DocumentoTextoViewTest(APITestCase):
+    """
+    Tests del endpoint de texto por páginas y rangos
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.texto = 'Página uno\fPágina dos\fPágina tres'
+        self.documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='largo.pdf',
+            tamaño_bytes=1024,
+            texto_extraido=self.texto,
+            metodo_extraccion='pypdf'
+        )
+        self.url = reverse('documento_texto', kwargs={'id': self.documento.id})
+    
+    def _contenido(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+    
+    def test_rango_de_paginas(self):
+        """Devuelve solo las páginas solicitadas"""
+        response = self.client.get(self.url, {'pagina_desde': 2, 'pagina_hasta': 3})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._contenido(response), 'Página dos\fPágina tres')
+        self.assertEqual(response['X-Total-Paginas'], '3')
+    
+    def test_documento_completo(self):
+        """Sin parámetros devuelve el texto completo en streaming"""
+        response = self.client.get(self.url)
+        self.assertEqual(self._contenido(response), self.texto)
+    
+    def test_range_bytes(self):
+        """La cabecera Range en bytes devuelve 206 con Content-Range"""
+        codificado = self.texto.encode('utf-8')
+        
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5-20')
+        
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 5-20/{len(codificado)}')
+        self.assertEqual(b''.join(response.streaming_content), codificado[5:21])
+    
+    def test_range_caracteres_sufijo(self):
+        """Rango de sufijo en caracteres"""
+        response = self.client.get(self.url, HTTP_RANGE='chars=-15')
+        
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(self._contenido(response), self.texto[-15:])
+    
+    def test_documento_sin_paginas(self):
+        """Sin páginas registradas, la petición sin rango devuelve el texto completo"""
+        self.documento.paginas.all().delete()
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._contenido(response), self.texto)
+        self.assertEqual(response['X-Total-Paginas'], '0')
+        
+        response = self.client.get(self.url, {'pagina': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_range_no_satisfacible(self):
+        """Un rango fuera del texto responde 416"""
+        response = self.client.get(self.url, HTTP_RANGE='chars=500-')
+        
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'chars */{len(self.texto)}')
+
+
+class CargaDiferidaTextoTest(APITestCase):
+    """
+    Tests de carga de consultas: listados y búsquedas no leen el texto completo
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo='extenso.pdf',
+            tamaño_bytes=1024,
+            texto_extraido='Informe anual de resultados. ' * 50,
+            metodo_extraccion='pypdf'
+        )
+    
+    def _consultas(self, url, params):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [c['sql'] for c in consultas.captured_queries]
+    
+    def test_resumen_precalculado(self):
+        """El resumen se guarda en la ingesta con 200 caracteres como máximo"""
+        self.assertEqual(len(self.documento.resumen_texto), 200)
+        self.assertTrue(self.documento.resumen_texto.endswith('...'))
+    
+    def test_endpoints_no_leen_texto_completo(self):
+        """Ninguna consulta de listado o búsqueda selecciona las columnas de texto"""
+        casos = [
+            (reverse('documentos_lista'), {}),
+            (reverse('documentos_buscar'), {'q': 'informe'}),
+            (reverse('documentos_buscar'), {'q': 'inexistente'}),
+            (reverse('documentos_buscar'), {'q': 'resultados', 'global': 'true'}),
+        ]
+        for url, params in casos:
+            response, consultas = self._consultas(url, params)
+            for sql in consultas:
+                self.assertNotIn('"texto_extraido"', sql, f"{url} {params}")
+                columnas = sql.split(' FROM ')[0]
+                self.assertNotIn('"texto_normalizado"', columnas, f"{url} {params}")
+        
+        response, _ = self._consultas(reverse('documentos_lista'), {})
+        self.assertEqual(response.data['resultados'][0]['resumen_texto'], self.documento.resumen_texto)
+
+
+class TextoComprimidoTest(TestCase):
+    """
+    Tests de los códecs de compresión de texto (fields.comprimir/descomprimir)
+    """
+    
+    texto = 'Contrato de arrendamiento de vivienda urbana. ' * 100
+    
+    def test_ida_y_vuelta(self):
+        """El texto se recupera igual y el valor comprimido es más chico"""
+        from Document_Processing.fields import comprimir, descomprimir
+        
+        valor = comprimir(self.texto, algoritmo='zlib', diccionario=False)
+        self.assertLess(len(valor), len(self.texto.encode('utf-8')))
+        self.assertEqual(descomprimir(valor), self.texto)
+    
+    def test_diccionario_zlib(self):
+        """Con un diccionario configurado se comprime y descomprime con él"""
+        from Document_Processing.fields import CODEC_ZLIB_DICCIONARIO, _cargar_diccionarios, comprimir, descomprimir
+        
+        with tempfile.NamedTemporaryFile(suffix='.dict') as archivo:
+            archivo.write(b'arrendamiento vivienda urbana contrato ')
+            archivo.flush()
+            configuracion = {'ALGORITMO': 'zlib', 'DICCIONARIOS': [archivo.name]}
+            with override_settings(TEXTO_COMPRIMIDO=configuracion):
+                _cargar_diccionarios.cache_clear()
+                valor = comprimir(self.texto)
+                self.assertEqual(valor[:1], CODEC_ZLIB_DICCIONARIO)
+                self.assertEqual(descomprimir(valor), self.texto)
+        _cargar_diccionarios.cache_clear()
+
+
+class AlmacenBlobsTest(APITestCase):
+    """
+    Tests del almacén de blobs: texto_extraido y PDF original fuera de la fila
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.texto = 'Contrato de arrendamiento\fCláusula segunda: vivienda urbana'
+        self.documento = self._crear('contrato.pdf')
+    
+    def _crear(self, nombre, texto=None):
+        return DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo=nombre,
+            tamaño_bytes=1024,
+            texto_extraido=texto or self.texto,
+            metodo_extraccion='pypdf'
+        )
+    
+    def test_fila_guarda_solo_la_huella(self):
+        """La columna contiene el SHA-256 y el texto se lee del blob"""
+        import hashlib
+        from django.db import connection
+        from Document_Processing.Services.almacen_blobs import almacen_blobs
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT texto_sha256 FROM "Document_Processing_documentoprocesado" WHERE id = %s',
+                [self.documento.id]
+            )
+            huella = cursor.fetchone()[0]
+        
+        self.assertEqual(huella, hashlib.sha256(self.texto.encode('utf-8')).hexdigest())
+        self.assertTrue(almacen_blobs().existe(huella))
+        self.assertEqual(DocumentoProcesado.objects.get(id=self.documento.id).texto_extraido, self.texto)
+        self.assertTrue(DocumentoProcesado.objects.filter(texto_extraido=self.texto).exists())
+    
+    def test_lectura_perezosa_y_sin_reescritura(self):
+        """El blob se lee al acceder; guardar sin cambios conserva la huella"""
+        from Document_Processing.fields import ReferenciaBlob
+        
+        documento = DocumentoProcesado.objects.get(id=self.documento.id)
+        huella = documento.huella_texto
+        self.assertIsInstance(documento.__dict__['texto_extraido'], ReferenciaBlob)
+        
+        documento.texto_extraido
+        documento.nombre_archivo = 'renombrado.pdf'
+        documento.save()
+        self.assertEqual(DocumentoProcesado.objects.get(id=self.documento.id).huella_texto, huella)
+        
+        documento.texto_extraido = 'Texto actualizado'
+        documento.save()
+        self.assertEqual(DocumentoProcesado.objects.get(id=self.documento.id).texto_extraido, 'Texto actualizado')
+    
+    def test_deduplicacion_y_liberacion(self):
+        """Textos iguales comparten blob; se borra al eliminar el último documento"""
+        from Document_Processing.Services.almacen_blobs import almacen_blobs
+        
+        copia = self._crear('copia.pdf')
+        huella = self.documento.huella_texto
+        self.assertEqual(copia.huella_texto, huella)
+        
+        copia.hard_delete()
+        self.assertTrue(almacen_blobs().existe(huella))
+        self.documento.hard_delete()
+        self.assertFalse(almacen_blobs().existe(huella))
+    
+    def test_recoleccion_concurrente_con_ingesta(self):
+        """Un blob apartado por la recolección se restaura o se reescribe al confirmar"""
+        from Document_Processing.Services.almacen_blobs import almacen_blobs
+        
+        almacen = almacen_blobs()
+        huella = self.documento.huella_texto
+        self.documento.hard_delete()
+        almacen.guardar_texto(self.texto)
+        
+        # La ingesta se confirma mientras el blob está apartado: se restaura
+        self.assertFalse(almacen.eliminar_sin_uso(huella, lambda: True))
+        self.assertEqual(almacen.leer_texto(huella), self.texto)
+        
+        # La recolección no vio la fila sin confirmar: el commit reescribe el blob
+        with self.captureOnCommitCallbacks(execute=True):
+            documento = self._crear('nuevo.pdf')
+            self.assertTrue(almacen.eliminar_sin_uso(huella, lambda: False))
+            self.assertFalse(almacen.existe(huella))
+        self.assertEqual(DocumentoProcesado.objects.get(id=documento.id).texto_extraido, self.texto)
+    
+    def test_texto_completo_desde_blob(self):
+        """El texto completo y los rangos en bytes se sirven desde el blob"""
+        url = reverse('documento_texto', kwargs={'id': self.documento.id})
+        # Páginas alteradas: si la respuesta coincide con el texto, viene del blob
+        self.documento.paginas.update(texto='otro')
+        codificado = self.texto.encode('utf-8')
+        
+        response = self.client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), codificado)
+        
+        response = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), codificado[-10:])
+        self.assertEqual(
+            response['Content-Range'],
+            f"bytes {len(codificado) - 10}-{len(codificado) - 1}/{len(codificado)}"
+        )
+
+    def test_blob_de_texto_comprimido(self):
+        """El texto se guarda comprimido y los rangos se descomprimen en streaming"""
+        from Document_Processing.Services.almacen_blobs import CABECERA_TEXTO, almacen_blobs
+
+        almacen = almacen_blobs()
+        texto = 'Cláusula de confidencialidad entre las partes. ' * 2000
+        codificado = texto.encode('utf-8')
+        huella = self._crear('extenso.pdf', texto).huella_texto
+
+        self.assertTrue(almacen.leer(huella).startswith(CABECERA_TEXTO))
+        self.assertLess(almacen.tamaño(huella), len(codificado) // 10)
+        self.assertEqual(almacen.tamaño_texto(huella), len(codificado))
+        self.assertEqual(almacen.leer_texto(huella), texto)
+        for inicio, fin in [(0, None), (0, 1), (4095, 9000), (len(codificado) - 7, None)]:
+            bloques = almacen.leer_bloques_texto(huella, inicio, fin, tamaño_bloque=1024)
+            self.assertEqual(b''.join(bloques), codificado[inicio:fin])
+
+    def test_migracion_comprime_blobs_de_texto_plano(self):
+        """Los blobs de texto plano anteriores se leen y la migración 0015 los comprime"""
+        import importlib
+        from django.apps import apps
+        from Document_Processing.Services.almacen_blobs import almacen_blobs
+
+        almacen = almacen_blobs()
+        huella = self.documento.huella_texto
+        almacen.eliminar(huella)
+        self.assertEqual(almacen.guardar(self.texto), huella)
+        self.assertFalse(almacen.texto_comprimido(huella))
+        self.assertEqual(almacen.leer_texto(huella), self.texto)
+        self.assertEqual(b''.join(almacen.leer_bloques_texto(huella, 2, 9)), self.texto.encode('utf-8')[2:9])
+
+        migracion = importlib.import_module('Document_Processing.migrations.0015_comprimir_blobs_texto')
+        migracion.comprimir_blobs_texto(apps, None)
+        self.assertTrue(almacen.texto_comprimido(huella))
+        self.assertEqual(DocumentoProcesado.objects.get(id=self.documento.id).texto_extraido, self.texto)
+
+    def test_pdf_original_se_conserva(self):
+        """La ingesta guarda el PDF original y se puede descargar"""
+        import fitz
+        
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), 'Documento de prueba para el almacén de blobs.\n' * 4)
+        contenido = pdf.tobytes()
+        pdf.close()
+        
+        response = self.client.post(
+            reverse('extraer_texto'),
+            {'archivo': SimpleUploadedFile('prueba.pdf', contenido, content_type='application/pdf')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        url = reverse('documento_original', kwargs={'id': response.data['documento_id']})
+        descarga = self.client.get(url)
+        self.assertEqual(descarga.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(descarga.streaming_content), contenido)
+        
+        sin_original = self.client.get(reverse('documento_original', kwargs={'id': self.documento.id}))
+        self.assertEqual(sin_original.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PaginacionCursorTest(APITestCase):
+    """
+    Tests de la paginación por cursor (keyset) en listados y búsquedas
+    """
+    
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        base = timezone.now()
+        for i in range(12):
+            DocumentoProcesado.objects.create(
+                usuario=self.usuario,
+                nombre_archivo=f'informe_{i}.pdf',
+                tamaño_bytes=1024,
+                texto_extraido=f'Informe trimestral número {i}',
+                metodo_extraccion='pypdf',
+                # Pares de documentos con la misma fecha: el id desempata
+                fecha_procesamiento=base - timedelta(minutes=i // 2)
+            )
+        self.esperados = list(
+            DocumentoProcesado.objects.order_by('-fecha_procesamiento', '-id').values_list('id', flat=True)
+        )
+    
+    def _recorrer(self, url, params):
+        ids, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [documento['id'] for documento in response.data['resultados']]
+            siguiente = response.data['paginacion']['siguiente']
+            if not siguiente:
+                return ids, response
+            response = self.client.get(siguiente)
+    
+    def test_recorrido_completo_sin_repetidos(self):
+        """Recorrer los enlaces 'siguiente' devuelve todos los documentos en orden"""
+        ids, ultima = self._recorrer(reverse('documentos_lista'), {'paginacion': 'cursor', 'page_size': 5})
+        self.assertEqual(ids, self.esperados)
+        self.assertEqual(ultima.data['paginacion']['modo'], 'cursor')
+        self.assertIsNone(ultima.data['paginacion']['total_documentos'])
+        
+        # El enlace 'anterior' vuelve a la página previa
+        anterior = self.client.get(ultima.data['paginacion']['anterior'])
+        self.assertEqual([d['id'] for d in anterior.data['resultados']], self.esperados[5:10])
+    
+    def test_orden_ascendente_y_busqueda(self):
+        """El cursor respeta ordering=fecha_procesamiento y funciona en búsquedas"""
+        ids, _ = self._recorrer(
+            reverse('documentos_lista'),
+            {'paginacion': 'cursor', 'page_size': 4, 'ordering': 'fecha_procesamiento'}
+        )
+        self.assertEqual(ids, list(
+            DocumentoProcesado.objects.order_by('fecha_procesamiento', 'id').values_list('id', flat=True)
+        ))
+        
+        ids, ultima = self._recorrer(
+            reverse('documentos_buscar'),
+            {'q': 'trimestral', 'paginacion': 'cursor', 'page_size': 5, 'total': 'exacto'}
+        )
+        self.assertEqual(ids, self.esperados)
+        self.assertEqual(ultima.data['busqueda']['resultados_encontrados'], 12)
+    
+    def test_sin_count_ni_offset(self):
+        """Sin total no se ejecuta COUNT(*) y las páginas no usan OFFSET"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        primera = self.client.get(reverse('documentos_lista'), {'paginacion': 'cursor', 'page_size': 5})
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(primera.data['paginacion']['siguiente'])
+        sql = ' '.join(c['sql'] for c in consultas.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+    
+    def test_total_aproximado(self):
+        """total=aproximado acota el conteo"""
+        from unittest import mock
+        
+        with mock.patch('Document_Processing.pagination.LIMITE_CONTEO_APROXIMADO', 10):
+            response = self.client.get(reverse('documentos_lista'), {'paginacion': 'cursor', 'total': 'aproximado'})
+        self.assertEqual(response.data['paginacion']['total_documentos'], 10)
+        self.assertTrue(response.data['paginacion']['total_aproximado'])
+    
+    def test_parametros_invalidos(self):
+        """Cursor corrupto devuelve 404 y un orden no soportado 400"""
+        url = reverse('documentos_lista')
+        self.assertEqual(self.client.get(url, {'cursor': 'no-es-un-cursor'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.get(url, {'paginacion': 'cursor', 'ordering': 'nombre_archivo'}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+
+class CacheBusquedaTest(APITestCase):
+    """
+    Tests de la caché de resultados de búsqueda y su invalidación
+    """
+    
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'busqueda': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-busqueda'},
+    }
+    
+    def setUp(self):
+        from django.core.cache import caches
+        
+        self.ajustes = override_settings(CACHES=self.CACHES)
+        self.ajustes.enable()
+        caches['busqueda'].clear()
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123', is_staff=True)
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        self.documento = self._crear('contrato.pdf')
+        self.url = reverse('documentos_buscar')
+    
+    def tearDown(self):
+        self.ajustes.disable()
+    
+    def _crear(self, nombre):
+        return DocumentoProcesado.objects.create(
+            usuario=self.usuario,
+            nombre_archivo=nombre,
+            tamaño_bytes=1024,
+            texto_extraido='Contrato de arrendamiento de vivienda',
+            metodo_extraccion='pypdf'
+        )
+    
+    def _buscar(self, **params):
+        response = self.client.get(self.url, {'q': 'Contrato', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+    
+    def test_acierto_con_consulta_normalizada(self):
+        """La misma consulta normalizada se sirve desde caché sin consultar la base"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self.assertEqual(self._buscar()['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'q': '  CONTRÁTO '})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['busqueda']['termino'], 'CONTRÁTO')
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 1)
+        consultas_documentos = [c for c in consultas.captured_queries if 'documentoprocesado' in c['sql']]
+        self.assertEqual(consultas_documentos, [])
+        
+        # Ámbito y página forman parte de la clave
+        self.assertEqual(self._buscar(**{'global': 'true'})['X-Cache'], 'MISS')
+        self.assertEqual(self._buscar(page_size=5)['X-Cache'], 'MISS')
+    
+    def test_invalidacion_por_alta_eliminacion_y_restauracion(self):
+        """Crear, eliminar y restaurar (acción del admin) invalidan la caché"""
+        from unittest import mock
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+        
+        self._buscar(**{'global': 'true'})
+        self._crear('contrato_2.pdf')
+        response = self._buscar(**{'global': 'true'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 2)
+        
+        # La invalidación de operaciones por conjunto ocurre al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            self.documento.delete()
+        response = self._buscar()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 1)
+        self.assertEqual(self._buscar()['X-Cache'], 'HIT')
+        
+        admin_documentos = site._registry[DocumentoProcesado]
+        request = RequestFactory().post('/')
+        request.user = self.usuario
+        with mock.patch.object(admin_documentos, 'message_user'), self.captureOnCommitCallbacks(execute=True):
+            admin_documentos.restaurar_documentos(request, DocumentoProcesado.objects.all())
+        response = self._buscar()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 2)
+
+    def test_cambio_en_otro_proceso_no_sirve_resultados_viejos(self):
+        """Una versión renovada en la base sin invalidar() la caché local deja la entrada inalcanzable"""
+        from unittest import mock
+        from Document_Processing.Services import cache_busqueda
+
+        self.assertEqual(self._buscar()['X-Cache'], 'MISS')
+        self.assertEqual(self._buscar()['X-Cache'], 'HIT')
+        # Otro proceso: renueva VersionColeccion, pero su caché local no es la de este
+        with mock.patch.object(cache_busqueda, 'invalidar'):
+            self._crear('contrato_2.pdf')
+        response = self._buscar()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 2)
+
+    def test_metricas_ratio_aciertos(self):
+        """El endpoint de métricas expone aciertos, fallos y ratio"""
+        self._buscar()
+        self._buscar()
+        self._buscar()
+        
+        response = self.client.get(reverse('metricas'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metricas = response.data['cache_busqueda']
+        self.assertEqual((metricas['aciertos'], metricas['fallos']), (2, 1))
+        self.assertAlmostEqual(metricas['ratio_aciertos'], 2 / 3, places=3)
+
+
+
+class EstadisticasResumenTest(APITestCase):
+    """
+    Tests de las tablas de estadísticas mantenidas incrementalmente
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123', is_staff=True)
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.documentos = [
+            DocumentoProcesado.objects.create(
+                usuario=self.usuario,
+                nombre_archivo=f'doc_{i}.pdf',
+                tamaño_bytes=1000 * (i + 1),
+                texto_extraido=f'Documento número {i}',
+                metodo_extraccion='ocr' if i % 2 else 'pypdf',
+                tiempo_procesamiento=i + 1
+            )
+            for i in range(4)
+        ]
+        self.url = reverse('documentos_estadisticas')
+    
+    def _estadisticas(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_edicion_en_admin_mantiene_resumenes(self):
+        """Editar método, tamaño, tiempo o eliminado con save() no deja deriva"""
+        from io import StringIO
+        from django.contrib.admin.sites import site
+        from django.core.management import call_command
+        from django.test import RequestFactory
+        from Document_Processing.models import FrecuenciaTermino
+        
+        def deriva():
+            salida = StringIO()
+            call_command('reconciliar_estadisticas', '--solo-reportar', stdout=salida)
+            return salida.getvalue().strip().splitlines()[-1]
+        
+        def frecuencia(termino):
+            return FrecuenciaTermino.objects.get(usuario=self.usuario, termino=termino).documentos
+        
+        documento = DocumentoProcesado.objects.get(id=self.documentos[0].id)
+        documento.metodo_extraccion = 'ocr'
+        documento.tamaño_bytes = 9000
+        documento.tiempo_procesamiento = 10
+        documento.save()
+        self.assertEqual(deriva(), 'Filas con deriva: 0 (sin cambios)')
+        self.assertEqual(self._estadisticas()['estadisticas_generales']['total_tamaño_bytes'], 18000)
+        
+        self.assertEqual(frecuencia('documento'), 4)
+        documento.eliminado = True
+        documento.save()
+        self.assertEqual(deriva(), 'Filas con deriva: 0 (sin cambios)')
+        self.assertEqual(self._estadisticas()['estadisticas_generales']['total_documentos'], 3)
+        self.assertEqual(frecuencia('documento'), 3)
+        
+        documento.eliminado = False
+        documento.save()
+        self.assertEqual(deriva(), 'Filas con deriva: 0 (sin cambios)')
+        self.assertEqual(frecuencia('documento'), 4)
+        
+        # El propietario no se edita en el admin (arrastraría frecuencias y cubetas)
+        request = RequestFactory().get('/')
+        self.assertIn('usuario', site._registry[DocumentoProcesado].get_readonly_fields(request, documento))
+    
+    def test_alta_eliminacion_y_restauracion(self):
+        """Las estadísticas siguen a altas, eliminaciones y restauraciones"""
+        from unittest import mock
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+        
+        datos = self._estadisticas()
+        self.assertEqual(datos['estadisticas_generales']['total_documentos'], 4)
+        self.assertEqual(datos['estadisticas_generales']['total_tamaño_bytes'], 10000)
+        self.assertEqual(datos['estadisticas_generales']['tiempo_promedio_procesamiento'], 2.5)
+        self.assertEqual(datos['distribucion_por_metodo'], [
+            {'metodo_extraccion': 'ocr', 'cantidad': 2},
+            {'metodo_extraccion': 'pypdf', 'cantidad': 2},
+        ])
+        self.assertEqual(datos['documentos_recientes_7_dias'], 4)
+        
+        self.documentos[1].delete()
+        self.documentos[1].delete()  # Eliminar dos veces no descuenta dos veces
+        datos = self._estadisticas()
+        self.assertEqual(datos['estadisticas_generales']['total_documentos'], 3)
+        self.assertEqual(datos['estadisticas_generales']['total_tamaño_bytes'], 8000)
+        
+        admin_documentos = site._registry[DocumentoProcesado]
+        request = RequestFactory().post('/')
+        request.user = self.usuario
+        with mock.patch.object(admin_documentos, 'message_user'):
+            admin_documentos.restaurar_documentos(request, DocumentoProcesado.objects.all())
+        datos = self._estadisticas()
+        self.assertEqual(datos['estadisticas_generales']['total_documentos'], 4)
+        self.assertEqual(datos['estadisticas_generales']['total_tamaño_bytes'], 10000)
+    
+    def test_lectura_sin_agregar_documentos(self):
+        """El endpoint no recorre la tabla de documentos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as consultas:
+            self._estadisticas()
+        for consulta in consultas.captured_queries:
+            self.assertNotIn('documentoprocesado', consulta['sql'])
+    
+    def test_reconciliacion_informa_y_corrige_deriva(self):
+        """El comando detecta la deriva y reconstruye las tablas"""
+        from io import StringIO
+        from django.core.management import call_command
+        from Document_Processing.models import EstadisticaUsuario
+        
+        EstadisticaUsuario.objects.filter(metodo_extraccion='ocr').update(documentos=99)
+        
+        salida = StringIO()
+        call_command('reconciliar_estadisticas', '--solo-reportar', stdout=salida)
+        self.assertIn('Filas con deriva: 1', salida.getvalue())
+        self.assertEqual(self._estadisticas()['estadisticas_generales']['total_documentos'], 101)
+        
+        call_command('reconciliar_estadisticas', stdout=StringIO())
+        self.assertEqual(self._estadisticas()['estadisticas_generales']['total_documentos'], 4)
+        
+        salida = StringIO()
+        call_command('reconciliar_estadisticas', '--solo-reportar', stdout=salida)
+        self.assertIn('Filas con deriva: 0', salida.getvalue())
+
+    def test_reconciliacion_bloquea_escrituras_antes_de_recalcular(self):
+        """Las escrituras de estadísticas quedan bloqueadas antes de agregar los documentos"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('reconciliar_estadisticas', stdout=StringIO())
+        sentencias = [consulta['sql'] for consulta in consultas.captured_queries]
+        bloqueo = next(i for i, sql in enumerate(sentencias) if 'WHERE 0 = 1' in sql or 'LOCK TABLE' in sql)
+        agregacion = next(i for i, sql in enumerate(sentencias) if 'documentoprocesado' in sql and 'GROUP BY' in sql)
+        reemplazo = next(i for i, sql in enumerate(sentencias) if sql.startswith('DELETE'))
+        self.assertLess(bloqueo, agregacion)
+        self.assertLess(agregacion, reemplazo)
+
+
+class OperacionesMasivasTest(APITestCase):
+    """
+    Tests de eliminación, restauración y purga masivas
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.documentos = [
+            self._crear(self.usuario, f'doc_{i}.pdf', 'ocr' if i < 3 else 'pypdf')
+            for i in range(5)
+        ]
+        self.ajeno = self._crear(self.otro, 'ajeno.pdf', 'ocr')
+    
+    def _crear(self, usuario, nombre, metodo):
+        return DocumentoProcesado.objects.create(
+            usuario=usuario,
+            nombre_archivo=nombre,
+            tamaño_bytes=1000,
+            texto_extraido=f'Contenido del documento {nombre}',
+            metodo_extraccion=metodo
+        )
+    
+    def _total_estadisticas(self):
+        return self.client.get(reverse('documentos_estadisticas')).data['estadisticas_generales']['total_documentos']
+    
+    def test_eliminar_por_ids_con_un_solo_update(self):
+        """Un único UPDATE sobre documentos; solo afecta documentos propios"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        ids = [self.documentos[0].id, self.documentos[1].id, self.ajeno.id]
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(reverse('documentos_eliminar_masivo'), {'ids': ids}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['documentos_afectados'], 2)
+        updates = [
+            c['sql'] for c in consultas.captured_queries
+            if c['sql'].startswith('UPDATE') and 'documentoprocesado' in c['sql']
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(DocumentoProcesado.objects.get(id=self.ajeno.id).eliminado)
+        self.assertEqual(self._total_estadisticas(), 3)
+    
+    def test_filtros_restaurar_y_purgar(self):
+        """Filtros por método; restaurar y purgar mantienen índice y estadísticas"""
+        from Document_Processing.models import PaginaDocumento, TerminoIndexado
+        
+        response = self.client.post(
+            reverse('documentos_eliminar_masivo'), {'metodo_extraccion': 'ocr'}, format='json'
+        )
+        self.assertEqual(response.data['documentos_afectados'], 3)
+        self.assertEqual(self._total_estadisticas(), 2)
+        
+        response = self.client.post(
+            reverse('documentos_restaurar_masivo'), {'ids': [self.documentos[0].id]}, format='json'
+        )
+        self.assertEqual(response.data['documentos_afectados'], 1)
+        self.assertEqual(self._total_estadisticas(), 3)
+        
+        # La purga solo alcanza documentos eliminados lógicamente
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('documentos_purgar_masivo'), {'todos': True}, format='json')
+        self.assertEqual(response.data['documentos_afectados'], 2)
+        purgados = [self.documentos[1].id, self.documentos[2].id]
+        self.assertFalse(DocumentoProcesado.objects.filter(id__in=purgados).exists())
+        self.assertFalse(TerminoIndexado.objects.filter(documento_id__in=purgados).exists())
+        self.assertFalse(PaginaDocumento.objects.filter(documento_id__in=purgados).exists())
+        self.assertEqual(self._total_estadisticas(), 3)
+
+    def test_purga_de_eliminados_renueva_versiones_y_caches(self):
+        """Purgar documentos ya eliminados renueva la versión e invalida búsquedas y sugerencias"""
+        from Document_Processing.Services import cache_busqueda, versiones
+        from Document_Processing.Services.operaciones_masivas import purgar_documentos
+
+        self.documentos[0].delete()
+        self.ajeno.delete()
+        version_usuario = versiones.version(self.usuario.id)
+        version_otro = versiones.version(self.otro.id)
+        generacion = cache_busqueda.generacion(cache_busqueda.ambito_busqueda(self.otro.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purgar_documentos(DocumentoProcesado.objects.filter(eliminado=True))
+        self.assertNotEqual(versiones.version(self.usuario.id), version_usuario)
+        self.assertNotEqual(versiones.version(self.otro.id), version_otro)
+        self.assertNotEqual(cache_busqueda.generacion(cache_busqueda.ambito_busqueda(self.otro.id)), generacion)
+
+    def test_admin_no_edita_eliminado(self):
+        """En el admin, eliminar y restaurar solo se hace con las acciones"""
+        from django.contrib.auth.models import User as Usuario
+        
+        documento = self.documentos[0]
+        documento.delete()
+        admin = Usuario.objects.create_superuser(username='admin', password='pass123')
+        self.client.force_login(admin)
+        url = reverse('admin:Document_Processing_documentoprocesado_change', args=[documento.id])
+        response = self.client.post(url, {
+            'nombre_archivo': 'renombrado.pdf',
+            'tamaño_bytes': 1000,
+            'texto_extraido': f'Contenido del documento {documento.nombre_archivo}',
+            'metodo_extraccion': 'ocr',
+            'eliminado': '',
+        })
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        documento.refresh_from_db()
+        self.assertEqual(documento.nombre_archivo, 'renombrado.pdf')
+        self.assertTrue(documento.eliminado)
+        self.assertEqual(self._total_estadisticas(), 4)
+    
+    def test_seleccion_requerida(self):
+        """Sin ids, filtros ni 'todos' la operación se rechaza"""
+        response = self.client.post(reverse('documentos_eliminar_masivo'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(DocumentoProcesado.objects.filter(eliminado=True).exists())
+
+
+class PurgaEliminadosTest(TestCase):
+    """
+    Tests del comando purgar_eliminados
+    """
+    
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.documentos = [
+            DocumentoProcesado.objects.create(
+                usuario=self.usuario,
+                nombre_archivo=f'doc_{i}.pdf',
+                tamaño_bytes=1000,
+                texto_extraido=f'Contenido purgable número {i}',
+                metodo_extraccion='pypdf'
+            )
+            for i in range(6)
+        ]
+        ahora = timezone.now()
+        # 0-3 vencidos, 4 eliminado hace poco, 5 activo
+        for documento in self.documentos[:5]:
+            documento.delete()
+        DocumentoProcesado.objects.filter(id__in=[d.id for d in self.documentos[:4]]).update(
+            fecha_eliminacion=ahora - timedelta(days=40)
+        )
+        DocumentoProcesado.objects.filter(id=self.documentos[4].id).update(
+            fecha_eliminacion=ahora - timedelta(days=2)
+        )
+    
+    def _purgar(self, *argumentos):
+        from io import StringIO
+        from django.core.management import call_command
+        
+        salida = StringIO()
+        call_command('purgar_eliminados', '--dias', '30', '--pausa', '0', *argumentos, stdout=salida)
+        return salida.getvalue()
+    
+    def test_simular_no_modifica(self):
+        salida = self._purgar('--simular')
+        self.assertIn('Se purgarían 4 documentos', salida)
+        self.assertEqual(DocumentoProcesado.objects.count(), 6)
+    
+    def test_purga_por_lotes_con_indice(self):
+        """Solo los vencidos, en lotes, junto con sus páginas y términos"""
+        from Document_Processing.models import PaginaDocumento, TerminoIndexado
+        
+        vencidos = [d.id for d in self.documentos[:4]]
+        self.assertTrue(TerminoIndexado.objects.filter(documento_id__in=vencidos).exists())
+        
+        salida = self._purgar('--lote', '3', '--analyze')
+        self.assertIn('Purgados 4 documentos en 2 lotes', salida)
+        self.assertIn('ANALYZE', salida)
+        self.assertEqual(
+            set(DocumentoProcesado.objects.values_list('id', flat=True)),
+            {self.documentos[4].id, self.documentos[5].id}
+        )
+        self.assertFalse(TerminoIndexado.objects.filter(documento_id__in=vencidos).exists())
+        self.assertFalse(PaginaDocumento.objects.filter(documento_id__in=vencidos).exists())
+    
+    def test_purga_no_carga_filas_completas(self):
+        """El borrado en cascada solo lee las claves de los documentos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as consultas:
+            self._purgar('--lote', '3')
+        lecturas = [c['sql'] for c in consultas if c['sql'].startswith('SELECT')]
+        self.assertTrue(lecturas)
+        self.assertFalse([sql for sql in lecturas if 'texto_normalizado' in sql or 'resumen_texto' in sql])
+    
+    def test_max_lotes(self):
+        salida = self._purgar('--lote', '1', '--max-lotes', '2')
+        self.assertIn('Purgados 2 documentos en 2 lotes', salida)
+        self.assertEqual(DocumentoProcesado.objects.count(), 4)
+
+
+class CasiDuplicadosTest(APITestCase):
+    """
+    Tests de detección de casi duplicados (MinHash + LSH)
+    """
+    
+    def setUp(self):
+        import random
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        generador = random.Random(7)
+        vocabulario = [f'palabra{i}' for i in range(3000)]
+        self.palabras = [generador.choice(vocabulario) for _ in range(1500)]
+        # Variante: la última "página" (5% del texto) reemplazada
+        self.variante = self.palabras[:-75] + [generador.choice(vocabulario) for _ in range(75)]
+        
+        self.original = self._crear(self.usuario, 'original.pdf', ' '.join(self.palabras))
+        self.reescaneado = self._crear(self.usuario, 'reescaneado.pdf', ' '.join(self.variante).upper())
+        self.distinto = self._crear(self.usuario, 'distinto.pdf', ' '.join(reversed(self.palabras)))
+        self.ajeno = self._crear(self.otro, 'ajeno.pdf', ' '.join(self.palabras))
+    
+    def _crear(self, usuario, nombre, texto):
+        return DocumentoProcesado.objects.create(
+            usuario=usuario,
+            nombre_archivo=nombre,
+            tamaño_bytes=1000,
+            texto_extraido=texto,
+            metodo_extraccion='pypdf'
+        )
+    
+    def test_firma_estable_y_similitud(self):
+        from Document_Processing.Services.similitud import calcular_firma, similitud
+        
+        texto = ' '.join(self.palabras)
+        self.assertEqual(calcular_firma(texto), calcular_firma('  ' + texto.upper()))
+        self.assertIsNone(calcular_firma(''))
+        self.assertGreater(similitud(calcular_firma(texto), calcular_firma(' '.join(self.variante))), 0.8)
+        self.assertLess(similitud(calcular_firma(texto), calcular_firma(' '.join(reversed(self.palabras)))), 0.1)
+    
+    def test_endpoint_informa_solo_documentos_propios(self):
+        url = reverse('documento_casi_duplicados', kwargs={'id': self.original.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([d['id'] for d in response.data['casi_duplicados']], [self.reescaneado.id])
+        
+        response = self.client.get(url, {'umbral': '2'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_colapsar_elimina_los_casi_duplicados(self):
+        url = reverse('documento_casi_duplicados', kwargs={'id': self.original.id})
+        response = self.client.post(url)
+        self.assertEqual(response.data['documentos_afectados'], 1)
+        self.assertTrue(DocumentoProcesado.objects.get(id=self.reescaneado.id).eliminado)
+        self.assertFalse(DocumentoProcesado.objects.get(id=self.distinto.id).eliminado)
+        self.assertEqual(self.client.get(url).data['casi_duplicados'], [])
+    
+    def test_marca_de_subida(self):
+        """'reportar' guarda e informa; 'colapsar' no guarda otra copia"""
+        import fitz
+        
+        def pdf(texto):
+            documento = fitz.open()
+            pagina = documento.new_page()
+            pagina.insert_textbox(fitz.Rect(36, 36, 576, 806), texto, fontsize=6)
+            contenido = documento.tobytes()
+            documento.close()
+            return SimpleUploadedFile('subida.pdf', contenido, content_type='application/pdf')
+        
+        texto = ' '.join(self.palabras[:600])
+        base = self._crear(self.usuario, 'base.pdf', texto)
+        
+        response = self.client.post(
+            reverse('extraer_texto'), {'archivo': pdf(texto), 'casi_duplicados': 'reportar'}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(base.id, [d['id'] for d in response.data['casi_duplicados']])
+        
+        total = DocumentoProcesado.objects.count()
+        response = self.client.post(
+            reverse('extraer_texto'), {'archivo': pdf(texto), 'casi_duplicados': 'colapsar'}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['colapsado'])
+        self.assertEqual(DocumentoProcesado.objects.count(), total)
+        
+        response = self.client.post(
+            reverse('extraer_texto'), {'archivo': pdf(texto), 'casi_duplicados': 'otro'}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DocumentosSimilaresTest(APITestCase):
+    """
+    Tests de documentos similares (TF-IDF sobre el índice invertido)
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        comun = 'informe anual documento texto general '
+        self.contrato = self._crear(self.usuario, 'contrato.pdf', comun + 'contrato arrendamiento inquilino fianza renta mensual')
+        self.similar = self._crear(self.usuario, 'similar.pdf', comun + 'contrato arrendamiento inquilino renta vivienda')
+        self.parcial = self._crear(self.usuario, 'parcial.pdf', comun + 'fianza bancaria garantía')
+        self.distinto = self._crear(self.usuario, 'distinto.pdf', comun + 'receta cocina tomate cebolla')
+        self.ajeno = self._crear(self.otro, 'ajeno.pdf', 'contrato arrendamiento inquilino fianza renta mensual')
+    
+    def _crear(self, usuario, nombre, texto):
+        return DocumentoProcesado.objects.create(
+            usuario=usuario,
+            nombre_archivo=nombre,
+            tamaño_bytes=1000,
+            texto_extraido=texto,
+            metodo_extraccion='pypdf'
+        )
+    
+    def _similares(self, documento, **params):
+        response = self.client.get(reverse('documento_similares', kwargs={'id': documento.id}), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['similares']
+    
+    def test_ranking_en_corpus_del_usuario(self):
+        similares = self._similares(self.contrato)
+        self.assertEqual([d['id'] for d in similares], [self.similar.id, self.parcial.id])
+        self.assertTrue(1 >= similares[0]['similitud'] > similares[1]['similitud'] > 0)
+    
+    def test_corpus_global_y_eliminados(self):
+        similares = self._similares(self.contrato, **{'global': 'true'})
+        self.assertEqual(similares[0]['id'], self.ajeno.id)
+        
+        self.similar.delete()
+        self.assertNotIn(self.similar.id, [d['id'] for d in self._similares(self.contrato)])
+    
+    def test_eliminados_no_cuentan_en_idf(self):
+        """N y df cuentan solo documentos activos"""
+        from Document_Processing.Services.similares import vector_consulta
+        
+        antes = vector_consulta(self.contrato, self.usuario.id)
+        self._crear(self.usuario, 'papelera.pdf', 'nota sin relación').delete()
+        self.assertEqual(vector_consulta(self.contrato, self.usuario.id), antes)
+    
+    def test_frecuencias_incrementales(self):
+        """El df se mantiene al indexar, reindexar y purgar"""
+        from Document_Processing.models import FrecuenciaTermino
+        from Document_Processing.Services.indice_busqueda import indexar_documento
+        
+        def df(termino):
+            return FrecuenciaTermino.objects.filter(usuario=self.usuario, termino=termino).values_list(
+                'documentos', flat=True
+            ).first()
+        
+        self.assertEqual(df('fianza'), 2)
+        self.assertEqual(df('informe'), 4)
+        
+        self.parcial.texto_extraido = 'solo receta'
+        self.parcial.save()
+        self.parcial.paginas.all().delete()
+        indexar_documento(self.parcial)
+        self.assertEqual(df('fianza'), 1)
+        self.assertEqual(df('receta'), 2)
+        
+        self.distinto.hard_delete()
+        self.assertEqual(df('receta'), 1)
+        self.assertEqual(df('cocina'), 0)
+    
+    def test_parametros_y_permisos(self):
+        url = reverse('documento_similares', kwargs={'id': self.contrato.id})
+        self.assertEqual(self.client.get(url, {'limite': '0'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get(reverse('documento_similares', kwargs={'id': self.ajeno.id})).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        response = self.client.get(reverse('documento_similares_global', kwargs={'id': self.ajeno.id}))
+        self.assertEqual(response.data['similares'][0]['id'], self.contrato.id)
+
+
+class SugerenciasTest(APITestCase):
+    """
+    Tests de sugerencias de términos (diccionario en memoria)
+    """
+    
+    def setUp(self):
+        from Document_Processing.Services import sugerencias
+        
+        # Caché de búsquedas real (el refresco lo decide la versión de la colección)
+        self.cache_real = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'busqueda': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'sugerencias-test',
+            },
+        })
+        self.cache_real.enable()
+        sugerencias.descartar_diccionarios()
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.documentos = [
+            self._crear(self.usuario, 'Contrato de arrendamiento'),
+            self._crear(self.usuario, 'Contrato laboral y contratista'),
+            self._crear(self.usuario, 'Contabilidad anual'),
+        ]
+        self._crear(self.otro, 'Contraseña contraseña contrato')
+    
+    def tearDown(self):
+        from Document_Processing.Services import sugerencias
+        
+        sugerencias.descartar_diccionarios()
+        self.cache_real.disable()
+    
+    def _crear(self, usuario, texto):
+        return DocumentoProcesado.objects.create(
+            usuario=usuario,
+            nombre_archivo='doc.pdf',
+            tamaño_bytes=1000,
+            texto_extraido=texto,
+            metodo_extraccion='pypdf'
+        )
+    
+    def _sugerir(self, **params):
+        response = self.client.get(reverse('documentos_sugerencias'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(s['termino'], s['documentos']) for s in response.data['sugerencias']]
+    
+    def test_prefijo_ordenado_por_frecuencia(self):
+        self.assertEqual(self._sugerir(q='cont'), [('contrato', 2), ('contabilidad', 1), ('contratista', 1)])
+        self.assertEqual(self._sugerir(q='CONTRA', limite=1), [('contrato', 2)])
+        self.assertEqual(self._sugerir(q='xyz'), [])
+        self.assertEqual(self._sugerir(q=''), [])
+        
+        response = self.client.get(reverse('documentos_sugerencias'), {'q': 'de arre'})
+        self.assertEqual(response.data['sugerencias'][0]['consulta'], 'de arrendamiento')
+    
+    def test_ambito_global(self):
+        self.assertIn(('contrasena', 1), self._sugerir(q='contras', **{'global': 'true'}))
+        self.assertEqual(self._sugerir(q='contrato', **{'global': 'true'}), [('contrato', 3)])
+        self.assertEqual(self._sugerir(q='contras'), [])
+    
+    def test_sin_consultas_y_refresco_incremental(self):
+        from Document_Processing.Services import sugerencias
+        
+        sugerencias.sugerir('con', self.usuario.id)
+        # Solo se lee la versión de la colección
+        with self.assertNumQueries(1):
+            sugerencias.sugerir('contr', self.usuario.id)
+        
+        nuevo = self._crear(self.usuario, 'Contraparte')
+        self.assertIn(('contraparte', 1), self._sugerir(q='contrap'))
+        
+        nuevo.hard_delete()
+        self.documentos[2].hard_delete()
+        self.assertEqual(self._sugerir(q='contrap'), [])
+        self.assertEqual(self._sugerir(q='contab'), [])
+
+    def test_eliminacion_logica_y_restauracion(self):
+        """Los eliminados no cuentan; restaurar los suma y purgarlos no descuenta dos veces"""
+        from Document_Processing.models import FrecuenciaTermino
+        from Document_Processing.Services.operaciones_masivas import purgar_documentos, restaurar_documentos
+
+        self.assertEqual(self._sugerir(q='contrato'), [('contrato', 2)])
+        self.documentos[0].delete()
+        self.assertEqual(self._sugerir(q='contrato'), [('contrato', 1)])
+        self.assertEqual(self._sugerir(q='arrend'), [])
+
+        restaurar_documentos(DocumentoProcesado.objects.filter(id=self.documentos[0].id))
+        self.assertEqual(self._sugerir(q='contrato'), [('contrato', 2)])
+
+        self.documentos[0].delete()
+        purgar_documentos(DocumentoProcesado.objects.filter(id=self.documentos[0].id))
+        frecuencia = FrecuenciaTermino.objects.get(usuario=self.usuario, termino='arrendamiento')
+        self.assertEqual(frecuencia.documentos, 0)
+        self.assertEqual(self._sugerir(q='contrato'), [('contrato', 1)])
+
+    def test_refresco_por_version_compartida(self):
+        """Un cambio hecho en otro proceso (sin invalidar la caché local) se ve por la versión"""
+        from unittest import mock
+        from Document_Processing.Services import cache_busqueda
+
+        self.assertEqual(self._sugerir(q='contab'), [('contabilidad', 1)])
+        with mock.patch.object(cache_busqueda, 'invalidar'):
+            self.documentos[2].delete()
+        self.assertEqual(self._sugerir(q='contab'), [])
+
+    def test_migracion_descuenta_eliminados_existentes(self):
+        """La migración 0016 descuenta los documentos eliminados antes de mantenerse así"""
+        import importlib
+        from django.apps import apps
+        from Document_Processing.models import FrecuenciaTermino
+
+        # Eliminación lógica anterior: sin tocar las frecuencias
+        DocumentoProcesado.objects.filter(id=self.documentos[0].id).update(eliminado=True)
+        migracion = importlib.import_module('Document_Processing.migrations.0016_frecuencias_sin_eliminados')
+        migracion.descontar_eliminados(apps, None)
+
+        frecuencias = dict(
+            FrecuenciaTermino.objects.filter(usuario=self.usuario).values_list('termino', 'documentos')
+        )
+        self.assertEqual(frecuencias['contrato'], 1)
+        self.assertEqual(frecuencias['arrendamiento'], 0)
+
+
+class FacetasBusquedaTest(APITestCase):
+    """
+    Tests de facetas en la búsqueda
+    """
+    
+    def setUp(self):
+        from datetime import datetime
+        from django.utils import timezone
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        datos = [
+            (self.usuario, 'ocr', 50 * 1024, datetime(2025, 1, 10)),
+            (self.usuario, 'ocr', 500 * 1024, datetime(2025, 1, 20)),
+            (self.usuario, 'pypdf', 5 * 1024 * 1024, datetime(2025, 2, 5)),
+            (self.otro, 'pypdf', 20 * 1024 * 1024, datetime(2025, 2, 6)),
+        ]
+        for usuario, metodo, tamaño, fecha in datos:
+            documento = DocumentoProcesado.objects.create(
+                usuario=usuario,
+                nombre_archivo='factura.pdf',
+                tamaño_bytes=tamaño,
+                texto_extraido='Factura de servicios',
+                metodo_extraccion=metodo
+            )
+            DocumentoProcesado.objects.filter(id=documento.id).update(
+                fecha_procesamiento=timezone.make_aware(fecha)
+            )
+        DocumentoProcesado.objects.create(
+            usuario=self.usuario, nombre_archivo='otro.pdf', tamaño_bytes=10,
+            texto_extraido='Sin coincidencias', metodo_extraccion='ocr'
+        )
+    
+    def _buscar(self, **params):
+        return self.client.get(reverse('documentos_buscar'), {'q': 'factura', **params})
+    
+    def test_facetas_personales(self):
+        response = self._buscar(facets='metodo_extraccion,mes,tamaño', page_size=1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        facetas = response.data['facetas']
+        # Los conteos cubren todas las coincidencias, no solo la página
+        self.assertEqual(
+            {f['valor']: f['cantidad'] for f in facetas['metodo_extraccion']},
+            {'ocr': 2, 'pypdf': 1}
+        )
+        self.assertEqual([(f['valor'], f['cantidad']) for f in facetas['mes']], [('2025-02', 1), ('2025-01', 2)])
+        self.assertEqual(
+            [(f['valor'], f['cantidad']) for f in facetas['tamaño']],
+            [('menos_100kb', 1), ('100kb_1mb', 1), ('1mb_10mb', 1)]
+        )
+        self.assertNotIn('usuario', facetas)
+    
+    def test_faceta_usuario_global_y_sin_facetas(self):
+        response = self._buscar(facets='usuario', **{'global': 'true'})
+        self.assertEqual(
+            [(f['etiqueta'], f['cantidad']) for f in response.data['facetas']['usuario']],
+            [('user1', 3), ('user2', 1)]
+        )
+        self.assertNotIn('facetas', self._buscar().data)
+    
+    def test_faceta_invalida(self):
+        response = self._buscar(facets='metodo_extraccion,color')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('color', response.data['error'])
+
+
+class MapasBitsBusquedaTest(APITestCase):
+    """
+    Tests del filtrado por ámbito con mapas de bits en las búsquedas
+    """
+    
+    def setUp(self):
+        from Document_Processing.Services import alcance_busqueda, sugerencias
+        
+        # Caché de búsquedas real (el refresco lo decide la versión de la colección)
+        self.cache_real = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'busqueda': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'mapas-bits-test',
+            },
+        })
+        self.cache_real.enable()
+        sugerencias.descartar_diccionarios()
+        alcance_busqueda.descartar_mapas()
+        
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        self.arrendamiento = self._crear(self.usuario, 'Contrato de arrendamiento urbano')
+        self.laboral = self._crear(self.usuario, 'Contrato laboral')
+        self.factura = self._crear(self.usuario, 'Factura mensual')
+        self.ajeno = self._crear(self.otro, 'Contrato de arrendamiento rural')
+    
+    def tearDown(self):
+        from Document_Processing.Services import alcance_busqueda, sugerencias
+        
+        alcance_busqueda.descartar_mapas()
+        sugerencias.descartar_diccionarios()
+        self.cache_real.disable()
+    
+    def _crear(self, usuario, texto):
+        with self.captureOnCommitCallbacks(execute=True):
+            return DocumentoProcesado.objects.create(
+                usuario=usuario,
+                nombre_archivo='doc.pdf',
+                tamaño_bytes=1000,
+                texto_extraido=texto,
+                metodo_extraccion='pypdf'
+            )
+    
+    def _ids(self, documentos):
+        return sorted(documentos.values_list('id', flat=True))
+    
+    def test_operaciones_mapa_bits(self):
+        from Document_Processing.Services.mapas_bits import MapaBits
+        
+        # Contenedor denso (mapa de bits), disperso (arreglo) y en otro bloque alto
+        a = set(range(0, 20000, 2)) | {70000, 70001, 1 << 20}
+        b = set(range(0, 20000, 3)) | {70001, 5 << 20}
+        mapa_a, mapa_b = MapaBits(a), MapaBits(b)
+        
+        self.assertEqual(len(mapa_a), len(a))
+        self.assertEqual(list(mapa_a & mapa_b), sorted(a & b))
+        self.assertEqual(list(mapa_a | mapa_b), sorted(a | b))
+        self.assertIn(70001, mapa_a)
+        self.assertNotIn(3, mapa_a)
+        self.assertLess(mapa_a.tamaño_bytes(), 2 * len(a))
+        
+        for valor in range(0, 20000, 2):
+            mapa_a.descartar(valor)
+        mapa_a.agregar(3)
+        self.assertEqual(list(mapa_a), [3, 70000, 70001, 1 << 20])
+    
+    def test_busqueda_por_mapas_igual_a_sql(self):
+        from Document_Processing.Services import alcance_busqueda
+        from Document_Processing.Services.normalizacion import normalizar_texto
+        
+        casos = ['contrato', 'CONTRÁTO', 'trato', 'de arrendam', 'arrendamiento urb', 'mensual', 'inexistente']
+        for consulta in casos:
+            self.assertIsNotNone(alcance_busqueda.coincidencias(consulta, self.usuario.id), consulta)
+            self.assertIsNotNone(alcance_busqueda.coincidencias(consulta), consulta)
+            self.assertEqual(
+                self._ids(DocumentoProcesado.objects.busqueda_usuario(self.usuario, consulta)),
+                self._ids(DocumentoProcesado.objects.por_usuario(self.usuario).filter(
+                    texto_normalizado__contains=normalizar_texto(consulta)
+                )),
+                consulta
+            )
+            self.assertEqual(
+                self._ids(DocumentoProcesado.objects.busqueda_global(consulta)),
+                self._ids(DocumentoProcesado.objects.activos().filter(
+                    texto_normalizado__contains=normalizar_texto(consulta)
+                )),
+                consulta
+            )
+        
+        # Los candidatos ya vienen acotados al ámbito
+        self.assertEqual(
+            alcance_busqueda.coincidencias('contrato', self.usuario.id),
+            sorted([self.arrendamiento.id, self.laboral.id])
+        )
+        self.assertEqual(alcance_busqueda.coincidencias('inexistente'), [])
+        # Sin términos no hay forma de acotar: se filtra en SQL
+        self.assertIsNone(alcance_busqueda.coincidencias('  '))
+    
+    def test_mapas_mantenidos_en_ingesta_y_eliminacion(self):
+        from Document_Processing.Services import alcance_busqueda, operaciones_masivas
+        
+        self.assertEqual(self._ids(DocumentoProcesado.objects.busqueda_usuario(self.usuario, 'contrato')),
+                         sorted([self.arrendamiento.id, self.laboral.id]))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.laboral.delete()
+        nuevo = self._crear(self.usuario, 'Contrato de servicios')
+        
+        self.assertEqual(self._ids(DocumentoProcesado.objects.busqueda_usuario(self.usuario, 'contrato')),
+                         sorted([self.arrendamiento.id, nuevo.id]))
+        self.assertEqual(self._ids(DocumentoProcesado.objects.busqueda_global('contrato')),
+                         sorted([self.arrendamiento.id, nuevo.id, self.ajeno.id]))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            operaciones_masivas.restaurar_documentos(DocumentoProcesado.objects.filter(pk=self.laboral.pk))
+        self.assertIn(self.laboral.id, alcance_busqueda.coincidencias('contrato', self.usuario.id))
+
+    def test_mapas_refrescados_por_version_compartida(self):
+        """Un cambio hecho en otro proceso (sin invalidar la caché local) se ve por la versión"""
+        from unittest import mock
+        from Document_Processing.Services import alcance_busqueda, cache_busqueda, operaciones_masivas
+
+        self.assertIn(self.ajeno.id, alcance_busqueda.coincidencias('arrendamiento'))
+        with mock.patch.object(cache_busqueda, 'invalidar'), self.captureOnCommitCallbacks(execute=True):
+            operaciones_masivas.eliminar_documentos(DocumentoProcesado.objects.filter(pk=self.ajeno.pk))
+        self.assertEqual(alcance_busqueda.coincidencias('arrendamiento'), [self.arrendamiento.id])
+    
+    def test_documento_sin_indexar_se_busca_por_texto(self):
+        from Document_Processing.models import TerminoIndexado
+        
+        # Documento cargado antes de que existiera el índice invertido
+        TerminoIndexado.objects.filter(documento=self.factura).delete()
+        DocumentoProcesado.objects.filter(pk=self.factura.pk).update(norma_terminos=None)
+        
+        self.assertEqual(self._ids(DocumentoProcesado.objects.busqueda_usuario(self.usuario, 'mensual')),
+                         [self.factura.id])
+
+
+class SerializacionRapidaTest(APITestCase):
+    """
+    Tests del camino rápido de serialización (values()) y del renderer orjson
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(
+            username='user1', password='pass123', first_name='Ana', last_name='Pérez'
+        )
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        for i in range(3):
+            DocumentoProcesado.objects.create(
+                usuario=self.usuario,
+                nombre_archivo=f'contrato_{i}.pdf',
+                tamaño_bytes=1500 * (i + 1),
+                texto_extraido=f'Contrato número {i} firmado entre las partes',
+                metodo_extraccion='pypdf'
+            )
+    
+    def test_listado_igual_al_serializer(self):
+        from Document_Processing.serializers import DocumentoListaSerializer
+        
+        documentos = DocumentoProcesado.objects.por_usuario(self.usuario).order_by('id')
+        self.assertEqual(
+            DocumentoListaSerializer.serializar_valores(documentos.values(*DocumentoListaSerializer.CAMPOS_VALORES)),
+            DocumentoListaSerializer(documentos, many=True).data
+        )
+    
+    def test_busqueda_igual_al_serializer(self):
+        from Document_Processing.serializers import DocumentoBusquedaSerializer
+        
+        documentos = DocumentoProcesado.objects.busqueda_usuario(self.usuario, 'firmado').order_by('id')
+        contexto = {'termino_busqueda': 'firmado'}
+        rapido = DocumentoBusquedaSerializer.serializar_valores(
+            documentos.values(*DocumentoBusquedaSerializer.CAMPOS_VALORES), contexto
+        )
+        self.assertEqual(rapido, DocumentoBusquedaSerializer(documentos, many=True, context=contexto).data)
+        self.assertEqual(rapido[0]['usuario_info'], {'username': 'user1', 'nombre_completo': 'Ana Pérez'})
+        # Un solo dict de usuario compartido por todas las filas
+        self.assertIs(rapido[0]['usuario_info'], rapido[1]['usuario_info'])
+    
+    def test_renderer_igual_a_drf(self):
+        from decimal import Decimal
+        from django.utils import timezone
+        from rest_framework.renderers import JSONRenderer
+        from Document_Processing.renderers import RenderizadorJSONRapido
+        
+        datos = {'fecha': timezone.now(), 'monto': Decimal('1.50'), 1: 'línea nueva', 'lista': [None, True]}
+        self.assertEqual(RenderizadorJSONRapido().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(
+            RenderizadorJSONRapido().render({'a': 1}, 'application/json; indent=2'),
+            JSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        )
+    
+    def test_endpoints_con_camino_rapido(self):
+        response = self.client.get(reverse('documentos_lista'), {'paginacion': 'cursor', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(response.json()['resultados']), 2)
+        
+        # El cursor se arma desde las filas values()
+        siguiente = self.client.get(response.json()['paginacion']['siguiente'])
+        self.assertEqual([d['nombre_archivo'] for d in siguiente.json()['resultados']], ['contrato_0.pdf'])
+        
+        response = self.client.get(reverse('documentos_buscar'), {'q': 'contrato'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['busqueda']['resultados_encontrados'], 3)
+        self.assertEqual(response.json()['resultados'][0]['tamaño_legible'], '4.4 KB')
+
+
+# Tiempo SQL máximo por request en el arnés de presupuestos (milisegundos)
+MAX_MS_SQL_POR_REQUEST = 250
+
+
+class PresupuestoConsultasMixin:
+    """
+    Arnés reutilizable: ejecuta una request y verifica que no supere un
+    máximo de consultas SQL ni de tiempo SQL total.
+    
+    Las respuestas en streaming se consumen dentro de la medición (sus
+    consultas se ejecutan al generar el contenido).
+    """
+    
+    def assertPresupuesto(self, metodo, url, max_consultas, max_ms=MAX_MS_SQL_POR_REQUEST,
+                          estado=status.HTTP_200_OK, **kwargs):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as consultas:
+            response = getattr(self.client, metodo)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        
+        self.assertEqual(response.status_code, estado, f'{metodo.upper()} {url}')
+        sentencias = '\n'.join(consulta['sql'] for consulta in consultas.captured_queries)
+        self.assertLessEqual(
+            len(consultas), max_consultas,
+            f'{metodo.upper()} {url}: {len(consultas)} consultas (máximo {max_consultas})\n{sentencias}'
+        )
+        tiempo = sum(float(consulta['time']) for consulta in consultas.captured_queries) * 1000
+        self.assertLessEqual(tiempo, max_ms, f'{metodo.upper()} {url}: {tiempo:.0f} ms de SQL')
+        return response
+
+
+class PresupuestoConsultasTest(PresupuestoConsultasMixin, APITestCase):
+    """
+    Tests de presupuesto de consultas de todos los endpoints de
+    Document_Processing/urls.py y Api/urls.py sobre un conjunto sembrado
+    (más documentos que una página, para que un N+1 supere el presupuesto)
+    """
+    
+    DOCUMENTOS_POR_USUARIO = 15
+    
+    # Formato del cuerpo de las rutas que no reciben JSON
+    FORMATOS = {
+        'extraer_texto': {'format': 'multipart'},
+        'documentos_importar': {'content_type': 'application/x-ndjson'},
+    }
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='user1', password='pass123', first_name='Ana', last_name='Pérez'
+        )
+        cls.otro = User.objects.create_user(username='user2', password='pass123')
+        cls.admin = User.objects.create_superuser(username='admin', password='pass123')
+        cls.documentos = {}
+        for usuario in (cls.usuario, cls.otro):
+            cls.documentos[usuario.username] = [
+                DocumentoProcesado.objects.create(
+                    usuario=usuario,
+                    nombre_archivo=f'contrato_{i}.pdf',
+                    tamaño_bytes=1000 * (i + 1),
+                    texto_extraido=(
+                        f'Contrato de servicios número {i} entre las partes.\fAnexo {i} con '
+                        f'condiciones de pago y plazos de entrega del contrato.'
+                    ),
+                    metodo_extraccion='pypdf'
+                )
+                for i in range(cls.DOCUMENTOS_POR_USUARIO)
+            ]
+        # Un documento eliminado para restaurar y purgar
+        cls.eliminado = cls.documentos['user1'][-1]
+        cls.eliminado.delete()
+    
+    def _autenticar(self, usuario):
+        refresh = RefreshToken.for_user(usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+    
+    def _pdf(self):
+        import fitz
+        
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), 'Contrato de prueba para el presupuesto de consultas.\n' * 4)
+        return SimpleUploadedFile('prueba.pdf', pdf.tobytes(), content_type='application/pdf')
+    
+    def _ndjson(self, filas=20):
+        return b''.join(
+            json.dumps({
+                'nombre_archivo': f'importado_{i}.pdf', 'tamaño_bytes': 1000, 'metodo_extraccion': 'pypdf',
+                'texto_extraido': f'Contrato importado {i}.\fAnexo con condiciones de pago.'
+            }).encode('utf-8') + b'\n'
+            for i in range(filas)
+        )
+    
+    def _casos(self):
+        """
+        (nombre de ruta, kwargs de reverse, método, datos, estado, máximo de consultas)
+        """
+        from Document_Processing.Services import facetas
+        
+        propio = self.documentos['user1'][0].id
+        ajeno = self.documentos['user2'][0].id
+        refresh = str(RefreshToken.for_user(self.usuario))
+        return [
+            ('extraer_texto', {}, 'post', {'archivo': self._pdf()}, 201, 18),
+            ('documentos_lista', {}, 'get', {'page_size': 10}, 200, 4),
+            ('documentos_lista', {}, 'get', {'paginacion': 'cursor', 'page_size': 10}, 200, 3),
+            ('documentos_exportar', {}, 'get', {'formato': 'csv', 'incluir_texto': 'true'}, 200, 2),
+            ('documento_detalle', {'id': propio}, 'get', {}, 200, 3),
+            ('documento_detalle_global', {'id': ajeno}, 'get', {}, 200, 3),
+            ('documento_texto', {'id': propio}, 'get', {'paginas': '1-2'}, 200, 3),
+            ('documento_texto_global', {'id': ajeno}, 'get', {}, 200, 3),
+            ('documento_original', {'id': propio}, 'get', {}, 404, 2),
+            ('documento_original_global', {'id': ajeno}, 'get', {}, 404, 2),
+            ('documento_similares', {'id': propio}, 'get', {}, 200, 5),
+            ('documento_similares_global', {'id': ajeno}, 'get', {}, 200, 5),
+            ('documento_casi_duplicados', {'id': propio}, 'get', {}, 200, 4),
+            ('documento_casi_duplicados', {'id': propio}, 'post', {}, 200, 6),
+            ('documento_eliminar', {'id': propio}, 'delete', {}, 200, 13),
+            ('documentos_eliminar_masivo', {}, 'post', {'ids': [propio, self.documentos['user1'][1].id]}, 200, 13),
+            ('documentos_restaurar_masivo', {}, 'post', {'ids': [self.eliminado.id]}, 200, 13),
+            ('documentos_purgar_masivo', {}, 'post', {'ids': [self.eliminado.id]}, 200, 15),
+            ('documentos_importar', {}, 'post', self._ndjson(), 201, 15),
+            ('documentos_buscar', {}, 'get', {'q': 'contrato', 'page_size': 10}, 200, 12),
+            ('documentos_buscar', {}, 'get', {'q': 'contrato', 'global': 'true', 'page_size': 10}, 200, 11),
+            ('documentos_buscar', {}, 'get', {'q': 'ntrat', 'facets': ','.join(facetas.FACETAS)}, 200, 15),
+            ('documentos_sugerencias', {}, 'get', {'q': 'contr'}, 200, 3),
+            ('documentos_estadisticas', {}, 'get', {}, 200, 4),
+            ('metricas', {}, 'get', {}, 200, 1),
+            ('token_obtain_pair', {}, 'post', {'username': 'user1', 'password': 'pass123'}, 200, 3),
+            ('token_refresh', {}, 'post', {'refresh': refresh}, 200, 13),
+            ('token_blacklist', {}, 'post', {'refresh': refresh}, 200, 7),
+            ('crear_usuario', {}, 'post', {
+                'username': 'nuevo', 'email': 'nuevo@test.com', 'password': 'Clave-segura-123',
+                'password_confirm': 'Clave-segura-123', 'first_name': 'Nuevo', 'last_name': 'Usuario'
+            }, 201, 3),
+            ('obtener_perfil', {}, 'get', {}, 200, 1),
+        ]
+    
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        from Api import urls as urls_api
+        from Document_Processing import urls as urls_documentos
+        
+        rutas = {ruta.name for ruta in urls_documentos.urlpatterns + urls_api.urlpatterns}
+        self.assertEqual(rutas - {caso[0] for caso in self._casos()}, set())
+    
+    def test_presupuesto_admin(self):
+        self.client.force_login(self.admin)
+        self.assertPresupuesto('get', reverse('admin:Document_Processing_documentoprocesado_changelist'), 5)
+        self.assertPresupuesto(
+            'get', reverse('admin:Document_Processing_documentoprocesado_change', args=[self.eliminado.id]), 6
+        )
+    
+    def test_presupuesto_por_endpoint(self):
+        from django.db import transaction
+        from Document_Processing.Services import alcance_busqueda, sugerencias
+        
+        for nombre, kwargs, metodo, datos, estado, maximo in self._casos():
+            with self.subTest(ruta=nombre, metodo=metodo):
+                # Presupuesto en frío: sin diccionarios ni mapas de tests anteriores
+                sugerencias.descartar_diccionarios()
+                alcance_busqueda.descartar_mapas()
+                self._autenticar(self.admin if nombre == 'metricas' else self.usuario)
+                # Cada caso se revierte: las operaciones que modifican datos no afectan a los siguientes
+                with transaction.atomic():
+                    extra = {} if metodo == 'get' else self.FORMATOS.get(nombre, {'format': 'json'})
+                    self.assertPresupuesto(metodo, reverse(nombre, kwargs=kwargs), maximo, estado=estado,
+                                           data=datos, **extra)
+                    transaction.set_rollback(True)
+
+
+class GetCondicionalTest(APITestCase):
+    """
+    Tests de ETag / Last-Modified y respuestas 304 en detalle, listado,
+    búsqueda y estadísticas
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.documentos = [
+            DocumentoProcesado.objects.create(
+                usuario=usuario,
+                nombre_archivo=f'contrato_{usuario.username}_{i}.pdf',
+                tamaño_bytes=1000,
+                texto_extraido=f'Contrato de servicios número {i}',
+                metodo_extraccion='pypdf'
+            )
+            for usuario in (self.usuario, self.otro)
+            for i in range(3)
+        ]
+        self.propio = self.documentos[0]
+        self.ajeno = self.documentos[3]
+    
+    def _crear(self, usuario=None):
+        return DocumentoProcesado.objects.create(
+            usuario=usuario or self.usuario,
+            nombre_archivo='nuevo.pdf',
+            tamaño_bytes=500,
+            texto_extraido='Contrato nuevo',
+            metodo_extraccion='pypdf'
+        )
+    
+    def _revalidar(self, url, params=None, **cabeceras):
+        """Primera respuesta y la revalidación con su ETag."""
+        primera = self.client.get(url, params or {})
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+        self.assertTrue(primera['ETag'].startswith('W/"'))
+        self.assertEqual(primera['Cache-Control'], 'private, no-cache')
+        segunda = self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=primera['ETag'], **cabeceras)
+        return primera, segunda
+    
+    def test_detalle_304_sin_leer_el_texto(self):
+        """Con el ETag vigente el detalle responde 304 sin cuerpo ni lectura del texto"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        url = reverse('documento_detalle', kwargs={'id': self.propio.id})
+        primera = self.client.get(url, {'incluir_texto': 'true'})
+        self.assertEqual(primera.status_code, status.HTTP_200_OK)
+        self.assertEqual(primera.data['texto_extraido'], 'Contrato de servicios número 0')
+        self.assertIn('Last-Modified', primera)
+        
+        with CaptureQueriesContext(connection) as consultas:
+            segunda = self.client.get(url, {'incluir_texto': 'true'}, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(segunda.content, b'')
+        self.assertEqual(segunda['ETag'], primera['ETag'])
+        for consulta in consultas.captured_queries:
+            self.assertNotIn('texto_sha256', consulta['sql'])
+            self.assertNotIn('texto_normalizado', consulta['sql'])
+        
+        # Sin el texto es otra representación con otro ETag
+        sin_texto = self.client.get(url)
+        self.assertNotIn('texto_extraido', sin_texto.data)
+        self.assertNotEqual(sin_texto['ETag'], primera['ETag'])
+        
+        # If-Modified-Since con la fecha informada también valida
+        modificado = self.client.get(url, HTTP_IF_MODIFIED_SINCE=sin_texto['Last-Modified'])
+        self.assertEqual(modificado.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_detalle_cambia_con_la_edicion(self):
+        """Editar el documento cambia el ETag del detalle propio y del global"""
+        for nombre, documento in (('documento_detalle', self.propio), ('documento_detalle_global', self.ajeno)):
+            with self.subTest(ruta=nombre):
+                url = reverse(nombre, kwargs={'id': documento.id})
+                primera, segunda = self._revalidar(url)
+                self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+                
+                documento.nombre_archivo = 'renombrado.pdf'
+                documento.save()
+                tercera = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+                self.assertEqual(tercera.status_code, status.HTTP_200_OK)
+                self.assertEqual(tercera.data['nombre_archivo'], 'renombrado.pdf')
+    
+    def test_listado_sigue_a_la_coleccion_del_usuario(self):
+        """El listado solo se invalida con cambios en los documentos del usuario"""
+        url = reverse('documentos_lista')
+        primera, segunda = self._revalidar(url)
+        self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        # Otra página u orden es otra respuesta
+        otra = self.client.get(url, {'ordering': 'nombre_archivo'}, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(otra.status_code, status.HTTP_200_OK)
+        
+        # Documentos de otro usuario no la afectan
+        self._crear(self.otro)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag']).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        
+        # Alta, eliminación lógica y purga de un activo sí
+        etag = primera['ETag']
+        for cambio in (self._crear, self.propio.delete, self.documentos[1].hard_delete):
+            cambio()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+    
+    def test_busqueda_y_estadisticas(self):
+        """Búsqueda personal, global y estadísticas responden 304 hasta que cambia su ámbito"""
+        busqueda = reverse('documentos_buscar')
+        estadisticas = reverse('documentos_estadisticas')
+        casos = [
+            (busqueda, {'q': 'contrato'}, False),
+            (busqueda, {'q': 'contrato', 'global': 'true'}, True),
+            (estadisticas, {}, False),
+        ]
+        etags = {}
+        for url, params, global_ in casos:
+            primera, segunda = self._revalidar(url, params)
+            self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+            etags[(url, global_)] = primera['ETag']
+        
+        # Otro término es otra respuesta
+        self.assertEqual(
+            self.client.get(busqueda, {'q': 'servicios'}, HTTP_IF_NONE_MATCH=etags[(busqueda, False)]).status_code,
+            status.HTTP_200_OK
+        )
+        
+        # Un documento de otro usuario solo invalida la búsqueda global
+        self._crear(self.otro)
+        for url, params, global_ in casos:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etags[(url, global_)])
+            esperado = status.HTTP_200_OK if global_ else status.HTTP_304_NOT_MODIFIED
+            self.assertEqual(response.status_code, esperado)
+        
+        self.propio.delete()
+        for url, params, global_ in casos:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etags[(url, global_)])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ExportacionTest(APITestCase):
+    """
+    Tests de la exportación en streaming (NDJSON / CSV, gzip opcional)
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        otro = User.objects.create_user(username='user2', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.documentos = [
+            DocumentoProcesado.objects.create(
+                usuario=self.usuario,
+                nombre_archivo=f'doc_{i}.pdf',
+                tamaño_bytes=1000 * (i + 1),
+                texto_extraido=f'Texto "completo" del documento {i},\ncon salto de línea',
+                metodo_extraccion='ocr' if i % 2 else 'pypdf',
+                tiempo_procesamiento='1.250'
+            )
+            for i in range(5)
+        ]
+        self.documentos[-1].delete()
+        DocumentoProcesado.objects.create(
+            usuario=otro, nombre_archivo='ajeno.pdf', tamaño_bytes=1, texto_extraido='Ajeno', metodo_extraccion='pypdf'
+        )
+        self.url = reverse('documentos_exportar')
+    
+    def _contenido(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+    
+    def test_ndjson_con_los_filtros_del_listado(self):
+        """Una línea JSON por documento activo del usuario, con los filtros del listado"""
+        from unittest import mock
+        
+        # Lotes y bloques pequeños: la salida se arma en varias partes
+        with mock.patch('Document_Processing.Services.exportacion.TAMAÑO_LOTE', 2), \
+                mock.patch('Document_Processing.Services.exportacion.TAMAÑO_BLOQUE', 64):
+            response = self.client.get(self.url, {'ordering': 'nombre_archivo'})
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            self.assertIn('attachment; filename="documentos_user1_', response['Content-Disposition'])
+            partes = list(response.streaming_content)
+        self.assertGreater(len(partes), 1)
+        
+        filas = [json.loads(linea) for linea in b''.join(partes).decode('utf-8').splitlines()]
+        self.assertEqual([fila['nombre_archivo'] for fila in filas], ['doc_0.pdf', 'doc_1.pdf', 'doc_2.pdf', 'doc_3.pdf'])
+        self.assertEqual(filas[0]['tiempo_procesamiento'], '1.250')
+        self.assertNotIn('texto_extraido', filas[0])
+        
+        filtradas = self._contenido(self.client.get(self.url, {'metodo_extraccion': 'ocr'})).splitlines()
+        self.assertEqual(len(filtradas), 2)
+    
+    def test_csv_con_texto(self):
+        """El CSV incluye encabezado y el texto completo bajo demanda, con comillas y saltos de línea"""
+        import csv
+        import io
+        
+        response = self.client.get(self.url, {'formato': 'csv', 'incluir_texto': 'true', 'ordering': 'nombre_archivo'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.DictReader(io.StringIO(self._contenido(response).decode('utf-8'))))
+        self.assertEqual(len(filas), 4)
+        self.assertEqual(filas[0]['id'], str(self.documentos[0].id))
+        self.assertEqual(filas[0]['texto_extraido'], 'Texto "completo" del documento 0,\ncon salto de línea')
+    
+    def test_gzip_al_vuelo(self):
+        """Con Accept-Encoding: gzip la salida se comprime en streaming"""
+        import gzip
+        
+        plano = self._contenido(self.client.get(self.url))
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br;q=1.0, gzip;q=0.8')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(self._contenido(response)), plano)
+        
+        sin_gzip = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', sin_gzip)
+    
+    def test_formato_invalido(self):
+        """Un formato no soportado devuelve 400"""
+        response = self.client.get(self.url, {'formato': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ndjson', response.data['error'])
+
+
+class ImportacionTest(APITestCase):
+    """
+    Tests de la importación masiva NDJSON (API y comando importar_documentos)
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        self.url = reverse('documentos_importar')
+    
+    def _fila(self, i, **campos):
+        return {
+            'nombre_archivo': f'legado_{i}.pdf',
+            'tamaño_bytes': 1000 * (i + 1),
+            'texto_extraido': f'Acta número {i} del archivo histórico.\fAnexo con firmas del acta {i}.',
+            'metodo_extraccion': 'ocr' if i % 2 else 'pypdf',
+            **campos
+        }
+    
+    def _importar(self, filas, **parametros):
+        cuerpo = b''.join(
+            (fila if isinstance(fila, bytes) else json.dumps(fila).encode('utf-8')) + b'\n' for fila in filas
+        )
+        url = self.url + ('?' + '&'.join(f'{clave}={valor}' for clave, valor in parametros.items()) if parametros else '')
+        return self.client.generic('POST', url, cuerpo, content_type='application/x-ndjson')
+    
+    def test_importa_por_lotes_con_indice_y_estadisticas(self):
+        """Los documentos importados quedan indexados, con páginas, firma y estadísticas"""
+        from unittest import mock
+        from Document_Processing.models import FirmaDocumento, PaginaDocumento
+        from Document_Processing.Services import importacion
+        
+        filas = [self._fila(i) for i in range(5)]
+        filas[0]['fecha_procesamiento'] = '2020-01-15T10:00:00Z'
+        filas[1]['tiempo_procesamiento'] = '2.500'
+        with mock.patch.object(importacion, 'insertar_lote', wraps=importacion.insertar_lote) as insertar:
+            response = self._importar(filas, lote=2)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['importados'], 5)
+        self.assertEqual(response.data['errores'], 0)
+        self.assertIsNotNone(response.data['filas_por_segundo'])
+        self.assertEqual(insertar.call_count, 3)
+        
+        documentos = DocumentoProcesado.objects.filter(usuario=self.usuario)
+        self.assertEqual(documentos.count(), 5)
+        self.assertEqual(documentos.filter(norma_terminos__isnull=True).count(), 0)
+        self.assertEqual(PaginaDocumento.objects.filter(documento__in=documentos).count(), 10)
+        self.assertEqual(FirmaDocumento.objects.filter(documento__in=documentos).count(), 5)
+        antiguo = documentos.get(nombre_archivo='legado_0.pdf')
+        self.assertEqual(antiguo.fecha_procesamiento.year, 2020)
+        self.assertEqual(antiguo.resumen_texto[:14], 'Acta número 0 ')
+        
+        busqueda = self.client.get(reverse('documentos_buscar'), {'q': 'acta 3'})
+        self.assertEqual([d['nombre_archivo'] for d in busqueda.data['resultados']], ['legado_3.pdf'])
+        sugerencias = self.client.get(reverse('documentos_sugerencias'), {'q': 'histo'})
+        self.assertIn('historico', [s['termino'] for s in sugerencias.data['sugerencias']])
+        
+        generales = self.client.get(reverse('documentos_estadisticas')).data['estadisticas_generales']
+        self.assertEqual(generales['total_documentos'], 5)
+        self.assertEqual(generales['total_tamaño_bytes'], 15000)
+    
+    def test_ida_y_vuelta_con_la_exportacion(self):
+        """Lo exportado con texto se puede importar tal cual (id y resumen se ignoran)"""
+        DocumentoProcesado.objects.create(
+            usuario=self.usuario, nombre_archivo='original.pdf', tamaño_bytes=10,
+            texto_extraido='Texto original para exportar', metodo_extraccion='pypdf', tiempo_procesamiento='0.500'
+        )
+        exportado = b''.join(self.client.get(reverse('documentos_exportar'), {'incluir_texto': 'true'}).streaming_content)
+        
+        response = self.client.generic('POST', self.url, exportado, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        copias = DocumentoProcesado.objects.filter(usuario=self.usuario, nombre_archivo='original.pdf')
+        self.assertEqual(copias.count(), 2)
+        self.assertEqual({copia.texto_extraido for copia in copias}, {'Texto original para exportar'})
+        
+        casi_duplicados = self.client.get(reverse('documento_casi_duplicados', kwargs={'id': copias[0].id}))
+        self.assertEqual(len(casi_duplicados.data['casi_duplicados']), 1)
+    
+    def test_errores_por_linea(self):
+        """Las líneas inválidas se informan con su número sin detener la importación"""
+        response = self._importar([
+            self._fila(0),
+            b'{no es json',
+            self._fila(1, metodo_extraccion='otro'),
+            b'',
+            b'[1, 2]',
+            self._fila(2, texto_extraido=''),
+            self._fila(3),
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['importados'], 2)
+        self.assertEqual(response.data['errores'], 4)
+        self.assertEqual([error['linea'] for error in response.data['detalle_errores']], [2, 3, 5, 6])
+        self.assertIn('metodo_extraccion', response.data['detalle_errores'][1]['errores'])
+        
+        todas_invalidas = self._importar([b'{}'])
+        self.assertEqual(todas_invalidas.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._importar([self._fila(0)], lote=0).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_comando_con_archivo_gzip(self):
+        """El comando importa un .ndjson.gz e informa el progreso en filas/s"""
+        import gzip
+        import io
+        import os
+        from django.core.management import call_command
+        
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        ruta = os.path.join(directorio, 'legado.ndjson.gz')
+        with gzip.open(ruta, 'wt', encoding='utf-8') as archivo:
+            for i in range(3):
+                archivo.write(json.dumps(self._fila(i)) + '\n')
+        
+        salida = io.StringIO()
+        call_command('importar_documentos', ruta, usuario='user1', lote=2, stdout=salida)
+        self.assertEqual(DocumentoProcesado.objects.filter(usuario=self.usuario).count(), 3)
+        self.assertIn('2 documentos importados', salida.getvalue())
+        self.assertIn('Importados 3 documentos', salida.getvalue())
+
+
+class IngestaDirectorioTest(TestCase):
+    """
+    Tests del comando ingerir_pdfs (pool de procesos y punto de control)
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+    
+    def _pdf(self, relativa, paginas):
+        import os
+        import fitz
+        
+        ruta = os.path.join(self.directorio, relativa)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        pdf = fitz.open()
+        for texto in paginas:
+            pdf.new_page().insert_text((72, 72), (texto + '\n') * 6)
+        pdf.save(ruta)
+    
+    def _ingerir(self, **opciones):
+        import io
+        from django.core.management import call_command
+        
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('ingerir_pdfs', self.directorio, usuario='user1', stdout=salida, stderr=errores, **opciones)
+        return salida.getvalue(), errores.getvalue()
+    
+    def test_ingesta_en_paralelo_con_paginas_e_indice(self):
+        """Los PDF del directorio se guardan con páginas, PDF original e índice"""
+        import os
+        from Document_Processing.models import PaginaDocumento
+        
+        self._pdf('a.pdf', ['Contrato de obra principal', 'Anexo de garantías'])
+        self._pdf('sub/b.PDF', ['Factura de servicios del mes'])
+        with open(os.path.join(self.directorio, 'notas.txt'), 'w') as archivo:
+            archivo.write('no es un pdf')
+        
+        salida, _ = self._ingerir(procesos=2, lote=1)
+        documentos = DocumentoProcesado.objects.filter(usuario=self.usuario)
+        self.assertEqual(sorted(documentos.values_list('nombre_archivo', flat=True)), ['a.pdf', 'b.PDF'])
+        contrato = documentos.get(nombre_archivo='a.pdf')
+        self.assertEqual(contrato.metodo_extraccion, 'pypdf')
+        self.assertTrue(contrato.huella_pdf)
+        self.assertIsNotNone(contrato.norma_terminos)
+        self.assertEqual(PaginaDocumento.objects.filter(documento=contrato).count(), 2)
+        self.assertEqual(DocumentoProcesado.objects.busqueda_usuario(self.usuario, 'garantias').get(), contrato)
+        self.assertIn('páginas/s', salida)
+        self.assertIn('ETA', salida)
+        self.assertIn('Importados 2 documentos (3 páginas)', salida)
+    
+    def test_reanuda_desde_el_punto_de_control(self):
+        """Una segunda ejecución solo procesa los archivos nuevos; los inválidos se informan"""
+        import os
+        
+        self._pdf('uno.pdf', ['Primer contrato del archivo'])
+        with open(os.path.join(self.directorio, 'roto.pdf'), 'wb') as archivo:
+            archivo.write(b'%PDF-1.4 truncado')
+        _, errores = self._ingerir(procesos=1)
+        self.assertIn('roto.pdf', errores)
+        self.assertEqual(DocumentoProcesado.objects.filter(usuario=self.usuario).count(), 1)
+        
+        self._pdf('dos.pdf', ['Segundo contrato del archivo'])
+        salida, _ = self._ingerir(procesos=1)
+        self.assertIn('Reanudando: 2 archivos', salida)
+        self.assertIn('Importados 1 documentos', salida)
+        self.assertEqual(
+            sorted(DocumentoProcesado.objects.filter(usuario=self.usuario).values_list('nombre_archivo', flat=True)),
+            ['dos.pdf', 'uno.pdf']
+        )
+        
+        self._ingerir(procesos=1, sin_punto_control=True)
+        self.assertEqual(DocumentoProcesado.objects.filter(usuario=self.usuario).count(), 4)
+    
+    def test_caida_entre_commit_y_punto_de_control(self):
+        """Un lote confirmado pero no registrado no se duplica al reanudar; uno sin confirmar se reprocesa"""
+        from unittest import mock
+        from django.core.management.base import CommandError
+        from Document_Processing.Services import importacion
+        from Document_Processing.Services.ingesta_directorio import PuntoControl
+        
+        self._pdf('uno.pdf', ['Primer contrato del archivo'])
+        self._pdf('copia/uno.pdf', ['Primer contrato del archivo'])
+        with mock.patch.object(PuntoControl, 'registrar', side_effect=KeyboardInterrupt):
+            with self.assertRaises(CommandError):
+                self._ingerir(procesos=1)
+        self.assertEqual(DocumentoProcesado.objects.filter(usuario=self.usuario).count(), 2)
+        
+        self._pdf('dos.pdf', ['Segundo contrato del archivo'])
+        with mock.patch.object(importacion, 'insertar_lote', side_effect=KeyboardInterrupt):
+            with self.assertRaises(CommandError):
+                self._ingerir(procesos=1)
+        
+        salida, _ = self._ingerir(procesos=1)
+        self.assertIn('Importados 1 documentos', salida)
+        self.assertEqual(
+            sorted(DocumentoProcesado.objects.filter(usuario=self.usuario).values_list('nombre_archivo', flat=True)),
+            ['dos.pdf', 'uno.pdf', 'uno.pdf']
+        )
+
+
+class CompresionRespuestaTest(APITestCase):
+    """
+    Tests de la compresión de respuestas negociada (CompresionRespuestaMiddleware)
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        
+        self.texto = '\f'.join(
+            f'Página {i}: cláusulas del contrato de arrendamiento y condiciones de pago. ' * 40 for i in range(5)
+        )
+        self.documento = DocumentoProcesado.objects.create(
+            usuario=self.usuario, nombre_archivo='contrato.pdf', tamaño_bytes=1024,
+            texto_extraido=self.texto, metodo_extraccion='pypdf'
+        )
+    
+    def test_detalle_con_texto_comprimido(self):
+        """El JSON grande se comprime con gzip y conserva un ETag débil válido"""
+        import gzip
+        
+        url = reverse('documento_detalle', kwargs={'id': self.documento.id})
+        plano = self.client.get(url, {'incluir_texto': 'true'})
+        self.assertNotIn('Content-Encoding', plano)
+        self.assertIn('Accept-Encoding', plano['Vary'])
+        
+        response = self.client.get(url, {'incluir_texto': 'true'}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertLess(int(response['Content-Length']), len(plano.content) // 5)
+        self.assertEqual(gzip.decompress(response.content), plano.content)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        
+        no_modificado = self.client.get(
+            url, {'incluir_texto': 'true'}, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(no_modificado.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_umbral_y_tipos_no_comprimibles(self):
+        """Las respuestas chicas, parciales o sin codificación aceptable no se comprimen"""
+        pequeña = self.client.get(reverse('obtener_perfil'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(pequeña.content), 1024)
+        self.assertNotIn('Content-Encoding', pequeña)
+        
+        url = reverse('documento_texto', kwargs={'id': self.documento.id})
+        parcial = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=0-4999')
+        self.assertEqual(parcial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertNotIn('Content-Encoding', parcial)
+        
+        rechazada = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', rechazada)
+    
+    def test_texto_en_streaming(self):
+        """El texto completo se comprime al vuelo, sin Content-Length"""
+        import gzip
+        
+        url = reverse('documento_texto', kwargs={'id': self.documento.id})
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response)
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode('utf-8'), self.texto)
+    
+    def test_exportacion_no_se_comprime_dos_veces(self):
+        """La exportación con gzip propio pasa sin cambios por el middleware"""
+        import gzip
+        
+        response = self.client.get(reverse('documentos_exportar'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        fila = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(fila['nombre_archivo'], 'contrato.pdf')
+    
+    def test_negociacion(self):
+        """Se elige la codificación de mayor q entre las disponibles"""
+        from unittest import mock
+        from Document_Processing.Services import compresion
+        
+        with mock.patch.object(compresion, 'disponibles', return_value=['zstd', 'br', 'gzip']):
+            self.assertEqual(compresion.negociar('gzip, br, zstd'), 'zstd')
+            self.assertEqual(compresion.negociar('gzip;q=1.0, br;q=0.5'), 'gzip')
+            self.assertEqual(compresion.negociar('br;q=0.8, *;q=0.1'), 'br')
+            self.assertEqual(compresion.negociar('*'), 'zstd')
+            self.assertIsNone(compresion.negociar('identity'))
+            self.assertIsNone(compresion.negociar(''))
+        self.assertEqual(compresion.negociar('br, gzip;q=0.5', ['gzip']), 'gzip')
+
+
+class VistasAsincronasTest(APITestCase):
+    """
+    Tests de las vistas asíncronas de subida y búsqueda (Services.concurrencia)
+    """
+    
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='user1', password='pass123')
+        self.client.force_authenticate(user=self.usuario)
+    
+    def _pdf(self, paginas):
+        import fitz
+        
+        pdf = fitz.open()
+        for numero in range(paginas):
+            pdf.new_page().insert_text((72, 72), f'Contrato de servicios, página {numero}.\n' * 6)
+        return pdf.tobytes()
+    
+    def test_vistas_marcadas_como_corrutinas(self):
+        """Django despacha la subida y la búsqueda como vistas async"""
+        from asgiref.sync import iscoroutinefunction
+        from django.urls import resolve
+        
+        for nombre in ('extraer_texto', 'documentos_buscar'):
+            self.assertTrue(iscoroutinefunction(resolve(reverse(nombre)).func), nombre)
+    
+    def test_subida_y_busqueda(self):
+        """La subida guarda el documento y la búsqueda lo encuentra, como con las vistas síncronas"""
+        archivo = SimpleUploadedFile('contrato.pdf', self._pdf(3), content_type='application/pdf')
+        response = self.client.post(reverse('extraer_texto'), {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_paginas'], 3)
+        self.assertTrue(DocumentoProcesado.objects.filter(id=response.data['documento_id']).exists())
+        
+        response = self.client.get(reverse('documentos_buscar'), {'q': 'servicios'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['busqueda']['resultados_encontrados'], 1)
+        
+        response = self.client.get(reverse('documentos_buscar'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_extractor_cancelado(self):
+        """extract_text se interrumpe entre páginas cuando cancelled() devuelve True y cierra el PDF"""
+        import os
+        from unittest import mock
+        from Document_Processing.Services import pdf_extractor
+        from Document_Processing.Services.pdf_extractor import ExtraccionCancelada, PDFExtractor
+        
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temporal:
+            temporal.write(self._pdf(5))
+        self.addCleanup(os.remove, temporal.name)
+        
+        consultas = []
+        
+        def cancelado():
+            consultas.append(True)
+            return len(consultas) > 2
+        
+        abiertos = []
+        abrir = pdf_extractor.fitz.open
+        
+        def registrar(*args, **kwargs):
+            abiertos.append(abrir(*args, **kwargs))
+            return abiertos[-1]
+        
+        with mock.patch.object(pdf_extractor.fitz, 'open', side_effect=registrar):
+            with self.assertRaises(ExtraccionCancelada):
+                PDFExtractor().extract_text(temporal.name, cancelled=cancelado)
+        self.assertEqual(len(consultas), 3)
+        self.assertTrue(abiertos and all(doc.is_closed for doc in abiertos))
+    
+    def test_cancelacion_por_desconexion(self):
+        """Cancelar la tarea que espera la extracción detiene el hilo del ejecutor"""
+        import asyncio
+        import threading
+        import time
+        from unittest import mock
+        from Document_Processing.Services import concurrencia
+        from Document_Processing.Services.pdf_extractor import ExtraccionCancelada
+        
+        iniciada, detenida = threading.Event(), threading.Event()
+        
+        class ExtractorLento:
+            def extract_text(self, ruta, cancelled=None):
+                iniciada.set()
+                while not cancelled():
+                    time.sleep(0.01)
+                detenida.set()
+                raise ExtraccionCancelada()
+        
+        async def escenario():
+            tarea = asyncio.ensure_future(concurrencia.extraer('lento.pdf'))
+            await asyncio.get_running_loop().run_in_executor(None, iniciada.wait, 5)
+            tarea.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await tarea
+        
+        with mock.patch.object(concurrencia, 'PDFExtractor', ExtractorLento):
+            asyncio.run(escenario())
+        self.assertTrue(detenida.wait(5))
+
+
+class MigracionAlmacenBlobsTest(TransactionTestCase):
+    """
+    Tests de la migración 0007 (texto_extraido al almacén de blobs) sobre
+    filas que ya tienen texto, en ambos sentidos
+    """
+    
+    anterior = [('Document_Processing', '0006_texto_comprimido')]
+    posterior = [('Document_Processing', '0007_almacen_blobs')]
+    
+    def _migrar(self, destino):
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        
+        executor = MigrationExecutor(connection)
+        executor.migrate(destino)
+        executor.loader.build_graph()
+        return executor.loader.project_state(destino).apps
+    
+    def tearDown(self):
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        
+        self._migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+    
+    def test_textos_existentes_en_ambos_sentidos(self):
+        """Cada documento conserva su propio texto al migrar y al revertir"""
+        import hashlib
+        from django.db import connection
+        
+        apps = self._migrar(self.anterior)
+        usuario = apps.get_model('auth', 'User').objects.create(username='user1')
+        Documento = apps.get_model('Document_Processing', 'DocumentoProcesado')
+        textos = [f'Texto del documento {i}: cláusula {i} del contrato' for i in range(3)]
+        for i, texto in enumerate(textos):
+            Documento.objects.create(
+                usuario_id=usuario.id, nombre_archivo=f'doc{i}.pdf', tamaño_bytes=100,
+                texto_extraido=texto, metodo_extraccion='pypdf'
+            )
+        
+        self._migrar(self.posterior)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT texto_sha256 FROM "Document_Processing_documentoprocesado" ORDER BY id')
+            huellas = [fila[0] for fila in cursor.fetchall()]
+        self.assertEqual(huellas, [hashlib.sha256(texto.encode('utf-8')).hexdigest() for texto in textos])
+        
+        apps = self._migrar(self.anterior)
+        Documento = apps.get_model('Document_Processing', 'DocumentoProcesado')
+        self.assertEqual([documento.texto_extraido for documento in Documento.objects.order_by('id')], textos)
@@ -7,13 +7,33 @@ urlpatterns = [
     
     # Gestión de documentos
     path('', views.DocumentoListView.as_view(), name='documentos_lista'),
+    path('exportar/', views.DocumentoExportacionView.as_view(), name='documentos_exportar'),
     path('<int:id>/', views.DocumentoDetailView.as_view(), name='documento_detalle'),
     path('global/<int:id>/', views.DocumentoGlobalDetailView.as_view(), name='documento_detalle_global'),
+    path('<int:id>/texto/', views.DocumentoTextoView.as_view(), name='documento_texto'),
+    path('global/<int:id>/texto/', views.DocumentoGlobalTextoView.as_view(), name='documento_texto_global'),
+    path('<int:id>/original/', views.DocumentoOriginalView.as_view(), name='documento_original'),
+    path('global/<int:id>/original/', views.DocumentoGlobalOriginalView.as_view(), name='documento_original_global'),
+    path('<int:id>/similares/', views.DocumentoSimilaresView.as_view(), name='documento_similares'),
+    path('global/<int:id>/similares/', views.DocumentoGlobalSimilaresView.as_view(), name='documento_similares_global'),
+    path('<int:id>/casi-duplicados/', views.DocumentoCasiDuplicadosView.as_view(), name='documento_casi_duplicados'),
     path('<int:id>/eliminar/', views.DocumentoDeleteView.as_view(), name='documento_eliminar'),
     
+    # Operaciones masivas (ids o filtros en el cuerpo)
+    path('masivo/eliminar/', views.DocumentoOperacionMasivaView.as_view(accion='eliminar'), name='documentos_eliminar_masivo'),
+    path('masivo/restaurar/', views.DocumentoOperacionMasivaView.as_view(accion='restaurar'), name='documentos_restaurar_masivo'),
+    path('masivo/purgar/', views.DocumentoOperacionMasivaView.as_view(accion='purgar'), name='documentos_purgar_masivo'),
+    
+    # Importación masiva de texto ya extraído (NDJSON)
+    path('importar/', views.DocumentoImportacionView.as_view(), name='documentos_importar'),
+    
     # Búsqueda
     path('buscar/', views.DocumentoBusquedaView.as_view(), name='documentos_buscar'),
+    path('sugerencias/', views.DocumentoSugerenciasView.as_view(), name='documentos_sugerencias'),
     
     # Estadísticas
     path('estadisticas/', views.DocumentoEstadisticasView.as_view(), name='documentos_estadisticas'),
+    
+    # Métricas operativas (administradores)
+    path('metricas/', views.MetricasView.as_view(), name='metricas'),
 ]
\ No newline at end of file
@@ -1,22 +1,55 @@
+import asyncio
+import gzip
+import hashlib
+import json
 import os
 import tempfile
 import time
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework import generics, filters, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from .Services.pdf_extractor import PDFExtractor
-from .models import DocumentoProcesado
+from .Services import (
+    cache_busqueda,
+    concurrencia,
+    estadisticas,
+    exportacion,
+    facetas,
+    importacion,
+    operaciones_masivas,
+    similares,
+    similitud,
+    sugerencias,
+    versiones
+)
+from .Services.almacen_blobs import almacen_blobs
+from .Services.pdf_extractor import datos_extraccion
+from .Services.texto_paginado import (
+    RangoNoSatisfacible,
+    generar_texto,
+    parsear_rango,
+    resolver_rango,
+    tamaños_paginas
+)
+from .models import DocumentoProcesado, FirmaDocumento
+from .pagination import DocumentoCursorPagination
 from .serializers import (
     DocumentoCreacionSerializer, 
     DocumentoProcesadoSerializer,
     DocumentoBusquedaSerializer,
-    DocumentoListaSerializer
+    DocumentoListaSerializer,
+    OperacionMasivaSerializer
 )
 import logging
 
@@ -32,12 +65,23 @@ class DocumentoPagination(PageNumberPagination):
     - Tamaño de página configurable
     - Metadatos adicionales en respuesta
     - Optimizado para interfaces responsivas
+    - Modo cursor opcional (?paginacion=cursor) sin OFFSET ni COUNT(*)
+      para listados grandes (ver DocumentoCursorPagination)
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 50
     
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        if DocumentoCursorPagination.solicitada(request):
+            self.cursor = DocumentoCursorPagination()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+    
     def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
         return Response({
             'resultados': data,
             'paginacion': {
@@ -50,7 +94,49 @@ class DocumentoPagination(PageNumberPagination):
             }
         })
 
-class PDFProcessingView(APIView):
+class VistaAsincronaMixin:
+    """
+    dispatch asíncrono para vistas de DRF, que solo despacha en forma
+    síncrona. Con los handlers definidos como async def la vista queda
+    marcada como corrutina: bajo ASGI lo lento se espera en el event loop
+    sin retener un hilo por petición.
+    
+    Características:
+    - Mismo flujo que APIView.dispatch (initial, handler, handle_exception,
+      finalize_response)
+    - Autenticación, permisos y throttling con sync_to_async (acceden a la base)
+    - Handlers síncronos (options, método no permitido) con sync_to_async
+    - Con WSGI o el cliente de tests Django la ejecuta con async_to_sync
+    """
+    
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+        
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class PDFProcessingView(VistaAsincronaMixin, APIView):
     """
     Endpoint para procesar PDFs y extraer su texto.
     
@@ -62,12 +148,13 @@ class PDFProcessingView(APIView):
     - Guardado automático en base de datos
     - Logging de operaciones para auditoría
     - Validaciones robustas
+    - Vista asíncrona: la extracción corre en un ejecutor acotado
+      (Services.concurrencia) y se cancela si el cliente se desconecta
     """
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [IsAuthenticated]  # Requerimos autenticación
     
-    @transaction.atomic  # Técnica: Transacción atómica para integridad
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         """
         Procesa un archivo PDF, extrae su texto y lo guarda automáticamente.
         
@@ -77,20 +164,30 @@ class PDFProcessingView(APIView):
         3. Transacciones atómicas para consistencia
         4. Logging para auditoría
         5. Limpieza automática de archivos temporales
+        6. Casi duplicados opcionales (campo 'casi_duplicados'): 'reportar'
+           los incluye en la respuesta; 'colapsar' no guarda el documento si
+           ya existe uno casi igual
+        7. E/S y extracción fuera del event loop: el servidor ASGI recibe el
+           cuerpo sin bloquear, el multipart se parsea y el temporal se
+           escribe en hilos, y la extracción espera turno en el ejecutor
+           acotado sin ocupar ningún hilo mientras tanto
         """
         inicio_procesamiento = time.time()  # Técnica: Medición de performance
         temp_path = None
         
         try:
+            # Parseo del multipart (puede volcar el archivo a disco) fuera del event loop
+            archivos, datos = await sync_to_async(self._leer_formulario, thread_sensitive=False)(request)
+            
             # Validaciones de entrada
-            if 'archivo' not in request.FILES:
+            if 'archivo' not in archivos:
                 logger.warning(f"Usuario {request.user.username} intentó procesar sin archivo")
                 return Response(
                     {"error": "No se envió ningún archivo"}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            archivo = request.FILES['archivo']
+            archivo = archivos['archivo']
             
             # Validar extensión PDF
             if not archivo.name.lower().endswith('.pdf'):
@@ -109,83 +206,30 @@ class PDFProcessingView(APIView):
                     status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
                 )
             
+            # Casi duplicados: '' (no buscar), 'reportar' o 'colapsar'
+            modo_duplicados = datos.get('casi_duplicados', '')
+            if modo_duplicados not in ('', 'reportar', 'colapsar'):
+                return Response(
+                    {"error": "El parámetro 'casi_duplicados' debe ser 'reportar' o 'colapsar'"}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
             # Guardar temporalmente el archivo para procesarlo
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                for chunk in archivo.chunks():
-                    temp_file.write(chunk)
-                temp_path = temp_file.name
+            temp_path = await sync_to_async(self._guardar_temporal, thread_sensitive=False)(archivo)
             
-            # Extraer el texto usando el servicio
+            # Extraer el texto usando el servicio (ejecutor acotado, cancelable)
             logger.info(f"Iniciando extracción para usuario {request.user.username}, archivo: {archivo.name}")
-            extractor = PDFExtractor()
-            resultado = extractor.extract_text(temp_path)
-            texto = resultado["text"]
-            metodo_usado = resultado["method"]
-            
-            # Mapear métodos del extractor a valores válidos del modelo
-            mapeo_metodos = {
-                "PyMuPDF": "pypdf",
-                "Tesseract OCR": "ocr"
-            }
-            metodo_bd = mapeo_metodos.get(metodo_usado, "pypdf")  # Fallback a pypdf
-            
-            # Calcular tiempo de procesamiento
-            tiempo_procesamiento = time.time() - inicio_procesamiento
-            
-            # Validar que se extrajo texto válido
-            if not texto or len(texto.strip()) < 10:
-                logger.error(f"Texto extraído insuficiente para {archivo.name}: {len(texto)} caracteres")
-                return Response({
-                    "error": "No se pudo extraer texto suficiente del PDF. El archivo podría estar corrupto o protegido."
-                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            resultado = await concurrencia.extraer(temp_path)
             
-            # Preparar datos para guardado automático
-            datos_documento = {
-                'nombre_archivo': archivo.name,
-                'tamaño_bytes': archivo.size,
-                'texto_extraido': texto,
-                'metodo_extraccion': metodo_bd,  # Usar el método mapeado
-                'tiempo_procesamiento': round(tiempo_procesamiento, 3)
-            }
-            
-            # Técnica: Usar serializer para validación y guardado
-            serializer = DocumentoCreacionSerializer(
-                data=datos_documento,
-                context={'request': request}
+            # Consultas y escritura con sync_to_async (hilo de la petición)
+            return await sync_to_async(self._guardar_documento)(
+                request, archivo, resultado, modo_duplicados, temp_path, inicio_procesamiento
             )
-            
-            if serializer.is_valid():
-                # Guardar documento en base de datos
-                documento = serializer.save()
-                
-                logger.info(
-                    f"Documento guardado exitosamente - ID: {documento.id}, "
-                    f"Usuario: {request.user.username}, "
-                    f"Archivo: {archivo.name}, "
-                    f"Método: {metodo_usado}, "
-                    f"Tiempo: {tiempo_procesamiento:.3f}s"
-                )
-                
-                # Respuesta exitosa con datos del documento guardado
-                return Response({
-                    "exito": True,
-                    "mensaje": "Documento procesado y guardado exitosamente",
-                    "documento_id": documento.id,
-                    "texto_extraido": texto,
-                    "nombre_archivo": archivo.name,
-                    "tamaño_bytes": archivo.size,
-                    "tamaño_legible": documento.tamaño_legible,
-                    "metodo": metodo_usado,
-                    "tiempo_procesamiento": tiempo_procesamiento,
-                    "fecha_procesamiento": documento.fecha_procesamiento
-                }, status=status.HTTP_201_CREATED)
-            else:
-                # Error en validación del serializer
-                logger.error(f"Error de validación para {archivo.name}: {serializer.errors}")
-                return Response({
-                    "error": "Error validando datos del documento",
-                    "detalles": serializer.errors
-                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        except asyncio.CancelledError:
+            # El cliente se desconectó: la extracción en curso se interrumpe
+            logger.warning(f"Procesamiento cancelado por desconexión del usuario {request.user.username}")
+            raise
         
         except Exception as e:
             # Manejo de errores durante el procesamiento
@@ -205,11 +249,181 @@ class PDFProcessingView(APIView):
                     logger.debug(f"Archivo temporal eliminado: {temp_path}")
                 except OSError as e:
                     logger.warning(f"No se pudo eliminar archivo temporal {temp_path}: {e}")
+    
+    @staticmethod
+    def _leer_formulario(request):
+        return request.FILES, request.data
+    
+    @staticmethod
+    def _guardar_temporal(archivo):
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+            for chunk in archivo.chunks():
+                temp_file.write(chunk)
+            return temp_file.name
+    
+    @transaction.atomic  # Técnica: Transacción atómica para integridad
+    def _guardar_documento(self, request, archivo, resultado, modo_duplicados, temp_path, inicio_procesamiento):
+        """Valida el texto extraído, busca casi duplicados y guarda el documento."""
+        texto = resultado["text"]
+        metodo_usado = resultado["method"]
+        
+        # Método mapeado a valores válidos del modelo y páginas individuales
+        metodo_bd, paginas = datos_extraccion(resultado)
+        
+        # Calcular tiempo de procesamiento
+        tiempo_procesamiento = time.time() - inicio_procesamiento
+        
+        # Validar que se extrajo texto válido
+        if not texto or len(texto.strip()) < 10:
+            logger.error(f"Texto extraído insuficiente para {archivo.name}: {len(texto)} caracteres")
+            return Response({
+                "error": "No se pudo extraer texto suficiente del PDF. El archivo podría estar corrupto o protegido."
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        
+        # Firma de similitud calculada una sola vez (se reutiliza al guardar)
+        firma = similitud.calcular_firma(texto)
+        casi_duplicados = []
+        if modo_duplicados:
+            casi_duplicados = similitud.describir_casi_duplicados(
+                similitud.buscar_casi_duplicados(firma, request.user.id)
+            )
+        
+        if modo_duplicados == 'colapsar' and casi_duplicados:
+            # No se guarda otra copia: se responde con el documento existente
+            existente = casi_duplicados[0]
+            logger.info(
+                f"Documento colapsado - Usuario: {request.user.username}, "
+                f"Archivo: {archivo.name}, casi duplicado de ID: {existente['id']} "
+                f"(similitud {existente['similitud']})"
+            )
+            return Response({
+                "exito": True,
+                "colapsado": True,
+                "mensaje": "El documento es casi duplicado de uno existente y no se guardó",
+                "documento_id": existente['id'],
+                "nombre_archivo": archivo.name,
+                "casi_duplicados": casi_duplicados,
+                "metodo": metodo_usado,
+                "tiempo_procesamiento": time.time() - inicio_procesamiento
+            }, status=status.HTTP_200_OK)
+        
+        # Preparar datos para guardado automático
+        datos_documento = {
+            'nombre_archivo': archivo.name,
+            'tamaño_bytes': archivo.size,
+            'texto_extraido': texto,
+            'metodo_extraccion': metodo_bd,  # Usar el método mapeado
+            'tiempo_procesamiento': round(tiempo_procesamiento, 3)
+        }
+        
+        # Técnica: Usar serializer para validación y guardado
+        serializer = DocumentoCreacionSerializer(
+            data=datos_documento,
+            context={'request': request, 'paginas': paginas, 'firma': firma}
+        )
+        
+        if serializer.is_valid():
+            # Conservar el PDF original (deduplicado por SHA-256) para reprocesarlo
+            huella_pdf = almacen_blobs().guardar_archivo(temp_path)
+            
+            # Guardar documento en base de datos
+            documento = serializer.save(huella_pdf=huella_pdf)
+            
+            logger.info(
+                f"Documento guardado exitosamente - ID: {documento.id}, "
+                f"Usuario: {request.user.username}, "
+                f"Archivo: {archivo.name}, "
+                f"Método: {metodo_usado}, "
+                f"Tiempo: {tiempo_procesamiento:.3f}s"
+            )
+            
+            # Respuesta exitosa con datos del documento guardado
+            return Response({
+                "exito": True,
+                "mensaje": "Documento procesado y guardado exitosamente",
+                "documento_id": documento.id,
+                "texto_extraido": texto,
+                "nombre_archivo": archivo.name,
+                "tamaño_bytes": archivo.size,
+                "tamaño_legible": documento.tamaño_legible,
+                "metodo": metodo_usado,
+                "total_paginas": len(paginas or []),
+                "tiempo_procesamiento": tiempo_procesamiento,
+                "fecha_procesamiento": documento.fecha_procesamiento,
+                **({"casi_duplicados": casi_duplicados} if modo_duplicados else {})
+            }, status=status.HTTP_201_CREATED)
+        else:
+            # Error en validación del serializer
+            logger.error(f"Error de validación para {archivo.name}: {serializer.errors}")
+            return Response({
+                "error": "Error validando datos del documento",
+                "detalles": serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
 
 
 # ==================== VISTAS DE GESTIÓN Y BÚSQUEDA ====================
 
-class DocumentoListView(generics.ListAPIView):
+class GetCondicionalMixin:
+    """
+    GET condicional (ETag / Last-Modified) para vistas de solo lectura.
+    
+    Técnicas implementadas:
+    - El validador se calcula antes de leer y serializar la respuesta:
+      fecha de cambio del documento en los detalles y versión de la
+      colección (VersionColeccion, una fila por ámbito) en listados,
+      búsquedas y estadísticas
+    - Si la copia del cliente está vigente (If-None-Match /
+      If-Modified-Since) se responde 304 sin cuerpo
+    - Cache-Control: private, no-cache: el cliente guarda la respuesta
+      pero revalida siempre, así que nunca muestra datos viejos
+    """
+    
+    def etag(self, *partes):
+        """ETag débil: la misma versión puede serializarse o comprimirse distinto."""
+        firma = json.dumps(partes, ensure_ascii=False, default=str)
+        return f'W/"{hashlib.sha256(firma.encode("utf-8")).hexdigest()[:32]}"'
+    
+    def version_coleccion(self, usuario_id):
+        """
+        Versión de la colección del usuario (o global), leída una sola vez
+        por petición: el ETag y la clave de la caché de resultados usan la misma.
+        """
+        leidas = self.__dict__.setdefault('_versiones_coleccion', {})
+        if usuario_id not in leidas:
+            leidas[usuario_id] = versiones.version(usuario_id)
+        return leidas[usuario_id]
+    
+    def etag_coleccion(self, usuario_id, *extra):
+        """
+        ETag de una respuesta sobre la colección de un usuario (o global si
+        usuario_id es None): su versión y todos los parámetros de la URL
+        (página, filtros, orden, término).
+        """
+        parametros = sorted(
+            (nombre, self.request.query_params.getlist(nombre)) for nombre in self.request.query_params
+        )
+        return self.etag(type(self).__name__, usuario_id, self.version_coleccion(usuario_id), parametros, *extra)
+    
+    def no_modificado(self, etag, ultima_modificacion=None):
+        """Respuesta 304 (o 412 ante If-Match) si corresponde; si no, None."""
+        respuesta = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+        )
+        if respuesta is not None:
+            self.validadores(respuesta, etag, ultima_modificacion)
+        return respuesta
+    
+    def validadores(self, response, etag, ultima_modificacion=None):
+        response['ETag'] = etag
+        if ultima_modificacion:
+            response['Last-Modified'] = http_date(ultima_modificacion.timestamp())
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class DocumentoListView(GetCondicionalMixin, generics.ListAPIView):
     """
     Vista para listar documentos del usuario autenticado.
     
@@ -218,6 +432,7 @@ class DocumentoListView(generics.ListAPIView):
     - Filtros por fecha y método de extracción
     - Ordenamiento flexible
     - Solo documentos del usuario actual
+    - GET condicional: 304 si la colección del usuario no cambió
     """
     serializer_class = DocumentoListaSerializer
     permission_classes = [IsAuthenticated]
@@ -238,9 +453,13 @@ class DocumentoListView(generics.ListAPIView):
         """
         Filtra documentos activos del usuario autenticado.
         
-        Técnica: Queryset personalizado para seguridad y performance
+        Técnica: Queryset personalizado para seguridad y performance;
+        las columnas de texto completo se difieren (el listado usa el
+        resumen precalculado)
         """
-        queryset = DocumentoProcesado.objects.por_usuario(self.request.user)
+        queryset = DocumentoProcesado.objects.por_usuario(self.request.user).defer(
+            *DocumentoProcesado.CAMPOS_TEXTO
+        )
         
         # Filtro opcional por rango de fechas
         fecha_desde = self.request.query_params.get('fecha_desde')
@@ -254,12 +473,112 @@ class DocumentoListView(generics.ListAPIView):
         return queryset
     
     def list(self, request, *args, **kwargs):
-        """Override para añadir logging y métricas"""
+        """
+        Override para añadir logging y métricas.
+        
+        Técnica: camino rápido con values(): la página se lee como filas
+        con solo las columnas del listado y se serializa sin instancias
+        del modelo (DocumentoListaSerializer.serializar_valores).
+        """
         logger.info(f"Usuario {request.user.username} consultó lista de documentos")
-        return super().list(request, *args, **kwargs)
+        etag = self.etag_coleccion(request.user.id)
+        no_modificado = self.no_modificado(etag)
+        if no_modificado is not None:
+            return no_modificado
+        
+        queryset = self.filter_queryset(self.get_queryset()).values(*DocumentoListaSerializer.CAMPOS_VALORES)
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(DocumentoListaSerializer.serializar_valores(page))
+        else:
+            response = Response(DocumentoListaSerializer.serializar_valores(queryset))
+        return self.validadores(response, etag)
 
 
-class DocumentoDetailView(generics.RetrieveAPIView):
+class DocumentoExportacionView(DocumentoListView):
+    """
+    Vista para exportar todos los documentos del usuario en NDJSON o CSV.
+    
+    Técnicas implementadas:
+    - Mismos filtros, búsqueda por nombre y orden que el listado
+      (metodo_extraccion, fecha_desde, fecha_hasta, search, ordering)
+    - StreamingHttpResponse sobre QuerySet.iterator(): memoria constante
+      para cualquier cantidad de filas, sin paginación ni COUNT(*)
+    - Compresión gzip al vuelo si el cliente la acepta (Accept-Encoding)
+    - Texto completo solo bajo demanda (?incluir_texto=true)
+    
+    Parámetros:
+    - formato: ndjson (por defecto) o csv
+    """
+    pagination_class = None
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            formato = exportacion.parsear_formato(request.query_params.get('formato'))
+        except exportacion.FormatoInvalido as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        incluir_texto = request.query_params.get('incluir_texto', 'false').lower() == 'true'
+        gzip = exportacion.acepta_gzip(request.META.get('HTTP_ACCEPT_ENCODING'))
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        tipo, extension = exportacion.FORMATOS[formato]
+        respuesta = StreamingHttpResponse(
+            exportacion.exportar(queryset, formato, incluir_texto=incluir_texto, gzip=gzip),
+            content_type=tipo
+        )
+        nombre = f"documentos_{request.user.username}_{timezone.localtime():%Y%m%d-%H%M%S}.{extension}"
+        respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        patch_vary_headers(respuesta, ['Accept-Encoding'])
+        if gzip:
+            respuesta['Content-Encoding'] = 'gzip'
+        
+        logger.info(
+            f"Usuario {request.user.username} exportó documentos ({formato}"
+            f"{', con texto' if incluir_texto else ''}{', gzip' if gzip else ''})"
+        )
+        return respuesta
+
+
+class TextoOpcionalMixin(GetCondicionalMixin):
+    """
+    Mixin para vistas de detalle que solo incluyen el texto completo cuando
+    se solicita explícitamente (?incluir_texto=true).
+    
+    Técnica: las columnas de texto se difieren siempre en la consulta (el
+    resumen está precalculado) y el texto se lee después de evaluar el GET
+    condicional, solo si se pidió y la respuesta no es 304. El texto se
+    obtiene por páginas o rangos desde el endpoint texto/.
+    """
+    
+    def incluir_texto(self):
+        return self.request.query_params.get('incluir_texto', 'false').lower() == 'true'
+    
+    def ajustar_queryset(self, queryset):
+        return queryset.defer(*DocumentoProcesado.CAMPOS_TEXTO)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['incluir_texto'] = self.incluir_texto()
+        return context
+    
+    def responder_documento(self, documento):
+        """
+        Detalle del documento con ETag y Last-Modified de su fecha de
+        cambio, o 304 sin leer el texto si la copia del cliente está vigente.
+        """
+        etag = self.etag('documento', documento.id, documento.actualizado_en, self.incluir_texto())
+        no_modificado = self.no_modificado(etag, documento.actualizado_en)
+        if no_modificado is not None:
+            return no_modificado
+        
+        if self.incluir_texto():
+            documento.refresh_from_db(fields=['texto_extraido'])
+        return self.validadores(Response(self.get_serializer(documento).data), etag, documento.actualizado_en)
+
+
+class DocumentoDetailView(TextoOpcionalMixin, generics.RetrieveAPIView):
     """
     Vista para obtener detalles completos de un documento específico.
     
@@ -267,6 +586,8 @@ class DocumentoDetailView(generics.RetrieveAPIView):
     - Generic RetrieveAPIView para obtención de objetos únicos
     - Validación de permisos por usuario
     - Logging de accesos para auditoría
+    - Texto completo solo bajo demanda (?incluir_texto=true)
+    - GET condicional con ETag / Last-Modified de la fecha de cambio
     """
     serializer_class = DocumentoProcesadoSerializer
     permission_classes = [IsAuthenticated]
@@ -274,21 +595,24 @@ class DocumentoDetailView(generics.RetrieveAPIView):
     
     def get_queryset(self):
         """
-        Solo documentos activos del usuario autenticado.
+        Solo documentos activos del usuario autenticado, con el usuario en
+        la misma consulta (usuario_info).
         """
-        return DocumentoProcesado.objects.por_usuario(self.request.user)
+        return self.ajustar_queryset(
+            DocumentoProcesado.objects.por_usuario(self.request.user).select_related('usuario')
+        )
     
     def retrieve(self, request, *args, **kwargs):
-        """Override para logging de accesos"""
+        """Override para logging de accesos (el documento se lee una sola vez)"""
         documento = self.get_object()
         logger.info(
             f"Usuario {request.user.username} accedió al documento ID: {documento.id} "
             f"({documento.nombre_archivo})"
         )
-        return super().retrieve(request, *args, **kwargs)
+        return self.responder_documento(documento)
 
 
-class DocumentoGlobalDetailView(generics.RetrieveAPIView):
+class DocumentoGlobalDetailView(TextoOpcionalMixin, generics.RetrieveAPIView):
     """
     Vista para obtener detalles de cualquier documento (para búsquedas globales).
     
@@ -296,6 +620,8 @@ class DocumentoGlobalDetailView(generics.RetrieveAPIView):
     - Acceso a documentos de cualquier usuario para búsquedas globales
     - Logging de accesos para auditoría
     - Permisos de autenticación
+    - Texto completo solo bajo demanda (?incluir_texto=true)
+    - GET condicional con ETag / Last-Modified de la fecha de cambio
     """
     serializer_class = DocumentoProcesadoSerializer
     permission_classes = [IsAuthenticated]
@@ -303,21 +629,210 @@ class DocumentoGlobalDetailView(generics.RetrieveAPIView):
     
     def get_queryset(self):
         """
-        Todos los documentos activos (para búsquedas globales).
+        Todos los documentos activos (para búsquedas globales), con el
+        propietario en la misma consulta (log y usuario_info).
         """
-        return DocumentoProcesado.objects.activos()
+        return self.ajustar_queryset(DocumentoProcesado.objects.activos().select_related('usuario'))
     
     def retrieve(self, request, *args, **kwargs):
-        """Override para logging de accesos globales"""
+        """Override para logging de accesos globales (el documento se lee una sola vez)"""
         documento = self.get_object()
         logger.info(
             f"Usuario {request.user.username} accedió globalmente al documento ID: {documento.id} "
             f"({documento.nombre_archivo}) del usuario {documento.usuario.username}"
         )
-        return super().retrieve(request, *args, **kwargs)
+        return self.responder_documento(documento)
+
+
+class DocumentoTextoView(APIView):
+    """
+    Vista para obtener el texto de un documento por páginas o por rangos.
+    
+    Técnicas implementadas:
+    - Rango de páginas (?pagina=3 o ?pagina_desde=3&pagina_hasta=5)
+    - Cabecera HTTP Range en bytes (UTF-8) o caracteres (Range: chars=0-999)
+      con respuesta 206 Partial Content
+    - Streaming página a página: el texto completo nunca se arma en memoria
+    - Tamaños de página calculados en la base de datos para leer solo las
+      páginas que cubren el rango
+    - El documento completo y los rangos en bytes se leen directamente del
+      blob mapeado en memoria (mmap), descomprimiéndolo en streaming, sin
+      pasar por la base de datos
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """
+        Solo documentos activos del usuario autenticado.
+        """
+        return DocumentoProcesado.objects.por_usuario(self.request.user)
+    
+    def get(self, request, id):
+        documento = get_object_or_404(
+            self.get_queryset().only('id', 'nombre_archivo', 'usuario_id', 'texto_extraido'), id=id
+        )
+        paginas = documento.paginas.all()
+        total_paginas = paginas.count()
+        almacen = almacen_blobs()
+        huella = documento.huella_texto
+        if huella and not almacen.existe(huella):
+            huella = None
+        
+        try:
+            pagina_desde, pagina_hasta = self._rango_paginas(request, total_paginas)
+        except ValueError:
+            return Response({
+                'error': 'Rango de páginas inválido',
+                'ejemplo': '?pagina=3 o ?pagina_desde=3&pagina_hasta=5'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        cabeceras = {
+            'Accept-Ranges': 'bytes, chars',
+            'X-Total-Paginas': str(total_paginas),
+        }
+        
+        rango = parsear_rango(request.META.get('HTTP_RANGE'))
+        documento_completo = pagina_desde == 1 and pagina_hasta == total_paginas
+        if rango is None and huella and documento_completo:
+            respuesta = StreamingHttpResponse(
+                almacen.leer_bloques_texto(huella),
+                content_type='text/plain; charset=utf-8'
+            )
+            respuesta['Content-Length'] = almacen.tamaño_texto(huella)
+            cabeceras['X-Paginas'] = f"{pagina_desde}-{pagina_hasta}"
+        elif rango is not None and rango[0] == 'bytes' and huella:
+            # Rango en bytes sobre el texto completo: se sirve desde el blob
+            _, inicio, fin = rango
+            try:
+                inicio, fin, total, _ = resolver_rango([(1, almacen.tamaño_texto(huella))], inicio, fin)
+            except RangoNoSatisfacible as e:
+                respuesta = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                respuesta['Content-Range'] = f"bytes */{e.total}"
+                return respuesta
+            
+            respuesta = StreamingHttpResponse(
+                almacen.leer_bloques_texto(huella, inicio, fin + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type='text/plain; charset=utf-8'
+            )
+            cabeceras['Content-Range'] = f"bytes {inicio}-{fin}/{total}"
+        elif rango is None:
+            # Rango de páginas (por defecto, el documento completo)
+            paginas = paginas.filter(numero__gte=pagina_desde, numero__lte=pagina_hasta)
+            respuesta = StreamingHttpResponse(
+                generar_texto(paginas, ultima_pagina=pagina_hasta),
+                content_type='text/plain; charset=utf-8'
+            )
+            cabeceras['X-Paginas'] = f"{pagina_desde}-{pagina_hasta}"
+        else:
+            unidad, inicio, fin = rango
+            tamaños = tamaños_paginas(paginas, unidad)
+            try:
+                inicio, fin, total, cortes = resolver_rango(tamaños, inicio, fin)
+            except RangoNoSatisfacible as e:
+                respuesta = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                respuesta['Content-Range'] = f"{unidad} */{e.total}"
+                return respuesta
+            
+            respuesta = StreamingHttpResponse(
+                generar_texto(
+                    paginas.filter(numero__in=cortes.keys()),
+                    unidad=unidad,
+                    cortes=cortes,
+                    ultima_pagina=tamaños[-1][0]
+                ),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type='text/plain; charset=utf-8'
+            )
+            cabeceras['Content-Range'] = f"{unidad} {inicio}-{fin}/{total}"
+        
+        for nombre, valor in cabeceras.items():
+            respuesta[nombre] = valor
+        
+        logger.info(
+            f"Usuario {request.user.username} leyó texto del documento ID: {documento.id} "
+            f"({cabeceras.get('X-Paginas') or cabeceras.get('Content-Range')})"
+        )
+        return respuesta
+    
+    def _rango_paginas(self, request, total_paginas):
+        """
+        Páginas solicitadas por query params, acotadas al documento. Un
+        documento sin páginas registradas (anterior al backfill o con
+        extracción vacía) sin parámetros pide el texto completo: (1, 0).
+        """
+        pagina = request.query_params.get('pagina')
+        if not total_paginas and not any(
+            nombre in request.query_params for nombre in ('pagina', 'pagina_desde', 'pagina_hasta')
+        ):
+            return 1, 0
+        desde = int(request.query_params.get('pagina_desde', pagina or 1))
+        hasta = min(int(request.query_params.get('pagina_hasta', pagina or total_paginas)), total_paginas)
+        if desde < 1 or hasta < desde:
+            raise ValueError("Rango de páginas inválido")
+        return desde, hasta
+
+
+class DocumentoGlobalTextoView(DocumentoTextoView):
+    """
+    Texto por páginas o rangos de cualquier documento activo (búsquedas globales).
+    """
+    
+    def get_queryset(self):
+        """
+        Todos los documentos activos (para búsquedas globales).
+        """
+        return DocumentoProcesado.objects.activos()
+
+
+class DocumentoOriginalView(APIView):
+    """
+    Descarga del PDF original desde el almacén de blobs.
+    
+    Técnica: FileResponse envía el archivo por bloques (o con sendfile
+    cuando el servidor lo permite) sin cargarlo en memoria.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """
+        Solo documentos activos del usuario autenticado.
+        """
+        return DocumentoProcesado.objects.por_usuario(self.request.user)
+    
+    def get(self, request, id):
+        documento = get_object_or_404(
+            self.get_queryset().only('id', 'nombre_archivo', 'usuario_id', 'huella_pdf'), id=id
+        )
+        almacen = almacen_blobs()
+        if not documento.huella_pdf or not almacen.existe(documento.huella_pdf):
+            return Response(
+                {'error': 'El PDF original no está disponible para este documento'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        logger.info(f"Usuario {request.user.username} descargó el PDF original del documento ID: {documento.id}")
+        return FileResponse(
+            open(almacen.ruta(documento.huella_pdf), 'rb'),
+            as_attachment=True,
+            filename=documento.nombre_archivo,
+            content_type='application/pdf'
+        )
+
+
+class DocumentoGlobalOriginalView(DocumentoOriginalView):
+    """
+    Descarga del PDF original de cualquier documento activo (búsquedas globales).
+    """
+    
+    def get_queryset(self):
+        """
+        Todos los documentos activos (para búsquedas globales).
+        """
+        return DocumentoProcesado.objects.activos()
 
 
-class DocumentoBusquedaView(generics.ListAPIView):
+class DocumentoBusquedaView(VistaAsincronaMixin, GetCondicionalMixin, generics.ListAPIView):
     """
     Vista para búsqueda de texto en documentos.
     
@@ -326,6 +841,8 @@ class DocumentoBusquedaView(generics.ListAPIView):
     - Búsqueda global (todos los usuarios) o por usuario
     - Serializer optimizado para resultados de búsqueda
     - Paginación para grandes volúmenes de resultados
+    - GET condicional: 304 sin ejecutar la búsqueda si el ámbito no cambió
+    - Vista asíncrona con búsquedas simultáneas acotadas (Services.concurrencia)
     """
     serializer_class = DocumentoBusquedaSerializer
     permission_classes = [IsAuthenticated]
@@ -342,6 +859,7 @@ class DocumentoBusquedaView(generics.ListAPIView):
         - Búsqueda case-insensitive con icontains
         - Opción de búsqueda global vs. personal
         - Optimización con select_related
+        - Texto completo diferido (no se transfiere para la página de resultados)
         """
         termino = self.request.query_params.get('q', '').strip()
         busqueda_global = self.request.query_params.get('global', 'false').lower() == 'true'
@@ -359,7 +877,9 @@ class DocumentoBusquedaView(generics.ListAPIView):
             queryset = DocumentoProcesado.objects.busqueda_usuario(self.request.user, termino)
             logger.info(f"Usuario {self.request.user.username} realizó búsqueda personal: '{termino}'")
         
-        return queryset
+        # Los fragmentos se recortan en la base de datos: el texto completo no se carga
+        self.coincidencias = queryset.defer(*DocumentoProcesado.CAMPOS_TEXTO)
+        return self.coincidencias
     
     def get_serializer_context(self):
         """
@@ -371,8 +891,32 @@ class DocumentoBusquedaView(generics.ListAPIView):
         context['termino_busqueda'] = self.request.query_params.get('q', '')
         return context
     
+    async def get(self, request, *args, **kwargs):
+        """
+        Espera turno en el semáforo de búsquedas y ejecuta list() en el hilo
+        de la petición.
+        
+        Técnica: bajo ASGI cada vista síncrona corre en un hilo propio; sin
+        el límite, una ráfaga de búsquedas lentas correría toda a la vez
+        compitiendo por la CPU y la base con perfil/ o estadisticas/. Las
+        que esperan el semáforo no ocupan ningún hilo.
+        """
+        async with concurrencia.limite_busquedas():
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+    
     def list(self, request, *args, **kwargs):
-        """Override para estadísticas de búsqueda"""
+        """
+        Override para estadísticas de búsqueda y caché de resultados.
+        
+        Técnica: la respuesta se guarda en caché con clave (consulta
+        normalizada, ámbito, versión de la colección, página); las altas,
+        eliminaciones y restauraciones renuevan la versión en la base de
+        datos, así que ningún proceso vuelve a servir la entrada anterior.
+        
+        Con ?facets=metodo_extraccion,mes,usuario,tamaño agrega conteos
+        por faceta de todas las coincidencias, calculados en un solo
+        recorrido (ver Services.facetas).
+        """
         termino = request.query_params.get('q', '').strip()
         if not termino:
             return Response({
@@ -380,17 +924,59 @@ class DocumentoBusquedaView(generics.ListAPIView):
                 'ejemplo': '?q=término de búsqueda&global=true'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        response = super().list(request, *args, **kwargs)
+        try:
+            facetas_pedidas = facetas.parsear_facetas(request.query_params.get('facets'))
+        except facetas.FacetaInvalida as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        busqueda_global = request.query_params.get('global', 'false').lower() == 'true'
+        usuario_id = None if busqueda_global else request.user.id
+        ambito = cache_busqueda.ambito_busqueda(usuario_id)
+        
+        # La versión se lee de la base de datos antes de buscar: es la misma
+        # en todos los procesos, y con ella se arman el ETag y la clave de la
+        # caché de resultados
+        etag = self.etag_coleccion(usuario_id)
+        no_modificado = self.no_modificado(etag)
+        if no_modificado is not None:
+            logger.info(f"Usuario {request.user.username} realizó búsqueda ({ambito}, sin cambios): '{termino}'")
+            return no_modificado
+        
+        clave = cache_busqueda.clave_resultado(
+            termino, ambito, self.version_coleccion(usuario_id), request.query_params
+        )
+        
+        datos = cache_busqueda.obtener(clave)
+        if datos is not None:
+            logger.info(f"Usuario {request.user.username} realizó búsqueda ({ambito}, en caché): '{termino}'")
+            response = Response(datos)
+            response.data['busqueda']['termino'] = termino
+            response['X-Cache'] = 'HIT'
+            return self.validadores(response, etag)
+        
+        # Camino rápido: la página se lee con values() (columnas del resultado
+        # y del usuario en la misma consulta) y se serializa sin instancias
+        filas = self.filter_queryset(self.get_queryset()).values(*DocumentoBusquedaSerializer.CAMPOS_VALORES)
+        page = self.paginate_queryset(filas)
+        contexto = self.get_serializer_context()
+        if page is not None:
+            response = self.get_paginated_response(DocumentoBusquedaSerializer.serializar_valores(page, contexto))
+        else:
+            response = Response(DocumentoBusquedaSerializer.serializar_valores(filas, contexto))
         
         # Añadir información de búsqueda a la respuesta
         if hasattr(response, 'data') and 'paginacion' in response.data:
             response.data['busqueda'] = {
                 'termino': termino,
-                'global': request.query_params.get('global', 'false').lower() == 'true',
+                'global': busqueda_global,
                 'resultados_encontrados': response.data['paginacion']['total_documentos']
             }
+            if facetas_pedidas:
+                response.data['facetas'] = facetas.calcular_facetas(self.coincidencias, facetas_pedidas)
+            cache_busqueda.guardar(clave, response.data)
         
-        return response
+        response['X-Cache'] = 'MISS'
+        return self.validadores(response, etag)
 
 
 class DocumentoDeleteView(generics.DestroyAPIView):
@@ -443,57 +1029,275 @@ class DocumentoDeleteView(generics.DestroyAPIView):
         }, status=status.HTTP_200_OK)
 
 
-class DocumentoEstadisticasView(generics.GenericAPIView):
+class DocumentoCasiDuplicadosView(APIView):
     """
-    Vista para obtener estadísticas de documentos del usuario.
+    Casi duplicados de un documento entre los documentos activos del usuario
+    (mismo contenido reescaneado, guardado de nuevo o con alguna página
+    distinta).
     
     Técnicas implementadas:
-    - Agregaciones eficientes con ORM
-    - Cálculos de métricas en base de datos
-    - Respuesta estructurada para dashboards
+    - Firma MinHash calculada en la ingesta (no se relee el texto)
+    - Candidatos por índice LSH (usuario, cubeta) y verificación con la
+      firma completa: costo sublineal en la cantidad de documentos
+    - GET informa; POST colapsa (elimina lógicamente los casi duplicados y
+      conserva el documento consultado) con un único UPDATE
     """
     permission_classes = [IsAuthenticated]
     
-    def get(self, request):
+    def _casi_duplicados(self, request, id):
+        documento = get_object_or_404(
+            DocumentoProcesado.objects.por_usuario(request.user).only('id', 'usuario_id'), id=id
+        )
+        try:
+            umbral = float(request.query_params.get('umbral', similitud.UMBRAL_CASI_DUPLICADO))
+        except ValueError:
+            umbral = None
+        if umbral is None or not 0 < umbral <= 1:
+            return documento, None, Response(
+                {'error': "El parámetro 'umbral' debe ser un número en (0, 1]"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        firma = FirmaDocumento.objects.filter(documento=documento).values_list('firma', flat=True).first()
+        resultados = similitud.buscar_casi_duplicados(
+            firma, documento.usuario_id, umbral=umbral, excluir_id=documento.id
+        )
+        return documento, resultados, None
+    
+    def get(self, request, id):
+        documento, resultados, error = self._casi_duplicados(request, id)
+        if error:
+            return error
+        return Response({
+            'documento_id': documento.id,
+            'casi_duplicados': similitud.describir_casi_duplicados(resultados)
+        })
+    
+    def post(self, request, id):
+        documento, resultados, error = self._casi_duplicados(request, id)
+        if error:
+            return error
+        cantidad = operaciones_masivas.eliminar_documentos(
+            DocumentoProcesado.objects.filter(
+                usuario=request.user, id__in=[documento_id for documento_id, _ in resultados]
+            )
+        )
+        logger.info(
+            f"Usuario {request.user.username} colapsó {cantidad} casi duplicado(s) "
+            f"del documento ID: {documento.id}"
+        )
+        return Response({
+            'exito': True,
+            'documento_id': documento.id,
+            'documentos_afectados': cantidad
+        })
+
+
+class DocumentoSimilaresView(APIView):
+    """
+    Documentos similares ("más como este") a uno del usuario.
+    
+    Técnicas implementadas:
+    - Vector TF-IDF de los términos más representativos del documento,
+      con frecuencias de documento mantenidas de forma incremental
+    - Puntaje acumulado sobre el índice invertido (solo postings de esos
+      términos): consulta TF-IDF · tf del candidato / norma tf guardada al
+      indexar, y top-k en memoria
+    - Corpus del usuario o global (?global=true); límite con ?limite=
+    """
+    permission_classes = [IsAuthenticated]
+    corpus_global = False
+    
+    def get_queryset(self):
         """
-        Retorna estadísticas del usuario autenticado.
+        Solo documentos activos del usuario autenticado.
+        """
+        return DocumentoProcesado.objects.por_usuario(self.request.user)
+    
+    def get(self, request, id):
+        documento = get_object_or_404(self.get_queryset().only('id', 'usuario_id'), id=id)
+        try:
+            limite = int(request.query_params.get('limite', 10))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= 50:
+            return Response(
+                {'error': "El parámetro 'limite' debe ser un entero entre 1 y 50"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        corpus_global = self.corpus_global or request.query_params.get('global', 'false').lower() == 'true'
+        resultados = similares.documentos_similares(
+            documento, usuario_id=None if corpus_global else request.user.id, limite=limite
+        )
+        
+        documentos = DocumentoProcesado.objects.filter(
+            id__in=[documento_id for documento_id, _ in resultados]
+        ).only(
+            'id', 'nombre_archivo', 'tamaño_bytes', 'metodo_extraccion', 'fecha_procesamiento', 'resumen_texto'
+        ).in_bulk()
+        datos = []
+        for documento_id, valor in resultados:
+            if documento_id in documentos:
+                fila = DocumentoListaSerializer(documentos[documento_id]).data
+                fila['similitud'] = round(valor, 4)
+                datos.append(fila)
+        
+        return Response({
+            'documento_id': documento.id,
+            'global': corpus_global,
+            'similares': datos
+        })
+
+
+class DocumentoGlobalSimilaresView(DocumentoSimilaresView):
+    """
+    Documentos similares a cualquier documento activo, en el corpus global.
+    """
+    corpus_global = True
+    
+    def get_queryset(self):
+        """
+        Todos los documentos activos (para búsquedas globales).
         """
-        from django.db.models import Count, Sum, Avg
+        return DocumentoProcesado.objects.activos()
+
+
+class DocumentoOperacionMasivaView(APIView):
+    """
+    Eliminación lógica, restauración o purga de varios documentos a la vez.
+    
+    Técnicas implementadas:
+    - Selección por lista de ids o por filtros (OperacionMasivaSerializer)
+    - Un único UPDATE (o DELETE en cascada) para todo el conjunto
+    - Estadísticas actualizadas en la misma transacción y caché de
+      búsquedas invalidada al confirmar
+    - Solo documentos del usuario autenticado; la purga solo alcanza
+      documentos ya eliminados lógicamente
+    """
+    permission_classes = [IsAuthenticated]
+    accion = None  # 'eliminar', 'restaurar' o 'purgar' (se fija en urls.py)
+    
+    OPERACIONES = {
+        'eliminar': (operaciones_masivas.eliminar_documentos, {'eliminado': False}),
+        'restaurar': (operaciones_masivas.restaurar_documentos, {'eliminado': True}),
+        'purgar': (operaciones_masivas.purgar_documentos, {'eliminado': True}),
+    }
+    
+    def post(self, request):
+        serializer = OperacionMasivaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        queryset = DocumentoProcesado.objects.por_usuario(request.user)
+        operacion, filtro_estado = self.OPERACIONES[self.accion]
+        queryset = serializer.filtrar(
+            DocumentoProcesado.objects.filter(usuario=request.user, **filtro_estado)
+        )
+        cantidad = operacion(queryset)
         
-        # Cálculos de estadísticas
-        estadisticas = queryset.aggregate(
-            total_documentos=Count('id'),
-            total_tamaño=Sum('tamaño_bytes'),
-            tiempo_promedio=Avg('tiempo_procesamiento')
+        logger.info(
+            f"Usuario {request.user.username} ejecutó operación masiva '{self.accion}' "
+            f"sobre {cantidad} documento(s)"
         )
         
-        # Distribución por método de extracción
-        por_metodo = queryset.values('metodo_extraccion').annotate(
-            cantidad=Count('id')
-        ).order_by('metodo_extraccion')
+        return Response({
+            'exito': True,
+            'accion': self.accion,
+            'documentos_afectados': cantidad
+        }, status=status.HTTP_200_OK)
+
+
+class DocumentoImportacionView(APIView):
+    """
+    Importación masiva de documentos con texto ya extraído (NDJSON).
+    
+    Técnicas implementadas:
+    - Cuerpo leído línea a línea desde el stream de la petición (sin
+      cargarlo completo ni pasar por los parsers de DRF)
+    - Cuerpo comprimido aceptado con Content-Encoding: gzip
+    - Validación por fila e inserción por lotes con bulk_create
+      (Services.importacion): índice, estadísticas y versión de la
+      colección actualizados una vez por lote
+    - Resumen con filas importadas, errores por línea y filas por segundo
+    
+    Parámetros:
+    - lote: filas por inserción (1 a MAX_LOTE, por defecto importacion.TAMAÑO_LOTE)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    MAX_LOTE = 5000
+    
+    def post(self, request):
+        try:
+            lote = int(request.query_params.get('lote', importacion.TAMAÑO_LOTE))
+        except ValueError:
+            lote = 0
+        if not 1 <= lote <= self.MAX_LOTE:
+            return Response(
+                {'error': f'El parámetro lote debe ser un entero entre 1 y {self.MAX_LOTE}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        cuerpo = request.stream
+        if cuerpo is None:
+            return Response({'error': 'El cuerpo NDJSON está vacío'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.META.get('HTTP_CONTENT_ENCODING', '').lower() == 'gzip':
+            cuerpo = gzip.GzipFile(fileobj=cuerpo)
         
-        # Documentos recientes (últimos 7 días)
-        from django.utils import timezone
-        from datetime import timedelta
+        try:
+            resumen = importacion.importar(cuerpo, request.user.id, tamaño_lote=lote)
+        except (OSError, EOFError) as error:
+            # gzip truncado o inválido: los lotes anteriores ya quedaron confirmados
+            return Response({'error': f'Cuerpo comprimido inválido: {error}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        fecha_limite = timezone.now() - timedelta(days=7)
-        recientes = queryset.filter(fecha_procesamiento__gte=fecha_limite).count()
+        logger.info(
+            f"Usuario {request.user.username} importó {resumen['importados']} documento(s) "
+            f"({resumen['errores']} con errores, {resumen['filas_por_segundo']} filas/s)"
+        )
         
+        codigo = status.HTTP_201_CREATED if resumen['importados'] else status.HTTP_400_BAD_REQUEST
+        return Response({'exito': bool(resumen['importados']), **resumen}, status=codigo)
+
+
+class DocumentoEstadisticasView(GetCondicionalMixin, generics.GenericAPIView):
+    """
+    Vista para obtener estadísticas de documentos del usuario.
+    
+    Técnicas implementadas:
+    - Lectura de tablas de resumen mantenidas en cada alta, eliminación y
+      restauración (una fila por método y una por día reciente)
+    - Costo constante: no agrega los documentos del usuario en cada carga
+    - Respuesta estructurada para dashboards
+    - GET condicional: 304 si la colección del usuario no cambió ese día
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        Retorna estadísticas del usuario autenticado.
+        
+        El ETag incluye la fecha local: los documentos recientes (últimos
+        7 días) cambian al pasar el día aunque no cambie ningún documento.
+        """
         logger.info(f"Usuario {request.user.username} consultó estadísticas")
         
-        return Response({
+        etag = self.etag_coleccion(request.user.id, timezone.localdate())
+        no_modificado = self.no_modificado(etag)
+        if no_modificado is not None:
+            return no_modificado
+        
+        resumen = estadisticas.resumen_usuario(request.user)
+        
+        return self.validadores(Response({
             'estadisticas_generales': {
-                'total_documentos': estadisticas['total_documentos'] or 0,
-                'total_tamaño_bytes': estadisticas['total_tamaño'] or 0,
-                'total_tamaño_legible': self._format_size(estadisticas['total_tamaño'] or 0),
-                'tiempo_promedio_procesamiento': round(estadisticas['tiempo_promedio'] or 0, 2)
+                'total_documentos': resumen['total_documentos'],
+                'total_tamaño_bytes': resumen['total_tamaño_bytes'],
+                'total_tamaño_legible': self._format_size(resumen['total_tamaño_bytes']),
+                'tiempo_promedio_procesamiento': round(resumen['tiempo_promedio_procesamiento'], 2)
             },
-            'distribucion_por_metodo': list(por_metodo),
-            'documentos_recientes_7_dias': recientes,
+            'distribucion_por_metodo': resumen['distribucion_por_metodo'],
+            'documentos_recientes_7_dias': resumen['documentos_recientes'],
             'usuario': request.user.username
-        })
+        }), etag)
     
     def _format_size(self, bytes_size):
         """Helper para formatear tamaños de archivo"""
@@ -504,4 +1308,54 @@ class DocumentoEstadisticasView(generics.GenericAPIView):
             if bytes_size < 1024.0:
                 return f"{bytes_size:.1f} {unit}"
             bytes_size /= 1024.0
-        return f"{bytes_size:.1f} TB"
\ No newline at end of file
+        return f"{bytes_size:.1f} TB"
+
+
+class DocumentoSugerenciasView(APIView):
+    """
+    Sugerencias de términos mientras se escribe una búsqueda.
+    
+    Técnicas implementadas:
+    - Diccionario de términos ordenado en memoria por usuario (o global),
+      con frecuencia de documento para ordenar las sugerencias
+    - Prefijo resuelto con búsqueda binaria: sin consultas a la base de
+      datos mientras el vocabulario no cambia
+    - Refresco incremental al agregar o eliminar documentos
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        consulta = request.query_params.get('q', '')
+        try:
+            limite = int(request.query_params.get('limite', 10))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= 50:
+            return Response(
+                {'error': "El parámetro 'limite' debe ser un entero entre 1 y 50"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        busqueda_global = request.query_params.get('global', 'false').lower() == 'true'
+        prefijo, resultado = sugerencias.sugerir(
+            consulta, usuario_id=None if busqueda_global else request.user.id, limite=limite
+        )
+        return Response({
+            'prefijo': prefijo,
+            'global': busqueda_global,
+            'sugerencias': resultado
+        })
+
+
+class MetricasView(APIView):
+    """
+    Métricas operativas del servicio (solo administradores).
+    
+    Incluye aciertos, fallos y ratio de aciertos de la caché de búsquedas.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'cache_busqueda': cache_busqueda.metricas()
+        })
@@ -94,7 +94,8 @@ class DocumentoService {
   async obtenerDocumento(documentoId, esGlobal = false) {
     try {
       const endpoint = esGlobal ? `/documentos/global/${documentoId}/` : `/documentos/${documentoId}/`;
-      const response = await axiosClient.get(endpoint);
+      // El detalle omite el texto completo salvo que se solicite explícitamente
+      const response = await axiosClient.get(endpoint, { params: { incluir_texto: true } });
       
       return {
         success: true,